@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Autocarga sin interfaz gráfica: escaneo → extracción → coincidencias → persistencia.
+Las etapas van encadenadas y la BD se escribe por lotes mientras se sigue extrayendo.
+Pensado para programarse fuera de horario (p. ej. con el Programador de tareas)
+sobre la carpeta de caché de Quiter. Escribe un reporte JSON con tiempos y conteos, y
+los tiempos por etapa en logs/autocarga_tiempos_<fecha>.json para comparar versiones.
+
+Uso:
+    python autocarga_cli.py [carpeta] [--dias 2] [--workers 4] [--dry-run] [--lote 50] [--reporte archivo.json]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Agregar el directorio raíz y src al path (igual que main.py)
+PROJECT_ROOT = Path(__file__).parent
+sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(PROJECT_ROOT / 'src'))
+
+CARPETA_POR_DEFECTO = r"C:\QuiterWeb\cache"
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """Argumentos de la línea de comandos."""
+    from src.buscarapp.autocarga.documento import BACKENDS_TEXTO, BACKEND_PDFPLUMBER
+    from src.buscarapp.autocarga.extraccion_paralela import (
+        workers_por_defecto, TIMEOUT_ARCHIVO_S, MEMORIA_MAXIMA_MB
+    )
+    from src.buscarapp.autocarga.autocarga import TAMANO_LOTE_PERSISTENCIA
+
+    parser = argparse.ArgumentParser(description="Ejecuta la autocarga de Vales y Órdenes sin interfaz")
+    parser.add_argument('carpeta', nargs='?', default=CARPETA_POR_DEFECTO,
+                        help=f"Carpeta con los PDFs (default: {CARPETA_POR_DEFECTO})")
+    parser.add_argument('--dias', type=int, default=2, help="Días hacia atrás a considerar (default: 2)")
+    parser.add_argument('--workers', type=int, default=workers_por_defecto(),
+                        help="Procesos para extraer PDFs en paralelo")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Procesar todo pero revertir los cambios en la base de datos")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Solo archivos nuevos desde la última autocarga confirmada")
+    parser.add_argument('--forzar-reextraccion', action='store_true',
+                        help="Ignorar la caché de extracciones y volver a extraer todo")
+    parser.add_argument('--backend', choices=BACKENDS_TEXTO, default=BACKEND_PDFPLUMBER,
+                        help="Backend de texto de los extractores")
+    parser.add_argument('--plantillas', action='store_true',
+                        help="Extraer los vales de las regiones de la plantilla calibrada "
+                             "(ver src/buscarapp/autocarga/plantillas_region.py); activar solo si "
+                             "benchmark_extractores --plantilla muestra que es más rápido con el backend")
+    parser.add_argument('--extraer-registrados', action='store_true',
+                        help="Extraer también los vales que ya están registrados en la base de datos")
+    parser.add_argument('--timeout-archivo', type=float, default=TIMEOUT_ARCHIVO_S,
+                        help=f"Segundos máximos por PDF antes de ponerlo en cuarentena, 0 sin límite "
+                             f"(default: {TIMEOUT_ARCHIVO_S})")
+    parser.add_argument('--memoria-max-mb', type=int, default=MEMORIA_MAXIMA_MB,
+                        help=f"Memoria máxima por proceso de extracción, 0 sin límite (default: {MEMORIA_MAXIMA_MB})")
+    parser.add_argument('--reintentar-cuarentena', action='store_true',
+                        help="Volver a intentar los PDFs en cuarentena de corridas anteriores")
+    parser.add_argument('--lote', type=int, default=TAMANO_LOTE_PERSISTENCIA,
+                        help=f"Documentos por escritura en la base de datos (default: {TAMANO_LOTE_PERSISTENCIA})")
+    parser.add_argument('--reporte', help="Archivo JSON del reporte (default: logs/autocarga_<fecha>.json)")
+    parser.add_argument('--log-level', default='INFO', help="Nivel de logging (default: INFO)")
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Ejecuta la autocarga y guarda el reporte.
+
+    Returns:
+        int: Código de salida (0 si terminó, 1 si hubo un error)
+    """
+    args = crear_parser().parse_args(argv)
+
+    from config.settings import LOGS_DIR
+    from app.utils.logger import setup_logging
+    setup_logging(args.log_level, str(LOGS_DIR / "autocarga_cli.log"))
+    logger = logging.getLogger("autocarga_cli")
+
+    from src.buscarapp.controllers.autocarga_controller import AutocargaController
+
+    config = {
+        'ruta_carpeta': args.carpeta,
+        'dias_atras': args.dias,
+        'workers': args.workers,
+        'forzar_reextraccion': args.forzar_reextraccion,
+        'backend_texto': args.backend,
+        'incremental': args.incremental,
+        'tamano_lote': args.lote,
+        'omitir_vales_registrados': not args.extraer_registrados,
+        'usar_plantillas': args.plantillas,
+        'timeout_archivo': args.timeout_archivo,
+        'memoria_maxima_mb': args.memoria_max_mb,
+        'reintentar_cuarentena': args.reintentar_cuarentena,
+    }
+    logger.info(f"⚙️ Configuración de autocarga: {config} (dry-run: {args.dry_run})")
+
+    controller = AutocargaController()
+    reporte = controller.ejecutar_autocarga_sin_interfaz(config, dry_run=args.dry_run)
+
+    ruta_reporte = Path(args.reporte) if args.reporte else (
+        Path(LOGS_DIR) / f"autocarga_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    ruta_reporte.parent.mkdir(parents=True, exist_ok=True)
+    ruta_reporte.write_text(json.dumps(reporte, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    logger.info(f"💾 Reporte guardado en {ruta_reporte}")
+
+    if not reporte['exito']:
+        logger.error(f"❌ Autocarga con error: {reporte.get('error')}")
+        return 1
+
+    contadores = reporte['contadores']
+    logger.info(
+        f"✅ Autocarga terminada en {reporte['tiempos_s']['total']:.1f} s - "
+        f"vales creados: {contadores.get('vales_creados', 0)}, "
+        f"órdenes creadas: {contadores.get('ordenes_creadas', 0)}, "
+        f"errores: {contadores.get('errores', 0)}, "
+        f"en cuarentena: {len(reporte.get('archivos_en_cuarentena', []))}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -143,11 +143,21 @@ class UIConfig:
     min_window_size: tuple = (800, 600)
     sidebar_width_expanded: int = 200
     sidebar_width_collapsed: int = 60
+    # Búsqueda de facturas filtrada y paginada en la base de datos (para tablas grandes)
+    server_side_search: bool = False
+    search_page_size: int = 500
+    # Búsqueda mientras se escribe en el campo "Buscar" (solo con las facturas en memoria)
+    live_search: bool = True
+    live_search_delay_ms: int = 250
     
     def __post_init__(self):
         """Configurar UI usando el archivo JSON."""
         # Cargar tema desde configuración JSON, con fallback a 'cosmo'
         self.theme = _json_config.get("theme", "cosmo")
+        self.server_side_search = bool(_json_config.get("server_side_search", self.server_side_search))
+        self.search_page_size = int(_json_config.get("search_page_size", self.search_page_size))
+        self.live_search = bool(_json_config.get("live_search", self.live_search))
+        self.live_search_delay_ms = int(_json_config.get("live_search_delay_ms", self.live_search_delay_ms))
 
 @dataclass
 class BusinessConfig:
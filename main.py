@@ -4,6 +4,7 @@ Punto de entrada principal de la aplicación TCM Matehuala.
 import sys
 import os
 import logging
+import multiprocessing
 from pathlib import Path
 
 # Agregar el directorio raíz y src al path
@@ -124,4 +125,6 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos de la autocarga en el ejecutable empaquetado
+    multiprocessing.freeze_support()
     main()
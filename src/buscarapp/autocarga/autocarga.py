@@ -30,15 +30,38 @@ Clase principal que combina todas las funcionalidades para:
 
 import os
 import json
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple, Any, Optional
 
 # Importar nuestros extractores
 from .extractor import PDFDataExtractor
 from .extractor_orden import OrdenDataExtractor
-from .lector_carpeta import buscar_vales_y_ordenes_recientes
-from .provider_matcher import ProviderMatcher
+from .lector_carpeta import escanear_vales_y_ordenes, RegistroEscaneos
+from .provider_matcher import ProviderMatcher, CoincidenciasProveedores
+from .extraccion_paralela import (
+    ExtraccionParalela, TIPO_VALE, TIPO_ORDEN, TIPO_SONDEO_VALE, TIMEOUT_ARCHIVO_S, MEMORIA_MAXIMA_MB
+)
+from .cache_extraccion import CacheExtraccion, VERSION_EXTRACTORES
+from .documento import BACKEND_PDFPLUMBER, validar_backend
+from .huella_archivo import obtener_huella, deduplicar_por_contenido
+from .bitacora_corrida import BitacoraCorrida, llave_archivo
+from .plantillas_region import cargar_plantillas
+from .cuarentena import RegistroCuarentena
+from .tiempos_etapas import TiemposEtapas, formatear_resumen, ETAPA_ESCANEO, ETAPA_DEDUPLICACION
+
+# Documentos por lote entregado por iterar_autocarga (y escrito en la BD de una vez)
+TAMANO_LOTE_PERSISTENCIA = 50
+
+# Segundos de espera en la cola entre extracción y lotes antes de revisar si hay que
+# detenerse (y de llamar a al_esperar, p. ej. para atender la ventana de progreso)
+ESPERA_COLA_S = 0.1
+
+# Segundos máximos que se espera al hilo de extracción al cerrar iterar_autocarga
+ESPERA_FIN_EXTRACCION_S = 10.0
 
 
 class AutoCarga:
@@ -47,24 +70,92 @@ class AutoCarga:
     Maneja tanto Vales (QRSVCMX) como Órdenes (QRSOPMX208).
     """
     
-    def __init__(self, ruta_carpeta: str = r"C:\QuiterWeb\cache", dias_atras: int = 2):
+    def __init__(self, ruta_carpeta: str = r"C:\QuiterWeb\cache", dias_atras: int = 2, workers: int = 1,
+                 usar_cache: bool = True, forzar_reextraccion: bool = False,
+                 backend_texto: str = BACKEND_PDFPLUMBER, incremental: bool = False,
+                 reanudable: bool = False, deduplicar: bool = True,
+                 filtro_vales_registrados: Optional[Callable[[Iterable[str]], Set[str]]] = None,
+                 usar_plantillas: bool = False, timeout_archivo: Optional[float] = TIMEOUT_ARCHIVO_S,
+                 memoria_maxima_mb: Optional[int] = MEMORIA_MAXIMA_MB, reintentar_cuarentena: bool = False):
         """
         Inicializa el sistema de autocarga.
         
         Args:
             ruta_carpeta (str): Ruta donde buscar los archivos PDF
             dias_atras (int): Cuántos días atrás buscar archivos (default: 2)
+            workers (int): Procesos para extraer PDFs en paralelo (default: 1, secuencial)
+            usar_cache (bool): Reutilizar extracciones guardadas de archivos sin cambios
+            forzar_reextraccion (bool): Ignorar la caché y volver a extraer todo (la caché se actualiza)
+            backend_texto (str): Backend de texto de los extractores: 'pdfplumber' (default) o 'pdfium'
+            incremental (bool): Solo buscar archivos modificados después de la última autocarga
+                confirmada (ver confirmar_escaneo). Un archivo copiado conservando una fecha
+                anterior a esa marca no se detecta; desactivar para un escaneo completo.
+            reanudable (bool): Llevar una bitácora de la corrida (archivos extraídos, su
+                duración y los ya guardados en la BD) para que, si se interrumpe, la
+                siguiente corrida sobre la carpeta omita los archivos terminados
+            deduplicar (bool): Omitir antes de extraer los archivos con el mismo contenido
+                que otro de la corrida (Quiter regenera documentos con otro nombre)
+            filtro_vales_registrados: Función que recibe números de vale y devuelve los que
+                ya no hace falta procesar (p. ej. persistencia_lote.vales_registrados). Si se
+                indica, antes de extraer se sondea el número de cada vale (nombre del archivo,
+                caché o primera página) y se omiten esos vales
+            usar_plantillas (bool): Extraer los vales de las regiones de la plantilla
+                calibrada (ver plantillas_region), con el texto completo como respaldo.
+                Desactivado por defecto: la ganancia depende del backend y de que la
+                plantilla cubra todos los campos (ver benchmark_extractores --plantilla)
+            timeout_archivo (float): Segundos máximos de extracción por archivo (None: sin límite)
+            memoria_maxima_mb (int): Memoria máxima de cada proceso de extracción (None: sin
+                límite). Con cualquiera de los dos límites la extracción se hace en procesos
+                aislados; el archivo que los supera queda en cuarentena y la corrida sigue
+            reintentar_cuarentena (bool): Volver a intentar los archivos en cuarentena de
+                corridas anteriores (por defecto se omiten mientras no cambien)
         """
         self.ruta_carpeta = ruta_carpeta
         self.dias_atras = dias_atras
+        self.workers = max(1, int(workers or 1))
+        self.usar_cache = usar_cache
+        self.forzar_reextraccion = forzar_reextraccion
+        self.backend_texto = validar_backend(backend_texto)
+        self.incremental = incremental
+        self.cache = None
+        self.registro_escaneos = RegistroEscaneos() if incremental else None
+        self._marca_pendiente = None
+        self.bitacora = BitacoraCorrida() if reanudable else None
+        self.deduplicar = deduplicar
+        self.filtro_vales_registrados = filtro_vales_registrados
+        self.timeout_archivo = timeout_archivo
+        self.memoria_maxima_mb = memoria_maxima_mb
+        self.reintentar_cuarentena = reintentar_cuarentena
+        self.registro_cuarentena = None
+        # Rutas puestas u omitidas por cuarentena en la corrida
+        self._en_cuarentena: Set[str] = set()
+        # Huellas ya calculadas al deduplicar, para no volver a leer esos archivos
+        self._huellas: Dict[str, Any] = {}
+        # Ruta de cada documento entregado y aún no guardado en la BD, por (tipo, id)
+        self._rutas_documentos: Dict[Tuple[str, str], str] = {}
+        # Duración de cada etapa de la corrida (ver obtener_estadisticas)
+        self.tiempos = TiemposEtapas()
+        
+        # Evento para cancelar la extracción desde la interfaz
+        self.cancelar_evento = threading.Event()
+        
+        # Plantilla de regiones de los vales (modo plantilla)
+        self.plantilla_vales = None
+        if usar_plantillas:
+            self.plantilla_vales = cargar_plantillas().get(TIPO_VALE)
+            if self.plantilla_vales is None:
+                print("⚠️ No hay plantilla de vales calibrada, se usará la extracción completa")
         
         # Inicializar extractores
-        self.extractor_vales = PDFDataExtractor()
-        self.extractor_ordenes = OrdenDataExtractor()
+        self.extractor_vales = PDFDataExtractor(backend_texto=self.backend_texto, plantilla=self.plantilla_vales)
+        self.extractor_ordenes = OrdenDataExtractor(backend_texto=self.backend_texto)
         
         # Inicializar matcher de proveedores
         self.provider_matcher = ProviderMatcher()
         
+        # Proveedor resuelto por documento durante la corrida (se consulta una sola vez)
+        self.coincidencias = CoincidenciasProveedores(self.provider_matcher)
+        
         # Diccionarios de resultados
         self.vales = {}
         self.ordenes = {}
@@ -79,6 +170,13 @@ class AutoCarga:
             'ordenes_exitosas': 0,
             'errores_vales': 0,
             'errores_ordenes': 0,
+            'desde_cache': 0,
+            'escaneo_incremental': incremental,
+            'reanudados': 0,
+            'duplicados_omitidos': 0,
+            'vales_ya_registrados': 0,
+            'cuarentena': [],
+            'cancelado': False,
             'timestamp': None
         }
     
@@ -94,14 +192,32 @@ class AutoCarga:
         # logging.info("-" * 60)
         
         try:
-            tupla_vales, tupla_ordenes = buscar_vales_y_ordenes_recientes(
-                ruta_carpeta=self.ruta_carpeta,
-                dias=self.dias_atras
-            )
+            marca_anterior = None
+            if self.registro_escaneos is not None:
+                marca_anterior = self.registro_escaneos.obtener(self.ruta_carpeta)
+                if marca_anterior is not None:
+                    print("🔖 Escaneo incremental: solo archivos nuevos desde la última autocarga")
+            
+            with self.tiempos.medir(ETAPA_ESCANEO):
+                resultado = escanear_vales_y_ordenes(
+                    ruta_carpeta=self.ruta_carpeta,
+                    dias=self.dias_atras,
+                    desde=marca_anterior
+                )
+            self._marca_pendiente = resultado.marca
             
-            # Convertir tuplas a listas
-            lista_vales = list(tupla_vales)
-            lista_ordenes = list(tupla_ordenes)
+            lista_vales = list(resultado.vales)
+            lista_ordenes = list(resultado.ordenes)
+            
+            # Copias del mismo documento con otro nombre: se extrae solo la primera
+            self._huellas = {}
+            self.stats['duplicados_omitidos'] = 0
+            if self.deduplicar:
+                with self.tiempos.medir(ETAPA_DEDUPLICACION):
+                    lista_vales = self._quitar_duplicados(lista_vales)
+                    lista_ordenes = self._quitar_duplicados(lista_ordenes)
+                if self.stats['duplicados_omitidos']:
+                    print(f"🧬 {self.stats['duplicados_omitidos']} archivo(s) duplicado(s) omitido(s)")
             
             self.stats['vales_encontrados'] = len(lista_vales)
             self.stats['ordenes_encontradas'] = len(lista_ordenes)
@@ -116,6 +232,16 @@ class AutoCarga:
             print(f"❌ Error al buscar archivos: {e}")
             return [], []
     
+    def _quitar_duplicados(self, archivos: List[str]) -> List[str]:
+        """
+        Quita los archivos con el mismo contenido que uno anterior de la lista
+        (ver deduplicar_por_contenido) y suma los omitidos a las estadísticas.
+        """
+        unicos, duplicados, huellas = deduplicar_por_contenido(archivos)
+        self._huellas.update(huellas)
+        self.stats['duplicados_omitidos'] += len(duplicados)
+        return unicos
+    
     def procesar_vales(self, lista_vales: List[str]) -> Dict[str, Any]:
         """
         Procesa todos los archivos de Vales y crea el diccionario correspondiente.
@@ -126,52 +252,9 @@ class AutoCarga:
         Returns:
             Dict[str, Any]: Diccionario con datos de Vales procesados
         """
-        # logging.info("🚀 PROCESANDO VALES")
-        # logging.info("=" * 40)
-        
-        vales_dict = {}
-        procesados = 0
-        exitosos = 0
-        errores = 0
-        
-        for i, archivo_vale in enumerate(lista_vales, 1):
-            try:
-                nombre_archivo = Path(archivo_vale).name
-                # logging.info(f"📄 {i}/{len(lista_vales)} Procesando: {nombre_archivo}")
-                
-                # Extraer datos del Vale
-                datos = self.extractor_vales.extract_all_data(archivo_vale)
-                
-                if datos and any(datos.values()):
-                    # Crear clave única basada en el nombre del archivo
-                    clave = Path(archivo_vale).stem
-                    vales_dict[clave] = datos
-                    exitosos += 1
-                    # logging.info(f"   ✅ Datos extraídos exitosamente")
-                    # logging.info(f"   🔢 Número: {datos.get('Numero', 'N/A')}")
-                    # logging.info(f"   🏢 Nombre: {datos.get('Nombre', 'N/A')}")
-                    # logging.info(f"   💰 Total: {datos.get('Total', 'N/A')}")
-                    # logging.info(f"   📝 Descripción: {datos.get('Descripcion', 'N/A')}")
-                else:
-                    errores += 1
-                    # logging.info(f"   ❌ No se pudieron extraer datos")
-                
-                procesados += 1
-                
-            except Exception as e:
-                errores += 1
-                # logging.info(f"   ❌ Error al procesar: {str(e)}")
-        
-        # Actualizar estadísticas
-        self.stats['vales_procesados'] = procesados
-        self.stats['vales_exitosos'] = exitosos
-        self.stats['errores_vales'] = errores
-        
-        # logging.info("\n" + "=" * 40)
-        # logging.info(f"📊 RESUMEN VALES: {exitosos}/{procesados} exitosos")
-        # logging.info("=" * 40)
-        
-        return vales_dict
+        tareas = [(TIPO_VALE, archivo) for archivo in lista_vales]
+        resultados = self._extraer_documentos(tareas)
+        return self._armar_diccionario(lista_vales, resultados, 'vales')
     
     def procesar_ordenes(self, lista_ordenes: List[str]) -> Dict[str, Any]:
         """
@@ -183,49 +266,12 @@ class AutoCarga:
         Returns:
             Dict[str, Any]: Diccionario con datos de Órdenes procesadas
         """
-        # logging.info("🚀 PROCESANDO ÓRDENES")
-        # logging.info("=" * 40)
-        
-        ordenes_dict = {}
-        procesados = 0
-        exitosos = 0
-        errores = 0
-        
-        for i, archivo_orden in enumerate(lista_ordenes, 1):
-            try:
-                nombre_archivo = Path(archivo_orden).name
-                # logging.info(f"📄 {i}/{len(lista_ordenes)} Procesando: {nombre_archivo}")
-                
-                # Extraer datos de la Orden
-                datos = self.extractor_ordenes.extract_all_data(archivo_orden)
-                
-                if datos and any(datos.values()):
-                    # Crear clave única basada en el nombre del archivo
-                    clave = Path(archivo_orden).stem
-                    ordenes_dict[clave] = datos
-                    exitosos += 1
-                    # logging.info(f"   ✅ Datos extraídos exitosamente")
-                    # logging.info(f"   📋 Ref. Movimiento: {datos.get('Ref_Movimiento', 'N/A')}")
-                    # logging.info(f"   🏢 Nombre: {datos.get('Nombre', 'N/A')}")
-                    # logging.info(f"   💰 Importe: {datos.get('Importe', 'N/A')}")
-                    # logging.info(f"   🏛️ Banco: {datos.get('Codigo_Banco', 'N/A')}")
-                else:
-                    errores += 1
-                    # logging.info(f"   ❌ No se pudieron extraer datos")
-                
-                procesados += 1
-                
-            except Exception as e:
-                errores += 1
-                # logging.info(f"   ❌ Error al procesar: {str(e)}")
-        
-        # Actualizar estadísticas
-        self.stats['ordenes_procesadas'] = procesados
-        self.stats['ordenes_exitosas'] = exitosos
-        self.stats['errores_ordenes'] = errores
+        tareas = [(TIPO_ORDEN, archivo) for archivo in lista_ordenes]
+        resultados = self._extraer_documentos(tareas)
+        ordenes_dict = self._armar_diccionario(lista_ordenes, resultados, 'ordenes')
         
         print("\n" + "=" * 40)
-        print(f"📊 RESUMEN ÓRDENES: {exitosos}/{procesados} exitosos")
+        print(f"📊 RESUMEN ÓRDENES: {self.stats['ordenes_exitosas']}/{self.stats['ordenes_procesadas']} exitosos")
         print("=" * 40)
         
         return ordenes_dict
@@ -234,76 +280,598 @@ class AutoCarga:
         """
         Ejecuta el proceso completo de autocarga.
         
+        Args:
+            progress_callback: Función (procesados, total) llamada al conocer el total de
+                archivos por extraer (procesados = 0) y tras extraer cada uno
+        
         Returns:
             Tuple[Dict[str, Any], Dict[str, Any]]: (diccionario_vales, diccionario_ordenes)
         """
-        print("🚀 SISTEMA DE AUTOCARGA - INICIO")
-        print("=" * 60)
+        try:
+            print("🚀 SISTEMA DE AUTOCARGA - INICIO")
+            print("=" * 60)
+        
+            # Registrar timestamp
+            self.stats['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Registrar timestamp
-        self.stats['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # Nueva corrida: los proveedores se vuelven a resolver con datos frescos
+            self._iniciar_corrida()
         
-        # 1. Buscar archivos
-        lista_vales, lista_ordenes = self.buscar_archivos()
+            # 1. Buscar archivos (sin los ya terminados si se reanuda una corrida interrumpida
+            # ni los vales que ya están en la BD)
+            lista_vales, lista_ordenes = self._omitir_en_cuarentena(*self._omitir_terminados(*self.buscar_archivos()))
+            lista_vales = self._omitir_vales_registrados(lista_vales)
 
-        total_archivos = len(lista_vales) + len(lista_ordenes)
-        idx = 0
+            # 2. Extraer Vales y Órdenes (en paralelo si hay más de un worker)
+            tareas = [(TIPO_VALE, archivo) for archivo in lista_vales]
+            tareas += [(TIPO_ORDEN, archivo) for archivo in lista_ordenes]
 
-        # 2. Procesar Vales
-        if lista_vales:
-            vales_dict = {}
-            for i, archivo_vale in enumerate(lista_vales, 1):
-                try:
-                    nombre_archivo = Path(archivo_vale).name
-                    print(f"📄 {i}/{len(lista_vales)} Procesando: {nombre_archivo}")
-                    datos = self.extractor_vales.extract_all_data(archivo_vale)
-                    if datos and any(datos.values()):
-                        clave = Path(archivo_vale).stem
-                        vales_dict[clave] = datos
-                        print(f"   ✅ Datos extraídos exitosamente")
-                    else:
-                        print(f"   ❌ No se pudieron extraer datos")
-                except Exception as e:
-                    print(f"   ❌ Error al procesar: {str(e)}")
-                idx += 1
-                if progress_callback:
-                    progress_callback(idx, total_archivos)
-            self.vales = vales_dict
-        else:
-            print("💳 No se encontraron Vales para procesar")
+            resultados = self._extraer_documentos(tareas, progress_callback=progress_callback)
+
+            resultados_vales = resultados[:len(lista_vales)]
+            resultados_ordenes = resultados[len(lista_vales):]
+
+            # 3. Armar diccionarios de resultados
+            if lista_vales:
+                self.vales = self._armar_diccionario(lista_vales, resultados_vales, 'vales')
+            else:
+                print("💳 No se encontraron Vales para procesar")
+
+            print()  # Línea en blanco
 
-        print()  # Línea en blanco
+            if lista_ordenes:
+                self.ordenes = self._armar_diccionario(lista_ordenes, resultados_ordenes, 'ordenes')
+            else:
+                print("📋 No se encontraron Órdenes para procesar")
 
-        # 3. Procesar Órdenes
-        if lista_ordenes:
-            ordenes_dict = {}
-            for i, archivo_orden in enumerate(lista_ordenes, 1):
+            if self.cancelar_evento.is_set():
+                self.stats['cancelado'] = True
+                print("🚫 Extracción cancelada por el usuario")
+
+            # 4. Solo guardar estadísticas sin mostrar reportes adicionales
+            # self.mostrar_resumen_final()  # Comentado para evitar reportes duplicados
+
+            # 5. Solo obtener estadísticas sin mostrar reportes en consola
+            # self.provider_matcher.print_matching_report(self.vales, self.ordenes)  # Comentado para evitar reportes duplicados
+
+            return self.vales, self.ordenes
+        finally:
+            # La conexión de la caché no queda abierta entre corridas
+            self.cerrar_cache()
+    
+    def _obtener_cache(self) -> Optional[CacheExtraccion]:
+        """
+        Abre la caché de extracciones la primera vez que se necesita.
+        Si no se puede abrir, la autocarga continúa sin caché.
+        """
+        if self.usar_cache and self.cache is None:
+            # Cada backend produce sus propios resultados, así que no comparten entradas
+            version = VERSION_EXTRACTORES
+            if self.backend_texto != BACKEND_PDFPLUMBER:
+                version = f"{VERSION_EXTRACTORES}+{self.backend_texto}"
+            if self.plantilla_vales is not None:
+                # Con otra calibración las regiones cambian y lo guardado ya no aplica
+                version += f"+plantilla-{self.plantilla_vales.huella()}"
+            try:
+                self.cache = CacheExtraccion(version=version)
+            except Exception as e:
+                print(f"⚠️ No se pudo abrir la caché de extracciones: {e}")
+                self.usar_cache = False
+        return self.cache
+    
+    def cerrar_cache(self):
+        """
+        Cierra la conexión con la caché de extracciones al terminar (o fallar) una
+        corrida; la siguiente la vuelve a abrir con _obtener_cache.
+        """
+        if self.cache is None:
+            return
+        try:
+            self.cache.cerrar()
+        except Exception as e:
+            print(f"⚠️ No se pudo cerrar la caché de extracciones: {e}")
+        self.cache = None
+    
+    def _iniciar_corrida(self):
+        """Olvida lo resuelto en la corrida anterior."""
+        self.coincidencias.limpiar()
+        self.provider_matcher.invalidar_indice()
+        self.stats.pop('provider_matching', None)
+        self.stats['cuarentena'] = []
+        self.stats['desde_cache'] = 0
+        self._en_cuarentena.clear()
+        self._rutas_documentos.clear()
+        self.tiempos.limpiar()
+    
+    def _omitir_terminados(self, lista_vales: List[str], lista_ordenes: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Inicia la bitácora de la corrida y, si se reanuda una corrida interrumpida,
+        quita los archivos que ya quedaron terminados en ella.
+        """
+        if self.bitacora is None:
+            return lista_vales, lista_ordenes
+        try:
+            terminados = self.bitacora.iniciar(self.ruta_carpeta, lista_vales + lista_ordenes)
+        except OSError as e:
+            print(f"⚠️ No se pudo abrir la bitácora de la corrida: {e}")
+            self.bitacora = None
+            return lista_vales, lista_ordenes
+        if not terminados:
+            return lista_vales, lista_ordenes
+        vales = [ruta for ruta in lista_vales if llave_archivo(ruta) not in terminados]
+        ordenes = [ruta for ruta in lista_ordenes if llave_archivo(ruta) not in terminados]
+        self.stats['reanudados'] = len(lista_vales) + len(lista_ordenes) - len(vales) - len(ordenes)
+        return vales, ordenes
+    
+    def _omitir_vales_registrados(self, lista_vales: List[str],
+                                  al_esperar: Optional[Callable[[], None]] = None) -> List[str]:
+        """
+        Sondea el número de cada vale sin extraerlo completo y quita los que el
+        filtro_vales_registrados reporta (una sola consulta para toda la corrida).
+        Si el sondeo o la consulta fallan, el vale se extrae como siempre.
+        al_esperar se llama tras sondear cada archivo (ver iterar_autocarga).
+        """
+        self.stats['vales_ya_registrados'] = 0
+        if self.filtro_vales_registrados is None or not lista_vales:
+            return lista_vales
+        
+        numeros = {}
+        por_sondear = []
+        for ruta in lista_vales:
+            numero = self._numero_vale_en_cache(ruta)
+            if numero:
+                numeros[ruta] = numero
+            else:
+                por_sondear.append(ruta)
+        
+        # El sondeo lee PDFs, así que va por el mismo motor (y el mismo aislamiento) que la extracción
+        motor = self._crear_motor()
+        for idx, (numero, error), _segundos in motor.iterar(
+                [(TIPO_SONDEO_VALE, ruta) for ruta in por_sondear], cancel_event=self.cancelar_evento):
+            if error:
+                print(f"⚠️ No se pudo sondear {Path(por_sondear[idx]).name}: {error}")
+            elif numero:
+                numeros[por_sondear[idx]] = numero
+            if al_esperar:
+                al_esperar()
+        if self.cancelar_evento.is_set():
+            return lista_vales
+        lista_vales = [ruta for ruta in lista_vales if ruta not in self._en_cuarentena]
+        if not numeros:
+            return lista_vales
+        
+        try:
+            registrados = self.filtro_vales_registrados(set(numeros.values()))
+        except Exception as e:
+            print(f"⚠️ No se pudieron consultar los vales registrados: {e}")
+            return lista_vales
+        
+        pendientes = [ruta for ruta in lista_vales if numeros.get(ruta) not in registrados]
+        self.stats['vales_ya_registrados'] = len(lista_vales) - len(pendientes)
+        if self.stats['vales_ya_registrados']:
+            print(f"🗃️ {self.stats['vales_ya_registrados']} vale(s) ya registrado(s) en la BD, no se extraen")
+        return pendientes
+    
+    def _numero_vale_en_cache(self, ruta: str) -> Optional[str]:
+        """
+        Número de un vale ya extraído antes según la caché (la huella queda guardada
+        para la extracción). Los demás se sondean con PDFDataExtractor.sondear_numero.
+        """
+        cache = self._obtener_cache()
+        if cache is not None and not self.forzar_reextraccion:
+            try:
+                huella = self._huellas.get(ruta) or obtener_huella(ruta)
+            except OSError:
+                huella = None
+            if huella is not None:
+                self._huellas[ruta] = huella
+                datos = cache.obtener(TIPO_VALE, huella)
+                if datos and datos.get('Numero'):
+                    return datos['Numero']
+        return None
+    
+    def _crear_motor(self) -> ExtraccionParalela:
+        """Motor de extracción con los workers, el backend y los límites de la corrida."""
+        return ExtraccionParalela(
+            workers=self.workers,
+            extractores={TIPO_VALE: self.extractor_vales, TIPO_ORDEN: self.extractor_ordenes},
+            backend_texto=self.backend_texto,
+            timeout_archivo=self.timeout_archivo,
+            memoria_maxima_mb=self.memoria_maxima_mb,
+            al_poner_en_cuarentena=self._poner_en_cuarentena,
+            tiempos=self.tiempos
+        )
+    
+    def _obtener_registro_cuarentena(self) -> Optional[RegistroCuarentena]:
+        """Abre el registro de cuarentena la primera vez que se necesita."""
+        if self.registro_cuarentena is None:
+            try:
+                self.registro_cuarentena = RegistroCuarentena()
+            except Exception as e:
+                print(f"⚠️ No se pudo abrir el registro de cuarentena: {e}")
+        return self.registro_cuarentena
+    
+    def _poner_en_cuarentena(self, tipo: str, ruta: str, motivo: str):
+        """Registra un archivo que colgó o agotó su proceso de extracción."""
+        tipo = TIPO_VALE if tipo == TIPO_SONDEO_VALE else tipo
+        self._en_cuarentena.add(ruta)
+        self.stats['cuarentena'].append({'archivo': ruta, 'tipo': tipo, 'motivo': motivo, 'nuevo': True})
+        registro = self._obtener_registro_cuarentena()
+        if registro is not None:
+            try:
+                registro.agregar(tipo, ruta, motivo)
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el registro de cuarentena: {e}")
+    
+    def _omitir_en_cuarentena(self, lista_vales: List[str], lista_ordenes: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Quita los archivos que quedaron en cuarentena en corridas anteriores y no han
+        cambiado desde entonces (salvo con reintentar_cuarentena).
+        """
+        if self.reintentar_cuarentena:
+            return lista_vales, lista_ordenes
+        registro = self._obtener_registro_cuarentena()
+        if registro is None or not registro.entradas():
+            return lista_vales, lista_ordenes
+        
+        def filtrar(rutas, tipo):
+            pendientes = []
+            for ruta in rutas:
+                motivo = registro.motivo(ruta)
+                if motivo is None:
+                    pendientes.append(ruta)
+                    continue
+                self._en_cuarentena.add(ruta)
+                self.stats['cuarentena'].append({'archivo': ruta, 'tipo': tipo, 'motivo': motivo, 'nuevo': False})
+            return pendientes
+        
+        vales, ordenes = filtrar(lista_vales, TIPO_VALE), filtrar(lista_ordenes, TIPO_ORDEN)
+        omitidos = len(lista_vales) + len(lista_ordenes) - len(vales) - len(ordenes)
+        if omitidos:
+            print(f"🚧 {omitidos} archivo(s) en cuarentena omitido(s) (sin cambios desde que fallaron)")
+        return vales, ordenes
+    
+    def confirmar_persistidos(self, vales: Dict[str, Any], ordenes: Dict[str, Any]):
+        """
+        Punto de control de la bitácora: estos documentos ya quedaron guardados en la BD.
+        
+        Args:
+            vales (Dict): Vales guardados (mismas llaves que los entregados)
+            ordenes (Dict): Órdenes guardadas
+        """
+        rutas = [self._rutas_documentos.pop((TIPO_VALE, vale_id), None) for vale_id in vales]
+        rutas += [self._rutas_documentos.pop((TIPO_ORDEN, orden_id), None) for orden_id in ordenes]
+        if self.bitacora is not None:
+            try:
+                self.bitacora.persistido(ruta for ruta in rutas if ruta)
+            except OSError as e:
+                print(f"⚠️ No se pudo escribir en la bitácora de la corrida: {e}")
+    
+    def iterar_autocarga(self, tamano_lote: int = TAMANO_LOTE_PERSISTENCIA, progress_callback=None,
+                         al_esperar: Optional[Callable[[], None]] = None
+                         ) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Ejecuta la autocarga por etapas encadenadas y entrega los resultados por lotes,
+        para escribirlos en la BD mientras se sigue extrayendo:
+        
+            búsqueda → extracción (hilo productor, cola acotada) → coincidencias → lotes
+        
+        Ni los diccionarios completos ni los resultados pendientes se acumulan: la cola
+        detiene la extracción si quien consume (p. ej. la BD) va más lento, así que la
+        memoria no crece con el número de PDFs del período. self.vales y self.ordenes
+        quedan vacíos; las estadísticas de coincidencias se acumulan lote por lote.
+        
+        Args:
+            tamano_lote (int): Documentos extraídos con éxito por lote
+            progress_callback: Función (procesados, total) llamada al conocer el total de
+                archivos por extraer (procesados = 0) y tras cada archivo
+            al_esperar: Función llamada en el hilo que consume mientras espera el
+                sondeo o la extracción (p. ej. para procesar los eventos de la ventana
+                de progreso cuando se consume desde el hilo de la interfaz)
+            
+        Yields:
+            Tuple[Dict, Dict]: (vales_del_lote, ordenes_del_lote) con el mismo formato
+            que devuelve ejecutar_autocarga
+        """
+        try:
+            print("🚀 SISTEMA DE AUTOCARGA - INICIO (por lotes)")
+            print("=" * 60)
+        
+            self.stats['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self._iniciar_corrida()
+            self.vales = {}
+            self.ordenes = {}
+        
+            lista_vales, lista_ordenes = self._omitir_en_cuarentena(*self._omitir_terminados(*self.buscar_archivos()))
+            lista_vales = self._omitir_vales_registrados(lista_vales, al_esperar=al_esperar)
+            tareas = [(TIPO_VALE, archivo) for archivo in lista_vales]
+            tareas += [(TIPO_ORDEN, archivo) for archivo in lista_ordenes]
+            if progress_callback:
+                # Total ya sin registrados, en cuarentena ni terminados: la barra llega al 100%
+                progress_callback(0, len(tareas))
+            if not tareas:
+                print("📂 No se encontraron Vales ni Órdenes para procesar")
+                return
+        
+            tamano_lote = max(1, int(tamano_lote or 1))
+            cola = queue.Queue(maxsize=tamano_lote * 2)
+            detener = threading.Event()
+            fin = object()
+        
+            def poner(elemento) -> bool:
+                # Si quien consume se detuvo, no quedarse bloqueado en la cola llena
+                while not detener.is_set():
+                    try:
+                        cola.put(elemento, timeout=ESPERA_COLA_S)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+        
+            def productor():
                 try:
-                    nombre_archivo = Path(archivo_orden).name
-                    print(f"📄 {i}/{len(lista_ordenes)} Procesando: {nombre_archivo}")
-                    datos = self.extractor_ordenes.extract_all_data(archivo_orden)
-                    if datos and any(datos.values()):
-                        clave = Path(archivo_orden).stem
-                        ordenes_dict[clave] = datos
+                    for resultado in self._iterar_extracciones(tareas, detener):
+                        if not poner(resultado):
+                            return
+                    poner(fin)
+                except BaseException as e:
+                    poner(e)
+        
+            hilo = threading.Thread(target=productor, name="autocarga-extraccion", daemon=True)
+            hilo.start()
+        
+            contadores = {tipo: {'procesados': 0, 'exitosos': 0, 'errores': 0} for tipo in (TIPO_VALE, TIPO_ORDEN)}
+            coincidencias = self.provider_matcher.crear_stats_coincidencias()
+            vales_lote, ordenes_lote = {}, {}
+            procesados = 0
+        
+            try:
+                while True:
+                    try:
+                        elemento = cola.get(timeout=ESPERA_COLA_S)
+                    except queue.Empty:
+                        if al_esperar:
+                            al_esperar()
+                        if self.cancelar_evento.is_set():
+                            detener.set()
+                        # Tras detenerse, el productor ya no avisa el fin; si terminó, ya no llegará nada
+                        if detener.is_set() or (not hilo.is_alive() and cola.empty()):
+                            break
+                        continue
+                    if elemento is fin:
+                        break
+                    if isinstance(elemento, BaseException):
+                        raise elemento
+                
+                    idx, datos, error, _segundos = elemento
+                    tipo, archivo = tareas[idx]
+                    procesados += 1
+                    contador = contadores[tipo]
+                    contador['procesados'] += 1
+                    print(f"📄 {procesados}/{len(tareas)} Procesando: {Path(archivo).name}")
+                    if error:
+                        contador['errores'] += 1
+                        print(f"   ❌ Error al procesar: {error}")
+                    elif datos and any(datos.values()):
+                        contador['exitosos'] += 1
                         print(f"   ✅ Datos extraídos exitosamente")
+                        documento_id = Path(archivo).stem
+                        self._rutas_documentos[(tipo, documento_id)] = archivo
+                        if tipo == TIPO_VALE:
+                            vales_lote[documento_id] = datos
+                        else:
+                            ordenes_lote[documento_id] = datos
                     else:
+                        contador['errores'] += 1
                         print(f"   ❌ No se pudieron extraer datos")
-                except Exception as e:
-                    print(f"   ❌ Error al procesar: {str(e)}")
-                idx += 1
-                if progress_callback:
-                    progress_callback(idx, total_archivos)
-            self.ordenes = ordenes_dict
+                    if progress_callback:
+                        progress_callback(procesados, len(tareas))
+                
+                    if len(vales_lote) + len(ordenes_lote) >= tamano_lote:
+                        self._cerrar_lote(vales_lote, ordenes_lote, contadores, coincidencias)
+                        yield vales_lote, ordenes_lote
+                        vales_lote, ordenes_lote = {}, {}
+                
+                    if self.cancelar_evento.is_set():
+                        detener.set()
+            
+                if vales_lote or ordenes_lote:
+                    self._cerrar_lote(vales_lote, ordenes_lote, contadores, coincidencias)
+                    yield vales_lote, ordenes_lote
+                else:
+                    self._cerrar_lote({}, {}, contadores, coincidencias)
+            finally:
+                detener.set()
+                inicio_cierre = time.monotonic()
+                # Vaciar la cola libera al productor si quedó esperando lugar en ella
+                while hilo.is_alive():
+                    try:
+                        while True:
+                            cola.get_nowait()
+                    except queue.Empty:
+                        pass
+                    hilo.join(timeout=ESPERA_COLA_S)
+                    if time.monotonic() - inicio_cierre > ESPERA_FIN_EXTRACCION_S:
+                        print("⚠️ La extracción no se detuvo a tiempo; el hilo terminará en segundo plano")
+                        break
+                if self.cancelar_evento.is_set():
+                    self.stats['cancelado'] = True
+                    print("🚫 Extracción cancelada por el usuario")
+        finally:
+            # La conexión de la caché no queda abierta entre corridas
+            self.cerrar_cache()
+    
+    def _cerrar_lote(self, vales_lote: Dict[str, Any], ordenes_lote: Dict[str, Any],
+                     contadores: Dict[str, Dict[str, int]], coincidencias: Dict[str, Any]):
+        """Actualiza las estadísticas con un lote antes de entregarlo."""
+        self.provider_matcher.acumular_stats_coincidencias(
+            coincidencias, vales_lote, ordenes_lote, self.coincidencias, self.tiempos
+        )
+        self.stats['provider_matching'] = coincidencias
+        self.stats['vales_procesados'] = contadores[TIPO_VALE]['procesados']
+        self.stats['vales_exitosos'] = contadores[TIPO_VALE]['exitosos']
+        self.stats['errores_vales'] = contadores[TIPO_VALE]['errores']
+        self.stats['ordenes_procesadas'] = contadores[TIPO_ORDEN]['procesados']
+        self.stats['ordenes_exitosas'] = contadores[TIPO_ORDEN]['exitosos']
+        self.stats['errores_ordenes'] = contadores[TIPO_ORDEN]['errores']
+    
+    def _extraer_documentos(self, tareas: List[Tuple[str, str]], progress_callback=None) -> List[Tuple]:
+        """
+        Extrae una lista de tareas (tipo, ruta) consultando primero la caché persistente.
+        Solo los archivos nuevos o modificados se envían al motor de extracción.
+        
+        Args:
+            tareas (List[Tuple[str, str]]): (tipo, ruta) por archivo
+            progress_callback: Función (procesados, total) llamada tras cada archivo
+            
+        Returns:
+            List[Tuple]: (datos, error) por tarea, en el mismo orden
+        """
+        resultados = [(None, 'cancelado')] * len(tareas)
+        if progress_callback:
+            # Total ya sin registrados, en cuarentena ni terminados: la barra llega al 100%
+            progress_callback(0, len(tareas))
+        for procesados, (idx, datos, error, _segundos) in enumerate(
+                self._iterar_extracciones(tareas, self.cancelar_evento), 1):
+            resultados[idx] = (datos, error)
+            if progress_callback:
+                progress_callback(procesados, len(tareas))
+        return resultados
+    
+    def _iterar_extracciones(self, tareas: List[Tuple[str, str]],
+                             cancel_event: threading.Event) -> Iterator[Tuple[int, Any, Optional[str], float]]:
+        """
+        Entrega (índice, datos, error, segundos) por tarea: primero las que están en la
+        caché y luego las extraídas, en orden de terminación. Las extracciones útiles se
+        guardan en la caché y cada extracción queda en la bitácora, si hay.
+        
+        Args:
+            tareas (List[Tuple[str, str]]): (tipo, ruta) por archivo
+            cancel_event (threading.Event): Evento que detiene la extracción
+        """
+        if not tareas:
+            return
+        
+        cache = self._obtener_cache()
+        huellas = [None] * len(tareas)
+        pendientes = []
+        desde_cache = 0
+        
+        for idx, (tipo, ruta) in enumerate(tareas):
+            if cache is not None:
+                try:
+                    huellas[idx] = self._huellas.get(ruta) or obtener_huella(ruta)
+                except OSError:
+                    huellas[idx] = None
+                if huellas[idx] is not None and not self.forzar_reextraccion:
+                    datos = cache.obtener(tipo, huellas[idx])
+                    if datos is not None:
+                        desde_cache += 1
+                        self._registrar_extraccion(tareas[idx], 0.0, None, desde_cache=True)
+                        yield idx, datos, None, 0.0
+                        continue
+            pendientes.append(idx)
+        
+        self.stats['desde_cache'] += desde_cache
+        if desde_cache:
+            print(f"💾 {desde_cache} archivo(s) sin cambios tomados de la caché")
+        
+        if pendientes:
+            print(f"⚙️ Extrayendo {len(pendientes)} archivos con {self.workers} proceso(s)")
+            motor = self._crear_motor()
+            for posicion, (datos, error), segundos in motor.iterar(
+                    [tareas[idx] for idx in pendientes], cancel_event=cancel_event):
+                idx = pendientes[posicion]
+                # Solo se guardan extracciones útiles, para no fijar fallos transitorios
+                if cache is not None and huellas[idx] is not None and not error and datos and any(datos.values()):
+                    try:
+                        cache.guardar(tareas[idx][0], huellas[idx], datos)
+                    except Exception as e:
+                        print(f"⚠️ No se pudo guardar en caché {Path(tareas[idx][1]).name}: {e}")
+                # Un archivo sin datos tampoco se guarda en la BD: cuenta como terminado con error
+                sin_datos = not error and not (datos and any(datos.values()))
+                self._registrar_extraccion(tareas[idx], segundos, 'sin datos' if sin_datos else error)
+                yield idx, datos, error, segundos
+    
+    def _registrar_extraccion(self, tarea: Tuple[str, str], segundos: float, error: Optional[str],
+                              desde_cache: bool = False):
+        """Agrega la extracción a la bitácora (si hay) sin interrumpir la corrida si falla."""
+        if self.bitacora is None:
+            return
+        try:
+            self.bitacora.extraido(tarea[0], tarea[1], segundos, error, desde_cache=desde_cache)
+        except OSError as e:
+            print(f"⚠️ No se pudo escribir en la bitácora de la corrida: {e}")
+    
+    def confirmar_escaneo(self):
+        """
+        Guarda la marca del último escaneo para que la siguiente autocarga incremental
+        empiece a partir de ella. Se llama cuando los resultados ya fueron procesados,
+        así una autocarga fallida o cancelada vuelve a considerar los mismos archivos.
+        También cierra la bitácora: la siguiente corrida ya no reanuda esta.
+        """
+        if self.bitacora is not None and self.bitacora.corrida is not None:
+            try:
+                self.bitacora.terminar()
+            except OSError as e:
+                print(f"⚠️ No se pudo cerrar la bitácora de la corrida: {e}")
+        if self.registro_escaneos is None or self._marca_pendiente is None:
+            return
+        try:
+            self.registro_escaneos.guardar(self.ruta_carpeta, self._marca_pendiente)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la marca de escaneo: {e}")
+    
+    def cancelar(self):
+        """
+        Solicita detener la extracción en curso. Los documentos ya extraídos se conservan.
+        """
+        self.cancelar_evento.set()
+    
+    def _armar_diccionario(self, archivos: List[str], resultados: List[Tuple], tipo: str) -> Dict[str, Any]:
+        """
+        Construye el diccionario de resultados en el orden de los archivos y actualiza estadísticas.
+        
+        Args:
+            archivos (List[str]): Rutas extraídas
+            resultados (List[Tuple]): (datos, error) por archivo, en el mismo orden
+            tipo (str): 'vales' u 'ordenes'
+            
+        Returns:
+            Dict[str, Any]: Diccionario {nombre_archivo_sin_extension: datos}
+        """
+        resultado_dict = {}
+        procesados = 0
+        exitosos = 0
+        errores = 0
+        
+        for i, (archivo, (datos, error)) in enumerate(zip(archivos, resultados), 1):
+            if error == 'cancelado':
+                continue
+            procesados += 1
+            print(f"📄 {i}/{len(archivos)} Procesando: {Path(archivo).name}")
+            if error:
+                errores += 1
+                print(f"   ❌ Error al procesar: {error}")
+            elif datos and any(datos.values()):
+                resultado_dict[Path(archivo).stem] = datos
+                self._rutas_documentos[(TIPO_VALE if tipo == 'vales' else TIPO_ORDEN, Path(archivo).stem)] = archivo
+                exitosos += 1
+                print(f"   ✅ Datos extraídos exitosamente")
+            else:
+                errores += 1
+                print(f"   ❌ No se pudieron extraer datos")
+        
+        if tipo == 'vales':
+            self.stats['vales_procesados'] = procesados
+            self.stats['vales_exitosos'] = exitosos
+            self.stats['errores_vales'] = errores
         else:
-            print("📋 No se encontraron Órdenes para procesar")
-
-        # 4. Solo guardar estadísticas sin mostrar reportes adicionales
-        # self.mostrar_resumen_final()  # Comentado para evitar reportes duplicados
-
-        # 5. Solo obtener estadísticas sin mostrar reportes en consola
-        # self.provider_matcher.print_matching_report(self.vales, self.ordenes)  # Comentado para evitar reportes duplicados
-
-        return self.vales, self.ordenes
+            self.stats['ordenes_procesadas'] = procesados
+            self.stats['ordenes_exitosas'] = exitosos
+            self.stats['errores_ordenes'] = errores
+        
+        return resultado_dict
     
     def mostrar_resumen_final(self):
         """
@@ -314,6 +882,11 @@ class AutoCarga:
         print(f"📅 Timestamp: {self.stats['timestamp']}")
         print(f"📂 Carpeta: {self.ruta_carpeta}")
         print(f"⏱️ Período: Últimos {self.dias_atras} días")
+        print(f"🧬 Duplicados omitidos: {self.stats.get('duplicados_omitidos', 0)}")
+        print(f"🗃️ Vales ya registrados omitidos: {self.stats.get('vales_ya_registrados', 0)}")
+        print(f"🚧 Archivos en cuarentena: {len(self.stats.get('cuarentena', []))}")
+        for entrada in self.stats.get('cuarentena', []):
+            print(f"   • {Path(entrada['archivo']).name}: {entrada['motivo']}")
         print("-" * 60)
         print(f"💳 VALES:")
         print(f"   📁 Encontrados: {self.stats['vales_encontrados']}")
@@ -332,6 +905,11 @@ class AutoCarga:
         if self.stats['ordenes_procesadas'] > 0:
             tasa_ordenes = (self.stats['ordenes_exitosas'] / self.stats['ordenes_procesadas']) * 100
             print(f"   📊 Tasa de éxito: {tasa_ordenes:.1f}%")
+        resumen_tiempos = self.tiempos.resumen()
+        if resumen_tiempos:
+            print("\n⏱️ TIEMPOS POR ETAPA:")
+            for linea in formatear_resumen(resumen_tiempos):
+                print(f"   {linea}")
         print("=" * 60)
     
     def guardar_resultados(self, carpeta_destino: str = None) -> Tuple[str, str]:
@@ -400,11 +978,16 @@ class AutoCarga:
         """
         stats = self.stats.copy()
         
-        # Agregar estadísticas de coincidencias de proveedores
-        if hasattr(self, 'provider_matcher'):
-            matching_stats = self.provider_matcher.get_matching_stats(self.vales, self.ordenes)
+        # Agregar estadísticas de coincidencias de proveedores (iterar_autocarga ya las acumuló)
+        if hasattr(self, 'provider_matcher') and 'provider_matching' not in stats:
+            matching_stats = self.provider_matcher.get_matching_stats(
+                self.vales, self.ordenes, coincidencias=self.coincidencias, tiempos=self.tiempos
+            )
             stats['provider_matching'] = matching_stats
         
+        # Tiempos por etapa hasta este punto (la persistencia la agrega quien guarda en la BD)
+        stats['tiempos_etapas'] = self.tiempos.resumen()
+        
         return stats
     
     def obtener_proveedores_para_actualizar(self) -> List[Dict[str, Any]]:
@@ -422,7 +1005,7 @@ class AutoCarga:
             
             if nombre and cuenta:
                 # Buscar si existe el proveedor sin código
-                proveedor = self.provider_matcher.find_provider_by_name(nombre)
+                proveedor = self.coincidencias.por_nombre(nombre)
                 if proveedor and not proveedor.codigo_quiter:
                     actualizaciones.append({
                         'proveedor_id': proveedor.id,
@@ -0,0 +1,356 @@
+"""
+Benchmark de los extractores de Vales y Órdenes sobre un corpus con valores conocidos.
+Para cada tipo de documento y backend de texto mide el rendimiento (documentos por
+segundo y percentiles por documento), la precisión por campo contra verdad.json y
+la memoria pico del proceso. Cada combinación corre en un proceso nuevo para que
+la memoria pico de una no contamine a la siguiente.
+
+Sin carpeta se genera un corpus sintético temporal (ver corpus_sintetico), así
+que funciona sin acceso a la carpeta de Quiter.
+
+Con --plantilla N además se calibra la plantilla de regiones de los vales con los
+primeros N y se verifica que el modo plantilla dé lo mismo que la extracción
+completa en todos los vales del corpus.
+
+Uso:
+    python -m src.buscarapp.autocarga.benchmark_extractores [carpeta] [--generar 50] [--repeticiones 3]
+    python -m src.buscarapp.autocarga.benchmark_extractores --plantilla 3
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from .corpus_sintetico import generar_corpus, cargar_verdad
+    from .documento import BACKENDS_TEXTO, validar_backend
+    from .extractor import CAMPOS_VALE, PDFDataExtractor
+    from .extractor_orden import OrdenDataExtractor
+    from .extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from .plantillas_region import textos_de_regiones
+    from .tiempos_etapas import percentil
+except ImportError:
+    from corpus_sintetico import generar_corpus, cargar_verdad
+    from documento import BACKENDS_TEXTO, validar_backend
+    from extractor import CAMPOS_VALE, PDFDataExtractor
+    from extractor_orden import OrdenDataExtractor
+    from extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from plantillas_region import textos_de_regiones
+    from tiempos_etapas import percentil
+
+# Campos de importe: la coma de miles no cuenta como diferencia
+_CAMPOS_IMPORTE = {'Total', 'Importe'}
+
+# Máximo de ejemplos de fallos guardados por campo
+_EJEMPLOS_POR_CAMPO = 3
+
+
+def _crear_extractor(tipo: str, backend: str):
+    """Extractor del tipo de documento configurado con un backend."""
+    if tipo == TIPO_VALE:
+        return PDFDataExtractor(backend_texto=backend)
+    return OrdenDataExtractor(backend_texto=backend)
+
+
+def _normalizar(campo: str, valor: Any) -> Optional[str]:
+    """Valor comparable: sin espacios repetidos ni mayúsculas; vacío y None cuentan igual."""
+    if valor is None:
+        return None
+    valor = ' '.join(str(valor).split()).casefold()
+    if campo in _CAMPOS_IMPORTE:
+        valor = valor.replace(',', '')
+    return valor or None
+
+
+def _memoria_pico_mb() -> Optional[float]:
+    """Memoria residente pico del proceso en MB (None donde no hay getrusage)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB y macOS bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def medir_extractor(tipo: str, backend: str, rutas: List[str], esperados: Dict[str, Dict[str, Any]],
+                    repeticiones: int = 1) -> Dict[str, Any]:
+    """
+    Extrae los archivos con un backend y los compara con los valores esperados.
+    El primer archivo se extrae una vez antes de medir para no contar la carga de
+    las bibliotecas. La salida de consola de los extractores se descarta.
+
+    Args:
+        tipo (str): TIPO_VALE o TIPO_ORDEN
+        backend (str): Backend de texto
+        rutas (List[str]): Archivos a extraer
+        esperados (Dict): Por nombre de archivo, los campos esperados
+        repeticiones (int): Veces que se extrae el corpus (la precisión se toma de la primera)
+
+    Returns:
+        Dict[str, Any]: 'documentos', 'docs_por_s', 'ms_por_doc' (p50/p90/max),
+        'memoria_base_mb', 'memoria_pico_mb', 'precision' por campo y 'errores'
+    """
+    extractor = _crear_extractor(tipo, backend)
+    duraciones = []
+    aciertos: Dict[str, int] = {}
+    totales: Dict[str, int] = {}
+    ejemplos: Dict[str, List[Dict[str, Any]]] = {}
+    errores = []
+
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        if rutas:
+            try:
+                extractor.extract_all_data(rutas[0])
+            except Exception:
+                pass
+        memoria_base = _memoria_pico_mb()
+
+        inicio_total = time.perf_counter()
+        for repeticion in range(repeticiones):
+            for ruta in rutas:
+                inicio = time.perf_counter()
+                try:
+                    datos = extractor.extract_all_data(ruta)
+                except Exception as e:
+                    if repeticion == 0:
+                        errores.append({'archivo': Path(ruta).name, 'error': str(e)})
+                    continue
+                duraciones.append(time.perf_counter() - inicio)
+                if repeticion:
+                    continue
+                for campo, esperado in esperados[Path(ruta).name].items():
+                    totales[campo] = totales.get(campo, 0) + 1
+                    obtenido = datos.get(campo)
+                    if _normalizar(campo, obtenido) == _normalizar(campo, esperado):
+                        aciertos[campo] = aciertos.get(campo, 0) + 1
+                        continue
+                    lista = ejemplos.setdefault(campo, [])
+                    if len(lista) < _EJEMPLOS_POR_CAMPO:
+                        lista.append({'archivo': Path(ruta).name, 'esperado': esperado, 'obtenido': obtenido})
+        segundos_total = time.perf_counter() - inicio_total
+
+    ordenados = sorted(duraciones)
+    return {
+        'documentos': len(rutas),
+        'extracciones': len(duraciones),
+        'docs_por_s': round(len(duraciones) / segundos_total, 2) if segundos_total else 0.0,
+        'ms_por_doc': {
+            'p50': round(percentil(ordenados, 50) * 1000, 2) if ordenados else None,
+            'p90': round(percentil(ordenados, 90) * 1000, 2) if ordenados else None,
+            'max': round(ordenados[-1] * 1000, 2) if ordenados else None,
+        },
+        'memoria_base_mb': memoria_base,
+        'memoria_pico_mb': _memoria_pico_mb(),
+        'precision': {
+            campo: {
+                'aciertos': aciertos.get(campo, 0),
+                'total': total,
+                'precision': round(aciertos.get(campo, 0) / total, 4),
+                'ejemplos': ejemplos.get(campo, []),
+            }
+            for campo, total in totales.items()
+        },
+        'errores': errores,
+    }
+
+
+def ejecutar_benchmark(carpeta: str, backends: List[str] = BACKENDS_TEXTO, repeticiones: int = 1,
+                       aislar: bool = True) -> Dict[str, Any]:
+    """
+    Mide cada combinación de tipo de documento y backend sobre el corpus de la carpeta.
+
+    Args:
+        carpeta (str): Carpeta con los PDFs y su verdad.json
+        backends (List[str]): Backends de texto a medir
+        repeticiones (int): Veces que se extrae el corpus por combinación
+        aislar (bool): Correr cada combinación en un proceso nuevo (memoria pico por combinación)
+
+    Returns:
+        Dict[str, Any]: Por tipo y backend, el resultado de medir_extractor
+    """
+    verdad = cargar_verdad(carpeta)
+    reporte: Dict[str, Any] = {}
+    for tipo in (TIPO_VALE, TIPO_ORDEN):
+        esperados = {nombre: datos['campos'] for nombre, datos in verdad.items() if datos['tipo'] == tipo}
+        rutas = [str(Path(carpeta) / nombre) for nombre in sorted(esperados)]
+        reporte[tipo] = {}
+        for backend in backends:
+            validar_backend(backend)
+            if not aislar:
+                reporte[tipo][backend] = medir_extractor(tipo, backend, rutas, esperados, repeticiones)
+                continue
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                reporte[tipo][backend] = pool.submit(
+                    medir_extractor, tipo, backend, rutas, esperados, repeticiones
+                ).result()
+    return reporte
+
+
+def comparar_plantilla(carpeta: str, backend: str, muestras: int = 3) -> Dict[str, Any]:
+    """
+    Calibra la plantilla de vales con los primeros archivos del corpus y compara el
+    modo plantilla con la extracción completa en todos los vales. Se compara tanto
+    el valor leído en cada región como el resultado final de extract_all_data (que
+    completa con el texto completo los campos sin región o sin valor).
+
+    Args:
+        carpeta (str): Carpeta con los PDFs y su verdad.json
+        backend (str): Backend de texto
+        muestras (int): Vales usados para calibrar
+
+    Returns:
+        Dict[str, Any]: 'documentos', 'muestras', 'campos' (con región), 'sin_region',
+        'diferencias' (archivo, campo, modo, completo, plantilla), 'ms_por_doc'
+        de cada modo (p50)
+    """
+    verdad = cargar_verdad(carpeta)
+    rutas = [str(Path(carpeta) / nombre) for nombre in sorted(verdad) if verdad[nombre]['tipo'] == TIPO_VALE]
+    completo = PDFDataExtractor(backend_texto=backend)
+    con_plantilla = PDFDataExtractor(backend_texto=backend)
+    duraciones: Dict[str, List[float]] = {'completo': [], 'plantilla': []}
+    diferencias = []
+
+    with open(os.devnull, 'w', encoding='utf-8') as nulo, contextlib.redirect_stdout(nulo):
+        con_plantilla.plantilla = con_plantilla.calibrar_plantilla(rutas[:muestras])
+        campos = sorted(con_plantilla.plantilla.regiones)
+        for ruta in rutas:
+            inicio = time.perf_counter()
+            esperado = completo.extract_all_data(ruta)
+            duraciones['completo'].append(time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            obtenido = con_plantilla.extract_all_data(ruta)
+            duraciones['plantilla'].append(time.perf_counter() - inicio)
+            textos = textos_de_regiones(ruta, con_plantilla.plantilla, backend)
+            regiones = con_plantilla.valores_de_regiones(textos) if textos is not None else {}
+
+            for campo in campos:
+                nombre = con_plantilla._nombre_campo(campo)
+                if regiones.get(nombre) != esperado.get(nombre):
+                    diferencias.append({'archivo': Path(ruta).name, 'campo': nombre, 'modo': 'región',
+                                        'completo': esperado.get(nombre), 'plantilla': regiones.get(nombre)})
+            for nombre, valor in esperado.items():
+                if obtenido.get(nombre) != valor:
+                    diferencias.append({'archivo': Path(ruta).name, 'campo': nombre, 'modo': 'resultado',
+                                        'completo': valor, 'plantilla': obtenido.get(nombre)})
+
+    return {
+        'documentos': len(rutas),
+        'muestras': min(muestras, len(rutas)),
+        'campos': campos,
+        'sin_region': [campo for campo in CAMPOS_VALE if campo not in campos],
+        'diferencias': diferencias,
+        'ms_por_doc': {modo: round(percentil(sorted(tiempos), 50) * 1000, 2) if tiempos else None
+                       for modo, tiempos in duraciones.items()},
+    }
+
+
+def imprimir_comparacion_plantilla(backend: str, comparacion: Dict[str, Any]):
+    """
+    Muestra en consola el resultado de comparar_plantilla.
+
+    Args:
+        backend (str): Backend de texto comparado
+        comparacion (Dict[str, Any]): Resultado de comparar_plantilla
+    """
+    tiempos = comparacion['ms_por_doc']
+    diferencias = comparacion['diferencias']
+    icono = "✅" if not diferencias else "⚠️"
+    print(f"📐 Plantilla / {backend}: calibrada con {comparacion['muestras']} vale(s), "
+          f"comparada en {comparacion['documentos']}")
+    print(f"   Campos con región: {', '.join(comparacion['campos']) or 'ninguno'}")
+    if comparacion['sin_region']:
+        print(f"   Sin región (texto completo): {', '.join(comparacion['sin_region'])}")
+    print(f"   ⏱️ p50 completo {tiempos['completo']} ms | p50 plantilla {tiempos['plantilla']} ms")
+    if tiempos['completo'] is not None and tiempos['plantilla'] is not None \
+            and tiempos['plantilla'] >= tiempos['completo']:
+        print("   ⚠️ El modo plantilla no es más rápido que la extracción completa con este corpus")
+    print(f"   {icono} {len(diferencias)} diferencia(s) contra la extracción completa")
+    for diferencia in diferencias[:_EJEMPLOS_POR_CAMPO * 3]:
+        print(f"      {diferencia['archivo']} [{diferencia['modo']}] {diferencia['campo']}: "
+              f"completo {diferencia['completo']!r}, plantilla {diferencia['plantilla']!r}")
+
+
+def imprimir_reporte(reporte: Dict[str, Any]):
+    """
+    Muestra en consola el reporte de ejecutar_benchmark.
+
+    Args:
+        reporte (Dict[str, Any]): Reporte devuelto por ejecutar_benchmark
+    """
+    print("🏁 BENCHMARK DE EXTRACTORES")
+    print("=" * 60)
+    for tipo, por_backend in reporte.items():
+        for backend, datos in por_backend.items():
+            tiempos = datos['ms_por_doc']
+            memoria = (f"{datos['memoria_pico_mb']:.1f} MB (base {datos['memoria_base_mb']:.1f} MB)"
+                       if datos['memoria_pico_mb'] is not None else "no disponible")
+            print(f"📄 {tipo} / {backend}: {datos['documentos']} documento(s)")
+            print(f"   ⏱️ {datos['docs_por_s']:.1f} docs/s | p50 {tiempos['p50']} ms | "
+                  f"p90 {tiempos['p90']} ms | máx {tiempos['max']} ms")
+            print(f"   💾 Memoria pico: {memoria}")
+            for campo, precision in sorted(datos['precision'].items(), key=lambda x: x[1]['precision']):
+                icono = "✅" if precision['aciertos'] == precision['total'] else "⚠️"
+                print(f"   {icono} {campo}: {precision['precision']:.0%} "
+                      f"({precision['aciertos']}/{precision['total']})")
+                for ejemplo in precision['ejemplos']:
+                    print(f"      {ejemplo['archivo']}: esperado {ejemplo['esperado']!r}, "
+                          f"obtenido {ejemplo['obtenido']!r}")
+            for error in datos['errores']:
+                print(f"   ❌ {error['archivo']}: {error['error']}")
+    print("=" * 60)
+
+
+def main():
+    """Mide los extractores sobre una carpeta de corpus o sobre un corpus sintético temporal."""
+    parser = argparse.ArgumentParser(description="Benchmark de velocidad, precisión y memoria de los extractores")
+    parser.add_argument('carpeta', nargs='?', help="Carpeta con PDFs y verdad.json (default: corpus temporal)")
+    parser.add_argument('--generar', type=int, default=50,
+                        help="Vales y Órdenes a generar si no se indica carpeta (default: 50 de cada uno)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla del corpus generado")
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS_TEXTO), choices=BACKENDS_TEXTO,
+                        help="Backends de texto a medir")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Veces que se extrae el corpus")
+    parser.add_argument('--sin-aislar', action='store_true',
+                        help="Medir todo en este proceso (la memoria pico queda acumulada)")
+    parser.add_argument('--plantilla', type=int, metavar='N',
+                        help="Calibrar la plantilla de vales con N muestras y compararla con la extracción completa")
+    parser.add_argument('--json', dest='salida_json', help="Archivo donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as pila:
+        carpeta = args.carpeta
+        if carpeta is None:
+            carpeta = pila.enter_context(tempfile.TemporaryDirectory(prefix='corpus_autocarga_'))
+            generar_corpus(carpeta, args.generar, args.generar, args.semilla)
+            print(f"📄 Corpus sintético: {args.generar} Vales y {args.generar} Órdenes")
+        reporte = ejecutar_benchmark(carpeta, args.backends, args.repeticiones, aislar=not args.sin_aislar)
+        if args.plantilla:
+            reporte['plantilla'] = {backend: comparar_plantilla(carpeta, backend, args.plantilla)
+                                    for backend in args.backends}
+    comparaciones = reporte.pop('plantilla', {})
+    imprimir_reporte(reporte)
+    for backend, comparacion in comparaciones.items():
+        imprimir_comparacion_plantilla(backend, comparacion)
+    if comparaciones:
+        reporte['plantilla'] = comparaciones
+
+    if args.salida_json:
+        Path(args.salida_json).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 Reporte guardado en {args.salida_json}")
+
+
+if __name__ == "__main__":
+    main()
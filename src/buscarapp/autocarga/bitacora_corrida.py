@@ -0,0 +1,185 @@
+"""
+Bitácora de corridas de AutoCarga.
+Archivo JSONL de solo agregado que registra, por corrida, qué archivos se
+extrajeron (con su duración) y cuáles ya se guardaron en la BD. Si una corrida
+se interrumpe, la siguiente sobre la misma carpeta la reanuda y omite los
+archivos terminados que no han cambiado.
+
+Eventos (uno por línea):
+    {"evento": "inicio", "corrida": ..., "carpeta": ..., "archivos": N, "fecha": ...}
+    {"evento": "extraido", "tipo": ..., "ruta": ..., "tamano": ..., "mtime_ns": ...,
+     "segundos": ..., "cache": bool, "error": ...}
+    {"evento": "persistido", "rutas": [...]}
+    {"evento": "fin", "fecha": ...}
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Llave de un archivo terminado: si cambia el tamaño o la fecha, se vuelve a procesar
+LlaveArchivo = Tuple[str, int, int]
+
+
+def llave_archivo(ruta: str) -> Optional[LlaveArchivo]:
+    """
+    (ruta, tamaño, mtime_ns) actuales de un archivo, o None si no se puede leer.
+
+    Args:
+        ruta (str): Ruta del archivo
+    """
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return (os.path.normcase(os.path.abspath(ruta)), info.st_size, info.st_mtime_ns)
+
+
+class BitacoraCorrida:
+    """
+    Bitácora de la corrida en curso. Solo guarda la última corrida: al empezar una
+    nueva (sin nada que reanudar) el archivo se reinicia.
+    """
+
+    def __init__(self, ruta_archivo: Optional[str] = None):
+        """
+        Args:
+            ruta_archivo (str): Archivo JSONL (default: junto a la caché de extracciones)
+        """
+        if ruta_archivo is None:
+            try:
+                from .cache_extraccion import ruta_cache_por_defecto
+            except ImportError:
+                from cache_extraccion import ruta_cache_por_defecto
+            ruta_archivo = ruta_cache_por_defecto().parent / 'autocarga_bitacora.jsonl'
+        self.ruta_archivo = Path(ruta_archivo)
+        self.corrida: Optional[str] = None
+        self._llaves: Dict[str, LlaveArchivo] = {}
+        self._lock = threading.Lock()
+
+    def leer(self) -> List[Dict[str, Any]]:
+        """
+        Eventos guardados. Una última línea incompleta (corte a media escritura) se ignora.
+
+        Returns:
+            List[Dict]: Eventos en orden
+        """
+        eventos = []
+        try:
+            with open(self.ruta_archivo, encoding='utf-8') as archivo:
+                for linea in archivo:
+                    try:
+                        eventos.append(json.loads(linea))
+                    except ValueError:
+                        continue
+        except OSError:
+            pass
+        return eventos
+
+    def iniciar(self, ruta_carpeta: str, rutas: Iterable[str]) -> Set[LlaveArchivo]:
+        """
+        Empieza una corrida o reanuda la última si quedó sin terminar en la misma carpeta.
+
+        Args:
+            ruta_carpeta (str): Carpeta de la corrida
+            rutas: Archivos que se van a procesar
+
+        Returns:
+            Set[LlaveArchivo]: Archivos ya terminados en la corrida reanudada (guardados
+            en la BD o con error de extracción) que no han cambiado desde entonces
+        """
+        rutas = list(rutas)
+        carpeta = os.path.normcase(os.path.abspath(ruta_carpeta))
+        eventos = self.leer()
+        inicio = next((e for e in reversed(eventos) if e.get('evento') == 'inicio'), None)
+        terminada = bool(eventos) and eventos[-1].get('evento') == 'fin'
+
+        terminados: Set[LlaveArchivo] = set()
+        if inicio and not terminada and inicio.get('carpeta') == carpeta:
+            self.corrida = inicio.get('corrida')
+            extraidos = {}
+            for evento in eventos[eventos.index(inicio):]:
+                if evento.get('evento') == 'extraido':
+                    llave = (evento['ruta'], evento['tamano'], evento['mtime_ns'])
+                    extraidos[evento['ruta']] = llave
+                    if evento.get('error'):
+                        terminados.add(llave)
+                elif evento.get('evento') == 'persistido':
+                    terminados.update(extraidos[r] for r in evento.get('rutas', []) if r in extraidos)
+            actuales = {llave_archivo(ruta) for ruta in rutas}
+            terminados &= actuales
+            print(f"♻️ Reanudando autocarga interrumpida: {len(terminados)} archivo(s) ya terminados")
+            self._agregar({'evento': 'reanudado', 'archivos': len(rutas), 'fecha': self._ahora()})
+        else:
+            self.corrida = datetime.now().strftime('%Y%m%dT%H%M%S')
+            self.ruta_archivo.parent.mkdir(parents=True, exist_ok=True)
+            self.ruta_archivo.write_text('', encoding='utf-8')
+            self._agregar({'evento': 'inicio', 'corrida': self.corrida, 'carpeta': carpeta,
+                           'archivos': len(rutas), 'fecha': self._ahora()})
+        return terminados
+
+    def extraido(self, tipo: str, ruta: str, segundos: float, error: Optional[str] = None,
+                 desde_cache: bool = False):
+        """
+        Registra la extracción de un archivo.
+
+        Args:
+            tipo (str): 'vale' u 'orden'
+            ruta (str): Ruta del archivo
+            segundos (float): Duración de la extracción
+            error (str): Error de extracción, si lo hubo (el archivo cuenta como terminado)
+            desde_cache (bool): Si los datos salieron de la caché
+        """
+        llave = llave_archivo(ruta)
+        if llave is None:
+            return
+        with self._lock:
+            self._llaves[ruta] = llave
+        self._agregar({'evento': 'extraido', 'tipo': tipo, 'ruta': llave[0], 'tamano': llave[1],
+                       'mtime_ns': llave[2], 'segundos': round(segundos, 4), 'cache': desde_cache,
+                       'error': error})
+
+    def persistido(self, rutas: Iterable[str]):
+        """
+        Punto de control: los archivos ya quedaron guardados en la BD.
+
+        Args:
+            rutas: Rutas de los archivos guardados
+        """
+        with self._lock:
+            normalizadas = [self._llaves.pop(ruta)[0] for ruta in rutas if ruta in self._llaves]
+        if normalizadas:
+            self._agregar({'evento': 'persistido', 'rutas': normalizadas})
+
+    def terminar(self):
+        """Marca la corrida como terminada (la siguiente empieza desde cero)."""
+        self._agregar({'evento': 'fin', 'fecha': self._ahora()})
+        self.corrida = None
+
+    def mas_lentos(self, cantidad: int = 10) -> List[Dict[str, Any]]:
+        """
+        Archivos de la corrida registrada que más tardaron en extraerse.
+
+        Args:
+            cantidad (int): Número de archivos a devolver
+
+        Returns:
+            List[Dict]: {'ruta', 'tipo', 'segundos'} de mayor a menor duración
+        """
+        extraidos = [e for e in self.leer() if e.get('evento') == 'extraido' and not e.get('cache')]
+        extraidos.sort(key=lambda e: -e.get('segundos', 0))
+        return [{'ruta': e['ruta'], 'tipo': e.get('tipo'), 'segundos': e.get('segundos')}
+                for e in extraidos[:cantidad]]
+
+    def _agregar(self, evento: Dict[str, Any]):
+        linea = json.dumps(evento, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.ruta_archivo, 'a', encoding='utf-8') as archivo:
+                archivo.write(linea)
+
+    @staticmethod
+    def _ahora() -> str:
+        return datetime.now().isoformat(timespec='seconds')
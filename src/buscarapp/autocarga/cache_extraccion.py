@@ -0,0 +1,167 @@
+"""
+Caché persistente de extracciones de AutoCarga.
+Guarda en SQLite el diccionario extraído de cada PDF, identificado por su huella
+(ruta, tamaño, fecha de modificación y hash), para no volver a extraer archivos
+que no han cambiado entre ejecuciones.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .huella_archivo import HuellaArchivo
+
+# Cambiar cuando los extractores produzcan datos distintos para invalidar la caché
+VERSION_EXTRACTORES = '1'
+
+# Tamaño máximo por defecto de los datos guardados (en MB)
+TAMANO_MAXIMO_MB = 50
+
+
+def ruta_cache_por_defecto() -> Path:
+    """
+    Ruta por defecto del archivo de caché dentro del directorio de datos de la aplicación.
+
+    Returns:
+        Path: Ruta del archivo SQLite
+    """
+    try:
+        from config.settings import DATABASE_DIR
+        directorio = Path(DATABASE_DIR)
+    except Exception:
+        directorio = Path(os.environ.get('LOCALAPPDATA') or Path.home()) / 'Autoforms'
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio / 'autocarga_cache.sqlite'
+
+
+class CacheExtraccion:
+    """
+    Caché de resultados de extracción por archivo con desalojo por tamaño.
+    Al superar el tamaño máximo se eliminan las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, ruta_bd: Optional[str] = None, tamano_maximo_mb: float = TAMANO_MAXIMO_MB,
+                 version: str = VERSION_EXTRACTORES):
+        """
+        Args:
+            ruta_bd (str): Archivo SQLite (default: directorio de datos de la aplicación)
+            tamano_maximo_mb (float): Tamaño máximo de los datos guardados
+            version (str): Versión de los extractores; las entradas de otra versión no se usan
+        """
+        self.ruta_bd = str(ruta_bd or ruta_cache_por_defecto())
+        self.version = version
+        self.tamano_maximo = int(tamano_maximo_mb * 1024 * 1024)
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(self.ruta_bd, check_same_thread=False)
+        self._crear_tabla()
+
+    def _crear_tabla(self):
+        with self._lock, self._conexion:
+            self._conexion.execute("""
+                CREATE TABLE IF NOT EXISTS extracciones (
+                    tipo TEXT NOT NULL,
+                    ruta TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    datos TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    ultimo_acceso REAL NOT NULL,
+                    PRIMARY KEY (tipo, ruta)
+                )
+            """)
+            self._conexion.execute(
+                "CREATE INDEX IF NOT EXISTS idx_extracciones_acceso ON extracciones (ultimo_acceso)"
+            )
+
+    def obtener(self, tipo: str, huella: HuellaArchivo) -> Optional[Dict[str, Any]]:
+        """
+        Busca la extracción guardada para un archivo.
+
+        Args:
+            tipo (str): 'vale' u 'orden'
+            huella (HuellaArchivo): Huella actual del archivo
+
+        Returns:
+            Optional[Dict]: Datos guardados, o None si no hay entrada o el archivo cambió
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT tamano, mtime_ns, sha256, version, datos FROM extracciones "
+                "WHERE tipo = ? AND ruta = ?",
+                (tipo, huella.ruta)
+            ).fetchone()
+
+            if not fila or tuple(fila[:4]) != (huella.tamano, huella.mtime_ns, huella.sha256, self.version):
+                self.fallos += 1
+                return None
+
+            with self._conexion:
+                self._conexion.execute(
+                    "UPDATE extracciones SET ultimo_acceso = ? WHERE tipo = ? AND ruta = ?",
+                    (time.time(), tipo, huella.ruta)
+                )
+            self.aciertos += 1
+
+        return json.loads(fila[4])
+
+    def guardar(self, tipo: str, huella: HuellaArchivo, datos: Dict[str, Any]):
+        """
+        Guarda (o reemplaza) la extracción de un archivo y aplica el desalojo por tamaño.
+
+        Args:
+            tipo (str): 'vale' u 'orden'
+            huella (HuellaArchivo): Huella del archivo extraído
+            datos (Dict): Diccionario devuelto por el extractor
+        """
+        contenido = json.dumps(datos, ensure_ascii=False)
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO extracciones "
+                "(tipo, ruta, tamano, mtime_ns, sha256, version, datos, bytes, ultimo_acceso) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (tipo, huella.ruta, huella.tamano, huella.mtime_ns, huella.sha256,
+                 self.version, contenido, len(contenido.encode('utf-8')), time.time())
+            )
+            self._desalojar()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar en el 90% del tamaño máximo."""
+        total = self._conexion.execute("SELECT COALESCE(SUM(bytes), 0) FROM extracciones").fetchone()[0]
+        if total <= self.tamano_maximo:
+            return
+
+        objetivo = int(self.tamano_maximo * 0.9)
+        filas = self._conexion.execute(
+            "SELECT tipo, ruta, bytes FROM extracciones ORDER BY ultimo_acceso"
+        ).fetchall()
+        eliminar = []
+        for tipo, ruta, tamano in filas:
+            if total <= objetivo:
+                break
+            eliminar.append((tipo, ruta))
+            total -= tamano
+        self._conexion.executemany("DELETE FROM extracciones WHERE tipo = ? AND ruta = ?", eliminar)
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché."""
+        with self._lock, self._conexion:
+            self._conexion.execute("DELETE FROM extracciones")
+
+    def cerrar(self):
+        """Cierra la conexión con el archivo de caché (se puede llamar más de una vez)."""
+        with self._lock:
+            self._conexion.close()
+
+    def __enter__(self) -> 'CacheExtraccion':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
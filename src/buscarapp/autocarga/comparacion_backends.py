@@ -0,0 +1,181 @@
+"""
+Modo sombra de los backends de texto de AutoCarga.
+Extrae una muestra de Vales y Órdenes con 'pdfplumber' y con 'pdfium', compara
+campo por campo y reporta las diferencias y el tiempo de cada backend. Sirve
+como evidencia antes de cambiar el backend por defecto.
+
+Uso:
+    python -m src.buscarapp.autocarga.comparacion_backends <carpeta> [--dias 30] [--muestra 20]
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .documento import BACKEND_PDFPLUMBER, BACKEND_PDFIUM
+    from .extractor import PDFDataExtractor
+    from .extractor_orden import OrdenDataExtractor
+    from .extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from .lector_carpeta import buscar_vales_y_ordenes_recientes
+except ImportError:
+    from documento import BACKEND_PDFPLUMBER, BACKEND_PDFIUM
+    from extractor import PDFDataExtractor
+    from extractor_orden import OrdenDataExtractor
+    from extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from lector_carpeta import buscar_vales_y_ordenes_recientes
+
+# Campos que describen el archivo y no el contenido extraído
+_CAMPOS_IGNORADOS = {'archivo_original', 'ruta_completa'}
+
+# Máximo de ejemplos de diferencias guardados por campo
+_EJEMPLOS_POR_CAMPO = 5
+
+
+def _crear_extractores(backend: str) -> Dict[str, Any]:
+    """Extractores de Vales y Órdenes configurados con un backend."""
+    return {
+        TIPO_VALE: PDFDataExtractor(backend_texto=backend),
+        TIPO_ORDEN: OrdenDataExtractor(backend_texto=backend),
+    }
+
+
+def _normalizar(valor: Any) -> Optional[str]:
+    """Valor comparable: vacío y None cuentan igual."""
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def comparar_backends(rutas_vales: List[str], rutas_ordenes: List[str],
+                      muestra: Optional[int] = 20, semilla: int = 0) -> Dict[str, Any]:
+    """
+    Extrae una muestra de archivos con ambos backends y compara los resultados.
+
+    Args:
+        rutas_vales (List[str]): Archivos de Vales disponibles
+        rutas_ordenes (List[str]): Archivos de Órdenes disponibles
+        muestra (int): Archivos por tipo a comparar (None para todos)
+        semilla (int): Semilla de la muestra aleatoria, para repetir la comparación
+
+    Returns:
+        Dict[str, Any]: Reporte por tipo con documentos comparados, tiempo promedio
+        por backend, número de diferencias por campo y ejemplos de cada diferencia
+    """
+    extractores = {
+        BACKEND_PDFPLUMBER: _crear_extractores(BACKEND_PDFPLUMBER),
+        BACKEND_PDFIUM: _crear_extractores(BACKEND_PDFIUM),
+    }
+    generador = random.Random(semilla)
+    reporte = {}
+
+    for tipo, rutas in ((TIPO_VALE, rutas_vales), (TIPO_ORDEN, rutas_ordenes)):
+        rutas = sorted(rutas)
+        if muestra is not None and len(rutas) > muestra:
+            rutas = sorted(generador.sample(rutas, muestra))
+
+        tiempos = {backend: 0.0 for backend in extractores}
+        diferencias: Dict[str, int] = {}
+        ejemplos: Dict[str, List[Dict[str, Any]]] = {}
+        documentos_con_diferencias = 0
+        errores = []
+
+        for ruta in rutas:
+            resultados = {}
+            try:
+                for backend, por_tipo in extractores.items():
+                    inicio = time.perf_counter()
+                    resultados[backend] = por_tipo[tipo].extract_all_data(ruta)
+                    tiempos[backend] += time.perf_counter() - inicio
+            except Exception as e:
+                errores.append({'archivo': Path(ruta).name, 'error': str(e)})
+                continue
+
+            base = resultados[BACKEND_PDFPLUMBER]
+            rapido = resultados[BACKEND_PDFIUM]
+            hubo_diferencia = False
+            for campo in sorted((set(base) | set(rapido)) - _CAMPOS_IGNORADOS):
+                valor_base = _normalizar(base.get(campo))
+                valor_rapido = _normalizar(rapido.get(campo))
+                if valor_base == valor_rapido:
+                    continue
+                hubo_diferencia = True
+                diferencias[campo] = diferencias.get(campo, 0) + 1
+                lista = ejemplos.setdefault(campo, [])
+                if len(lista) < _EJEMPLOS_POR_CAMPO:
+                    lista.append({
+                        'archivo': Path(ruta).name,
+                        BACKEND_PDFPLUMBER: valor_base,
+                        BACKEND_PDFIUM: valor_rapido,
+                    })
+            documentos_con_diferencias += hubo_diferencia
+
+        comparados = len(rutas) - len(errores)
+        reporte[tipo] = {
+            'documentos': comparados,
+            'documentos_con_diferencias': documentos_con_diferencias,
+            'ms_promedio': {
+                backend: round(total * 1000 / comparados, 2) if comparados else 0.0
+                for backend, total in tiempos.items()
+            },
+            'diferencias_por_campo': dict(sorted(diferencias.items(), key=lambda x: -x[1])),
+            'ejemplos': ejemplos,
+            'errores': errores,
+        }
+
+    return reporte
+
+
+def imprimir_reporte(reporte: Dict[str, Any]):
+    """
+    Muestra en consola el reporte de comparar_backends.
+
+    Args:
+        reporte (Dict[str, Any]): Reporte devuelto por comparar_backends
+    """
+    print("🔬 COMPARACIÓN DE BACKENDS DE TEXTO (pdfplumber vs pdfium)")
+    print("=" * 60)
+    for tipo, datos in reporte.items():
+        tiempos = datos['ms_promedio']
+        base = tiempos.get(BACKEND_PDFPLUMBER, 0.0)
+        rapido = tiempos.get(BACKEND_PDFIUM, 0.0)
+        aceleracion = f"x{base / rapido:.1f}" if rapido else "-"
+        print(f"📄 {tipo}: {datos['documentos']} documento(s), "
+              f"{datos['documentos_con_diferencias']} con diferencias")
+        print(f"   ⏱️ pdfplumber: {base:.2f} ms | pdfium: {rapido:.2f} ms | {aceleracion}")
+        if not datos['diferencias_por_campo']:
+            print("   ✅ Sin diferencias a nivel de campo")
+        for campo, total in datos['diferencias_por_campo'].items():
+            print(f"   ⚠️ {campo}: {total} diferencia(s)")
+            for ejemplo in datos['ejemplos'].get(campo, []):
+                print(f"      {ejemplo['archivo']}: {ejemplo[BACKEND_PDFPLUMBER]!r} -> {ejemplo[BACKEND_PDFIUM]!r}")
+        for error in datos['errores']:
+            print(f"   ❌ {error['archivo']}: {error['error']}")
+    print("=" * 60)
+
+
+def main():
+    """Compara los backends sobre los archivos recientes de una carpeta."""
+    parser = argparse.ArgumentParser(description="Compara los backends de texto de AutoCarga")
+    parser.add_argument('carpeta', help="Carpeta con los PDFs de Vales y Órdenes")
+    parser.add_argument('--dias', type=int, default=30, help="Días hacia atrás a considerar")
+    parser.add_argument('--muestra', type=int, default=20, help="Archivos por tipo a comparar")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de la muestra aleatoria")
+    parser.add_argument('--json', dest='salida_json', help="Archivo donde guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    vales, ordenes = buscar_vales_y_ordenes_recientes(args.carpeta, args.dias)
+    reporte = comparar_backends(list(vales), list(ordenes), muestra=args.muestra, semilla=args.semilla)
+    imprimir_reporte(reporte)
+
+    if args.salida_json:
+        Path(args.salida_json).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 Reporte guardado en {args.salida_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Corpus sintético de Vales y Órdenes para medir los extractores sin la carpeta de Quiter.
+Genera con reportlab PDFs con el acomodo de los documentos reales (etiquetas,
+renglones de dos columnas, descripción en varias líneas y, en las órdenes, la
+tabla de cuentas contables con su cuadrícula) y guarda en verdad.json el valor
+esperado de cada campo, con las mismas llaves que devuelven los extractores.
+
+Los nombres de archivo siguen el formato de Quiter (15user_QRSVCMX_N.pdf y
+15user_QRSOPMX208_N.pdf), así que la carpeta también sirve para probar AutoCarga.
+
+Las órdenes siguen lo que OrdenDataExtractor sabe leer de los documentos reales,
+para que el benchmark mida regresiones y no diferencias del generador:
+    - Codigo_Banco: el pago sale siempre de la cuenta BAJIOMATEHUALA (BTC23); el
+      extractor no distingue otros códigos de banco (toma el primer texto con
+      forma de código, p. ej. 'TURA846' de 'FACTURA846...').
+    - Folio_Factura: cada proveedor usa el formato de folio que el extractor
+      espera (F- de 5 dígitos, CC 106xx o 4 dígitos). OLEKSEI no se genera en
+      órdenes: el extractor solo reconoce su folio real 5718.
+Brecha conocida que sí aparece en el benchmark: con el backend pdfium no hay
+tablas y el Nombre sale del texto, que corta los nombres sin sufijo de sociedad
+('FERRETERIA EL TORNILLO' -> 'FERRETERIA').
+
+Uso:
+    python -m src.buscarapp.autocarga.corpus_sintetico <carpeta> [--vales 50] [--ordenes 50] [--semilla 0]
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+try:
+    from .extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from .lector_carpeta import PATRON_VALES, PATRON_ORDENES
+except ImportError:
+    from extraccion_paralela import TIPO_VALE, TIPO_ORDEN
+    from lector_carpeta import PATRON_VALES, PATRON_ORDENES
+
+# Archivo con los valores esperados, dentro de la carpeta del corpus
+ARCHIVO_VERDAD = 'verdad.json'
+
+# Proveedores: (nombre, cuenta, prefijo del folio de factura en la explicación,
+# rango del folio con el formato que el extractor espera para ese proveedor)
+PROVEEDORES = [
+    ('OLEKSEI-MX SA DE CV', '60309', 'OLEK ', (5000, 5999)),
+    ('COMERCIAL PAPELERA DE MATEHUALA SA DE CV', '60112', 'F-', (10000, 99999)),
+    ('SERVICIO NAVA MEDRANO SA DE CV', '60451', 'CC ', (10610, 10699)),
+    ('GASOLINERA LAS PALMAS SA DE CV', '60277', 'GLP ', (1000, 1999)),
+    ('FERRETERIA EL TORNILLO', '60590', 'FT ', (3000, 6999)),
+    ('IMPRESOS Y SUMINISTROS DEL CENTRO SA DE CV', '60733', 'ISC ', (4000, 4999)),
+]
+
+# En órdenes no va OLEKSEI (ver docstring del módulo)
+PROVEEDORES_ORDEN = [proveedor for proveedor in PROVEEDORES if not proveedor[0].startswith('OLEKSEI')]
+
+# Tipo de vale: (texto en el PDF, abreviatura esperada)
+TIPOS_VALE = [
+    ('CECOMPRA', 'CE'),
+    ('GAVALE GASOLINA', 'GA'),
+    ('CICONSUMIBLES', 'CI'),
+    ('SETSERVICIO EXTERNO', 'SET'),
+]
+
+# (texto en el PDF, valor esperado) de departamento, sucursal y marca
+DEPARTAMENTOS = [('6ADMINISTRACION', '6 ADMINISTRACION'), ('3SERVICIO', '3 SERVICIO'),
+                 ('4REFACCIONES', '4 REFACCIONES'), ('2VENTAS', '2 VENTAS')]
+SUCURSALES = [('15NISSANMATEHUALA', '15 NISSAN MATEHUALA'), ('16NISSANRIOVERDE', '16 NISSAN RIOVERDE')]
+MARCAS = [('2-NISSAN', '2 - NISSAN'), ('5-RENAULT', '5 - RENAULT')]
+
+# Descripciones en una o dos líneas (como las imprime Quiter)
+DESCRIPCIONES = [
+    ['SERVICIO DE MARKETING Y PUBLICIDAD'],
+    ['SERVICIO DE MARKETING Y PUBLICIDAD', 'DE ACUERDO A CONTRATO'],
+    ['GASOLINA MAGNA PARA UNIDADES'],
+    ['DIESEL PARA GRUA DE SERVICIO'],
+    ['HERRAMIENTAS PARA TALLER'],
+    ['IMPRESORA LASER PARA RECEPCION'],
+    ['AMENIDADES PARA CLIENTES', 'EXPERIENCIA NISSAN'],
+]
+
+# Cuenta de la que salen los pagos (renglón BAJIOMATEHUALA de la póliza)
+CODIGO_BANCO = 'BTC23'
+
+_UNIDADES = ['', 'UN', 'DOS', 'TRES', 'CUATRO', 'CINCO', 'SEIS', 'SIETE', 'OCHO', 'NUEVE', 'DIEZ',
+             'ONCE', 'DOCE', 'TRECE', 'CATORCE', 'QUINCE', 'DIECISEIS', 'DIECISIETE', 'DIECIOCHO',
+             'DIECINUEVE', 'VEINTE', 'VEINTIUN', 'VEINTIDOS', 'VEINTITRES', 'VEINTICUATRO',
+             'VEINTICINCO', 'VEINTISEIS', 'VEINTISIETE', 'VEINTIOCHO', 'VEINTINUEVE']
+_DECENAS = ['', '', '', 'TREINTA', 'CUARENTA', 'CINCUENTA', 'SESENTA', 'SETENTA', 'OCHENTA', 'NOVENTA']
+_CENTENAS = ['', 'CIENTO', 'DOSCIENTOS', 'TRESCIENTOS', 'CUATROCIENTOS', 'QUINIENTOS',
+             'SEISCIENTOS', 'SETECIENTOS', 'OCHOCIENTOS', 'NOVECIENTOS']
+
+
+def _centenas_a_letras(numero: int) -> str:
+    """Letras de un número de 0 a 999."""
+    if numero == 100:
+        return 'CIEN'
+    centenas, resto = divmod(numero, 100)
+    partes = [_CENTENAS[centenas]] if centenas else []
+    if resto < 30:
+        if resto:
+            partes.append(_UNIDADES[resto])
+    else:
+        decenas, unidades = divmod(resto, 10)
+        partes.append(_DECENAS[decenas] + (f" Y {_UNIDADES[unidades]}" if unidades else ''))
+    return ' '.join(partes)
+
+
+def importe_en_letras(importe: float) -> str:
+    """
+    Importe en letras como lo imprime Quiter.
+
+    Args:
+        importe (float): Importe menor a mil millones
+
+    Returns:
+        str: P. ej. 'MIL DOSCIENTOS TREINTA Y CUATRO PESOS 50/100 MN'
+    """
+    enteros = int(importe)
+    centavos = int(round((importe - enteros) * 100))
+    millones, resto = divmod(enteros, 1_000_000)
+    miles, unidades = divmod(resto, 1000)
+    partes = []
+    if millones:
+        partes.append('UN MILLON' if millones == 1 else f"{_centenas_a_letras(millones)} MILLONES")
+    if miles:
+        partes.append('MIL' if miles == 1 else f"{_centenas_a_letras(miles)} MIL")
+    if unidades:
+        partes.append(_centenas_a_letras(unidades))
+    letras = ' '.join(partes) if partes else 'CERO'
+    return f"{letras} {'PESO' if enteros == 1 else 'PESOS'} {centavos:02d}/100 MN"
+
+
+def _importe(generador: random.Random) -> Tuple[float, str]:
+    """Importe aleatorio y su formato con separador de miles."""
+    importe = round(generador.uniform(80, 95000), 2)
+    return importe, f"{importe:,.2f}"
+
+
+def _fecha(generador: random.Random) -> str:
+    """Fecha dd/mm/aaaa aleatoria."""
+    return f"{generador.randint(1, 28):02d}/{generador.randint(1, 12):02d}/{generador.choice([2024, 2025])}"
+
+
+def generar_vale(ruta: str, generador: random.Random, consecutivo: int) -> Dict[str, Optional[str]]:
+    """
+    Genera un PDF de Vale.
+
+    Args:
+        ruta (str): Archivo PDF a crear
+        generador (random.Random): Fuente de los datos aleatorios
+        consecutivo (int): Consecutivo del vale (define su número)
+
+    Returns:
+        Dict: Valores esperados con las llaves de PDFDataExtractor.extract_all_data
+    """
+    nombre, cuenta, prefijo_folio, _ = generador.choice(PROVEEDORES)
+    tipo_texto, tipo = generador.choice(TIPOS_VALE)
+    departamento_texto, departamento = generador.choice(DEPARTAMENTOS)
+    sucursal_texto, sucursal = generador.choice(SUCURSALES)
+    marca_texto, marca = generador.choice(MARCAS)
+    descripcion = generador.choice(DESCRIPCIONES)
+    _, total = _importe(generador)
+    numero = f"V{100000 + consecutivo}"
+    referencia = str(generador.randint(1000, 99999))
+    fecha = _fecha(generador)
+    responsable = str(generador.randint(100000, 999999))
+    folio = str(generador.randint(1000, 99999))
+    no_documento = f"F-{folio}" if prefijo_folio == 'F-' else folio
+
+    pdf = canvas.Canvas(ruta, pagesize=letter, invariant=1)
+    pdf.setFont('Helvetica-Bold', 13)
+    pdf.drawString(50, 745, "Vale de Caja")
+    pdf.setFont('Helvetica', 8)
+    pdf.drawRightString(562, 745, "TCM MATEHUALA - Página 1 de 1")
+
+    pdf.setFont('Helvetica', 9)
+    renglones = [
+        (f"Número: {numero}", f"Fecha: {fecha}"),
+        (f"Proveedor: {nombre} Tipo de Vale: {tipo_texto}", None),
+        (f"Referencia: {referencia}", f"Cuenta: {cuenta}"),
+        (f"Departamento: {departamento_texto}", f"Sucursal: {sucursal_texto}"),
+        (f"Marca: {marca_texto}", f"Responsable: {responsable}"),
+        (f"NºDocumento: {no_documento}", f"ValorVale: {total}"),
+        ("Descripción:", None),
+    ]
+    y = 715
+    for izquierda, derecha in renglones:
+        pdf.drawString(50, y, izquierda)
+        if derecha:
+            pdf.drawString(330, y, derecha)
+        y -= 16
+    for linea in descripcion:
+        pdf.drawString(50, y, linea)
+        y -= 16
+    pdf.line(50, y - 30, 250, y - 30)
+    pdf.drawString(50, y - 42, "Firma de autorización")
+    pdf.save()
+
+    return {
+        'Nombre': nombre, 'Numero': numero, 'Referencia': referencia, 'Fecha': fecha,
+        'Cuenta': cuenta, 'Departamento': departamento, 'Sucursal': sucursal, 'Marca': marca,
+        'Responsable': responsable, 'Tipo De Vale': tipo, 'No Documento': no_documento,
+        'Total': total, 'Descripcion': ' '.join(descripcion), 'Codigo': None,
+    }
+
+
+def generar_orden(ruta: str, generador: random.Random, consecutivo: int) -> Dict[str, Optional[str]]:
+    """
+    Genera un PDF de Orden de pago con su tabla de cuentas contables.
+
+    Args:
+        ruta (str): Archivo PDF a crear
+        generador (random.Random): Fuente de los datos aleatorios
+        consecutivo (int): Consecutivo de la orden (define su referencia de movimiento)
+
+    Returns:
+        Dict: Valores esperados con las llaves de OrdenDataExtractor.extract_all_data
+        (sin 'archivo_original' ni 'ruta_completa')
+    """
+    nombre, cuenta, prefijo_folio, rango_folio = generador.choice(PROVEEDORES_ORDEN)
+    importe, importe_texto = _importe(generador)
+    letras = importe_en_letras(importe)
+    ref_movimiento = str(8000000 + consecutivo)
+    banco = CODIGO_BANCO
+    folio = str(generador.randint(*rango_folio))
+    cuenta_mayor = f"2110000{generador.randint(0, 9999):04d}"
+
+    pdf = canvas.Canvas(ruta, pagesize=letter, invariant=1)
+    pdf.setFont('Helvetica-Bold', 13)
+    pdf.drawString(40, 745, "Orden de Pago")
+    pdf.setFont('Helvetica', 9)
+    renglones = [
+        (f"Ref.Movimiento: {ref_movimiento}", f"Fecha: {_fecha(generador)}"),
+        (f"Tercero: Cuenta: {cuenta} Nombre: {nombre}", None),
+        (f"Importe: {importe_texto}", None),
+        (f"Importeenletras: {letras}", None),
+    ]
+    y = 715
+    for izquierda, derecha in renglones:
+        pdf.drawString(40, y, izquierda)
+        if derecha:
+            pdf.drawString(400, y, derecha)
+        y -= 16
+
+    filas = [['C MAYOR', 'CTA.', 'NOMBRECLIENTE', 'DEBE', 'HABER', 'TIPO', 'DESCRIPCION', 'EXPLICACION']]
+    filas.append([cuenta_mayor, cuenta, nombre, importe_texto, '0.00', 'FACTURA',
+                  f"FACTURA{generador.randint(100000, 999999)}", f"{prefijo_folio}{folio}"])
+    # Renglones adicionales de la póliza (el número varía, como en los documentos reales)
+    for _ in range(generador.randint(0, 4)):
+        filas.append([f"1180000{generador.randint(0, 9999):04d}", str(generador.randint(11000, 99999)),
+                      'IVA ACREDITABLE', f"{generador.uniform(10, 5000):,.2f}", '0.00', 'IVA', '', ''])
+    filas.append(['12020000000', banco, 'BAJIOMATEHUALA', '0.00', importe_texto, 'TRANSFERENCIA', '', ''])
+    tabla = Table(filas, colWidths=[56, 34, 180, 48, 46, 58, 62, 48])
+    tabla.setStyle(TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 6),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ]))
+    _, alto = tabla.wrapOn(pdf, 532, 600)
+    tabla.drawOn(pdf, 40, y - 10 - alto)
+    pdf.save()
+
+    return {
+        'Ref_Movimiento': ref_movimiento, 'Cuenta': cuenta, 'Nombre': nombre, 'Importe': importe_texto,
+        'Importe_en_letras': letras, 'Codigo_Banco': banco, 'Folio_Factura': folio,
+        'cuentas_mayores': cuenta_mayor,
+    }
+
+
+def generar_corpus(carpeta: str, vales: int = 50, ordenes: int = 50, semilla: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Genera el corpus y su verdad.json. Con la misma semilla se obtienen los mismos PDFs.
+
+    Args:
+        carpeta (str): Carpeta de destino (se crea si no existe)
+        vales (int): Número de Vales
+        ordenes (int): Número de Órdenes
+        semilla (int): Semilla de los datos aleatorios
+
+    Returns:
+        Dict[str, Dict]: Por nombre de archivo: {'tipo': 'vale' u 'orden', 'campos': {...}}
+    """
+    destino = Path(carpeta)
+    destino.mkdir(parents=True, exist_ok=True)
+    generador = random.Random(semilla)
+    verdad = {}
+    for i in range(vales):
+        nombre = f"15user_{PATRON_VALES}_{1000 + i}.pdf"
+        verdad[nombre] = {'tipo': TIPO_VALE, 'campos': generar_vale(str(destino / nombre), generador, i)}
+    for i in range(ordenes):
+        nombre = f"15user_{PATRON_ORDENES}_{2000 + i}.pdf"
+        verdad[nombre] = {'tipo': TIPO_ORDEN, 'campos': generar_orden(str(destino / nombre), generador, i)}
+    (destino / ARCHIVO_VERDAD).write_text(json.dumps(verdad, ensure_ascii=False, indent=2), encoding='utf-8')
+    return verdad
+
+
+def cargar_verdad(carpeta: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Lee la verdad.json de un corpus generado.
+
+    Raises:
+        FileNotFoundError: Si la carpeta no tiene verdad.json
+    """
+    return json.loads((Path(carpeta) / ARCHIVO_VERDAD).read_text(encoding='utf-8'))
+
+
+def main(argv: Optional[List[str]] = None):
+    """Genera un corpus sintético en la carpeta indicada."""
+    parser = argparse.ArgumentParser(description="Genera PDFs sintéticos de Vales y Órdenes con sus valores esperados")
+    parser.add_argument('carpeta', help="Carpeta de destino")
+    parser.add_argument('--vales', type=int, default=50, help="Número de Vales (default: 50)")
+    parser.add_argument('--ordenes', type=int, default=50, help="Número de Órdenes (default: 50)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos aleatorios")
+    args = parser.parse_args(argv)
+
+    verdad = generar_corpus(args.carpeta, args.vales, args.ordenes, args.semilla)
+    print(f"📄 {len(verdad)} PDF(s) generados en {args.carpeta} (valores esperados en {ARCHIVO_VERDAD})")
+
+
+if __name__ == "__main__":
+    main()
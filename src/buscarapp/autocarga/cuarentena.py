@@ -0,0 +1,84 @@
+"""
+Registro de archivos en cuarentena de AutoCarga.
+Guarda en JSON los PDFs que colgaron, agotaron la memoria o hicieron terminar a
+su proceso de extracción, con el motivo, para que las siguientes corridas no los
+vuelvan a intentar mientras no cambien (misma ruta, tamaño y fecha).
+"""
+
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from .bitacora_corrida import llave_archivo
+except ImportError:
+    from bitacora_corrida import llave_archivo
+
+
+class RegistroCuarentena:
+    """Archivos en cuarentena, por ruta normalizada."""
+
+    def __init__(self, ruta_archivo: Optional[str] = None):
+        """
+        Args:
+            ruta_archivo (str): Archivo JSON (default: junto a la caché de extracciones)
+        """
+        if ruta_archivo is None:
+            try:
+                from .cache_extraccion import ruta_cache_por_defecto
+            except ImportError:
+                from cache_extraccion import ruta_cache_por_defecto
+            ruta_archivo = ruta_cache_por_defecto().parent / 'autocarga_cuarentena.json'
+        self.ruta_archivo = Path(ruta_archivo)
+        self._lock = threading.Lock()
+        self._entradas: Dict[str, Dict[str, Any]] = self._leer()
+
+    def _leer(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            datos = json.loads(self.ruta_archivo.read_text(encoding='utf-8'))
+            return {entrada['ruta']: entrada for entrada in datos}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def motivo(self, ruta: str) -> Optional[str]:
+        """
+        Motivo de la cuarentena si el archivo está en ella y no ha cambiado desde entonces.
+
+        Args:
+            ruta (str): Ruta del archivo
+        """
+        llave = llave_archivo(ruta)
+        if llave is None:
+            return None
+        entrada = self._entradas.get(llave[0])
+        if entrada is None or (entrada.get('tamano'), entrada.get('mtime_ns')) != llave[1:]:
+            return None
+        return entrada.get('motivo')
+
+    def agregar(self, tipo: str, ruta: str, motivo: str):
+        """
+        Pone un archivo en cuarentena y guarda el registro.
+
+        Args:
+            tipo (str): 'vale' u 'orden'
+            ruta (str): Ruta del archivo
+            motivo (str): Por qué se puso en cuarentena
+        """
+        llave = llave_archivo(ruta)
+        if llave is None:
+            return
+        with self._lock:
+            self._entradas[llave[0]] = {
+                'ruta': llave[0], 'tipo': tipo, 'tamano': llave[1], 'mtime_ns': llave[2],
+                'motivo': motivo, 'fecha': datetime.now().isoformat(timespec='seconds'),
+            }
+            self.ruta_archivo.parent.mkdir(parents=True, exist_ok=True)
+            self.ruta_archivo.write_text(
+                json.dumps(list(self._entradas.values()), ensure_ascii=False, indent=2), encoding='utf-8'
+            )
+
+    def entradas(self) -> List[Dict[str, Any]]:
+        """Todas las entradas registradas."""
+        return list(self._entradas.values())
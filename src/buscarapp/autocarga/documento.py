@@ -0,0 +1,181 @@
+"""
+Documento PDF leído una sola vez.
+Guarda el texto, las tablas y las palabras que necesitan los extractores para
+que cada archivo se abra y se decodifique una sola vez por extracción.
+
+El texto puede obtenerse con dos backends:
+- 'pdfplumber': análisis de layout de pdfplumber más el texto de PyPDF2 (default)
+- 'pdfium': texto crudo de pypdfium2, mucho más rápido, sin tablas ni palabras
+"""
+
+import io
+from pathlib import Path
+from typing import List, Optional
+
+import pdfplumber
+
+try:
+    from .tiempos_etapas import medir, ETAPA_APERTURA, ETAPA_TEXTO
+except ImportError:
+    from tiempos_etapas import medir, ETAPA_APERTURA, ETAPA_TEXTO
+
+BACKEND_PDFPLUMBER = 'pdfplumber'
+BACKEND_PDFIUM = 'pdfium'
+BACKENDS_TEXTO = (BACKEND_PDFPLUMBER, BACKEND_PDFIUM)
+
+
+def validar_backend(backend: str) -> str:
+    """
+    Verifica que el backend de texto sea uno de los soportados.
+
+    Args:
+        backend (str): 'pdfplumber' o 'pdfium'
+
+    Returns:
+        str: El mismo backend
+
+    Raises:
+        ValueError: Si el backend no existe
+    """
+    if backend not in BACKENDS_TEXTO:
+        raise ValueError(f"Backend de texto desconocido: {backend} (opciones: {', '.join(BACKENDS_TEXTO)})")
+    return backend
+
+
+def texto_de_pagina_pdfplumber(pagina) -> str:
+    """Texto de una página de pdfplumber tal como se acumula en DocumentoPDF.texto."""
+    texto = pagina.extract_text()
+    return texto + "\n" if texto else ""
+
+
+def texto_de_pagina_pdfium(textpage) -> str:
+    """Texto de una página de pypdfium2 tal como se acumula en DocumentoPDF.texto."""
+    texto = textpage.get_text_range()
+    # pdfium separa líneas con \r\n; los patrones esperan \n
+    return texto.replace('\r\n', '\n').replace('\r', '\n') + "\n" if texto else ""
+
+
+class DocumentoPDF:
+    """
+    Contenido ya extraído de un PDF.
+
+    Atributos:
+        ruta (str): Ruta del archivo de origen
+        texto (str): Texto de pdfplumber (análisis de layout) o de pypdfium2
+        texto_con_espacios (str): Texto de PyPDF2, que conserva mejor los espacios
+            (con el backend 'pdfium' es el mismo texto de pypdfium2)
+        tablas (List): Tablas de pdfplumber de todas las páginas, en orden
+        palabras (List): Cajas de palabras de pdfplumber por página (solo si se solicitan)
+        backend (str): Backend con el que se obtuvo el texto
+    """
+
+    def __init__(self, ruta: str, texto: str = "", texto_con_espacios: str = "",
+                 tablas: Optional[List] = None, palabras: Optional[List] = None,
+                 backend: str = BACKEND_PDFPLUMBER):
+        self.ruta = ruta
+        self.texto = texto
+        self.texto_con_espacios = texto_con_espacios
+        self.tablas = tablas or []
+        self.palabras = palabras or []
+        self.backend = backend
+
+    @classmethod
+    def desde_archivo(cls, ruta: str, con_espacios: bool = True, con_tablas: bool = False,
+                      con_palabras: bool = False, backend: str = BACKEND_PDFPLUMBER,
+                      max_paginas: Optional[int] = None) -> 'DocumentoPDF':
+        """
+        Lee el archivo una sola vez y genera todas las representaciones pedidas
+        a partir de los mismos bytes en memoria. Texto, tablas y palabras salen
+        del mismo recorrido de páginas de pdfplumber.
+
+        Con el backend 'pdfium' solo se obtiene el texto crudo de pypdfium2;
+        las tablas y las palabras quedan vacías y los extractores usan sus
+        alternativas basadas en texto.
+
+        Args:
+            ruta (str): Ruta del archivo PDF
+            con_espacios (bool): Si también se genera el texto de PyPDF2
+            con_tablas (bool): Si se extraen las tablas de cada página
+            con_palabras (bool): Si se extraen las cajas de palabras de cada página
+            backend (str): 'pdfplumber' (default) o 'pdfium'
+            max_paginas (int): Leer solo las primeras páginas (None: todas)
+
+        Returns:
+            DocumentoPDF: Documento con el contenido extraído
+        """
+        validar_backend(backend)
+        with medir(ETAPA_APERTURA):
+            datos = Path(ruta).read_bytes()
+        documento = cls(ruta, backend=backend)
+        if backend == BACKEND_PDFIUM:
+            documento.texto = cls._texto_pdfium(datos, max_paginas)
+            documento.texto_con_espacios = documento.texto
+            return documento
+
+        documento._leer_pdfplumber(datos, con_tablas, con_palabras, max_paginas)
+        if con_espacios:
+            documento.texto_con_espacios = cls._texto_pypdf2(datos, max_paginas)
+        return documento
+
+    def _leer_pdfplumber(self, datos: bytes, con_tablas: bool, con_palabras: bool,
+                         max_paginas: Optional[int] = None):
+        """Recorre las páginas una vez y guarda texto, tablas y palabras."""
+        text = ""
+        try:
+            with medir(ETAPA_APERTURA):
+                pdf = pdfplumber.open(io.BytesIO(datos))
+            with pdf, medir(ETAPA_TEXTO):
+                for page in pdf.pages[:max_paginas]:
+                    text += texto_de_pagina_pdfplumber(page)
+                    if con_tablas:
+                        try:
+                            self.tablas.extend(page.extract_tables())
+                        except Exception as e:
+                            print(f"Error al extraer tablas: {e}")
+                    if con_palabras:
+                        self.palabras.append(page.extract_words())
+        except Exception as e:
+            print(f"Error al leer el PDF: {e}")
+            text = ""
+        self.texto = text
+
+    @staticmethod
+    def _texto_pypdf2(datos: bytes, max_paginas: Optional[int] = None) -> str:
+        """Extrae el texto de todas las páginas con PyPDF2."""
+        text = ""
+        try:
+            import PyPDF2
+            with medir(ETAPA_APERTURA):
+                pdf_reader = PyPDF2.PdfReader(io.BytesIO(datos))
+            with medir(ETAPA_TEXTO):
+                for page in list(pdf_reader.pages)[:max_paginas]:
+                    page_text = page.extract_text()
+                    if page_text:
+                        text += page_text + "\n"
+        except Exception as e:
+            print(f"Error al leer el PDF con PyPDF2: {e}")
+            return ""
+        return text
+
+    @staticmethod
+    def _texto_pdfium(datos: bytes, max_paginas: Optional[int] = None) -> str:
+        """Extrae el texto crudo de todas las páginas con pypdfium2."""
+        text = ""
+        try:
+            import pypdfium2 as pdfium
+            with medir(ETAPA_APERTURA):
+                pdf = pdfium.PdfDocument(datos)
+            try:
+                with medir(ETAPA_TEXTO):
+                    for indice in range(len(pdf) if max_paginas is None else min(max_paginas, len(pdf))):
+                        page = pdf[indice]
+                        textpage = page.get_textpage()
+                        text += texto_de_pagina_pdfium(textpage)
+                        textpage.close()
+                        page.close()
+            finally:
+                pdf.close()
+        except Exception as e:
+            print(f"Error al leer el PDF con pypdfium2: {e}")
+            return ""
+        return text
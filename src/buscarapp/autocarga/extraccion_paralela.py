@@ -0,0 +1,448 @@
+"""
+Motor de extracción paralela para AutoCarga.
+Reparte la extracción de Vales y Órdenes entre varios procesos, conservando
+el orden de los resultados, el reporte de progreso y la cancelación.
+
+Con un tiempo máximo por archivo o un límite de memoria, cada proceso trabajador
+queda aislado: si un PDF lo cuelga, lo agota o lo hace terminar, ese proceso se
+reemplaza, el archivo se reporta en cuarentena con el motivo y la corrida sigue.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing.connection import wait as esperar_conexiones
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Any
+
+from .documento import BACKEND_PDFPLUMBER
+from .extractor import PDFDataExtractor
+from .extractor_orden import OrdenDataExtractor
+from .tiempos_etapas import TiemposEtapas, medir_documento, ETAPA_EXTRACCION, ETAPA_SONDEO
+
+TIPO_VALE = 'vale'
+TIPO_ORDEN = 'orden'
+# Tarea que solo obtiene el número de un vale (PDFDataExtractor.sondear_numero)
+TIPO_SONDEO_VALE = 'sondeo_vale'
+
+# Tiempo máximo de extracción por archivo (s) y memoria máxima por proceso (MB)
+TIMEOUT_ARCHIVO_S = 120
+MEMORIA_MAXIMA_MB = 1024
+
+# Extractores propios de cada proceso trabajador (se crean en el inicializador)
+_extractores_proceso: Dict[str, Any] = {}
+
+
+def workers_por_defecto() -> int:
+    """
+    Número de procesos sugerido: todos los núcleos menos uno para la interfaz.
+
+    Returns:
+        int: Número de procesos (mínimo 1)
+    """
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _inicializar_proceso(backend_texto: str = BACKEND_PDFPLUMBER, plantilla_vales=None):
+    """Crea los extractores una sola vez por proceso trabajador."""
+    _extractores_proceso[TIPO_VALE] = PDFDataExtractor(backend_texto=backend_texto, plantilla=plantilla_vales)
+    _extractores_proceso[TIPO_ORDEN] = OrdenDataExtractor(backend_texto=backend_texto)
+
+
+def _extraer_en_proceso(tipo: str, ruta: str) -> Tuple[Tuple[Optional[Dict[str, Any]], Optional[str]], float,
+                                                        Dict[str, float]]:
+    """
+    Extrae un documento dentro de un proceso trabajador.
+
+    Returns:
+        Tuple: ((datos, mensaje_error), segundos, segundos_por_etapa)
+    """
+    if not _extractores_proceso:
+        _inicializar_proceso()
+    return _extraer_medido(_extractores_proceso, tipo, ruta)
+
+
+def _extraer_medido(extractores: Dict[str, Any], tipo: str, ruta: str
+                    ) -> Tuple[Tuple[Optional[Dict[str, Any]], Optional[str]], float, Dict[str, float]]:
+    """
+    Ejecuta la extracción y mide su duración total (sin la espera en la cola del
+    pool) y la de cada etapa (ver tiempos_etapas.medir).
+    """
+    inicio = time.perf_counter()
+    with medir_documento() as etapas:
+        resultado = _extraer_con(extractores, tipo, ruta)
+    return resultado, time.perf_counter() - inicio, etapas
+
+
+def _extraer_con(extractores: Dict[str, Any], tipo: str, ruta: str) -> Tuple[Optional[Any], Optional[str]]:
+    """Ejecuta la tarea capturando cualquier error como texto."""
+    try:
+        return _ejecutar_tarea(extractores, tipo, ruta), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _ejecutar_tarea(extractores: Dict[str, Any], tipo: str, ruta: str) -> Any:
+    """Extracción completa del documento o, para TIPO_SONDEO_VALE, solo el número del vale."""
+    if tipo == TIPO_SONDEO_VALE:
+        return extractores[TIPO_VALE].sondear_numero(ruta)
+    return extractores[tipo].extract_all_data(ruta)
+
+
+def _limitar_memoria(memoria_maxima_mb: Optional[int]) -> bool:
+    """
+    Limita la memoria del proceso actual: en Windows con un Job object y en POSIX
+    con RLIMIT_AS (sumando lo que el proceso ya ocupa, que con fork hereda del padre).
+    Al superarlo, las asignaciones fallan con MemoryError.
+
+    Returns:
+        bool: Si se pudo aplicar el límite
+    """
+    if not memoria_maxima_mb:
+        return False
+    limite = int(memoria_maxima_mb) * 1024 * 1024
+    try:
+        if sys.platform == 'win32':
+            return _limitar_memoria_windows(limite)
+        import resource
+        try:
+            with open('/proc/self/statm') as statm:
+                limite += int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError):
+            pass
+        resource.setrlimit(resource.RLIMIT_AS, (limite, limite))
+        return True
+    except Exception as e:
+        print(f"⚠️ No se pudo limitar la memoria del proceso de extracción: {e}")
+        return False
+
+
+def _limitar_memoria_windows(limite: int) -> bool:
+    """Asigna el proceso actual a un Job object con límite de memoria por proceso."""
+    import ctypes
+    from ctypes import wintypes
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(nombre, ctypes.c_ulonglong) for nombre in (
+            'ReadOperationCount', 'WriteOperationCount', 'OtherOperationCount',
+            'ReadTransferCount', 'WriteTransferCount', 'OtherTransferCount')]
+
+    class JOBOBJECT_BASIC_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [('PerProcessUserTimeLimit', ctypes.c_int64),
+                    ('PerJobUserTimeLimit', ctypes.c_int64),
+                    ('LimitFlags', wintypes.DWORD),
+                    ('MinimumWorkingSetSize', ctypes.c_size_t),
+                    ('MaximumWorkingSetSize', ctypes.c_size_t),
+                    ('ActiveProcessLimit', wintypes.DWORD),
+                    ('Affinity', ctypes.c_size_t),
+                    ('PriorityClass', wintypes.DWORD),
+                    ('SchedulingClass', wintypes.DWORD)]
+
+    class JOBOBJECT_EXTENDED_LIMIT_INFORMATION(ctypes.Structure):
+        _fields_ = [('BasicLimitInformation', JOBOBJECT_BASIC_LIMIT_INFORMATION),
+                    ('IoInfo', IO_COUNTERS),
+                    ('ProcessMemoryLimit', ctypes.c_size_t),
+                    ('JobMemoryLimit', ctypes.c_size_t),
+                    ('PeakProcessMemoryUsed', ctypes.c_size_t),
+                    ('PeakJobMemoryUsed', ctypes.c_size_t)]
+
+    JOB_OBJECT_LIMIT_PROCESS_MEMORY = 0x100
+    JobObjectExtendedLimitInformation = 9
+
+    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    job = kernel32.CreateJobObjectW(None, None)
+    if not job:
+        raise ctypes.WinError(ctypes.get_last_error())
+    info = JOBOBJECT_EXTENDED_LIMIT_INFORMATION()
+    info.BasicLimitInformation.LimitFlags = JOB_OBJECT_LIMIT_PROCESS_MEMORY
+    info.ProcessMemoryLimit = limite
+    if not kernel32.SetInformationJobObject(wintypes.HANDLE(job), JobObjectExtendedLimitInformation,
+                                            ctypes.byref(info), ctypes.sizeof(info)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    if not kernel32.AssignProcessToJobObject(wintypes.HANDLE(job), wintypes.HANDLE(kernel32.GetCurrentProcess())):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return True
+
+
+def _bucle_trabajador(conexion, backend_texto: str, plantilla_vales, memoria_maxima_mb: Optional[int]):
+    """
+    Proceso trabajador aislado: recibe (tipo, ruta) por la conexión y responde
+    ((datos, error), segundos, motivo_cuarentena, segundos_por_etapa) hasta recibir None.
+    """
+    _inicializar_proceso(backend_texto, plantilla_vales)
+    _limitar_memoria(memoria_maxima_mb)
+    while True:
+        try:
+            tarea = conexion.recv()
+        except (EOFError, OSError):
+            break
+        if tarea is None:
+            break
+        tipo, ruta = tarea
+        inicio = time.perf_counter()
+        motivo = None
+        with medir_documento() as etapas:
+            try:
+                resultado = (_ejecutar_tarea(_extractores_proceso, tipo, ruta), None)
+            except MemoryError:
+                motivo = f"superó el límite de memoria ({memoria_maxima_mb} MB)"
+                resultado = (None, motivo)
+            except Exception as e:
+                resultado = (None, str(e))
+        conexion.send((resultado, time.perf_counter() - inicio, motivo, etapas))
+    conexion.close()
+
+
+class _TrabajadorAislado:
+    """Proceso trabajador con su conexión y la tarea que está extrayendo."""
+
+    def __init__(self, contexto, backend_texto: str, plantilla_vales, memoria_maxima_mb: Optional[int]):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(
+            target=_bucle_trabajador, name="autocarga-trabajador", daemon=True,
+            args=(extremo, backend_texto, plantilla_vales, memoria_maxima_mb)
+        )
+        self.proceso.start()
+        extremo.close()
+        self.tarea: Optional[int] = None
+        self.inicio = 0.0
+
+    def enviar(self, idx: int, tipo: str, ruta: str):
+        """Asigna una tarea al trabajador."""
+        self.conexion.send((tipo, ruta))
+        self.tarea = idx
+        self.inicio = time.perf_counter()
+
+    def detener(self, forzar: bool = False):
+        """Termina el proceso: pidiéndole salir o, si está ocupado o colgado, matándolo."""
+        if not forzar:
+            try:
+                self.conexion.send(None)
+            except (OSError, ValueError):
+                forzar = True
+        if forzar:
+            self.proceso.kill()
+        self.proceso.join(timeout=5)
+        if self.proceso.is_alive():
+            self.proceso.kill()
+            self.proceso.join()
+        self.conexion.close()
+
+
+class ExtraccionParalela:
+    """
+    Ejecuta la extracción de una lista de tareas (tipo, ruta) en un pool de procesos.
+    Con workers <= 1 la extracción se hace en el mismo proceso con la misma interfaz.
+    """
+
+    def __init__(self, workers: int = 1, extractores: Optional[Dict[str, Any]] = None,
+                 backend_texto: str = BACKEND_PDFPLUMBER, timeout_archivo: Optional[float] = None,
+                 memoria_maxima_mb: Optional[int] = None,
+                 al_poner_en_cuarentena: Optional[Callable[[str, str, str], None]] = None,
+                 tiempos: Optional[TiemposEtapas] = None):
+        """
+        Args:
+            workers (int): Número de procesos de extracción
+            extractores (Dict): Extractores a usar en modo secuencial, por tipo (la
+                plantilla de regiones del de vales también se usa en cada proceso)
+            backend_texto (str): Backend de texto de los extractores de cada proceso
+            timeout_archivo (float): Segundos máximos por archivo. Con este valor o con
+                memoria_maxima_mb, la extracción se hace en procesos aislados (aun con
+                un solo worker)
+            memoria_maxima_mb (int): Memoria máxima de cada proceso trabajador
+            al_poner_en_cuarentena: Función (tipo, ruta, motivo) llamada por cada archivo
+                que colgó, agotó la memoria o terminó su proceso trabajador
+            tiempos (TiemposEtapas): Donde registrar la duración de cada archivo y de sus
+                etapas (apertura, texto, regex por campo, post-proceso); los sondeos de
+                vales se registran completos en la etapa 'sondeo'
+        """
+        self.workers = max(1, int(workers or 1))
+        self.backend_texto = backend_texto
+        self.timeout_archivo = timeout_archivo
+        self.memoria_maxima_mb = memoria_maxima_mb
+        self.al_poner_en_cuarentena = al_poner_en_cuarentena
+        self.tiempos = tiempos
+        self.extractores = extractores or {
+            TIPO_VALE: PDFDataExtractor(backend_texto=backend_texto),
+            TIPO_ORDEN: OrdenDataExtractor(backend_texto=backend_texto),
+        }
+
+    def _plantilla_vales(self):
+        """Plantilla de regiones del extractor de vales, para los procesos trabajadores."""
+        return getattr(self.extractores.get(TIPO_VALE), 'plantilla', None)
+
+    def ejecutar(self, tareas: List[Tuple[str, str]],
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 cancel_event: Optional[threading.Event] = None
+                 ) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Extrae todas las tareas y devuelve los resultados en el mismo orden.
+
+        Args:
+            tareas: Lista de (tipo, ruta) donde tipo es 'vale' u 'orden'
+            progress_callback: Función (procesados, total) llamada tras cada documento
+            cancel_event: Evento que, al activarse, detiene la extracción
+
+        Returns:
+            List[Tuple[Optional[Dict], Optional[str]]]: (datos, error) por tarea.
+            Las tareas no ejecutadas por cancelación quedan como (None, 'cancelado').
+        """
+        resultados: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = [(None, 'cancelado')] * len(tareas)
+        for completadas, (idx, resultado, _segundos) in enumerate(self.iterar(tareas, cancel_event), 1):
+            resultados[idx] = resultado
+            if progress_callback:
+                progress_callback(completadas, len(tareas))
+        return resultados
+
+    def iterar(self, tareas: List[Tuple[str, str]],
+               cancel_event: Optional[threading.Event] = None
+               ) -> Iterator[Tuple[int, Tuple[Optional[Dict[str, Any]], Optional[str]], float]]:
+        """
+        Extrae las tareas y entrega cada resultado en cuanto está listo (en orden de
+        terminación, no de entrada). Solo hay unas pocas tareas en vuelo por proceso,
+        así que quien consume el iterador marca el ritmo y la memoria no crece.
+
+        Args:
+            tareas: Lista de (tipo, ruta) donde tipo es 'vale', 'orden' o 'sondeo_vale'
+            cancel_event: Evento que, al activarse, detiene la extracción
+
+        Yields:
+            Tuple[int, Tuple, float]: (índice de la tarea, (datos, error), segundos de
+            extracción). Las tareas no ejecutadas por cancelación no se entregan.
+        """
+        if not tareas:
+            return
+        if self.timeout_archivo or self.memoria_maxima_mb:
+            resultados = self._iterar_aislado(tareas, cancel_event)
+        elif self.workers == 1 or len(tareas) == 1:
+            resultados = self._iterar_secuencial(tareas, cancel_event)
+        else:
+            resultados = self._iterar_en_pool(tareas, cancel_event)
+        try:
+            for idx, resultado, segundos, etapas in resultados:
+                if self.tiempos is not None:
+                    self._registrar_tiempos(tareas[idx], segundos, etapas)
+                yield idx, resultado, segundos
+        finally:
+            # Si quien consume se detiene antes, los procesos se cierran ahora
+            resultados.close()
+
+    def _registrar_tiempos(self, tarea: Tuple[str, str], segundos: float, etapas: Dict[str, float]):
+        """Agrega a self.tiempos la duración de un archivo y la de sus etapas."""
+        tipo, ruta = tarea
+        if tipo == TIPO_SONDEO_VALE:
+            self.tiempos.agregar(ETAPA_SONDEO, segundos, ruta)
+            return
+        self.tiempos.agregar(ETAPA_EXTRACCION, segundos, ruta)
+        self.tiempos.agregar_documento(ruta, etapas)
+
+    def _iterar_secuencial(self, tareas, cancel_event):
+        """Extrae en el proceso actual, una tarea a la vez."""
+        for idx, (tipo, ruta) in enumerate(tareas):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            yield (idx, *_extraer_medido(self.extractores, tipo, ruta))
+
+    def _iterar_en_pool(self, tareas, cancel_event):
+        """
+        Extrae en un pool de procesos. Solo se mantienen en vuelo unas pocas tareas
+        por proceso para que la cancelación surta efecto de inmediato.
+        """
+        total = len(tareas)
+        en_vuelo_max = self.workers * 2
+        siguiente = 0
+        pendientes = {}
+
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, total),
+                                       initializer=_inicializar_proceso,
+                                       initargs=(self.backend_texto, self._plantilla_vales()))
+        try:
+            while siguiente < total or pendientes:
+                cancelado = cancel_event is not None and cancel_event.is_set()
+                while not cancelado and siguiente < total and len(pendientes) < en_vuelo_max:
+                    tipo, ruta = tareas[siguiente]
+                    pendientes[executor.submit(_extraer_en_proceso, tipo, ruta)] = siguiente
+                    siguiente += 1
+                if cancelado and not pendientes:
+                    break
+
+                # Espera acotada para revisar la cancelación periódicamente
+                terminadas, _ = wait(pendientes, timeout=0.5, return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    idx = pendientes.pop(futuro)
+                    try:
+                        resultado, segundos, etapas = futuro.result()
+                    except Exception as e:
+                        # El proceso trabajador murió (p. ej. BrokenProcessPool)
+                        resultado, segundos, etapas = (None, str(e)), 0.0, {}
+                    yield idx, resultado, segundos, etapas
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _iterar_aislado(self, tareas, cancel_event):
+        """
+        Extrae con procesos trabajadores propios, una tarea a la vez por proceso.
+        Un archivo que supera timeout_archivo, agota la memoria o hace terminar a su
+        proceso se entrega con error, se reporta en cuarentena y su proceso se
+        reemplaza por uno nuevo. Al cancelar, los procesos ocupados se matan.
+        """
+        contexto = multiprocessing.get_context()
+        total = len(tareas)
+        siguiente = 0
+        trabajadores: List[_TrabajadorAislado] = []
+        try:
+            while siguiente < total or any(t.tarea is not None for t in trabajadores):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                # Un proceso por tarea en vuelo, hasta self.workers
+                en_vuelo = sum(t.tarea is not None for t in trabajadores)
+                while len(trabajadores) < min(self.workers, en_vuelo + total - siguiente):
+                    trabajadores.append(_TrabajadorAislado(contexto, self.backend_texto,
+                                                           self._plantilla_vales(), self.memoria_maxima_mb))
+                for trabajador in list(trabajadores):
+                    if trabajador.tarea is None and siguiente < total:
+                        try:
+                            trabajador.enviar(siguiente, *tareas[siguiente])
+                        except (OSError, ValueError):
+                            # Murió sin tarea: se reemplaza y la tarea queda para otro
+                            trabajador.detener(forzar=True)
+                            trabajadores.remove(trabajador)
+                            continue
+                        siguiente += 1
+
+                ocupados = [t for t in trabajadores if t.tarea is not None]
+                listos = esperar_conexiones([t.conexion for t in ocupados], timeout=0.5)
+                ahora = time.perf_counter()
+                for trabajador in ocupados:
+                    idx = trabajador.tarea
+                    etapas = {}
+                    if trabajador.conexion in listos:
+                        try:
+                            resultado, segundos, motivo, etapas = trabajador.conexion.recv()
+                        except (EOFError, OSError):
+                            trabajador.proceso.join(timeout=5)
+                            motivo = f"el proceso de extracción terminó (código {trabajador.proceso.exitcode})"
+                            resultado, segundos = (None, motivo), ahora - trabajador.inicio
+                    elif self.timeout_archivo and ahora - trabajador.inicio > self.timeout_archivo:
+                        motivo = f"tiempo agotado ({self.timeout_archivo:g} s)"
+                        resultado, segundos = (None, motivo), ahora - trabajador.inicio
+                    else:
+                        continue
+
+                    trabajador.tarea = None
+                    if motivo:
+                        trabajador.detener(forzar=True)
+                        trabajadores.remove(trabajador)
+                        tipo, ruta = tareas[idx]
+                        print(f"🚧 {os.path.basename(ruta)} en cuarentena: {motivo}")
+                        if self.al_poner_en_cuarentena:
+                            self.al_poner_en_cuarentena(tipo, ruta, motivo)
+                        resultado = (None, f"en cuarentena: {motivo}")
+                    yield idx, resultado, segundos, etapas
+        finally:
+            for trabajador in trabajadores:
+                trabajador.detener(forzar=trabajador.tarea is not None)
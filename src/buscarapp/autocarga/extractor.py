@@ -1,14 +1,53 @@
 import pdfplumber
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Union
 import os
+from pathlib import Path
+
+try:
+    from .documento import DocumentoPDF, BACKEND_PDFPLUMBER, validar_backend
+    from .matcher_campos import MatcherCampos, literal_inicial
+    from .plantillas_region import LectorRegiones, PlantillaRegiones, calibrar_plantilla
+    from .tiempos_etapas import medir, etapa_regex, ETAPA_APERTURA, ETAPA_POSTPROCESO
+except ImportError:
+    from documento import DocumentoPDF, BACKEND_PDFPLUMBER, validar_backend
+    from matcher_campos import MatcherCampos, literal_inicial
+    from plantillas_region import LectorRegiones, PlantillaRegiones, calibrar_plantilla
+    from tiempos_etapas import medir, etapa_regex, ETAPA_APERTURA, ETAPA_POSTPROCESO
+
+# Número de vale en el nombre del archivo (p. ej. "V123456.pdf" o "vale_V123456.pdf")
+_NUMERO_EN_NOMBRE = re.compile(r'(?<![A-Za-z0-9])(V\d{6})(?!\d)')
+
+# Campos de un vale, en el orden del diccionario de resultados
+CAMPOS_VALE = [
+    'nombre', 'numero', 'referencia', 'fecha', 'cuenta', 'departamento',
+    'sucursal', 'marca', 'responsable', 'tipo_de_vale',
+    'no_documento', 'total', 'descripcion', 'codigo'
+]
+
+# Campos que se buscan primero en el texto de PyPDF2, que conserva mejor los espacios
+CAMPOS_CON_ESPACIOS = {'nombre', 'descripcion'}
+
+# Campos que pueden ocupar varias líneas: en la plantilla su región llega hasta la siguiente etiqueta
+CAMPOS_LARGO_VARIABLE = ('descripcion',)
 
 class PDFDataExtractor:
     """
     Extractor de datos específicos de documentos PDF tipo vale/documento corporativo.
     """
     
-    def __init__(self):
+    def __init__(self, backend_texto: str = BACKEND_PDFPLUMBER, plantilla: Optional[PlantillaRegiones] = None):
+        """
+        Args:
+            backend_texto (str): Backend para leer el texto del PDF: 'pdfplumber' (default)
+                o 'pdfium' (texto crudo de pypdfium2, más rápido)
+            plantilla (PlantillaRegiones): Regiones de los campos en la página 1; si se
+                indica, cada campo se busca solo en su región y el texto completo se lee
+                únicamente cuando alguna región no da resultado
+        """
+        self.backend_texto = validar_backend(backend_texto)
+        self.plantilla = plantilla
+        
         # Patrones de expresiones regulares SIMPLIFICADOS para mejor rendimiento
         self.patterns = {
             'nombre': [
@@ -116,6 +155,35 @@ class PDFDataExtractor:
                 r'\bCódigo[:\s]*([A-Z0-9]+)\b'
             ]
         }
+        
+        # Patrones compilados una sola vez (misma prioridad que la búsqueda secuencial)
+        self._matcher = MatcherCampos(self.patterns)
+        # Solo el patrón con etiqueta: su primera coincidencia en la primera página es la
+        # misma que encuentra la extracción completa (los genéricos podrían no serlo).
+        # Con las mismas banderas y limpieza que self._matcher (sin distinguir mayúsculas)
+        self._sondeo_numero = MatcherCampos({'numero': self.patterns['numero'][:1]}, self._matcher.flags)
+    
+    def sondear_numero(self, pdf_path: str) -> Optional[str]:
+        """
+        Obtiene el número de vale sin hacer la extracción completa: primero del nombre
+        del archivo y, si no viene ahí, del texto de la primera página.
+        
+        Args:
+            pdf_path (str): Ruta del PDF del vale
+            
+        Returns:
+            Optional[str]: Número de vale (p. ej. 'V123456') o None si no se encontró
+        """
+        coincidencia = _NUMERO_EN_NOMBRE.search(os.path.basename(pdf_path))
+        if coincidencia:
+            return coincidencia.group(1)
+        
+        documento = DocumentoPDF.desde_archivo(pdf_path, con_espacios=False,
+                                               backend=self.backend_texto, max_paginas=1)
+        numero = self._sondeo_numero.buscar(documento.texto, 'numero')
+        if numero:
+            return self.post_process_field('numero', numero)
+        return None
     
     def debug_text_extraction(self, pdf_path: str) -> str:
         """
@@ -297,95 +365,96 @@ class PDFDataExtractor:
         
         return value
 
-    def extract_field(self, text_or_path: str, field_name: str) -> Optional[str]:
+    def extract_field(self, text_or_path: Union[str, DocumentoPDF], field_name: str) -> Optional[str]:
         """
         Extrae un campo específico del texto usando los patrones definidos.
-        Para ciertos campos usa PyPDF2 para preservar espacios.
+        Acepta un DocumentoPDF ya leído, una ruta de archivo o texto plano.
+        Para ciertos campos usa el texto de PyPDF2 para preservar espacios.
         """
         if field_name not in self.patterns:
             return None
         
-        # Determinar si es una ruta de archivo o texto
-        is_file_path = os.path.isfile(text_or_path) if os.path.exists(text_or_path) else False
+        # Determinar si es un documento ya leído, una ruta de archivo o texto
+        if isinstance(text_or_path, DocumentoPDF):
+            documento = text_or_path
+        elif os.path.isfile(text_or_path):
+            documento = DocumentoPDF.desde_archivo(text_or_path, backend=self.backend_texto)
+        else:
+            documento = None
+        
+        with medir(etapa_regex('vale', field_name)):
+            result = self._buscar_campo(documento, text_or_path, field_name)
+        if result is None:
+            return None
         
-        # Para campos donde los espacios son importantes, usar PyPDF2
-        if field_name in ['nombre', 'descripcion'] and is_file_path:
-            # Intentar primero con texto de PyPDF2
-            pypdf2_text = self.extract_text_from_pdf_with_spaces(text_or_path)
+        # Aplica post-procesamiento específico
+        with medir(ETAPA_POSTPROCESO):
+            return self.post_process_field(field_name, result)
+    
+    def _buscar_campo(self, documento: Optional[DocumentoPDF], texto: str, field_name: str) -> Optional[str]:
+        """Valor del campo tal como lo dan los patrones, sin post-procesar."""
+        # Para campos donde los espacios son importantes, usar el texto de PyPDF2
+        if field_name in CAMPOS_CON_ESPACIOS and documento is not None:
+            pypdf2_text = documento.texto_con_espacios
             if pypdf2_text:
                 # Tratamiento especial para descripción que puede ser multilínea
                 if field_name == 'descripcion':
                     result = self.extract_multiline_description(pypdf2_text)
                     if result:
-                        return self.post_process_field(field_name, result)
-                
-                # Buscar en el texto de PyPDF2 (SIMPLIFICADO)
-                for pattern in self.patterns[field_name]:
-                    match = re.search(pattern, pypdf2_text, re.IGNORECASE)
-                    if match:
-                        result = match.group(1).strip()
-                        result = re.sub(r'\s+', ' ', result)
-                        result = self.post_process_field(field_name, result)
                         return result
+                
+                # Buscar en el texto de PyPDF2
+                result = self._matcher.buscar(pypdf2_text, field_name)
+                if result is not None:
+                    return result
         
         # Usar el texto normal de pdfplumber para otros campos o como fallback
-        if is_file_path:
-            current_text = self.extract_text_from_pdf(text_or_path)
-        else:
-            current_text = text_or_path
-        
-        # Intenta cada patrón para el campo (SIMPLIFICADO)
-        for pattern in self.patterns[field_name]:
-            match = re.search(pattern, current_text, re.IGNORECASE)
-            if match:
-                # Limpia el resultado
-                result = match.group(1).strip()
-                # Remueve espacios excesivos
-                result = re.sub(r'\s+', ' ', result)
-                # Aplica post-procesamiento específico
-                result = self.post_process_field(field_name, result)
-                return result
+        current_text = documento.texto if documento is not None else texto
         
-        return None
+        # Primer patrón del campo que coincide (resultado ya limpio de espacios)
+        return self._matcher.buscar(current_text, field_name)
     
     def extract_all_data(self, pdf_path: str, debug: bool = False) -> Dict[str, Optional[str]]:
         """
         Extrae todos los campos especificados del PDF.
+        El archivo se abre una sola vez y el mismo DocumentoPDF se usa para todos los campos.
         """
         # Verifica si el archivo existe
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"El archivo {pdf_path} no existe")
         
-        # Extrae el texto del PDF
+        # Modo plantilla: regiones de la página 1, con el texto completo del mismo
+        # documento abierto para los campos que no salen de su región
+        data = None
+        if self.plantilla is not None and self.plantilla.regiones and not debug:
+            data = self._extraer_con_plantilla(pdf_path)
+            if data is not None:
+                return data
+        
+        # Lee el PDF una sola vez (texto de pdfplumber y de PyPDF2, o de pypdfium2)
+        documento = DocumentoPDF.desde_archivo(pdf_path, backend=self.backend_texto)
+        text = documento.texto
+        
         if debug:
-            text = self.debug_text_extraction(pdf_path)
-        else:
-            text = self.extract_text_from_pdf(pdf_path)
+            print("\n" + "="*60)
+            print("TEXTO EXTRAÍDO DEL PDF (PARA DEPURACIÓN)")
+            print("="*60)
+            print(text[:1000] + "..." if len(text) > 1000 else text)
+            print("="*60)
         
         if not text:
             print("No se pudo extraer texto del PDF")
-            return {}
-        
-        # Diccionario para almacenar los resultados
-        data = {}
-        
-        # Lista de campos a extraer
-        fields = [
-            'nombre', 'numero', 'referencia', 'fecha', 'cuenta', 'departamento', 
-            'sucursal', 'marca', 'responsable', 'tipo_de_vale', 
-            'no_documento', 'total', 'descripcion', 'codigo'
-        ]
-        
-        # Extrae cada campo
-        for field in fields:
-            # Para campos que necesitan PyPDF2, pasar la ruta del archivo
-            if field in ['nombre', 'descripcion']:
-                extracted_value = self.extract_field(pdf_path, field)
-            else:
-                # Para otros campos, usar el texto ya extraído
-                extracted_value = self.extract_field(text, field)
-            
-            field_name = field.replace('_', ' ').title()
+            return data or {}
+        
+        # Diccionario para almacenar los resultados (con lo que ya dio la plantilla)
+        data = data or {}
+        
+        # Extrae cada campo faltante a partir del documento ya leído
+        for field in CAMPOS_VALE:
+            field_name = self._nombre_campo(field)
+            if data.get(field_name):
+                continue
+            extracted_value = self.extract_field(documento, field)
             data[field_name] = extracted_value
             
             # Modo debug: muestra qué se encontró para cada campo
@@ -394,6 +463,110 @@ class PDFDataExtractor:
         
         return data
     
+    @staticmethod
+    def _nombre_campo(field: str) -> str:
+        """Llave del campo en el diccionario de resultados ('no_documento' -> 'No Documento')."""
+        return field.replace('_', ' ').title()
+    
+    def _extraer_con_plantilla(self, pdf_path: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Extrae los campos a partir de sus regiones de la página 1, abriendo el PDF una
+        sola vez. Si algún campo queda sin valor (no tiene región en la plantilla o su
+        región no dio resultado) se busca en el texto completo de ese mismo documento,
+        como en la extracción normal.
+        
+        Cuando la plantilla no cubre todos los campos el texto completo se necesita de
+        todos modos, y buscar en él cuesta menos que recortar cada región: entonces
+        solo se recortan las regiones de los campos que evitan generar el texto de
+        PyPDF2 (nombre y descripción, con el backend pdfplumber).
+        
+        Returns:
+            Optional[Dict]: Mismo formato que extract_all_data, o None si el documento
+            no tiene el formato de la plantilla o no se pudo leer
+        """
+        campos = None
+        if any(field not in self.plantilla.regiones for field in CAMPOS_VALE):
+            campos = CAMPOS_CON_ESPACIOS if self.backend_texto == BACKEND_PDFPLUMBER else ()
+        
+        with medir(ETAPA_APERTURA):
+            datos = Path(pdf_path).read_bytes()
+        try:
+            with LectorRegiones(datos, self.plantilla, self.backend_texto) as lector:
+                textos = lector.textos(campos)
+                if textos is None:
+                    return None
+                data = self.valores_de_regiones(textos)
+                faltantes = [field for field in CAMPOS_VALE if not data[self._nombre_campo(field)]]
+                if not faltantes:
+                    return data
+                documento = lector.documento(pdf_path, con_espacios=bool(CAMPOS_CON_ESPACIOS & set(faltantes)))
+        except Exception as e:
+            print(f"Error al leer las regiones del PDF: {e}")
+            return None
+        
+        for field in faltantes:
+            data[self._nombre_campo(field)] = self.extract_field(documento, field)
+        return data
+    
+    def valores_de_regiones(self, textos: Dict[str, str]) -> Dict[str, Optional[str]]:
+        """
+        Valor de cada campo a partir del texto de su región (ver textos_de_regiones).
+        
+        Returns:
+            Dict: Mismo formato que extract_all_data, con None en los campos sin región
+            o sin resultado en ella
+        """
+        return {self._nombre_campo(field): self._valor_de_region(field, textos.get(field, ''))
+                for field in CAMPOS_VALE}
+    
+    def _valor_de_region(self, field: str, texto: str) -> Optional[str]:
+        """
+        Busca un campo en el texto de su región con los mismos patrones y el mismo
+        post-procesamiento que la extracción completa. Como el texto es solo la línea
+        del campo, los patrones genéricos (p. ej. \\b(\\d{5})\\b para la cuenta) ya no
+        pueden tomar un número de otra parte del documento.
+        """
+        if not texto:
+            return None
+        with medir(etapa_regex('vale', field)):
+            result = None
+            if field == 'descripcion':
+                result = self.extract_multiline_description(texto) or None
+            if result is None:
+                result = self._matcher.buscar(texto, field)
+        if result is None:
+            return None
+        with medir(ETAPA_POSTPROCESO):
+            return self.post_process_field(field, result)
+    
+    def calibrar_plantilla(self, rutas_muestra: List[str]) -> PlantillaRegiones:
+        """
+        Calibra la plantilla de regiones de los vales con PDFs de muestra, anclando cada
+        región a las etiquetas de los patrones del campo (ver plantillas_region). La
+        descripción puede ocupar varias líneas, así que su región llega hasta la
+        siguiente etiqueta (o al final de la página) en lugar de tener alto fijo.
+        
+        Args:
+            rutas_muestra (List[str]): PDFs de vales de muestra
+            
+        Returns:
+            PlantillaRegiones: Plantilla con los campos verificados contra la extracción completa
+        """
+        etiquetas = {}
+        for field in CAMPOS_VALE:
+            literales = [literal_inicial(patron) for patron in self.patterns.get(field, [])]
+            etiquetas[field] = [literal for literal in literales if len(literal) >= 3]
+        
+        completo = PDFDataExtractor(backend_texto=self.backend_texto)
+        
+        def extraer_completo(ruta):
+            datos = completo.extract_all_data(ruta)
+            return {field: datos.get(self._nombre_campo(field)) for field in CAMPOS_VALE}
+        
+        return calibrar_plantilla('vale', rutas_muestra, etiquetas, extraer_completo,
+                                  self._valor_de_region, backend=self.backend_texto,
+                                  campos_variables=CAMPOS_LARGO_VARIABLE)
+    
     def print_extracted_data(self, data: Dict[str, Optional[str]]):
         """
         Imprime los datos extraídos de forma organizada.
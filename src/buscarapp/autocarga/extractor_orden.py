@@ -7,12 +7,26 @@ import PyPDF2
 import pdfplumber
 import re
 from pathlib import Path
+from typing import Union
+
+try:
+    from .documento import DocumentoPDF, BACKEND_PDFPLUMBER, BACKEND_PDFIUM, validar_backend
+    from .tiempos_etapas import medir, etapa_regex, ETAPA_POSTPROCESO
+except ImportError:
+    from documento import DocumentoPDF, BACKEND_PDFPLUMBER, BACKEND_PDFIUM, validar_backend
+    from tiempos_etapas import medir, etapa_regex, ETAPA_POSTPROCESO
 
 class OrdenDataExtractor:
-    def __init__(self):
+    def __init__(self, backend_texto: str = BACKEND_PDFPLUMBER):
         """
         Inicializa el extractor de órdenes con los patrones de búsqueda.
+        
+        Args:
+            backend_texto (str): Backend para leer el texto del PDF: 'pdfplumber' (default)
+                o 'pdfium' (texto crudo de pypdfium2, más rápido y sin tablas)
         """
+        self.backend_texto = validar_backend(backend_texto)
+        
         # Patrones regex para extraer los datos de las órdenes
         self.patterns = {
             'Ref_Movimiento': [
@@ -128,15 +142,21 @@ class OrdenDataExtractor:
         
         # Lógica especial para Folio_Factura
         if field_name == 'Folio_Factura':
-            return self._extract_folio_factura_inteligente(text)
+            with medir(etapa_regex('orden', field_name)):
+                return self._extract_folio_factura_inteligente(text)
         
-        for pattern in self.patterns[field_name]:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                value = match.group(1).strip()
-                return self.post_process_field(field_name, value)
+        value = None
+        with medir(etapa_regex('orden', field_name)):
+            for pattern in self.patterns[field_name]:
+                match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+                if match:
+                    value = match.group(1).strip()
+                    break
+        if value is None:
+            return ""
         
-        return ""
+        with medir(ETAPA_POSTPROCESO):
+            return self.post_process_field(field_name, value)
 
     def _extract_folio_factura_inteligente(self, text: str) -> str:
         """
@@ -340,12 +360,21 @@ class OrdenDataExtractor:
             
         return value
 
-    def extract_from_table(self, pdf_path: str) -> dict:
+    def _obtener_documento(self, pdf_path: Union[str, DocumentoPDF]) -> DocumentoPDF:
+        """
+        Devuelve el DocumentoPDF recibido o lo lee del archivo (con tablas) si se pasó una ruta.
+        """
+        if isinstance(pdf_path, DocumentoPDF):
+            return pdf_path
+        return DocumentoPDF.desde_archivo(pdf_path, con_espacios=False, con_tablas=True,
+                                          backend=self.backend_texto)
+
+    def extract_from_table(self, pdf_path: Union[str, DocumentoPDF]) -> dict:
         """
         Extrae datos específicamente de las tablas del PDF.
         
         Args:
-            pdf_path (str): Ruta del archivo PDF
+            pdf_path: Ruta del archivo PDF o DocumentoPDF ya leído
             
         Returns:
             dict: Datos extraídos de las tablas
@@ -353,99 +382,95 @@ class OrdenDataExtractor:
         table_data = {}
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    tables = page.extract_tables()
+            documento = self._obtener_documento(pdf_path)
+            tables = documento.tablas
+            
+            for table in tables:
+                if not table:
+                    continue
                     
-                    for table in tables:
-                        if not table:
-                            continue
+                # Buscar en la tabla principal de cuentas contables
+                for row in table:
+                    if row and len(row) >= 4:
+                        # Buscar la primera fila de datos (no el header)
+                        # La estructura es: C.MAYOR, CTA., NOMBRECLIENTE, DEBE, HABER, TIPO, DESCRIPCION, EXPLICACION
+                        if (row[0] and str(row[0]).isdigit() and 
+                            row[1] and str(row[1]).isdigit() and 
+                            row[2] and len(str(row[2])) > 5 and
+                            row[3] and re.match(r'[\d,]+\.\d+', str(row[3]))):
                             
-                        # Buscar en la tabla principal de cuentas contables
-                        for row in table:
-                            if row and len(row) >= 4:
-                                # Buscar la primera fila de datos (no el header)
-                                # La estructura es: C.MAYOR, CTA., NOMBRECLIENTE, DEBE, HABER, TIPO, DESCRIPCION, EXPLICACION
-                                if (row[0] and str(row[0]).isdigit() and 
-                                    row[1] and str(row[1]).isdigit() and 
-                                    row[2] and len(str(row[2])) > 5 and
-                                    row[3] and re.match(r'[\d,]+\.\d+', str(row[3]))):
-                                    
-                                    # Tomar el nombre de la columna 2 (NOMBRECLIENTE)
-                                    nombre_crudo = str(row[2]).strip()
-                                    if not any(word in nombre_crudo.upper() for word in ['NOMBRECLIENTE', 'DEBE', 'HABER']):
-                                        table_data['Nombre'] = nombre_crudo
-                                    
-                                    # Tomar el importe de la columna 3 (DEBE) - solo si no es 0.00
-                                    importe = str(row[3]).strip()
-                                    if importe != '0.00':
-                                        table_data['Importe'] = importe
-                                    
-                                    # Solo tomar la primera fila válida
-                                    break
-                                
-                                # Buscar código de banco - priorizar BTC23
-                                if len(row) >= 2 and row[1]:
-                                    banco_candidato = str(row[1]).strip()
-                                    if banco_candidato.startswith('BTC'):
-                                        table_data['Codigo_Banco'] = banco_candidato
-                                    elif re.match(r'[A-Z]{2,4}\d{1,3}', banco_candidato) and 'Codigo_Banco' not in table_data:
-                                        table_data['Codigo_Banco'] = banco_candidato
+                            # Tomar el nombre de la columna 2 (NOMBRECLIENTE)
+                            nombre_crudo = str(row[2]).strip()
+                            if not any(word in nombre_crudo.upper() for word in ['NOMBRECLIENTE', 'DEBE', 'HABER']):
+                                table_data['Nombre'] = nombre_crudo
+                            
+                            # Tomar el importe de la columna 3 (DEBE) - solo si no es 0.00
+                            importe = str(row[3]).strip()
+                            if importe != '0.00':
+                                table_data['Importe'] = importe
+                            
+                            # Solo tomar la primera fila válida
+                            break
+                        
+                        # Buscar código de banco - priorizar BTC23
+                        if len(row) >= 2 and row[1]:
+                            banco_candidato = str(row[1]).strip()
+                            if banco_candidato.startswith('BTC'):
+                                table_data['Codigo_Banco'] = banco_candidato
+                            elif re.match(r'[A-Z]{2,4}\d{1,3}', banco_candidato) and 'Codigo_Banco' not in table_data:
+                                table_data['Codigo_Banco'] = banco_candidato
         
         except Exception as e:
             print(f"Error al extraer datos de tabla: {e}")
         
         return table_data
 
-    def extraer_cuentas_mayores(self, pdf_path: str) -> str:
+    def extraer_cuentas_mayores(self, pdf_path: Union[str, DocumentoPDF]) -> str:
         """
         Extrae la primera cuenta mayor de la tabla de cuentas contables del PDF.
         Optimizado para extraer solo la primera cuenta encontrada.
         
         Args:
-            pdf_path (str): Ruta del archivo PDF
+            pdf_path: Ruta del archivo PDF o DocumentoPDF ya leído
             
         Returns:
             str: Primera cuenta mayor encontrada, o None si no se encuentra
         """
         try:
-            # Método 1: Extraer usando pdfplumber (mejor para tablas)
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    # Extraer tablas de la página
-                    tables = page.extract_tables()
-                    
-                    for table in tables:
-                        if not table:
-                            continue
-                        
-                        # Buscar el encabezado "C MAYOR" o similar
-                        header_row = None
-                        mayor_col_index = None
-                        
-                        for i, row in enumerate(table):
-                            if row and any(cell and 'MAYOR' in str(cell).upper() for cell in row):
-                                header_row = i
-                                # Encontrar la columna de C MAYOR
-                                for j, cell in enumerate(row):
-                                    if cell and 'MAYOR' in str(cell).upper():
-                                        mayor_col_index = j
-                                        break
+            documento = self._obtener_documento(pdf_path)
+            
+            # Método 1: Buscar en las tablas ya extraídas (mejor para tablas)
+            for table in documento.tablas:
+                if not table:
+                    continue
+                
+                # Buscar el encabezado "C MAYOR" o similar
+                header_row = None
+                mayor_col_index = None
+                
+                for i, row in enumerate(table):
+                    if row and any(cell and 'MAYOR' in str(cell).upper() for cell in row):
+                        header_row = i
+                        # Encontrar la columna de C MAYOR
+                        for j, cell in enumerate(row):
+                            if cell and 'MAYOR' in str(cell).upper():
+                                mayor_col_index = j
                                 break
-                        
-                        # Si encontramos la columna de C MAYOR, extraer solo la primera cuenta
-                        if header_row is not None and mayor_col_index is not None:
-                            for row in table[header_row + 1:]:  # Saltar el encabezado
-                                if row and len(row) > mayor_col_index:
-                                    cuenta = row[mayor_col_index]
-                                    if cuenta and str(cuenta).strip():
-                                        cuenta_str = str(cuenta).strip()
-                                        # Validar que sea una cuenta (11 dígitos)
-                                        if re.match(r'^\d{11}$', cuenta_str):
-                                            return cuenta_str  # Retornar inmediatamente la primera encontrada
+                        break
+                
+                # Si encontramos la columna de C MAYOR, extraer solo la primera cuenta
+                if header_row is not None and mayor_col_index is not None:
+                    for row in table[header_row + 1:]:  # Saltar el encabezado
+                        if row and len(row) > mayor_col_index:
+                            cuenta = row[mayor_col_index]
+                            if cuenta and str(cuenta).strip():
+                                cuenta_str = str(cuenta).strip()
+                                # Validar que sea una cuenta (11 dígitos)
+                                if re.match(r'^\d{11}$', cuenta_str):
+                                    return cuenta_str  # Retornar inmediatamente la primera encontrada
             
             # Método 2: Si no encontramos con tablas, usar regex en el texto
-            text = self.extract_text_with_pdfplumber(pdf_path)
+            text = documento.texto
             
             # Buscar patrones de cuentas mayores (11 dígitos) cerca de "MAYOR"
             lineas = text.split('\n')
@@ -485,12 +510,17 @@ class OrdenDataExtractor:
         if not Path(pdf_path).exists():
             raise FileNotFoundError(f"El archivo {pdf_path} no existe")
         
-        # Extraer texto usando ambos métodos
-        text_pdfplumber = self.extract_text_with_pdfplumber(pdf_path)
-        text_pypdf2 = self.extract_text_with_pypdf2(pdf_path)
+        # Leer el PDF una sola vez: texto de ambos métodos y tablas
+        documento = DocumentoPDF.desde_archivo(pdf_path, con_espacios=True, con_tablas=True,
+                                               backend=self.backend_texto)
+        text_pdfplumber = documento.texto
+        text_pypdf2 = documento.texto_con_espacios
         
-        # Combinar textos para mayor cobertura
-        combined_text = text_pdfplumber + "\n" + text_pypdf2
+        # Combinar textos para mayor cobertura (con pypdfium2 ambos son el mismo texto)
+        if documento.backend == BACKEND_PDFIUM:
+            combined_text = text_pdfplumber
+        else:
+            combined_text = text_pdfplumber + "\n" + text_pypdf2
         
         # Extraer cada campo usando regex
         data = {}
@@ -509,7 +539,8 @@ class OrdenDataExtractor:
                 data[field_name] = self.extract_field(combined_text, field_name)
         
         # Extraer datos adicionales de las tablas
-        table_data = self.extract_from_table(pdf_path)
+        with medir(etapa_regex('orden', 'tablas')):
+            table_data = self.extract_from_table(documento)
         
         # Combinar datos de texto y tabla, dando prioridad a los datos de tabla cuando estén disponibles
         for key, value in table_data.items():
@@ -517,10 +548,12 @@ class OrdenDataExtractor:
                 data[key] = value
         
         # Post-procesamiento específico para mejorar los datos
-        self.improve_extracted_data(data, combined_text)
+        with medir(ETAPA_POSTPROCESO):
+            self.improve_extracted_data(data, combined_text)
         
         # Extraer primera cuenta mayor (optimizado)
-        cuenta_mayor = self.extraer_cuentas_mayores(pdf_path)
+        with medir(etapa_regex('orden', 'cuentas_mayores')):
+            cuenta_mayor = self.extraer_cuentas_mayores(documento)
         data['cuentas_mayores'] = cuenta_mayor  # Ahora es un string o None
         
         # Agregar información adicional
@@ -0,0 +1,100 @@
+"""
+Huella de archivos para AutoCarga.
+Identifica un archivo por ruta, tamaño, fecha de modificación y hash de contenido.
+"""
+
+import hashlib
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Tamaño de bloque para leer archivos sin cargarlos completos en memoria
+TAMANO_BLOQUE = 1024 * 1024
+
+
+class HuellaArchivo(NamedTuple):
+    """Identidad de un archivo en un momento dado."""
+    ruta: str
+    tamano: int
+    mtime_ns: int
+    sha256: str
+
+
+def calcular_hash(ruta: str, tamano_bloque: int = TAMANO_BLOQUE) -> str:
+    """
+    Calcula el SHA-256 del contenido leyendo el archivo por bloques.
+
+    Args:
+        ruta (str): Ruta del archivo
+        tamano_bloque (int): Bytes leídos por iteración
+
+    Returns:
+        str: Hash hexadecimal del contenido
+    """
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def obtener_huella(ruta: str, info: Optional[os.stat_result] = None) -> HuellaArchivo:
+    """
+    Obtiene la huella completa de un archivo.
+
+    Args:
+        ruta (str): Ruta del archivo
+        info (os.stat_result): Resultado de os.stat ya obtenido (opcional)
+
+    Returns:
+        HuellaArchivo: Ruta absoluta, tamaño, mtime en nanosegundos y SHA-256
+    """
+    info = info or os.stat(ruta)
+    return HuellaArchivo(
+        ruta=os.path.abspath(ruta),
+        tamano=info.st_size,
+        mtime_ns=info.st_mtime_ns,
+        sha256=calcular_hash(ruta),
+    )
+
+
+def deduplicar_por_contenido(rutas: List[str]) -> Tuple[List[str], Dict[str, str], Dict[str, HuellaArchivo]]:
+    """
+    Quita de la lista las copias de un mismo contenido. De cada grupo de copias se
+    conserva la más antigua (a igual fecha, la de nombre menor), que es la que
+    Quiter generó primero. Solo se calcula el hash de los archivos cuyo tamaño
+    coincide con el de otro; un archivo de tamaño único no puede tener copias.
+
+    Args:
+        rutas (List[str]): Archivos a revisar
+
+    Returns:
+        Tuple: (archivos conservados en el orden original, {duplicado: original},
+        huellas calculadas por ruta, para no volver a leer esos archivos)
+    """
+    infos = {}
+    por_tamano: Dict[int, List[str]] = {}
+    for ruta in rutas:
+        try:
+            infos[ruta] = os.stat(ruta)
+        except OSError:
+            continue  # Se conserva; la extracción reportará el error
+        por_tamano.setdefault(infos[ruta].st_size, []).append(ruta)
+
+    duplicados: Dict[str, str] = {}
+    huellas: Dict[str, HuellaArchivo] = {}
+    for grupo in por_tamano.values():
+        if len(grupo) < 2:
+            continue
+        por_contenido: Dict[str, List[str]] = {}
+        for ruta in grupo:
+            try:
+                huellas[ruta] = obtener_huella(ruta, infos[ruta])
+            except OSError:
+                continue
+            por_contenido.setdefault(huellas[ruta].sha256, []).append(ruta)
+        for copias in por_contenido.values():
+            original = min(copias, key=lambda r: (infos[r].st_mtime_ns, r))
+            duplicados.update((ruta, original) for ruta in copias if ruta != original)
+
+    unicos = [ruta for ruta in rutas if ruta not in duplicados]
+    return unicos, duplicados, huellas
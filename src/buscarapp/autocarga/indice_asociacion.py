@@ -0,0 +1,141 @@
+"""
+Índice de asociación Orden ↔ Factura por importe para AutoCarga.
+Con una sola consulta (Proveedor ⟕ Factura ⟕ Vale) carga las facturas de los
+proveedores de la corrida, agrupadas por proveedor y ordenadas por total, para
+buscar con bisect las facturas dentro de una tolerancia de importe sin consultar
+la base de datos por cada orden.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .persistencia_lote import _en_bloques
+except ImportError:
+    from persistencia_lote import _en_bloques
+
+# Tolerancia de importe de la asociación por cuenta (codigo_quiter) + importe
+TOLERANCIA_IMPORTE = 0.05
+
+
+class IndiceAsociacion:
+    """
+    Facturas de los proveedores de una corrida, agrupadas por proveedor y
+    ordenadas por total, más el número de vale asociado a cada factura.
+    """
+
+    def __init__(self):
+        self.proveedores: Dict[int, Any] = {}
+        self.proveedores_por_cuenta: Dict[int, Any] = {}
+        self.vales_por_factura: Dict[int, str] = {}
+        # Por proveedor: totales ordenados y facturas en el mismo orden
+        self._totales: Dict[int, List[float]] = {}
+        self._facturas: Dict[int, List[Any]] = {}
+
+    @classmethod
+    def desde_bd(cls, cuentas: Optional[Iterable[int]] = None) -> 'IndiceAsociacion':
+        """
+        Crea el índice y lo precarga.
+
+        Args:
+            cuentas: Cuentas (codigo_quiter) de las órdenes; None para todos los proveedores
+        """
+        indice = cls()
+        indice.precargar(cuentas)
+        return indice
+
+    def precargar(self, cuentas: Optional[Iterable[int]] = None):
+        """
+        Carga los proveedores, sus facturas y los vales asociados en una sola consulta
+        (una por bloque de TAMANO_BLOQUE_BD cuentas).
+
+        Args:
+            cuentas: Cuentas (codigo_quiter) de las órdenes; None para todos los proveedores
+        """
+        from src.bd.models import Proveedor, Factura, Vale
+        from peewee import JOIN
+
+        def consulta():
+            return (Proveedor
+                    .select(Proveedor, Factura, Vale.noVale)
+                    .join(Factura, JOIN.LEFT_OUTER, on=(Factura.proveedor == Proveedor.id), attr='factura_unida')
+                    .join(Vale, JOIN.LEFT_OUTER, on=(Vale.factura == Factura.folio_interno), attr='vale_unido')
+                    .order_by(Proveedor.id, Factura.folio_interno))
+
+        if cuentas is None:
+            consultas = [consulta()]
+        else:
+            valores = sorted({int(c) for c in cuentas if c})
+            consultas = [consulta().where(Proveedor.codigo_quiter.in_(bloque)) for bloque in _en_bloques(valores)]
+
+        pendientes: Dict[int, List[Tuple[float, int, Any]]] = {}
+        for seleccion in consultas:
+            for fila in seleccion:
+                proveedor = self.proveedores.setdefault(fila.id, fila)
+                if proveedor.codigo_quiter is not None:
+                    # Igual que Proveedor.get_or_none: el de menor id gana
+                    self.proveedores_por_cuenta.setdefault(proveedor.codigo_quiter, proveedor)
+
+                factura = getattr(fila, 'factura_unida', None)
+                if factura is None or factura.folio_interno is None:
+                    continue
+                factura.proveedor = proveedor  # Evita la consulta perezosa del proveedor
+                vale = getattr(factura, 'vale_unido', None)
+                if vale is not None and vale.noVale:
+                    self.vales_por_factura[factura.folio_interno] = vale.noVale
+                pendientes.setdefault(proveedor.id, []).append(
+                    (float(factura.total or 0), factura.folio_interno, factura)
+                )
+
+        for proveedor_id, facturas in pendientes.items():
+            facturas.sort(key=lambda x: (x[0], x[1]))
+            self._totales[proveedor_id] = [total for total, _, _ in facturas]
+            self._facturas[proveedor_id] = [factura for _, _, factura in facturas]
+
+    def proveedor_por_cuenta(self, cuenta) -> Optional[Any]:
+        """Proveedor con codigo_quiter igual a la cuenta (None si no se precargó)."""
+        try:
+            return self.proveedores_por_cuenta.get(int(cuenta))
+        except (TypeError, ValueError):
+            return None
+
+    def facturas_en_rango(self, proveedor_id: int, minimo: float, maximo: float) -> List[Any]:
+        """
+        Facturas del proveedor con minimo <= total <= maximo, ordenadas por total.
+
+        Args:
+            proveedor_id (int): Id del proveedor
+            minimo (float): Total mínimo
+            maximo (float): Total máximo
+        """
+        totales = self._totales.get(proveedor_id)
+        if not totales:
+            return []
+        return self._facturas[proveedor_id][bisect_left(totales, minimo):bisect_right(totales, maximo)]
+
+    def vale_de_factura(self, factura) -> Optional[str]:
+        """Número del vale asociado a la factura, o None."""
+        return self.vales_por_factura.get(factura.folio_interno)
+
+    def buscar_por_cuenta(self, cuenta, importe: float,
+                          tolerancia: float = TOLERANCIA_IMPORTE) -> Tuple[Optional[Any], Optional[Any], List[Any]]:
+        """
+        Asociación por cuenta (codigo_quiter) + importe.
+
+        Args:
+            cuenta: Cuenta de la orden
+            importe (float): Importe de la orden
+            tolerancia (float): Tolerancia relativa del importe
+
+        Returns:
+            Tuple: (proveedor, mejor factura, candidatas). La mejor factura es la de
+            total más cercano al importe (a igualdad, la de menor folio_interno).
+        """
+        proveedor = self.proveedor_por_cuenta(cuenta)
+        if proveedor is None:
+            return None, None, []
+        candidatas = self.facturas_en_rango(proveedor.id, importe * (1 - tolerancia), importe * (1 + tolerancia))
+        if not candidatas:
+            return proveedor, None, []
+        mejor = min(candidatas, key=lambda f: (abs(float(f.total) - importe), f.folio_interno))
+        return proveedor, mejor, candidatas
@@ -3,69 +3,202 @@ Lector de carpeta para buscar archivos de Vales y Órdenes recientes.
 Busca archivos PDF con patrones específicos modificados en los últimos días.
 """
 
+import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple, List
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple
 
+# Patrones para identificar archivos
+PATRON_VALES = "QRSVCMX"  # Vales
+PATRON_ORDENES = "QRSOPMX208"  # Órdenes
 
-def buscar_vales_y_ordenes_recientes(ruta_carpeta: str, dias: int = 2) -> Tuple[List[str], List[str]]:
+
+class MarcaEscaneo(NamedTuple):
     """
-    Busca archivos de Vales y Órdenes modificados en los últimos días.
+    Marca de agua de un escaneo: la fecha de modificación más reciente vista
+    y los archivos que tenían exactamente esa fecha (para no repetirlos).
+    """
+    mtime_ns: int
+    nombres: FrozenSet[str]
+
+
+class ResultadoEscaneo(NamedTuple):
+    """Archivos encontrados (más recientes primero) y la marca para el siguiente escaneo."""
+    vales: List[str]
+    ordenes: List[str]
+    marca: Optional[MarcaEscaneo]
+
+
+def escanear_vales_y_ordenes(ruta_carpeta: str, dias: int = 2,
+                             desde: Optional[MarcaEscaneo] = None) -> ResultadoEscaneo:
+    """
+    Escanea la carpeta con os.scandir y devuelve los Vales y Órdenes modificados
+    en los últimos días. Se reutiliza el stat de cada DirEntry (en Windows viene
+    incluido en el listado) y solo se consulta para los archivos cuyo nombre
+    corresponde a un Vale o una Orden.
     
     Args:
         ruta_carpeta (str): Ruta de la carpeta donde buscar
         dias (int): Número de días atrás para buscar (default: 2)
+        desde (MarcaEscaneo): Marca de un escaneo anterior; si se indica, solo se
+            devuelven los archivos modificados después de ella
         
     Returns:
-        Tuple[List[str], List[str]]: (lista_vales, lista_ordenes)
+        ResultadoEscaneo: (vales, ordenes, marca) con la marca actualizada
     """
-    # Patrones para identificar archivos
-    patron_vales = "QRSVCMX"  # Vales
-    patron_ordenes = "QRSOPMX208"  # Órdenes
-    
-    # Calcular fecha límite
-    fecha_limite = datetime.now() - timedelta(days=dias)
+    limite_ns = int((datetime.now() - timedelta(days=dias)).timestamp() * 1_000_000_000)
     
     vales = []
     ordenes = []
+    marca_ns = desde.mtime_ns if desde else -1
+    nombres_en_marca = set(desde.nombres) if desde else set()
     
     try:
-        # Verificar que la carpeta existe
-        if not os.path.exists(ruta_carpeta):
-            print(f"❌ La carpeta {ruta_carpeta} no existe")
-            return vales, ordenes
+        with os.scandir(ruta_carpeta) as entradas:
+            for entrada in entradas:
+                nombre = entrada.name
+                
+                # Solo procesar archivos PDF de Vales u Órdenes (sin consultar el disco)
+                if not nombre.lower().endswith('.pdf'):
+                    continue
+                if PATRON_VALES in nombre:
+                    destino = vales
+                elif PATRON_ORDENES in nombre:
+                    destino = ordenes
+                else:
+                    continue
+                
+                # Verificar fecha de modificación
+                try:
+                    if not entrada.is_file():
+                        continue
+                    mtime_ns = entrada.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if mtime_ns < limite_ns:
+                    continue
+                
+                # Descartar lo ya visto en el escaneo anterior
+                if desde is not None:
+                    if mtime_ns < desde.mtime_ns:
+                        continue
+                    if mtime_ns == desde.mtime_ns and nombre in desde.nombres:
+                        continue
+                
+                destino.append((mtime_ns, entrada.path))
+                if mtime_ns > marca_ns:
+                    marca_ns = mtime_ns
+                    nombres_en_marca = {nombre}
+                elif mtime_ns == marca_ns:
+                    nombres_en_marca.add(nombre)
+    
+    except FileNotFoundError:
+        print(f"❌ La carpeta {ruta_carpeta} no existe")
+        return ResultadoEscaneo([], [], desde)
+    except Exception as e:
+        print(f"❌ Error al buscar archivos: {e}")
+    
+    # Ordenar por fecha de modificación (más recientes primero) con el stat ya leído
+    vales.sort(key=lambda x: x[0], reverse=True)
+    ordenes.sort(key=lambda x: x[0], reverse=True)
+    
+    marca = MarcaEscaneo(marca_ns, frozenset(nombres_en_marca)) if marca_ns >= 0 else desde
+    return ResultadoEscaneo([ruta for _, ruta in vales], [ruta for _, ruta in ordenes], marca)
+
+
+def buscar_vales_y_ordenes_recientes(ruta_carpeta: str, dias: int = 2) -> Tuple[List[str], List[str]]:
+    """
+    Busca archivos de Vales y Órdenes modificados en los últimos días.
+    Envoltura compatible de escanear_vales_y_ordenes (escaneo completo, sin marca).
+    
+    Args:
+        ruta_carpeta (str): Ruta de la carpeta donde buscar
+        dias (int): Número de días atrás para buscar (default: 2)
         
-        # Buscar archivos en la carpeta
-        for archivo in os.listdir(ruta_carpeta):
-            ruta_completa = os.path.join(ruta_carpeta, archivo)
-            
-            # Solo procesar archivos PDF
-            if not archivo.lower().endswith('.pdf'):
-                continue
-            
-            # Verificar fecha de modificación
+    Returns:
+        Tuple[List[str], List[str]]: (lista_vales, lista_ordenes)
+    """
+    resultado = escanear_vales_y_ordenes(ruta_carpeta, dias)
+    return resultado.vales, resultado.ordenes
+
+
+class RegistroEscaneos:
+    """
+    Marcas de agua persistidas por carpeta en un archivo JSON, para que cada
+    autocarga incremental solo revise los archivos nuevos desde la anterior.
+    """
+    
+    def __init__(self, ruta_archivo: Optional[str] = None):
+        """
+        Args:
+            ruta_archivo (str): Archivo JSON (default: junto a la caché de extracciones)
+        """
+        if ruta_archivo is None:
             try:
-                fecha_modificacion = datetime.fromtimestamp(os.path.getmtime(ruta_completa))
-                if fecha_modificacion < fecha_limite:
-                    continue
-            except OSError:
-                continue
-            
-            # Clasificar por tipo de archivo
-            if patron_vales in archivo:
-                vales.append(ruta_completa)
-            elif patron_ordenes in archivo:
-                ordenes.append(ruta_completa)
+                from .cache_extraccion import ruta_cache_por_defecto
+            except ImportError:
+                from cache_extraccion import ruta_cache_por_defecto
+            ruta_archivo = ruta_cache_por_defecto().parent / 'autocarga_escaneos.json'
+        self.ruta_archivo = Path(ruta_archivo)
+    
+    @staticmethod
+    def _clave(ruta_carpeta: str) -> str:
+        return os.path.normcase(os.path.abspath(ruta_carpeta))
+    
+    def _leer_todo(self) -> dict:
+        try:
+            return json.loads(self.ruta_archivo.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+    
+    def obtener(self, ruta_carpeta: str) -> Optional[MarcaEscaneo]:
+        """
+        Obtiene la marca guardada de una carpeta.
         
-        # Ordenar por fecha de modificación (más recientes primero)
-        vales.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-        ordenes.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+        Args:
+            ruta_carpeta (str): Carpeta escaneada
+            
+        Returns:
+            Optional[MarcaEscaneo]: Marca del último escaneo confirmado o None
+        """
+        registro = self._leer_todo().get(self._clave(ruta_carpeta))
+        if not registro:
+            return None
+        try:
+            return MarcaEscaneo(int(registro['mtime_ns']), frozenset(registro.get('nombres', [])))
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def guardar(self, ruta_carpeta: str, marca: MarcaEscaneo):
+        """
+        Guarda la marca de una carpeta (escritura atómica del archivo completo).
         
-    except Exception as e:
-        print(f"❌ Error al buscar archivos: {e}")
+        Args:
+            ruta_carpeta (str): Carpeta escaneada
+            marca (MarcaEscaneo): Marca a persistir
+        """
+        registros = self._leer_todo()
+        registros[self._clave(ruta_carpeta)] = {
+            'mtime_ns': marca.mtime_ns,
+            'nombres': sorted(marca.nombres),
+            'guardado': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.ruta_archivo.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.ruta_archivo.with_suffix('.tmp')
+        temporal.write_text(json.dumps(registros, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temporal, self.ruta_archivo)
     
-    return vales, ordenes
+    def borrar(self, ruta_carpeta: str):
+        """
+        Olvida la marca de una carpeta (el siguiente escaneo será completo).
+        
+        Args:
+            ruta_carpeta (str): Carpeta escaneada
+        """
+        registros = self._leer_todo()
+        if registros.pop(self._clave(ruta_carpeta), None) is not None:
+            self.ruta_archivo.write_text(json.dumps(registros, ensure_ascii=False, indent=2), encoding='utf-8')
 
 
 def listar_archivos_disponibles(ruta_carpeta: str, patron: str = "") -> List[str]:
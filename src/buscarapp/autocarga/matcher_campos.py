@@ -0,0 +1,267 @@
+"""
+Matcher compilado de campos para los extractores de AutoCarga.
+Compila una sola vez los patrones de cada campo, descarta sin ejecutar la regex
+los patrones cuyo literal inicial no aparece en el texto y evita el retroceso
+cuadrático de los patrones genéricos de nombres.
+"""
+
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Caracteres con significado especial en una expresión regular
+_METACARACTERES = set('.^$*+?{}[]\\|()')
+_CUANTIFICADORES = set('*+?{')
+_ESPACIOS = re.compile(r'\s+')
+
+# Patrones que empiezan con "([A-Z]" seguido de una repetición de una clase que
+# contiene a [A-Z], p. ej. "([A-Z][A-Z\-\s&]+" o "([A-Z]+"
+_INICIO_CORRIDA = re.compile(r'^\(\[A-Z\](?:(\[A-Z[^\]]*\])\+|\+)')
+
+# Longitud mínima del literal para que valga la pena el filtro previo
+_LITERAL_MINIMO = 3
+
+
+def literal_inicial(patron: str) -> str:
+    """
+    Obtiene el texto literal con el que obligatoriamente empieza cualquier coincidencia.
+
+    Ejemplos:
+    - r'Referencia:\\s*(\\d+)' -> 'Referencia:'
+    - r'\\bCOD[:\\s]*([0-9]+)\\b' -> 'COD'
+    - r'(V\\d{6})' -> ''
+
+    Args:
+        patron (str): Expresión regular
+
+    Returns:
+        str: Literal inicial (puede ser vacío)
+    """
+    if _tiene_alternativa_superior(patron):
+        return ''
+
+    literal = []
+    i = 0
+    # Las anclas \b al inicio no consumen texto
+    while patron.startswith('\\b', i):
+        i += 2
+
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            if i + 1 < len(patron) and not patron[i + 1].isalnum():
+                siguiente = patron[i + 1]
+                avance = 2
+            else:
+                break  # \s, \d, \b, etc.
+        elif c in _METACARACTERES:
+            break
+        else:
+            siguiente = c
+            avance = 1
+
+        # Si el carácter lleva cuantificador, no es obligatorio
+        if i + avance < len(patron) and patron[i + avance] in _CUANTIFICADORES:
+            break
+        literal.append(siguiente)
+        i += avance
+
+    return ''.join(literal)
+
+
+def clase_de_corrida(patron: str) -> Optional[str]:
+    """
+    Para patrones de la forma "([A-Z]<clase>+..." donde <clase> incluye [A-Z],
+    devuelve la regex de las "corridas" de caracteres de esa clase.
+
+    En esos patrones, si una coincidencia empieza dentro de una corrida, también
+    existe una que empieza en la primera letra de la corrida. Por eso basta con
+    probar el patrón en el inicio de cada corrida, en lugar de en cada posición
+    (que con textos largos en mayúsculas provoca retroceso cuadrático).
+
+    Args:
+        patron (str): Expresión regular
+
+    Returns:
+        Optional[str]: Regex de corridas, o None si el patrón no tiene esa forma
+    """
+    if _tiene_alternativa_superior(patron):
+        return None
+    match = _INICIO_CORRIDA.match(patron)
+    if not match:
+        return None
+    clase = match.group(1) or '[A-Z]'
+    return '[A-Z]' + clase + '*'
+
+
+def _tiene_alternativa_superior(patron: str) -> bool:
+    """Indica si el patrón tiene un '|' fuera de grupos y clases de caracteres."""
+    profundidad = 0
+    en_clase = False
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            i += 2
+            continue
+        if en_clase:
+            en_clase = c != ']'
+        elif c == '[':
+            en_clase = True
+        elif c == '(':
+            profundidad += 1
+        elif c == ')':
+            profundidad -= 1
+        elif c == '|' and profundidad == 0:
+            return True
+        i += 1
+    return False
+
+
+class MatcherCampos:
+    """
+    Conjunto de patrones compilados por campo con la misma prioridad que la
+    búsqueda secuencial: para cada campo gana el primer patrón (en orden) que
+    coincide en cualquier parte del texto.
+    """
+
+    def __init__(self, patrones: Dict[str, List[str]], flags: int = re.IGNORECASE):
+        """
+        Args:
+            patrones (Dict[str, List[str]]): Patrones por campo, en orden de prioridad
+            flags (int): Banderas de compilación (las mismas que usaba re.search)
+        """
+        self.flags = flags
+        self._ignorar_mayusculas = bool(flags & re.IGNORECASE)
+        self.campos: Dict[str, List[Tuple[re.Pattern, str, Optional[re.Pattern]]]] = {}
+        for campo, lista in patrones.items():
+            compilados = []
+            for patron in lista:
+                literal = literal_inicial(patron)
+                if len(literal) < _LITERAL_MINIMO:
+                    literal = ''
+                elif self._ignorar_mayusculas:
+                    literal = literal.casefold()
+                corrida = clase_de_corrida(patron)
+                compilados.append((
+                    re.compile(patron, flags),
+                    literal,
+                    re.compile(corrida, flags) if corrida else None
+                ))
+            self.campos[campo] = compilados
+
+        # Último texto visto y su versión para el filtro de literales
+        self._ultimo_texto: Optional[str] = None
+        self._ultimo_plegado = ''
+
+    def _texto_plegado(self, texto: str) -> str:
+        """Versión del texto para buscar literales, calculada una vez por texto."""
+        if texto is not self._ultimo_texto:
+            self._ultimo_texto = texto
+            self._ultimo_plegado = texto.casefold() if self._ignorar_mayusculas else texto
+        return self._ultimo_plegado
+
+    def buscar(self, texto: str, campo: str) -> Optional[str]:
+        """
+        Busca un campo y devuelve el grupo 1 limpio (sin espacios repetidos).
+
+        Args:
+            texto (str): Texto donde buscar
+            campo (str): Nombre del campo
+
+        Returns:
+            Optional[str]: Valor encontrado o None
+        """
+        if not texto:
+            return None
+        plegado = self._texto_plegado(texto)
+        for regex, literal, corrida in self.campos.get(campo, ()):
+            if literal and literal not in plegado:
+                continue
+            match = self._buscar_en_corridas(regex, corrida, texto) if corrida else regex.search(texto)
+            if match:
+                return _ESPACIOS.sub(' ', match.group(1).strip())
+        return None
+
+    @staticmethod
+    def _buscar_en_corridas(regex: re.Pattern, corrida: re.Pattern, texto: str) -> Optional[re.Match]:
+        """Equivalente a regex.search(texto) probando solo el inicio de cada corrida."""
+        for inicio in corrida.finditer(texto):
+            match = regex.match(texto, inicio.start())
+            if match:
+                return match
+        return None
+
+    def buscar_todos(self, texto: str, campos: Optional[Iterable[str]] = None) -> Dict[str, Optional[str]]:
+        """
+        Busca varios campos sobre el mismo texto.
+
+        Args:
+            texto (str): Texto donde buscar
+            campos: Campos a buscar (default: todos)
+
+        Returns:
+            Dict[str, Optional[str]]: Valor crudo por campo (sin post-procesamiento)
+        """
+        return {campo: self.buscar(texto, campo) for campo in (campos or self.campos)}
+
+
+def _texto_vale_de_prueba(repeticiones: int) -> str:
+    """Texto con el formato de un vale, repetido para simular documentos más grandes."""
+    relleno = "LINEA DE DETALLE SIN DATOS RELEVANTES 0000 ABC\n" * 20
+    base = (
+        "Número: V123456\nProveedor: OLEKSEI-MX SA DE CV Tipo de Vale\nReferencia: 5123\n"
+        "Fecha: 18/07/2025\nCuenta: 60309\nDepartamento: 6ADMINISTRACION\nSucursal: 15NISSANMATEHUALA\n"
+        "Marca: 2-NISSAN\nResponsable: 294379\nTipodeVale: CECOMPRA\nNºDocumento: 17474\n"
+        "ValorVale: 1,234.50\nDescripción: SERVICIO DE MARKETING\n"
+    )
+    return relleno * repeticiones + base
+
+
+def benchmark_matcher(repeticiones: Iterable[int] = (1, 10, 50), rondas: int = 50):
+    """
+    Compara el tiempo de regex por documento entre la búsqueda secuencial
+    (re.search por patrón) y el MatcherCampos, para textos de distinto tamaño.
+    """
+    try:
+        from .extractor import PDFDataExtractor
+    except ImportError:
+        from extractor import PDFDataExtractor
+
+    patrones = PDFDataExtractor().patterns
+    matcher = MatcherCampos(patrones)
+
+    def secuencial(texto):
+        resultado = {}
+        for campo, lista in patrones.items():
+            resultado[campo] = None
+            for patron in lista:
+                match = re.search(patron, texto, re.IGNORECASE)
+                if match:
+                    resultado[campo] = re.sub(r'\s+', ' ', match.group(1).strip())
+                    break
+        return resultado
+
+    print("🧪 BENCHMARK DE REGEX POR DOCUMENTO")
+    print("=" * 60)
+    for rep in repeticiones:
+        texto = _texto_vale_de_prueba(rep)
+        assert secuencial(texto) == matcher.buscar_todos(texto), "Los resultados difieren"
+
+        inicio = time.perf_counter()
+        for _ in range(rondas):
+            secuencial(texto + " ")  # Texto nuevo en cada ronda, como en documentos reales
+        t_secuencial = (time.perf_counter() - inicio) / rondas
+
+        inicio = time.perf_counter()
+        for _ in range(rondas):
+            matcher.buscar_todos(texto + " ")
+        t_matcher = (time.perf_counter() - inicio) / rondas
+
+        print(f"📄 {len(texto):>7} caracteres | secuencial: {t_secuencial * 1000:7.3f} ms | "
+              f"compilado: {t_matcher * 1000:7.3f} ms | x{t_secuencial / t_matcher:.1f}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    benchmark_matcher()
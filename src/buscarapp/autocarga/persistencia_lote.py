@@ -0,0 +1,347 @@
+"""
+Persistencia por lotes de los resultados de AutoCarga.
+Precarga con consultas IN los vales, facturas y órdenes que se van a consultar,
+resuelve las búsquedas en memoria y crea los registros nuevos con insert_many
+dentro de una sola transacción. Incluye un contador de viajes a la base de datos.
+"""
+
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Máximo de valores por consulta IN y de filas por insert_many
+TAMANO_BLOQUE_BD = 500
+
+
+def normalizar_folio_para_comparacion(folio_str) -> str:
+    """
+    Normaliza un folio para comparación flexible.
+    Extrae la parte principal del folio ignorando prefijos/sufijos.
+
+    Ejemplos:
+    - 'B1-405721387T1' -> '405721387'
+    - 'TP-B1-405721387T1' -> '405721387'
+    - '123456' -> '123456'
+    - 'A-123-B' -> '123'
+    """
+    if not folio_str:
+        return ''
+
+    # Remover espacios y convertir a string
+    folio_clean = str(folio_str).strip()
+
+    # Si es solo dígitos, retornar tal como está
+    if folio_clean.isdigit():
+        return folio_clean
+
+    # Buscar la secuencia de dígitos más larga
+    numeros = re.findall(r'\d+', folio_clean)
+    if numeros:
+        # Retornar el número más largo encontrado
+        return max(numeros, key=len)
+
+    # Si no hay números, retornar el folio normalizado sin guiones
+    return folio_clean.replace('-', '').replace(' ', '')
+
+
+def folios_son_equivalentes(folio1, folio2) -> bool:
+    """
+    Compara dos folios usando normalización flexible.
+
+    Args:
+        folio1, folio2: Los folios a comparar
+
+    Returns:
+        bool: True si son equivalentes
+    """
+    if not folio1 or not folio2:
+        return False
+
+    # Normalizar ambos folios
+    norm1 = normalizar_folio_para_comparacion(folio1)
+    norm2 = normalizar_folio_para_comparacion(folio2)
+
+    # Comparar normalizados
+    return norm1 == norm2 and len(norm1) > 0
+
+
+def _en_bloques(valores: List[Any], tamano: int = TAMANO_BLOQUE_BD) -> Iterable[List[Any]]:
+    """Divide una lista en bloques para no exceder el tamaño de una consulta."""
+    for inicio in range(0, len(valores), tamano):
+        yield valores[inicio:inicio + tamano]
+
+
+def vales_registrados(no_vales: Iterable[str], solo_asociados: bool = True) -> Set[str]:
+    """
+    Números de vale que ya están en la BD, con una consulta IN por bloque de
+    TAMANO_BLOQUE_BD números. Sirve para no extraer completo un vale que la
+    persistencia solo va a omitir.
+
+    Args:
+        no_vales: Números de vale a revisar
+        solo_asociados (bool): Devolver solo los vales asociados a una factura que
+            existe (a los demás la autocarga todavía puede asociarlos)
+
+    Returns:
+        Set[str]: Números de vale registrados
+    """
+    from src.bd.models import Vale, Factura
+
+    registrados: Set[str] = set()
+    for bloque in _en_bloques(sorted({n for n in no_vales if n})):
+        consulta = Vale.select(Vale.noVale).where(Vale.noVale.in_(bloque))
+        if solo_asociados:
+            consulta = consulta.join(Factura, on=(Vale.factura == Factura.folio_interno))
+        registrados.update(no_vale for (no_vale,) in consulta.tuples())
+    return registrados
+
+
+class ContadorConsultas:
+    """
+    Cuenta los viajes a la base de datos (llamadas a execute_sql de Peewee)
+    mientras el bloque with está activo.
+
+    Uso:
+        with ContadorConsultas(db) as contador:
+            ...
+        print(contador.consultas)
+    """
+
+    def __init__(self, database):
+        """
+        Args:
+            database: Base de datos de Peewee (p. ej. Vale._meta.database)
+        """
+        self.database = database
+        self.consultas = 0
+        self._anterior = None
+        self._tenia_atributo = False
+
+    def __enter__(self) -> 'ContadorConsultas':
+        self._tenia_atributo = 'execute_sql' in vars(self.database)
+        self._anterior = self.database.execute_sql
+        anterior = self._anterior
+
+        def execute_sql(*args, **kwargs):
+            self.consultas += 1
+            return anterior(*args, **kwargs)
+
+        self.database.execute_sql = execute_sql
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Restaurar lo que había (otro contador activo o el método de la clase)
+        if self._tenia_atributo:
+            self.database.execute_sql = self._anterior
+        else:
+            del self.database.execute_sql
+        return False
+
+
+class LoteAutocarga:
+    """
+    Estado de una corrida de persistencia por lotes: registros precargados para
+    resolver en memoria y registros nuevos pendientes de insertar.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        """
+        Args:
+            logger: Logger para los mensajes de creación (default: logger del módulo)
+        """
+        from src.bd.models import Vale, Factura, OrdenCompra
+        self.Vale = Vale
+        self.Factura = Factura
+        self.OrdenCompra = OrdenCompra
+        self.database = Vale._meta.database
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Registros precargados
+        self.vales_existentes: Dict[str, Any] = {}
+        self.facturas_por_id: Dict[int, Any] = {}
+        self.facturas_por_serie_folio: Dict[Tuple[str, str], Any] = {}
+        self.facturas_por_folio: Dict[str, Any] = {}
+        self.ordenes_existentes: Set[Tuple[str, int]] = set()
+
+        # Registros pendientes de insertar
+        self.vales_nuevos: List[Tuple[Dict[str, Any], Any]] = []
+        self.ordenes_nuevas: List[Tuple[Dict[str, Any], Any]] = []
+        self._no_vales_nuevos: Set[str] = set()
+
+        # Proveedores ya revisados para actualizar código (nombre, código)
+        self.codigos_revisados: Set[Tuple[str, str]] = set()
+
+        # Índice de asociación Orden ↔ Factura por importe (IndiceAsociacion), si se precargó
+        self.asociacion = None
+
+    def precargar(self, no_vales: Iterable[str], refs_ordenes: Iterable[str],
+                  facturas_seleccionadas: Optional[List[Dict[str, Any]]] = None):
+        """
+        Carga con consultas IN todo lo que el procesamiento va a consultar.
+
+        Args:
+            no_vales: Números de vale de la corrida
+            refs_ordenes: Ref. Movimiento de las órdenes de la corrida
+            facturas_seleccionadas: Facturas candidatas para asociar vales
+        """
+        Vale, Factura, OrdenCompra = self.Vale, self.Factura, self.OrdenCompra
+
+        # Vales existentes y las facturas que ya tienen asociadas
+        for bloque in _en_bloques(sorted({n for n in no_vales if n})):
+            for vale in Vale.select().where(Vale.noVale.in_(bloque)):
+                self.vales_existentes[vale.noVale] = vale
+        ids_facturas = sorted({v.factura_id for v in self.vales_existentes.values() if v.factura_id is not None})
+        for bloque in _en_bloques(ids_facturas):
+            for factura in Factura.select().where(Factura.folio_interno.in_(bloque)):
+                self.facturas_por_id[factura.folio_interno] = factura
+
+        # Facturas candidatas por folio (la serie se filtra en memoria)
+        folios = sorted({
+            str(f.get('folio', '')).strip() for f in (facturas_seleccionadas or [])
+            if str(f.get('folio', '')).strip()
+        })
+        for bloque in _en_bloques(folios):
+            for factura in Factura.select().where(Factura.folio.in_(bloque)):
+                self.facturas_por_serie_folio.setdefault((factura.serie, factura.folio), factura)
+                self.facturas_por_folio.setdefault(factura.folio, factura)
+
+        # Órdenes ya registradas
+        for bloque in _en_bloques(sorted({r for r in refs_ordenes if r})):
+            consulta = (OrdenCompra
+                        .select(OrdenCompra.ref_movimiento, OrdenCompra.cuenta)
+                        .where(OrdenCompra.ref_movimiento.in_(bloque))
+                        .tuples())
+            for ref_movimiento, cuenta in consulta:
+                self.ordenes_existentes.add((ref_movimiento, cuenta))
+
+    def buscar_vale(self, no_vale: str):
+        """
+        Vale ya registrado con ese número (None si no existe).
+
+        Args:
+            no_vale (str): Número de vale
+        """
+        return self.vales_existentes.get(no_vale)
+
+    def vale_pendiente(self, no_vale: str) -> bool:
+        """Indica si el vale ya se agregó al lote en esta corrida."""
+        return no_vale in self._no_vales_nuevos
+
+    def factura_de_vale(self, vale):
+        """
+        Factura asociada a un vale existente, o None si la referencia apunta a una
+        factura que ya no existe.
+        """
+        return self.facturas_por_id.get(vale.factura_id)
+
+    def buscar_factura(self, serie: str, folio: str):
+        """
+        Equivalente en memoria de Factura.get por serie y folio (o solo folio si no hay serie).
+
+        Raises:
+            Factura.DoesNotExist: Si no se precargó ninguna factura que coincida
+        """
+        if serie:
+            factura = self.facturas_por_serie_folio.get((serie, folio))
+        else:
+            factura = self.facturas_por_folio.get(folio)
+        if factura is None:
+            raise self.Factura.DoesNotExist(f"Factura {serie}-{folio} no encontrada")
+        return factura
+
+    def orden_existe(self, ref_movimiento: str, cuenta: int) -> bool:
+        """Indica si la orden ya está registrada o ya se agregó al lote."""
+        return (ref_movimiento, cuenta) in self.ordenes_existentes
+
+    def agregar_vale(self, campos: Dict[str, Any], factura):
+        """
+        Agrega un vale nuevo al lote.
+
+        Args:
+            campos (Dict): Campos del modelo Vale (sin factura)
+            factura: Factura a asociar (o None)
+        """
+        self.vales_nuevos.append((campos, factura))
+        self._no_vales_nuevos.add(campos['noVale'])
+
+    def agregar_orden(self, campos: Dict[str, Any], factura):
+        """
+        Agrega una orden nueva al lote.
+
+        Args:
+            campos (Dict): Campos del modelo OrdenCompra (sin factura)
+            factura: Factura a asociar (o None)
+        """
+        self.ordenes_nuevas.append((campos, factura))
+        self.ordenes_existentes.add((campos['ref_movimiento'], campos['cuenta']))
+
+    def insertar(self, contadores: Dict[str, Any]):
+        """
+        Inserta los vales y órdenes pendientes con insert_many en una sola transacción.
+        Si el lote falla (p. ej. dos vales con la misma factura), se revierte y se
+        inserta registro por registro para que solo fallen los registros con problema,
+        igual que en el procesamiento individual.
+
+        Args:
+            contadores (Dict): Contadores del reporte a actualizar
+        """
+        with self.database.atomic():
+            for modelo, pendientes, tipo in (
+                (self.Vale, self.vales_nuevos, 'vale'),
+                (self.OrdenCompra, self.ordenes_nuevas, 'orden'),
+            ):
+                if pendientes:
+                    self._insertar_modelo(modelo, pendientes, tipo, contadores)
+        self._no_vales_nuevos.clear()
+
+    def _insertar_modelo(self, modelo, pendientes: List[Tuple[Dict[str, Any], Any]], tipo: str,
+                         contadores: Dict[str, Any]):
+        """Inserta los pendientes de un modelo (dentro de la transacción de insertar)."""
+        filas = [dict(campos, factura=factura) for campos, factura in pendientes]
+        try:
+            with self.database.atomic():
+                for bloque in _en_bloques(filas):
+                    modelo.insert_many(bloque).execute()
+            creados = [True] * len(filas)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Inserción por lote de {tipo}s falló ({e}); insertando uno por uno")
+            creados = []
+            for fila in filas:
+                try:
+                    with self.database.atomic():
+                        modelo.create(**fila)
+                    creados.append(True)
+                except Exception as error_fila:
+                    creados.append(False)
+                    contadores['errores'] = contadores.get('errores', 0) + 1
+                    self.logger.error(f"❌ Error creando {tipo} {self._describir(tipo, fila)}: {error_fila}")
+
+        for fila, creado in zip(filas, creados):
+            if creado:
+                self._contar_creado(tipo, fila, contadores)
+        pendientes.clear()
+
+    @staticmethod
+    def _describir(tipo: str, fila: Dict[str, Any]) -> str:
+        return fila['noVale'] if tipo == 'vale' else f"{fila['ref_movimiento']} - {fila['cuenta']}"
+
+    def _contar_creado(self, tipo: str, fila: Dict[str, Any], contadores: Dict[str, Any]):
+        """Actualiza los contadores y registra el mensaje de un registro creado."""
+        factura = fila['factura']
+        if tipo == 'vale':
+            if factura:
+                contadores['vales_asociados'] += 1
+                self.logger.info(f"✅ Vale {fila['noVale']} CREADO y ASOCIADO con factura {factura.serie}-{factura.folio}")
+            else:
+                contadores['vales_sin_asociar'] += 1
+                self.logger.info(f"📝 Vale {fila['noVale']} CREADO sin asociar")
+            contadores['vales_creados'] += 1
+        else:
+            contadores['ordenes_creadas'] = contadores.get('ordenes_creadas', 0) + 1
+            mensaje_cuenta_mayor = f" (Cuenta Mayor: {fila['cuenta_mayor']})" if fila.get('cuenta_mayor') else ""
+            if factura:
+                contadores['ordenes_asociadas'] = contadores.get('ordenes_asociadas', 0) + 1
+                self.logger.info(f"✅ Orden creada y asociada: {fila['ref_movimiento']} → Factura {factura.serie}-{factura.folio}{mensaje_cuenta_mayor}")
+            else:
+                contadores['ordenes_sin_asociar'] = contadores.get('ordenes_sin_asociar', 0) + 1
+                self.logger.info(f"✅ Orden creada sin asociar: {fila['ref_movimiento']}{mensaje_cuenta_mayor}")
@@ -0,0 +1,437 @@
+"""
+Plantillas de regiones para documentos de Quiter con formato fijo.
+Los vales (QRSVCMX) salen siempre con el mismo acomodo: en lugar de leer todo el
+documento y buscar cada campo en todo el texto, una plantilla guarda la región
+(bbox) de cada campo en la página 1 y solo se lee el texto de esas regiones.
+
+Las regiones se calibran con PDFs de muestra: cada una se ancla a la línea de la
+etiqueta del campo ("Cuenta:", "Referencia:", ...) y se agranda hacia abajo hasta
+que el valor leído en ella es el mismo que da la extracción completa en todas las
+muestras. Los campos de largo variable (la descripción, que puede ocupar una o
+varias líneas) no se agrandan línea por línea: su región llega hasta la siguiente
+etiqueta de la página, o hasta el final si no hay otra debajo.
+Las plantillas se guardan en JSON junto a la caché de extracciones.
+
+Si la página 1 no tiene el tamaño de la plantilla, un campo no tiene región en la
+plantilla o no aparece en su región, el extractor vuelve a la búsqueda con regex
+sobre el texto completo, leído del mismo documento ya abierto (ver LectorRegiones).
+El ahorro es mayor cuando la plantilla cubre todos los campos; con campos sin región
+el texto completo se lee siempre, así que conviene medirlo con
+benchmark_extractores --plantilla antes de activar el modo plantilla.
+
+Uso (calibrar con PDFs de muestra y guardar la plantilla):
+    python -m src.buscarapp.autocarga.plantillas_region muestra1.pdf [muestra2.pdf ...]
+"""
+
+import bisect
+import hashlib
+import io
+import json
+import statistics
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pdfplumber
+
+try:
+    from .documento import (BACKEND_PDFIUM, BACKEND_PDFPLUMBER, DocumentoPDF, validar_backend,
+                            texto_de_pagina_pdfium, texto_de_pagina_pdfplumber)
+    from .tiempos_etapas import medir, ETAPA_APERTURA, ETAPA_TEXTO
+except ImportError:
+    from documento import (BACKEND_PDFIUM, BACKEND_PDFPLUMBER, DocumentoPDF, validar_backend,
+                           texto_de_pagina_pdfium, texto_de_pagina_pdfplumber)
+    from tiempos_etapas import medir, ETAPA_APERTURA, ETAPA_TEXTO
+
+# Región de un campo: (x0, top, x1, bottom) en puntos, con el origen arriba a la
+# izquierda (las coordenadas de pdfplumber)
+Region = Tuple[float, float, float, float]
+
+# Holgura alrededor de la línea de la etiqueta (en puntos)
+MARGEN_REGION = 2.0
+
+# Líneas que se puede agrandar una región hacia abajo durante la calibración
+LINEAS_EXTRA_MAXIMAS = 4
+
+# Diferencia de tamaño de página (en puntos) a partir de la cual el formato no es el de la plantilla
+TOLERANCIA_PAGINA = 1.0
+
+
+class PlantillaRegiones:
+    """
+    Regiones de los campos de un tipo de documento en la página 1.
+
+    Atributos:
+        tipo (str): Tipo de documento ('vale')
+        ancho, alto (float): Tamaño de la página con el que se calibró
+        regiones (Dict[str, Region]): Región por campo del extractor
+    """
+
+    def __init__(self, tipo: str, ancho: float, alto: float, regiones: Dict[str, Region]):
+        self.tipo = tipo
+        self.ancho = float(ancho)
+        self.alto = float(alto)
+        self.regiones = {campo: tuple(float(v) for v in region) for campo, region in regiones.items()}
+
+    def coincide_pagina(self, ancho: float, alto: float) -> bool:
+        """Indica si una página tiene el tamaño con el que se calibró la plantilla."""
+        return abs(ancho - self.ancho) <= TOLERANCIA_PAGINA and abs(alto - self.alto) <= TOLERANCIA_PAGINA
+
+    def a_dict(self) -> Dict:
+        """Representación para guardar en JSON."""
+        return {'ancho': self.ancho, 'alto': self.alto,
+                'regiones': {campo: list(region) for campo, region in self.regiones.items()}}
+
+    def huella(self) -> str:
+        """Hash corto de las regiones: cambia cada vez que se vuelve a calibrar con otro resultado."""
+        datos = json.dumps(self.a_dict(), sort_keys=True).encode('utf-8')
+        return hashlib.sha1(datos).hexdigest()[:12]
+
+    @classmethod
+    def desde_dict(cls, tipo: str, datos: Dict) -> 'PlantillaRegiones':
+        """Crea la plantilla a partir de lo guardado en JSON."""
+        return cls(tipo, datos['ancho'], datos['alto'], datos['regiones'])
+
+
+def ruta_plantillas_por_defecto() -> Path:
+    """Archivo JSON de plantillas, junto a la caché de extracciones."""
+    try:
+        from .cache_extraccion import ruta_cache_por_defecto
+    except ImportError:
+        from cache_extraccion import ruta_cache_por_defecto
+    return ruta_cache_por_defecto().parent / 'autocarga_plantillas.json'
+
+
+def cargar_plantillas(ruta_archivo: Optional[str] = None) -> Dict[str, PlantillaRegiones]:
+    """
+    Lee las plantillas guardadas. Si el archivo no existe o no se puede leer no hay plantillas.
+
+    Args:
+        ruta_archivo (str): Archivo JSON (default: junto a la caché de extracciones)
+
+    Returns:
+        Dict[str, PlantillaRegiones]: Plantilla por tipo de documento
+    """
+    ruta = Path(ruta_archivo) if ruta_archivo else ruta_plantillas_por_defecto()
+    if not ruta.exists():
+        return {}
+    try:
+        datos = json.loads(ruta.read_text(encoding='utf-8'))
+        return {tipo: PlantillaRegiones.desde_dict(tipo, plantilla) for tipo, plantilla in datos.items()}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ No se pudieron leer las plantillas de regiones: {e}")
+        return {}
+
+
+def guardar_plantilla(plantilla: PlantillaRegiones, ruta_archivo: Optional[str] = None) -> Path:
+    """
+    Guarda (o reemplaza) la plantilla de su tipo conservando las de otros tipos.
+
+    Args:
+        plantilla (PlantillaRegiones): Plantilla calibrada
+        ruta_archivo (str): Archivo JSON (default: junto a la caché de extracciones)
+
+    Returns:
+        Path: Archivo donde se guardó
+    """
+    ruta = Path(ruta_archivo) if ruta_archivo else ruta_plantillas_por_defecto()
+    plantillas = cargar_plantillas(str(ruta))
+    plantillas[plantilla.tipo] = plantilla
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(json.dumps({tipo: p.a_dict() for tipo, p in plantillas.items()}, indent=2),
+                    encoding='utf-8')
+    return ruta
+
+
+class LectorRegiones:
+    """
+    PDF abierto una sola vez para el modo plantilla: da el texto de las regiones de
+    la página 1 y, solo si se pide, el texto completo del documento, sin volver a
+    leer ni a decodificar el archivo.
+
+    Uso:
+        with LectorRegiones(datos, plantilla, backend) as lector:
+            textos = lector.textos()
+            if falta_algo:
+                texto = lector.texto_completo()
+    """
+
+    def __init__(self, datos: bytes, plantilla: PlantillaRegiones, backend: str = BACKEND_PDFPLUMBER):
+        """
+        Args:
+            datos (bytes): Contenido del PDF
+            plantilla (PlantillaRegiones): Plantilla del tipo de documento
+            backend (str): 'pdfplumber' (caracteres dentro de cada región) o 'pdfium'
+                (texto acotado de pypdfium2)
+        """
+        self.datos = datos
+        self.plantilla = plantilla
+        self.backend = validar_backend(backend)
+        self._pdf = None
+        # Página 1 de pdfium, abierta mientras se pueda necesitar el texto completo
+        self._pagina = None
+        self._textpage = None
+
+    def __enter__(self) -> 'LectorRegiones':
+        with medir(ETAPA_APERTURA):
+            if self.backend == BACKEND_PDFIUM:
+                import pypdfium2 as pdfium
+                self._pdf = pdfium.PdfDocument(self.datos)
+            else:
+                self._pdf = pdfplumber.open(io.BytesIO(self.datos))
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        """Libera el documento (y la página 1 de pdfium, si se abrió)."""
+        if self._textpage is not None:
+            self._textpage.close()
+            self._textpage = None
+        if self._pagina is not None:
+            self._pagina.close()
+            self._pagina = None
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    def textos(self, campos: Optional[Iterable[str]] = None) -> Optional[Dict[str, str]]:
+        """
+        Texto de cada región de la plantilla.
+
+        Args:
+            campos (Iterable[str]): Leer solo las regiones de estos campos (None: todas)
+
+        Returns:
+            Optional[Dict[str, str]]: Texto por campo, o None si la página 1 no tiene
+            el formato de la plantilla
+        """
+        regiones = self.plantilla.regiones
+        if campos is not None:
+            regiones = {campo: regiones[campo] for campo in campos if campo in regiones}
+        with medir(ETAPA_TEXTO):
+            if self.backend == BACKEND_PDFIUM:
+                return self._textos_pdfium(regiones)
+            return self._textos_pdfplumber(regiones)
+
+    def texto_completo(self) -> str:
+        """Texto de todas las páginas, igual al DocumentoPDF.texto del mismo backend."""
+        with medir(ETAPA_TEXTO):
+            if self.backend == BACKEND_PDFIUM:
+                texto = ""
+                for indice in range(len(self._pdf)):
+                    if indice == 0 and self._textpage is not None:
+                        texto += texto_de_pagina_pdfium(self._textpage)
+                        continue
+                    pagina = self._pdf[indice]
+                    textpage = pagina.get_textpage()
+                    texto += texto_de_pagina_pdfium(textpage)
+                    textpage.close()
+                    pagina.close()
+                return texto
+            # La página 1 reutiliza los caracteres ya leídos para las regiones
+            return "".join(texto_de_pagina_pdfplumber(pagina) for pagina in self._pdf.pages)
+
+    def documento(self, ruta: str, con_espacios: bool = True) -> DocumentoPDF:
+        """
+        DocumentoPDF con el mismo texto que daría DocumentoPDF.desde_archivo, a partir
+        del documento ya abierto (el texto de PyPDF2 solo se genera si se pide).
+
+        Args:
+            ruta (str): Ruta del PDF (solo informativa)
+            con_espacios (bool): Si también se genera el texto de PyPDF2
+        """
+        documento = DocumentoPDF(ruta, texto=self.texto_completo(), backend=self.backend)
+        if self.backend == BACKEND_PDFIUM:
+            documento.texto_con_espacios = documento.texto
+        elif con_espacios:
+            documento.texto_con_espacios = DocumentoPDF._texto_pypdf2(self.datos)
+        return documento
+
+    def _textos_pdfplumber(self, regiones: Dict[str, Region]) -> Optional[Dict[str, str]]:
+        """
+        Los caracteres de la página se leen una vez y se reparten entre las regiones
+        (mismo resultado que page.crop(region).extract_text(), sin volver a filtrar la
+        página por cada campo).
+        """
+        from pdfplumber.utils import extract_text
+
+        if not self._pdf.pages:
+            return None
+        pagina = self._pdf.pages[0]
+        if not self.plantilla.coincide_pagina(pagina.width, pagina.height):
+            return None
+        # Caracteres ordenados por su borde superior: cada región solo revisa los de su franja
+        caracteres = pagina.chars
+        orden = sorted(range(len(caracteres)), key=lambda i: caracteres[i]['top'])
+        superiores = [caracteres[i]['top'] for i in orden]
+        alto_maximo = max((c['bottom'] - c['top'] for c in caracteres), default=0.0)
+        textos = {}
+        for campo, (x0, top, x1, bottom) in regiones.items():
+            franja = orden[bisect.bisect_left(superiores, top - alto_maximo):bisect.bisect_left(superiores, bottom)]
+            dentro = [caracteres[i] for i in sorted(franja)
+                      if caracteres[i]['x0'] < x1 and caracteres[i]['x1'] > x0
+                      and caracteres[i]['top'] < bottom and caracteres[i]['bottom'] > top]
+            textos[campo] = extract_text(dentro) if dentro else ''
+        return textos
+
+    def _textos_pdfium(self, regiones: Dict[str, Region]) -> Optional[Dict[str, str]]:
+        """Texto de cada región con get_text_bounded de pypdfium2 (origen abajo a la izquierda)."""
+        if len(self._pdf) == 0:
+            return None
+        self._pagina = self._pdf[0]
+        ancho, alto = self._pagina.get_size()
+        if not self.plantilla.coincide_pagina(ancho, alto):
+            return None
+        self._textpage = self._pagina.get_textpage()
+        textos = {}
+        for campo, (x0, top, x1, bottom) in regiones.items():
+            texto = self._textpage.get_text_bounded(left=x0, bottom=alto - bottom, right=x1, top=alto - top)
+            # pdfium separa líneas con \r\n; los patrones esperan \n
+            textos[campo] = texto.replace('\r\n', '\n').replace('\r', '\n')
+        return textos
+
+
+def textos_de_regiones(ruta_pdf: str, plantilla: PlantillaRegiones,
+                       backend: str = BACKEND_PDFPLUMBER) -> Optional[Dict[str, str]]:
+    """
+    Lee solo el texto de las regiones de la plantilla en la página 1.
+
+    Args:
+        ruta_pdf (str): Ruta del PDF
+        plantilla (PlantillaRegiones): Plantilla del tipo de documento
+        backend (str): 'pdfplumber' (caracteres dentro de cada región) o 'pdfium'
+            (texto acotado de pypdfium2)
+
+    Returns:
+        Optional[Dict[str, str]]: Texto por campo, o None si la página no tiene el
+        formato de la plantilla o no se pudo leer
+    """
+    validar_backend(backend)
+    with medir(ETAPA_APERTURA):
+        datos = Path(ruta_pdf).read_bytes()
+    try:
+        with LectorRegiones(datos, plantilla, backend) as lector:
+            return lector.textos()
+    except Exception as e:
+        print(f"Error al leer las regiones del PDF: {e}")
+        return None
+
+
+def regiones_por_etiqueta(ruta_pdf: str, etiquetas: Dict[str, List[str]]
+                          ) -> Tuple[float, float, Dict[str, Region], float]:
+    """
+    Ancla una región a la línea de la etiqueta de cada campo en la página 1: va del
+    inicio de la línea al borde derecho de la página, con MARGEN_REGION de holgura.
+
+    Args:
+        ruta_pdf (str): PDF de muestra
+        etiquetas (Dict[str, List[str]]): Etiquetas posibles por campo, en orden de prioridad
+
+    Returns:
+        Tuple: (ancho, alto, región por campo encontrado, separación típica entre líneas)
+    """
+    with pdfplumber.open(ruta_pdf) as pdf:
+        pagina = pdf.pages[0]
+        ancho, alto = float(pagina.width), float(pagina.height)
+        lineas = pagina.extract_text_lines()
+
+    regiones = {}
+    for campo, opciones in etiquetas.items():
+        for etiqueta in opciones:
+            linea = next((l for l in lineas if etiqueta.casefold() in l['text'].casefold()), None)
+            if linea is not None:
+                regiones[campo] = (max(0.0, linea['x0'] - MARGEN_REGION), max(0.0, linea['top'] - MARGEN_REGION),
+                                   ancho, min(alto, linea['bottom'] + MARGEN_REGION))
+                break
+
+    saltos = [b['top'] - a['top'] for a, b in zip(lineas, lineas[1:]) if b['top'] > a['top']]
+    interlineado = statistics.median(saltos) if saltos else 12.0
+    return ancho, alto, regiones, interlineado
+
+
+def _hasta_siguiente_etiqueta(region: Region, regiones: Iterable[Region], alto: float) -> Region:
+    """Extiende una región hasta la etiqueta más cercana debajo de ella, o hasta el final de la página."""
+    x0, top, x1, bottom = region
+    debajo = [otra[1] for otra in regiones if otra[1] >= bottom]
+    return (x0, top, x1, min(debajo) if debajo else alto)
+
+
+def calibrar_plantilla(tipo: str, rutas_muestra: List[str], etiquetas: Dict[str, List[str]],
+                       extraer_completo: Callable[[str], Dict[str, Optional[str]]],
+                       valor_de_region: Callable[[str, str], Optional[str]],
+                       backend: str = BACKEND_PDFPLUMBER,
+                       campos_variables: Iterable[str] = ()) -> PlantillaRegiones:
+    """
+    Calibra la plantilla de un tipo de documento. Las regiones se anclan a las
+    etiquetas del primer PDF y cada una se agranda hacia abajo (hasta
+    LINEAS_EXTRA_MAXIMAS líneas) hasta que el valor leído en ella coincide con la
+    extracción completa en todas las muestras. Los campos de largo variable llegan
+    desde el inicio hasta la siguiente etiqueta (o el final de la página), para no
+    depender de que las muestras traigan el valor más largo. Los campos que no lo
+    logran, o que la extracción completa no encuentra, quedan fuera de la plantilla.
+
+    Args:
+        tipo (str): Tipo de documento ('vale')
+        rutas_muestra (List[str]): PDFs de muestra (el primero fija las etiquetas)
+        etiquetas (Dict[str, List[str]]): Etiquetas posibles por campo
+        extraer_completo: Función ruta -> {campo: valor} con la extracción completa
+        valor_de_region: Función (campo, texto de la región) -> valor, igual que en el modo plantilla
+        backend (str): Backend con el que se leerán las regiones
+        campos_variables (Iterable[str]): Campos que pueden ocupar un número variable de líneas
+
+    Returns:
+        PlantillaRegiones: Plantilla con los campos verificados
+    """
+    if not rutas_muestra:
+        raise ValueError("Se necesita al menos un PDF de muestra para calibrar")
+    ancho, alto, candidatas, interlineado = regiones_por_etiqueta(rutas_muestra[0], etiquetas)
+    esperados = [extraer_completo(ruta) for ruta in rutas_muestra]
+
+    pendientes = {campo: region for campo, region in candidatas.items() if esperados[0].get(campo)}
+    variables = {campo: _hasta_siguiente_etiqueta(region, candidatas.values(), alto)
+                 for campo, region in pendientes.items() if campo in set(campos_variables)}
+    verificadas: Dict[str, Region] = {}
+    for lineas_extra in range(LINEAS_EXTRA_MAXIMAS + 1):
+        if not pendientes:
+            break
+        prueba = PlantillaRegiones(tipo, ancho, alto, {
+            campo: variables.get(campo) or (x0, top, x1, min(alto, bottom + lineas_extra * interlineado))
+            for campo, (x0, top, x1, bottom) in pendientes.items()
+        })
+        fallidos = set()
+        for ruta, esperado in zip(rutas_muestra, esperados):
+            textos = textos_de_regiones(ruta, prueba, backend) or {}
+            fallidos.update(campo for campo in pendientes
+                            if valor_de_region(campo, textos.get(campo, '')) != esperado.get(campo))
+        for campo in set(pendientes) - fallidos:
+            verificadas[campo] = prueba.regiones[campo]
+            del pendientes[campo]
+
+    if pendientes:
+        print(f"⚠️ Campos sin región confiable (se buscarán en el texto completo): {', '.join(sorted(pendientes))}")
+    return PlantillaRegiones(tipo, ancho, alto, verificadas)
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    """Calibra la plantilla de vales con los PDFs indicados y la guarda."""
+    import argparse
+    try:
+        from .extractor import PDFDataExtractor
+    except ImportError:
+        from extractor import PDFDataExtractor
+
+    parser = argparse.ArgumentParser(description="Calibra la plantilla de regiones de los vales de Quiter")
+    parser.add_argument('muestras', nargs='+', help="PDFs de vales de muestra")
+    parser.add_argument('--backend', choices=(BACKEND_PDFPLUMBER, BACKEND_PDFIUM), default=BACKEND_PDFPLUMBER,
+                        help="Backend con el que se leerán las regiones")
+    parser.add_argument('--archivo', help="Archivo JSON de plantillas (default: junto a la caché)")
+    args = parser.parse_args(argv)
+
+    plantilla = PDFDataExtractor(backend_texto=args.backend).calibrar_plantilla(args.muestras)
+    ruta = guardar_plantilla(plantilla, args.archivo)
+    print(f"📐 Plantilla de {plantilla.tipo} con {len(plantilla.regiones)} campos guardada en {ruta}")
+
+
+if __name__ == "__main__":
+    main()
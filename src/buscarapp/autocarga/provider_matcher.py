@@ -29,7 +29,8 @@ Maneja la lógica de:
 
 import sys
 import os
-from typing import Dict, Optional, List, Tuple
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Optional, List, Tuple
 import logging
 
 # Agregar path para imports de la base de datos
@@ -44,6 +45,208 @@ except ImportError:
     print("⚠️ No se pudo importar el modelo Proveedor")
     Proveedor = None
 
+try:
+    from .tiempos_etapas import TiemposEtapas, ETAPA_COINCIDENCIAS
+except ImportError:
+    from tiempos_etapas import TiemposEtapas, ETAPA_COINCIDENCIAS
+
+
+# Sufijo que los PDFs agregan o quitan al nombre (reglas 3 y 4)
+SUFIJO_SADECV = 'SADECV'
+
+# Longitud mínima de ambos nombres y proporción mínima para la regla de contención
+LONGITUD_MINIMA_CONTENCION = 10
+PROPORCION_CONTENCION = 0.8
+
+# Tamaño de los n-gramas del índice de contención
+TAMANO_NGRAMA = 4
+
+
+class IndiceProveedores:
+    """
+    Índice en memoria de los nombres normalizados de los proveedores.
+    Reproduce las cinco reglas de find_provider_by_name (gana el primer proveedor,
+    en el orden de la consulta, que cumple cualquiera de ellas) sin recorrer la tabla:
+    
+    1. Exacta: diccionario nombre -> posición
+    2. Sin sufijos legales: diccionario nombre_sin_sufijo -> posición
+    3. El PDF trae "SADECV" extra: búsqueda exacta del nombre sin ese sufijo
+    4. La BD trae "SADECV" extra: diccionario nombre_sin_SADECV -> posición
+    5. Contención (>80%): el nombre de BD dentro del buscado se resuelve enumerando
+       las subcadenas suficientemente largas del buscado en el diccionario exacto;
+       el buscado dentro del de BD, con un índice de n-gramas y verificación final
+    """
+    
+    def __init__(self, proveedores: Iterable[object], normalizar: Callable[[str], str],
+                 quitar_sufijos: Callable[[str], str]):
+        """
+        Args:
+            proveedores: Proveedores en el orden en que se evaluarían las reglas
+            normalizar: Función de normalización de nombres
+            quitar_sufijos: Función que quita el sufijo legal de un nombre normalizado
+        """
+        self.normalizar = normalizar
+        self.quitar_sufijos = quitar_sufijos
+        self.proveedores: List[object] = []
+        self.nombres: List[str] = []
+        self.exactos: Dict[str, int] = {}
+        self.sin_sufijos: Dict[str, int] = {}
+        self.sin_sadecv: Dict[str, int] = {}
+        self.ngramas: Dict[str, List[int]] = {}
+        
+        for posicion, proveedor in enumerate(proveedores):
+            nombre = normalizar(proveedor.nombre)
+            self.proveedores.append(proveedor)
+            self.nombres.append(nombre)
+            
+            # setdefault conserva la primera posición (el primer proveedor gana)
+            self.exactos.setdefault(nombre, posicion)
+            sin_sufijo = quitar_sufijos(nombre)
+            if sin_sufijo:
+                self.sin_sufijos.setdefault(sin_sufijo, posicion)
+            if nombre.endswith(SUFIJO_SADECV):
+                self.sin_sadecv.setdefault(nombre[:-len(SUFIJO_SADECV)], posicion)
+            if len(nombre) > LONGITUD_MINIMA_CONTENCION:
+                for ngrama in {nombre[i:i + TAMANO_NGRAMA] for i in range(len(nombre) - TAMANO_NGRAMA + 1)}:
+                    self.ngramas.setdefault(ngrama, []).append(posicion)
+    
+    def __len__(self) -> int:
+        return len(self.proveedores)
+    
+    def buscar(self, name: str) -> Optional[object]:
+        """
+        Busca un proveedor con las mismas reglas y prioridad que la búsqueda secuencial.
+        
+        Args:
+            name (str): Nombre del proveedor a buscar
+            
+        Returns:
+            Optional[Proveedor]: Proveedor encontrado o None
+        """
+        objetivo = self.normalizar(name)
+        candidatos = []
+        
+        # 1. Comparación exacta
+        candidatos.append(self.exactos.get(objetivo))
+        
+        # 2. Comparación sin sufijos legales
+        objetivo_sin_sufijos = self.quitar_sufijos(objetivo)
+        if objetivo_sin_sufijos:
+            candidatos.append(self.sin_sufijos.get(objetivo_sin_sufijos))
+        
+        # 3. El nombre del PDF incluye "SADECV" extra
+        if objetivo.endswith(SUFIJO_SADECV):
+            candidatos.append(self.exactos.get(objetivo[:-len(SUFIJO_SADECV)]))
+        
+        # 4. El nombre de BD es más completo
+        candidatos.append(self.sin_sadecv.get(objetivo))
+        
+        # 5. Contención
+        if len(objetivo) > LONGITUD_MINIMA_CONTENCION:
+            candidatos.append(self._buscar_contenido_en_objetivo(objetivo))
+            candidatos.append(self._buscar_que_contiene_objetivo(objetivo))
+        
+        posiciones = [c for c in candidatos if c is not None]
+        return self.proveedores[min(posiciones)] if posiciones else None
+    
+    def _buscar_contenido_en_objetivo(self, objetivo: str) -> Optional[int]:
+        """Primer proveedor cuyo nombre es subcadena del objetivo y mide más del 80% de él."""
+        largo = len(objetivo)
+        mejor = None
+        for longitud in range(largo, LONGITUD_MINIMA_CONTENCION, -1):
+            if longitud / largo <= PROPORCION_CONTENCION:
+                break
+            for inicio in range(largo - longitud + 1):
+                posicion = self.exactos.get(objetivo[inicio:inicio + longitud])
+                if posicion is not None and (mejor is None or posicion < mejor):
+                    mejor = posicion
+        return mejor
+    
+    def _buscar_que_contiene_objetivo(self, objetivo: str) -> Optional[int]:
+        """Primer proveedor cuyo nombre contiene al objetivo y este mide más del 80% de él."""
+        largo = len(objetivo)
+        listas = []
+        for ngrama in {objetivo[i:i + TAMANO_NGRAMA] for i in range(largo - TAMANO_NGRAMA + 1)}:
+            lista = self.ngramas.get(ngrama)
+            if not lista:
+                return None  # Ningún nombre contiene este fragmento
+            listas.append(lista)
+        
+        # Recorrer la lista más corta en orden y verificar cada candidato
+        for posicion in min(listas, key=len):
+            nombre = self.nombres[posicion]
+            if len(nombre) >= largo and largo / len(nombre) > PROPORCION_CONTENCION and objetivo in nombre:
+                return posicion
+        return None
+
+
+class CoincidenciasProveedores:
+    """
+    Resultados de la resolución de proveedores durante una corrida de autocarga.
+    Cada documento (y cada nombre buscado) se resuelve una sola vez; las
+    estadísticas y la lista de actualizaciones leen de aquí.
+    """
+    
+    def __init__(self, matcher: 'ProviderMatcher'):
+        """
+        Args:
+            matcher (ProviderMatcher): Matcher usado para resolver lo que no esté guardado
+        """
+        self.matcher = matcher
+        self.vales: Dict[str, Tuple[Optional[object], bool]] = {}
+        self.ordenes: Dict[str, Optional[object]] = {}
+        self.nombres: Dict[str, Optional[object]] = {}
+    
+    def vale(self, vale_id: str, vale_data: Dict) -> Tuple[Optional[object], bool]:
+        """
+        Proveedor de un vale (ver ProviderMatcher.match_provider_from_vale_data).
+        
+        Args:
+            vale_id (str): Identificador del vale en la corrida
+            vale_data (Dict): Datos extraídos del vale
+            
+        Returns:
+            Tuple[Optional[Proveedor], bool]: (proveedor_encontrado, fue_actualizado)
+        """
+        if vale_id not in self.vales:
+            self.vales[vale_id] = self.matcher.match_provider_from_vale_data(vale_data)
+        return self.vales[vale_id]
+    
+    def orden(self, orden_id: str, orden_data: Dict) -> Optional[object]:
+        """
+        Proveedor de una orden (ver ProviderMatcher.match_provider_from_orden_data).
+        
+        Args:
+            orden_id (str): Identificador de la orden en la corrida
+            orden_data (Dict): Datos extraídos de la orden
+            
+        Returns:
+            Optional[Proveedor]: Proveedor encontrado o None
+        """
+        if orden_id not in self.ordenes:
+            self.ordenes[orden_id] = self.matcher.match_provider_from_orden_data(orden_data)
+        return self.ordenes[orden_id]
+    
+    def por_nombre(self, nombre: str) -> Optional[object]:
+        """
+        Proveedor por nombre (ver ProviderMatcher.find_provider_by_name).
+        
+        Args:
+            nombre (str): Nombre del proveedor
+            
+        Returns:
+            Optional[Proveedor]: Proveedor encontrado o None
+        """
+        if nombre not in self.nombres:
+            self.nombres[nombre] = self.matcher.find_provider_by_name(nombre)
+        return self.nombres[nombre]
+    
+    def limpiar(self):
+        """Olvida todos los resultados (inicio de una nueva corrida)."""
+        self.vales.clear()
+        self.ordenes.clear()
+        self.nombres.clear()
+
 
 class ProviderMatcher:
     """
@@ -53,6 +256,26 @@ class ProviderMatcher:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Índice de nombres, construido en la primera búsqueda por nombre
+        self._indice: Optional[IndiceProveedores] = None
+    
+    def obtener_indice(self) -> Optional[IndiceProveedores]:
+        """
+        Devuelve el índice de proveedores, consultando la tabla una sola vez por matcher.
+        
+        Returns:
+            Optional[IndiceProveedores]: Índice o None si no hay modelo Proveedor
+        """
+        if self._indice is None and Proveedor:
+            self._indice = IndiceProveedores(Proveedor.select(), self.normalize_name, self.remove_legal_suffixes)
+        return self._indice
+    
+    def invalidar_indice(self):
+        """
+        Descarta el índice para que se vuelva a construir en la siguiente búsqueda
+        (por ejemplo, después de dar de alta o renombrar proveedores).
+        """
+        self._indice = None
     
     def normalize_name(self, name: str) -> str:
         """
@@ -160,6 +383,7 @@ class ProviderMatcher:
     def find_provider_by_name(self, name: str) -> Optional[object]:
         """
         Busca un proveedor por nombre usando comparación sin espacios.
+        Usa el índice de proveedores del matcher (ver IndiceProveedores).
         
         Args:
             name (str): Nombre del proveedor a buscar
@@ -170,49 +394,8 @@ class ProviderMatcher:
         if not Proveedor or not name:
             return None
         
-        normalized_target = self.normalize_name(name)
-        
         try:
-            # Obtener todos los proveedores y comparar nombres normalizados
-            proveedores = Proveedor.select()
-            
-            for proveedor in proveedores:
-                normalized_db = self.normalize_name(proveedor.nombre)
-                
-                # 1. Comparación exacta
-                if normalized_db == normalized_target:
-                    return proveedor
-                
-                # 2. Comparación sin sufijos legales
-                target_sin_sufijos = self.remove_legal_suffixes(normalized_target)
-                db_sin_sufijos = self.remove_legal_suffixes(normalized_db)
-                
-                if target_sin_sufijos and db_sin_sufijos and target_sin_sufijos == db_sin_sufijos:
-                    return proveedor
-                
-                # 3. Comparación parcial - el nombre del PDF puede incluir "SADECV" extra
-                if normalized_target.endswith('SADECV'):
-                    # Quitar "SADECV" del final y comparar
-                    target_sin_sadecv = normalized_target[:-6]  # Quitar "SADECV"
-                    if normalized_db == target_sin_sadecv:
-                        return proveedor
-                
-                # 4. Comparación inversa - el nombre de BD puede ser más completo
-                if normalized_db.endswith('SADECV'):
-                    db_sin_sadecv = normalized_db[:-6]
-                    if db_sin_sadecv == normalized_target:
-                        return proveedor
-                
-                # 5. Comparación por contención - uno contiene al otro
-                if len(normalized_target) > 10 and len(normalized_db) > 10:
-                    if normalized_target in normalized_db or normalized_db in normalized_target:
-                        # Verificar que la coincidencia sea significativa (>80% del nombre más corto)
-                        min_len = min(len(normalized_target), len(normalized_db))
-                        max_len = max(len(normalized_target), len(normalized_db))
-                        if min_len / max_len > 0.8:
-                            return proveedor
-            
-            return None
+            return self.obtener_indice().buscar(name)
             
         except Exception as e:
             self.logger.error(f"Error buscando proveedor por nombre {name}: {e}")
@@ -297,18 +480,30 @@ class ProviderMatcher:
         # Para órdenes, solo buscar por nombre (no tienen código QuiteR)
         return self.find_provider_by_name(nombre)
     
-    def get_matching_stats(self, vales_data: Dict, ordenes_data: Dict) -> Dict:
+    def get_matching_stats(self, vales_data: Dict, ordenes_data: Dict,
+                           coincidencias: Optional[CoincidenciasProveedores] = None,
+                           tiempos: Optional[TiemposEtapas] = None) -> Dict:
         """
         Obtiene estadísticas de coincidencias de proveedores.
         
         Args:
             vales_data (Dict): Datos de vales procesados
             ordenes_data (Dict): Datos de órdenes procesadas
+            coincidencias (CoincidenciasProveedores): Resultados ya resueltos en la corrida;
+                los documentos que no estén ahí se resuelven y se guardan
+            tiempos (TiemposEtapas): Donde registrar lo que tarda cada documento
             
         Returns:
             Dict: Estadísticas de coincidencias
         """
-        stats = {
+        stats = self.crear_stats_coincidencias()
+        self.acumular_stats_coincidencias(stats, vales_data, ordenes_data, coincidencias, tiempos)
+        return stats
+    
+    @staticmethod
+    def crear_stats_coincidencias() -> Dict:
+        """Estadísticas de coincidencias vacías (ver get_matching_stats)."""
+        return {
             'vales_con_proveedor': 0,
             'vales_sin_proveedor': 0,
             'ordenes_con_proveedor': 0,
@@ -316,10 +511,33 @@ class ProviderMatcher:
             'proveedores_actualizados': 0,
             'nombres_no_encontrados': []
         }
+    
+    def acumular_stats_coincidencias(self, stats: Dict, vales_data: Dict, ordenes_data: Dict,
+                                     coincidencias: Optional[CoincidenciasProveedores] = None,
+                                     tiempos: Optional[TiemposEtapas] = None):
+        """
+        Suma a stats las coincidencias de un grupo de vales y órdenes, para calcular
+        las estadísticas por lotes sin tener todos los documentos a la vez.
+        
+        Args:
+            stats (Dict): Estadísticas creadas con crear_stats_coincidencias
+            vales_data (Dict): Datos de vales procesados
+            ordenes_data (Dict): Datos de órdenes procesadas
+            coincidencias (CoincidenciasProveedores): Resultados ya resueltos en la corrida
+            tiempos (TiemposEtapas): Donde registrar lo que tarda cada documento
+        """
+        if coincidencias is None:
+            coincidencias = CoincidenciasProveedores(self)
+        
+        def medir(documento_id):
+            if tiempos is None:
+                return nullcontext()
+            return tiempos.medir(ETAPA_COINCIDENCIAS, documento_id)
         
         # Procesar vales
         for vale_id, vale_data in vales_data.items():
-            proveedor, fue_actualizado = self.match_provider_from_vale_data(vale_data)
+            with medir(vale_id):
+                proveedor, fue_actualizado = coincidencias.vale(vale_id, vale_data)
             
             if proveedor:
                 stats['vales_con_proveedor'] += 1
@@ -333,7 +551,8 @@ class ProviderMatcher:
         
         # Procesar órdenes
         for orden_id, orden_data in ordenes_data.items():
-            proveedor = self.match_provider_from_orden_data(orden_data)
+            with medir(orden_id):
+                proveedor = coincidencias.orden(orden_id, orden_data)
             
             if proveedor:
                 stats['ordenes_con_proveedor'] += 1
@@ -342,8 +561,6 @@ class ProviderMatcher:
                 nombre = orden_data.get('Nombre', 'Sin nombre')
                 if nombre not in stats['nombres_no_encontrados']:
                     stats['nombres_no_encontrados'].append(nombre)
-        
-        return stats
     
     def print_matching_report(self, vales_data: Dict, ordenes_data: Dict):
         """
@@ -0,0 +1,263 @@
+"""
+Tiempos por etapa de AutoCarga.
+Mide cuánto tarda cada etapa de una corrida (escaneo, apertura del PDF, extracción
+del texto, regex de cada campo, post-proceso, coincidencias de proveedores,
+normalización para la BD y persistencia) y resume por etapa el total, los percentiles y los archivos
+más lentos. El resumen se guarda en JSON para comparar corridas entre versiones.
+
+Las etapas dentro de la extracción de un documento se miden con medir(), que solo
+registra algo dentro de medir_documento(); así los extractores se pueden usar
+fuera de una corrida sin costo. En los procesos trabajadores el diccionario del
+documento viaja de regreso junto con el resultado (ver extraccion_paralela).
+"""
+
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Etapas de la corrida
+ETAPA_ESCANEO = 'escaneo'
+ETAPA_DEDUPLICACION = 'deduplicacion'
+ETAPA_SONDEO = 'sondeo'
+ETAPA_EXTRACCION = 'extraccion'
+ETAPA_APERTURA = 'apertura_pdf'
+ETAPA_TEXTO = 'extraccion_texto'
+ETAPA_REGEX = 'regex'
+ETAPA_POSTPROCESO = 'postproceso'
+ETAPA_COINCIDENCIAS = 'coincidencias'
+ETAPA_NORMALIZACION = 'normalizacion'
+ETAPA_PERSISTENCIA = 'persistencia'
+
+# Orden del reporte (las etapas 'regex.<tipo>.<campo>' van después de 'regex')
+ORDEN_ETAPAS = (
+    ETAPA_ESCANEO, ETAPA_DEDUPLICACION, ETAPA_SONDEO, ETAPA_EXTRACCION, ETAPA_APERTURA,
+    ETAPA_TEXTO, ETAPA_REGEX, ETAPA_POSTPROCESO, ETAPA_COINCIDENCIAS, ETAPA_NORMALIZACION,
+    ETAPA_PERSISTENCIA,
+)
+
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+
+
+@contextmanager
+def medir_documento() -> Iterator[Dict[str, float]]:
+    """
+    Activa la medición de etapas del documento que se extrae en este hilo.
+
+    Yields:
+        Dict[str, float]: Segundos por etapa, que medir() va acumulando
+    """
+    anterior = getattr(_local, 'etapas', None)
+    etapas: Dict[str, float] = {}
+    _local.etapas = etapas
+    try:
+        yield etapas
+    finally:
+        _local.etapas = anterior
+
+
+@contextmanager
+def medir(etapa: str):
+    """
+    Suma la duración del bloque a la etapa del documento en curso (ver medir_documento).
+    Sin documento en curso no hace nada.
+
+    Args:
+        etapa (str): Nombre de la etapa (p. ej. ETAPA_TEXTO o etapa_regex('vale', 'numero'))
+    """
+    etapas = getattr(_local, 'etapas', None)
+    if etapas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        etapas[etapa] = etapas.get(etapa, 0.0) + time.perf_counter() - inicio
+
+
+def etapa_regex(tipo: str, campo: str) -> str:
+    """Nombre de la etapa de regex de un campo de un tipo de documento ('regex.vale.numero')."""
+    return f"{ETAPA_REGEX}.{tipo}.{campo}"
+
+
+def percentil(ordenados: List[float], porcentaje: float) -> float:
+    """
+    Percentil por rango más cercano de una lista ya ordenada.
+
+    Args:
+        ordenados (List[float]): Valores ordenados de menor a mayor (no vacía)
+        porcentaje (float): Percentil a calcular (0-100)
+
+    Returns:
+        float: El valor de la lista en ese percentil
+    """
+    rango = max(1, math.ceil(porcentaje / 100 * len(ordenados)))
+    return ordenados[rango - 1]
+
+
+class TiemposEtapas:
+    """Muestras (segundos, archivo) por etapa de una corrida. Seguro entre hilos."""
+
+    def __init__(self):
+        self._muestras: Dict[str, List[Tuple[float, Optional[str]]]] = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, etapa: str, segundos: float, archivo: Optional[str] = None):
+        """
+        Registra una duración.
+
+        Args:
+            etapa (str): Nombre de la etapa
+            segundos (float): Duración
+            archivo (str): Archivo o lote al que corresponde (None: toda la corrida)
+        """
+        with self._lock:
+            self._muestras.setdefault(etapa, []).append((segundos, archivo))
+
+    @contextmanager
+    def medir(self, etapa: str, archivo: Optional[str] = None):
+        """Registra la duración del bloque en la etapa."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.agregar(etapa, time.perf_counter() - inicio, archivo)
+
+    def agregar_documento(self, archivo: str, etapas: Dict[str, float]):
+        """
+        Registra las etapas medidas con medir_documento para un archivo. Las etapas
+        'regex.<tipo>.<campo>' también se suman en una sola muestra de 'regex'.
+
+        Args:
+            archivo (str): Ruta del archivo
+            etapas (Dict[str, float]): Segundos por etapa
+        """
+        regex_total = None
+        for etapa, segundos in etapas.items():
+            self.agregar(etapa, segundos, archivo)
+            if etapa.startswith(ETAPA_REGEX + '.'):
+                regex_total = (regex_total or 0.0) + segundos
+        if regex_total is not None and ETAPA_REGEX not in etapas:
+            self.agregar(ETAPA_REGEX, regex_total, archivo)
+
+    def limpiar(self):
+        """Olvida las muestras (nueva corrida)."""
+        with self._lock:
+            self._muestras.clear()
+
+    def resumen(self, mas_lentos: int = 5) -> Dict[str, Dict[str, Any]]:
+        """
+        Resumen por etapa, en el orden de ORDEN_ETAPAS.
+
+        Args:
+            mas_lentos (int): Archivos más lentos a incluir por etapa
+
+        Returns:
+            Dict[str, Dict]: Por etapa: 'muestras', 'total_s', 'media_s', 'p50_s',
+            'p90_s', 'p99_s', 'max_s' y 'mas_lentos' ([{'archivo', 'segundos'}])
+        """
+        with self._lock:
+            muestras = {etapa: list(valores) for etapa, valores in self._muestras.items()}
+
+        def orden(etapa: str):
+            base = etapa.split('.', 1)[0]
+            posicion = ORDEN_ETAPAS.index(base) if base in ORDEN_ETAPAS else len(ORDEN_ETAPAS)
+            return posicion, etapa != base, etapa
+
+        resumen = {}
+        for etapa in sorted(muestras, key=orden):
+            valores = muestras[etapa]
+            ordenados = sorted(segundos for segundos, _ in valores)
+            total = sum(ordenados)
+            datos = {
+                'muestras': len(ordenados),
+                'total_s': round(total, 4),
+                'media_s': round(total / len(ordenados), 4),
+            }
+            for porcentaje in PERCENTILES:
+                datos[f'p{porcentaje}_s'] = round(percentil(ordenados, porcentaje), 4)
+            datos['max_s'] = round(ordenados[-1], 4)
+            con_archivo = sorted((v for v in valores if v[1] is not None), key=lambda v: -v[0])
+            datos['mas_lentos'] = [{'archivo': archivo, 'segundos': round(segundos, 4)}
+                                   for segundos, archivo in con_archivo[:mas_lentos]]
+            resumen[etapa] = datos
+        return resumen
+
+
+def ruta_tiempos_por_defecto() -> Path:
+    """
+    Archivo JSON para los tiempos de una corrida, en el directorio de logs de la aplicación.
+
+    Returns:
+        Path: logs/autocarga_tiempos_<fecha>.json
+    """
+    try:
+        from config.settings import LOGS_DIR
+        directorio = Path(LOGS_DIR)
+    except Exception:
+        try:
+            from .cache_extraccion import ruta_cache_por_defecto
+        except ImportError:
+            from cache_extraccion import ruta_cache_por_defecto
+        directorio = ruta_cache_por_defecto().parent
+    return directorio / f"autocarga_tiempos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+
+def guardar_tiempos(resumen: Dict[str, Dict[str, Any]], ruta_archivo: Optional[str] = None,
+                    extra: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Guarda el resumen de tiempos en JSON, con la versión de la aplicación, para
+    comparar corridas entre versiones.
+
+    Args:
+        resumen (Dict): Resultado de TiemposEtapas.resumen
+        ruta_archivo (str): Archivo de destino (default: ruta_tiempos_por_defecto)
+        extra (Dict): Datos adicionales de la corrida (configuración, archivos, ...)
+
+    Returns:
+        Path: Archivo guardado
+    """
+    try:
+        from config.settings import AppConfig
+        version = AppConfig.version
+    except Exception:
+        version = None
+    ruta = Path(ruta_archivo) if ruta_archivo else ruta_tiempos_por_defecto()
+    contenido = {'fecha': datetime.now().isoformat(timespec='seconds'), 'version_app': version}
+    contenido.update(extra or {})
+    contenido['etapas'] = resumen
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_text(json.dumps(contenido, ensure_ascii=False, indent=2, default=str), encoding='utf-8')
+    return ruta
+
+
+def formatear_resumen(resumen: Dict[str, Dict[str, Any]], mas_lentos: int = 3) -> List[str]:
+    """
+    Líneas de texto del resumen para los reportes.
+
+    Args:
+        resumen (Dict): Resultado de TiemposEtapas.resumen
+        mas_lentos (int): Archivos más lentos a mostrar por etapa principal
+
+    Returns:
+        List[str]: Una línea por etapa (más los archivos lentos de las principales)
+    """
+    lineas = []
+    for etapa, datos in resumen.items():
+        sangria = "    " if '.' in etapa else ""
+        lineas.append(
+            f"{sangria}• {etapa}: {datos['total_s']:.2f} s en {datos['muestras']} "
+            f"(p50 {datos['p50_s'] * 1000:.1f} ms, p90 {datos['p90_s'] * 1000:.1f} ms, "
+            f"p99 {datos['p99_s'] * 1000:.1f} ms)"
+        )
+        if '.' not in etapa and datos['muestras'] > 1:
+            for lento in datos['mas_lentos'][:mas_lentos]:
+                lineas.append(f"    ↳ {Path(lento['archivo']).name}: {lento['segundos'] * 1000:.1f} ms")
+    return lineas
@@ -0,0 +1,263 @@
+"""
+Benchmark de la carga de facturas de la vista Buscar.
+Crea una base SQLite en memoria con los modelos de la aplicación, la llena con
+facturas, conceptos y vales sintéticos y mide SearchController.load_facturas
+contra la carga anterior fila por fila (una consulta de vale y otra de conceptos
+por factura). Verifica que ambas produzcan exactamente los mismos diccionarios y
+cuenta las consultas que ejecuta cada una. También simula la búsqueda mientras
+se escribe: aplica los filtros tecla por tecla con y sin reutilizar los
+resultados de la búsqueda anterior.
+
+La base configurada no se toca. En SQLite en memoria cada consulta es casi
+gratis; contra PostgreSQL en red cada consulta evitada ahorra además un viaje
+de ida y vuelta, así que la diferencia real es mayor.
+
+Uso:
+    python -m src.buscarapp.benchmark_busqueda [--facturas 50000] [--semilla 0] [--sin-anterior]
+                                               [--consulta "servicio de mant"]
+"""
+
+import argparse
+import logging
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from peewee import SqliteDatabase
+
+
+class _BDContada(SqliteDatabase):
+    """SQLite que cuenta las consultas ejecutadas."""
+
+    consultas = 0
+
+    def execute_sql(self, sql, params=None, *args, **kwargs):
+        self.consultas += 1
+        return super().execute_sql(sql, params, *args, **kwargs)
+
+
+def _modelos():
+    """Modelos que usa la carga de facturas (import diferido, como en los controladores)."""
+    from src.bd.models import Proveedor, Layout, Cheque, Factura, Concepto, Vale
+    return [Proveedor, Layout, Cheque, Factura, Concepto, Vale]
+
+
+def llenar_base(facturas: int, semilla: int = 0, lote: int = 2000):
+    """
+    Inserta proveedores, facturas, conceptos y vales sintéticos en la base ligada a los modelos.
+
+    Args:
+        facturas (int): Número de facturas
+        semilla (int): Semilla de los datos aleatorios
+        lote (int): Filas por INSERT
+    """
+    from src.bd.models import Proveedor, Factura, Concepto, Vale
+
+    generador = random.Random(semilla)
+    proveedores = [{'id': i + 1, 'nombre': f"PROVEEDOR {i + 1} SA DE CV", 'rfc': f"PRO{i:06d}AB1"}
+                   for i in range(200)]
+    descripciones = ['SERVICIO DE MANTENIMIENTO', 'PAPELERIA', '  GASOLINA MAGNA  ', 'REFACCIONES VARIAS',
+                     'PUBLICIDAD EN REDES SOCIALES Y MEDIOS IMPRESOS PARA LA CAMPAÑA DEL MES', '', 'HONORARIOS']
+    tipos = ['GA', 'CE', 'CI', 'SET', 'VC']
+    inicio = date(2023, 1, 1)
+
+    filas_facturas, filas_conceptos, filas_vales = [], [], []
+    for folio in range(1, facturas + 1):
+        proveedor = generador.choice(proveedores)
+        subtotal = Decimal(generador.randint(10000, 9000000)) / 100
+        iva = (subtotal * Decimal('0.16')).quantize(Decimal('0.01'))
+        fecha = inicio + timedelta(days=generador.randint(0, 900))
+        filas_facturas.append({
+            'folio_interno': folio, 'serie': generador.choice(['A', 'F', 'B', '']), 'folio': str(folio * 7),
+            'fecha': fecha, 'fecha_emision': fecha, 'tipo': generador.choice(tipos),
+            'nombre_emisor': proveedor['nombre'], 'rfc_emisor': proveedor['rfc'],
+            'nombre_receptor': 'TCM MATEHUALA', 'rfc_receptor': 'TMA000101AAA',
+            'subtotal': subtotal, 'iva_trasladado': iva, 'total': subtotal + iva,
+            'ret_iva': None, 'ret_isr': None, 'comentario': None if generador.random() < 0.8 else 'REVISAR',
+            'clase': generador.choice([None, 'GASTO', 'INVENTARIO']),
+            'departamento': generador.choice([None, 'ADMINISTRACION', 'SERVICIO']),
+            'proveedor': proveedor['id'], 'cargada': generador.random() < 0.5, 'pagada': generador.random() < 0.3,
+        })
+        for _ in range(generador.choice([0, 1, 1, 2, 3, 5])):
+            filas_conceptos.append({
+                'descripcion': generador.choice(descripciones), 'cantidad': 1,
+                'precio_unitario': subtotal, 'total': subtotal, 'factura': folio,
+            })
+        if generador.random() < 0.6:
+            filas_vales.append({
+                'noVale': f"V{100000 + folio}", 'tipo': 'CE', 'noDocumento': str(folio), 'descripcion': '',
+                'referencia': folio, 'total': str(subtotal), 'factura': folio,
+            })
+
+    with Factura._meta.database.atomic():
+        for modelo, filas in ((Proveedor, proveedores), (Factura, filas_facturas),
+                              (Concepto, filas_conceptos), (Vale, filas_vales)):
+            for i in range(0, len(filas), lote):
+                modelo.insert_many(filas[i:i + lote]).execute()
+
+
+def cargar_facturas_fila_por_fila(controller) -> List[Dict[str, Any]]:
+    """
+    Carga anterior de load_facturas (un Vale.get y una consulta de conceptos por factura),
+    para comparar tiempos y resultados. Los conceptos se ordenan por id para que la
+    comparación no dependa del orden físico de la tabla.
+    """
+    from src.bd.models import Factura, Proveedor, Vale, Concepto
+    from src.buscarapp.models.search_models import FacturaData
+
+    facturas_data = []
+    consulta = (Factura
+                .select()
+                .join(Proveedor, on=(Factura.proveedor == Proveedor.id))
+                .order_by(Factura.fecha.desc()))
+    for factura in consulta:
+        try:
+            vale_asociado = Vale.get(Vale.factura_id == factura.folio_interno)
+        except Vale.DoesNotExist:
+            vale_asociado = None
+        facturas_data.append(FacturaData(
+            folio_interno=str(factura.folio_interno),
+            tipo=factura.tipo,
+            no_vale=str(vale_asociado.noVale) if vale_asociado else "",
+            fecha=controller._format_date_for_display(factura.fecha),
+            folio_xml=f"{factura.serie or ''} {factura.folio or ''}".strip(),
+            serie=factura.serie,
+            folio=factura.folio,
+            nombre_emisor=factura.nombre_emisor,
+            rfc_emisor=factura.rfc_emisor,
+            conceptos=controller._format_conceptos(factura.conceptos.order_by(Concepto.id)),
+            total=float(factura.total) if factura.total else 0.0,
+            subtotal=float(factura.subtotal) if factura.subtotal else 0.0,
+            iva_trasladado=float(factura.iva_trasladado) if factura.iva_trasladado else 0.0,
+            ret_iva=float(factura.ret_iva) if factura.ret_iva else 0.0,
+            ret_isr=float(factura.ret_isr) if factura.ret_isr else 0.0,
+            clase=factura.clase,
+            departamento=factura.departamento,
+            cargada=bool(factura.cargada),
+            pagada=bool(factura.pagada),
+            comentario=factura.comentario
+        ).to_dict())
+    return facturas_data
+
+
+def medir_escritura(controller, consulta: str) -> Dict[str, Any]:
+    """
+    Aplica el texto de búsqueda letra por letra, como la búsqueda en vivo, primero
+    reutilizando las búsquedas anteriores y luego con el caché vacío en cada tecla.
+
+    Args:
+        controller: SearchController con las facturas cargadas
+        consulta (str): Texto que se "escribe"
+
+    Returns:
+        Dict[str, Any]: 'teclas' y, para 'reutilizando' y 'sin_reutilizar', 'ms_max'
+        y 'ms_total'; 'resultados_iguales' si ambas dieron lo mismo en cada tecla
+    """
+    from src.buscarapp.models.search_models import SearchFilters
+
+    reporte: Dict[str, Any] = {'teclas': len(consulta)}
+    resultados = {}
+    for nombre, reutilizar in (('reutilizando', True), ('sin_reutilizar', False)):
+        controller._result_cache.clear()
+        tiempos, resultados[nombre] = [], []
+        for i in range(1, len(consulta) + 1):
+            if not reutilizar:
+                controller._result_cache.clear()
+            inicio = time.perf_counter()
+            filas = controller.apply_filters(SearchFilters(texto_busqueda=consulta[:i]))
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            resultados[nombre].append(len(filas))
+        reporte[nombre] = {'ms_max': round(max(tiempos), 1), 'ms_total': round(sum(tiempos), 1)}
+    reporte['resultados_iguales'] = resultados['reutilizando'] == resultados['sin_reutilizar']
+    return reporte
+
+
+def medir_carga(facturas: int = 50000, semilla: int = 0, con_anterior: bool = True,
+                consulta: str = "servicio de mant") -> Dict[str, Any]:
+    """
+    Llena una base en memoria y mide la carga de facturas.
+
+    Args:
+        facturas (int): Número de facturas sintéticas
+        semilla (int): Semilla de los datos
+        con_anterior (bool): Medir también la carga fila por fila y comparar resultados
+        consulta (str): Texto para simular la búsqueda mientras se escribe (vacío para omitirla)
+
+    Returns:
+        Dict[str, Any]: 'facturas', 'llenado_s' y, por carga ('actual' y 'anterior'),
+        'segundos' y 'consultas'; 'resultados_iguales' si se midió la anterior;
+        'escritura' con el resultado de medir_escritura
+    """
+    from src.buscarapp.controllers.search_controller import SearchController
+
+    modelos = _modelos()
+    bd = _BDContada(':memory:')
+    reporte: Dict[str, Any] = {'facturas': facturas}
+    with bd.bind_ctx(modelos):
+        bd.create_tables(modelos)
+        inicio = time.perf_counter()
+        llenar_base(facturas, semilla)
+        reporte['llenado_s'] = round(time.perf_counter() - inicio, 2)
+
+        controller = SearchController(bd_control=object())
+        logging.getLogger(controller.logger.name).setLevel(logging.WARNING)
+        bd.consultas = 0
+        inicio = time.perf_counter()
+        controller.load_facturas()
+        reporte['actual'] = {'segundos': round(time.perf_counter() - inicio, 3), 'consultas': bd.consultas}
+
+        if consulta:
+            reporte['escritura'] = medir_escritura(controller, consulta)
+
+        if con_anterior:
+            bd.consultas = 0
+            inicio = time.perf_counter()
+            anteriores = cargar_facturas_fila_por_fila(controller)
+            reporte['anterior'] = {'segundos': round(time.perf_counter() - inicio, 3), 'consultas': bd.consultas}
+            reporte['resultados_iguales'] = anteriores == controller.state.all_facturas
+    return reporte
+
+
+def imprimir_reporte(reporte: Dict[str, Any]):
+    """Muestra en consola el reporte de medir_carga."""
+    print("🏁 BENCHMARK DE CARGA DE FACTURAS (SQLite en memoria)")
+    print("=" * 60)
+    print(f"📄 {reporte['facturas']} facturas (llenado: {reporte['llenado_s']} s)")
+    for nombre in ('actual', 'anterior'):
+        if nombre in reporte:
+            datos = reporte[nombre]
+            print(f"   ⏱️ {nombre}: {datos['segundos']} s en {datos['consultas']} consulta(s)")
+    if 'anterior' in reporte and reporte['actual']['segundos']:
+        print(f"   🚀 x{reporte['anterior']['segundos'] / reporte['actual']['segundos']:.1f}")
+    if 'resultados_iguales' in reporte:
+        icono = "✅" if reporte['resultados_iguales'] else "❌"
+        print(f"   {icono} Resultados idénticos: {'sí' if reporte['resultados_iguales'] else 'no'}")
+    if 'escritura' in reporte:
+        escritura = reporte['escritura']
+        print(f"⌨️ Búsqueda en vivo ({escritura['teclas']} teclas):")
+        for nombre in ('reutilizando', 'sin_reutilizar'):
+            datos = escritura[nombre]
+            print(f"   ⏱️ {nombre}: máx {datos['ms_max']} ms por tecla, {datos['ms_total']} ms en total")
+        icono = "✅" if escritura['resultados_iguales'] else "❌"
+        print(f"   {icono} Mismos resultados en cada tecla: {'sí' if escritura['resultados_iguales'] else 'no'}")
+    print("=" * 60)
+
+
+def main():
+    """Mide la carga de facturas sobre una base sintética en memoria."""
+    parser = argparse.ArgumentParser(description="Benchmark de la carga de facturas de la vista Buscar")
+    parser.add_argument('--facturas', type=int, default=50000, help="Facturas sintéticas (default: 50000)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los datos")
+    parser.add_argument('--sin-anterior', action='store_true', help="No medir la carga fila por fila")
+    parser.add_argument('--consulta', default="servicio de mant",
+                        help="Texto para simular la búsqueda mientras se escribe ('' para omitirla)")
+    args = parser.parse_args()
+
+    imprimir_reporte(medir_carga(args.facturas, args.semilla, con_anterior=not args.sin_anterior,
+                                 consulta=args.consulta))
+
+
+if __name__ == "__main__":
+    main()
@@ -88,7 +88,9 @@ class BuscarAppRefactored(ttk.Frame):
         self._initialize_database()
         
         # Inicializar controladores
-        self.search_controller = SearchController(self.bd_control)
+        server_side_search, search_page_size = self._get_search_settings()
+        self.search_controller = SearchController(self.bd_control, server_side=server_side_search,
+                                                  page_size=search_page_size)
         self.invoice_controller = InvoiceController(self.bd_control)
         self.export_controller = ExportController()
         self.autocarga_controller = AutocargaController(self.bd_control, self)
@@ -115,6 +117,32 @@ class BuscarAppRefactored(ttk.Frame):
             self.logger.error(f"Error inicializando base de datos: {e}")
             self.bd_control = None
     
+    def _get_search_settings(self):
+        """
+        Lee de la configuración si la búsqueda se hace en el servidor y el tamaño de página
+        
+        Returns:
+            tuple: (server_side_search, search_page_size)
+        """
+        try:
+            from config.settings import config
+            return config.ui.server_side_search, config.ui.search_page_size
+        except Exception:
+            return False, SearchController.DEFAULT_PAGE_SIZE
+    
+    def _get_live_search_settings(self):
+        """
+        Lee de la configuración si se busca mientras se escribe y la espera tras la última tecla
+        
+        Returns:
+            tuple: (live_search, live_search_delay_ms)
+        """
+        try:
+            from config.settings import config
+            return config.ui.live_search, config.ui.live_search_delay_ms
+        except Exception:
+            return True, SearchFrame.DEFAULT_LIVE_SEARCH_DELAY_MS
+    
     def _create_layout(self):
         """Crea el layout principal de la aplicación"""
         
@@ -122,18 +150,24 @@ class BuscarAppRefactored(ttk.Frame):
         main_container = ttk.Frame(self, padding=10)
         main_container.pack(fill="both", expand=True)
         
-        # Frame de búsqueda
+        # Frame de búsqueda (en vivo solo con las facturas en memoria: en el servidor
+        # cada búsqueda es una consulta y se mantiene el botón Buscar)
+        live_search, live_search_delay_ms = self._get_live_search_settings()
+        live_search = live_search and not self.search_controller.get_state().server_side
         self.search_frame = SearchFrame(
             main_container,
             on_search_callback=self._on_search,
-            on_clear_callback=self._on_clear_search
+            on_clear_callback=self._on_clear_search,
+            on_live_search_callback=self._on_live_search if live_search else None,
+            live_search_delay_ms=live_search_delay_ms
         )
         
         # Frame de tabla
         self.table_frame = TableFrame(
             main_container,
             on_selection_callback=self._on_table_selection,
-            on_double_click_callback=self._on_table_double_click
+            on_double_click_callback=self._on_table_double_click,
+            on_end_reached_callback=self._on_table_end_reached
         )
         
         # Frame de botones de acción
@@ -221,6 +255,20 @@ class BuscarAppRefactored(ttk.Frame):
     
     def _on_search(self, filters_dict: Dict[str, Any]):
         """Maneja el evento de búsqueda"""
+        self._run_search(filters_dict)
+    
+    def _on_live_search(self, filters_dict: Dict[str, Any]):
+        """Búsqueda mientras se escribe: no bloquea los controles para no quitar el foco"""
+        self._run_search(filters_dict, live=True)
+    
+    def _run_search(self, filters_dict: Dict[str, Any], live: bool = False):
+        """
+        Aplica los filtros y muestra los resultados
+        
+        Args:
+            filters_dict: Filtros de SearchFrame.get_filters
+            live: Búsqueda en vivo (sin deshabilitar controles ni mostrar diálogos de error)
+        """
         try:
             # Convertir diccionario a objeto SearchFilters
             search_filters = SearchFilters(
@@ -236,7 +284,8 @@ class BuscarAppRefactored(ttk.Frame):
             )
             
             # Deshabilitar controles durante búsqueda
-            self.search_frame.enable_controls(False)
+            if not live:
+                self.search_frame.enable_controls(False)
             
             # Aplicar filtros
             filtered_results = self.search_controller.apply_filters(search_filters)
@@ -255,14 +304,27 @@ class BuscarAppRefactored(ttk.Frame):
             self.info_panels_frame.clear_all_info()
             self.action_buttons_frame.update_selection(None)
             
-            result_count = len(filtered_results)
+            result_count = self.search_controller.get_state().get_results_count()
             self.logger.info(f"Búsqueda completada - {result_count} resultados")
             
         except Exception as e:
             self.logger.error(f"Error en búsqueda: {e}")
-            self.dialog_utils.show_error("Error en búsqueda", f"Error en la búsqueda: {str(e)}")
+            if not live:
+                self.dialog_utils.show_error("Error en búsqueda", f"Error en la búsqueda: {str(e)}")
         finally:
-            self.search_frame.enable_controls(True)
+            if not live:
+                self.search_frame.enable_controls(True)
+    
+    def _on_table_end_reached(self):
+        """Trae la siguiente página de resultados cuando la búsqueda es en el servidor"""
+        search_state = self.search_controller.get_state()
+        if not search_state.has_more_results():
+            return
+        new_rows = self.search_controller.load_next_page()
+        if new_rows:
+            self.table_frame.append_data(new_rows)
+            self.logger.info(f"Página agregada - {len(search_state.filtered_facturas)} de "
+                             f"{search_state.get_results_count()} resultados")
     
     def _on_clear_search(self):
         """Maneja el evento de limpiar búsqueda"""
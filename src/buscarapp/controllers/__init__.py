@@ -1,9 +1,25 @@
 """
 Controllers package - Contiene la lógica de negocio separada de la UI
+
+Los controladores se importan al primer uso, para que importar
+controllers.autocarga_controller (p. ej. desde autocarga_cli.py) no cargue
+ttkbootstrap a través de los demás controladores.
 """
 
-from .search_controller import SearchController
-from .invoice_controller import InvoiceController
-from .export_controller import ExportController
+import importlib
+
+_MODULOS = {
+    'SearchController': '.search_controller',
+    'InvoiceController': '.invoice_controller',
+    'ExportController': '.export_controller',
+}
 
 __all__ = ['SearchController', 'InvoiceController', 'ExportController']
+
+
+def __getattr__(nombre):
+    if nombre in _MODULOS:
+        valor = getattr(importlib.import_module(_MODULOS[nombre], __name__), nombre)
+        globals()[nombre] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
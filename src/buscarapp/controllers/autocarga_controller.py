@@ -4,9 +4,12 @@ Maneja la integración entre el sistema de autocarga y la base de datos.
 """
 import sys
 import os
-from typing import Dict, Any, List, Tuple, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Tuple, Optional
+import functools
 import logging
+import time
 from datetime import datetime
+from pathlib import Path
 
 # Agregar path para imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,20 +17,54 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 try:
-    from ..utils.dialog_utils import DialogUtils
-    from ..autocarga.autocarga import AutoCarga
+    from ..autocarga.autocarga import AutoCarga, TAMANO_LOTE_PERSISTENCIA
     from ..autocarga.provider_matcher import ProviderMatcher
-    from ..views.dialogo_asociacion_manual import mostrar_dialogo_asociacion_manual
+    from ..autocarga.extraccion_paralela import workers_por_defecto, TIMEOUT_ARCHIVO_S, MEMORIA_MAXIMA_MB
+    from ..autocarga.persistencia_lote import (
+        ContadorConsultas, LoteAutocarga, folios_son_equivalentes, normalizar_folio_para_comparacion,
+        vales_registrados
+    )
+    from ..autocarga.indice_asociacion import IndiceAsociacion
+    from ..autocarga.tiempos_etapas import TiemposEtapas, guardar_tiempos, formatear_resumen, ETAPA_NORMALIZACION, ETAPA_PERSISTENCIA
+    from ..utils.procesar_datos_vale import procesar_datos_vale
 except ImportError:
-    from utils.dialog_utils import DialogUtils
-    from autocarga.autocarga import AutoCarga
+    from autocarga.autocarga import AutoCarga, TAMANO_LOTE_PERSISTENCIA
     from autocarga.provider_matcher import ProviderMatcher
-    from views.dialogo_asociacion_manual import mostrar_dialogo_asociacion_manual
+    from autocarga.extraccion_paralela import workers_por_defecto, TIMEOUT_ARCHIVO_S, MEMORIA_MAXIMA_MB
+    from autocarga.persistencia_lote import (
+        ContadorConsultas, LoteAutocarga, folios_son_equivalentes, normalizar_folio_para_comparacion,
+        vales_registrados
+    )
+    from autocarga.indice_asociacion import IndiceAsociacion
+    from autocarga.tiempos_etapas import TiemposEtapas, guardar_tiempos, formatear_resumen, ETAPA_NORMALIZACION, ETAPA_PERSISTENCIA
+    from utils.procesar_datos_vale import procesar_datos_vale
+
+
+# Los diálogos (ttkbootstrap) se importan solo cuando hay interfaz, para poder
+# ejecutar la autocarga sin Tk (ver autocarga_cli.py)
+def _crear_dialog_utils(parent_widget):
+    try:
+        from ..utils.dialog_utils import DialogUtils
+    except ImportError:
+        from utils.dialog_utils import DialogUtils
+    return DialogUtils(parent_widget)
+
+
+def mostrar_dialogo_asociacion_manual(*args, **kwargs):
+    try:
+        from ..views.dialogo_asociacion_manual import mostrar_dialogo_asociacion_manual as mostrar
+    except ImportError:
+        from views.dialogo_asociacion_manual import mostrar_dialogo_asociacion_manual as mostrar
+    return mostrar(*args, **kwargs)
 
 
 class AutocargaController:
-    def _procesar_orden_individual(self, orden_data: Dict, contadores: Dict):
-        """Procesa una orden individual para guardar en la BD y asociar con factura"""
+    def _procesar_orden_individual(self, orden_data: Dict, contadores: Dict, lote: Optional[LoteAutocarga] = None):
+        """
+        Procesa una orden individual para guardar en la BD y asociar con factura.
+        Con un lote, la verificación de duplicados usa las órdenes precargadas y la
+        orden nueva se agrega al lote en lugar de crearse de inmediato.
+        """
         try:
             from src.bd.models import OrdenCompra, Factura, Proveedor
             from datetime import date
@@ -75,10 +112,13 @@ class AutocargaController:
                 self.logger.info(f"💼 Cuenta mayor encontrada: {cuenta_mayor}")
             
             # Verificar si la orden ya existe (evitar duplicados)
-            orden_existente = OrdenCompra.get_or_none(
-                OrdenCompra.ref_movimiento == ref_movimiento,
-                OrdenCompra.cuenta == cuenta
-            )
+            if lote is not None:
+                orden_existente = lote.orden_existe(ref_movimiento, cuenta)
+            else:
+                orden_existente = OrdenCompra.get_or_none(
+                    OrdenCompra.ref_movimiento == ref_movimiento,
+                    OrdenCompra.cuenta == cuenta
+                )
             
             if orden_existente:
                 self.logger.info(f"Orden ya existe: {ref_movimiento} - {cuenta}")
@@ -94,7 +134,9 @@ class AutocargaController:
                     'fecha': None,  # No necesitamos fecha para esta estrategia
                     'importe_total': float(importe)
                 }
-                factura_asociada = self._buscar_factura_por_asociacion_inteligente(orden_data)
+                factura_asociada = self._buscar_factura_por_asociacion_inteligente(
+                    orden_data, lote.asociacion if lote is not None else None
+                )
                 
                 if factura_asociada:
                     self.logger.info(f"✅ Factura encontrada por cuenta/proveedor: {factura_asociada.serie}-{factura_asociada.folio}")
@@ -104,8 +146,8 @@ class AutocargaController:
             except Exception as e:
                 self.logger.error(f"Error en búsqueda de asociación: {e}")
             
-            # Crear la orden en la BD
-            nueva_orden = OrdenCompra.create(
+            # Campos de la orden según el modelo
+            campos_orden = dict(
                 ref_movimiento=ref_movimiento,
                 cuenta=cuenta,
                 nombre=nombre,
@@ -118,12 +160,20 @@ class AutocargaController:
                 archivo_original=archivo_original,
                 fecha_procesamiento=date.today(),
                 cuenta_mayor=cuenta_mayor,  # Agregar la cuenta mayor extraída del PDF
-                factura=factura_asociada  # Asociar con la factura si se encontró
             )
             
+            if lote is not None:
+                # Se inserta con el resto del lote; los contadores se actualizan al insertar
+                lote.agregar_orden(campos_orden, factura_asociada)
+                orden_id = f"ref {ref_movimiento}"
+            else:
+                # Crear la orden asociada con la factura si se encontró
+                nueva_orden = OrdenCompra.create(**campos_orden, factura=factura_asociada)
+                orden_id = nueva_orden.id
+            
             # Actualizar cuenta_mayor del proveedor y factura si no la tienen
             if cuenta_mayor:
-                self.logger.info(f"💼 Procesando cuenta mayor {cuenta_mayor} para orden {nueva_orden.id}")
+                self.logger.info(f"💼 Procesando cuenta mayor {cuenta_mayor} para orden {orden_id}")
                 proveedor_para_actualizar = None
                 
                 # Caso 1: Hay factura asociada, usar su proveedor
@@ -142,7 +192,9 @@ class AutocargaController:
                 # Caso 2: No hay factura asociada, buscar proveedor por cuenta o nombre
                 else:
                     self.logger.info(f"🔍 No hay factura asociada. Buscando proveedor por cuenta={cuenta} nombre='{nombre}'")
-                    proveedor_para_actualizar = self._buscar_proveedor_para_cuenta_mayor(cuenta, nombre)
+                    proveedor_para_actualizar = self._buscar_proveedor_para_cuenta_mayor(
+                        cuenta, nombre, lote.asociacion if lote is not None else None
+                    )
                     if proveedor_para_actualizar:
                         self.logger.info(f"✅ Proveedor encontrado por búsqueda: {proveedor_para_actualizar.nombre or proveedor_para_actualizar.nombre_en_quiter}")
                     else:
@@ -150,10 +202,13 @@ class AutocargaController:
                 
                 # Actualizar cuenta mayor del proveedor si encontramos uno
                 if proveedor_para_actualizar:
-                    self._actualizar_cuenta_mayor_proveedor(proveedor_para_actualizar, cuenta_mayor, nueva_orden.id)
+                    self._actualizar_cuenta_mayor_proveedor(proveedor_para_actualizar, cuenta_mayor, orden_id)
                 else:
                     self.logger.info(f"ℹ️ No se pudo determinar el proveedor para actualizar cuenta mayor {cuenta_mayor}")
             
+            if lote is not None:
+                return
+            
             contadores['ordenes_creadas'] = contadores.get('ordenes_creadas', 0) + 1
             
             if factura_asociada:
@@ -171,61 +226,60 @@ class AutocargaController:
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             contadores['errores'] = contadores.get('errores', 0) + 1
 
-    def _buscar_asociacion_cuenta_proveedor(self, cuenta: int, nombre_proveedor: str, importe: float, fecha_orden=None):
+    def _buscar_asociacion_cuenta_proveedor(self, cuenta: int, nombre_proveedor: str, importe: float, fecha_orden=None,
+                                            indice: Optional[IndiceAsociacion] = None):
         """
         Busca asociación usando cuenta + proveedor + importe.
         
         Estrategia simplificada:
-        1. Buscar vales por cuenta (y opcionalmente fecha)
-        2. De esos vales, buscar facturas por proveedor + importe similar
+        1. Buscar facturas por proveedor + importe similar
+        2. Si no hay, buscar facturas con vale de proveedores con cuenta parecida
         3. Devolver la mejor coincidencia
         
+        Las facturas salen del índice por importe (una consulta para toda la corrida),
+        no de una consulta por proveedor y por factura.
+        
         Args:
             cuenta (int): Cuenta del proveedor
             nombre_proveedor (str): Nombre del proveedor  
             importe (float): Importe de la orden
             fecha_orden (date, optional): Fecha de la orden
+            indice (IndiceAsociacion): Índice precargado con todos los proveedores
+                (si no se proporciona, se precarga aquí)
             
         Returns:
-            tuple: (Factura, Vale) o (None, None) si no hay coincidencia
+            tuple: (Factura, noVale) o (None, None) si no hay coincidencia
         """
-        try:
-            from src.bd.models import Factura, Proveedor, Vale
-        except ImportError:
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-            from src.bd.models import Factura, Proveedor, Vale
+        if indice is None:
+            indice = IndiceAsociacion.desde_bd()
             
         self.logger.info(f"🔍 Búsqueda por cuenta/proveedor: cuenta={cuenta}, proveedor='{nombre_proveedor}', importe=${importe:,.2f}")
         
         # ESTRATEGIA 1: Buscar por proveedor + importe similar
         # Normalizar nombre del proveedor (quitar SADECV, espacios, etc.)
-        nombre_limpio = nombre_proveedor.upper().replace('SADECV', '').replace('S.A.DE C.V.', '').replace('SADECV', '').strip()
+        nombre_limpio = nombre_proveedor.upper().replace('SADECV', '').replace('S.A.DE C.V.', '').strip()
+        palabras = nombre_limpio.split()
         
         # Buscar proveedores similares
-        proveedores_candidatos = Proveedor.select().where(
-            (Proveedor.nombre.contains(nombre_limpio[:15])) |  # Primeros 15 caracteres
-            (Proveedor.nombre.contains(nombre_limpio.split()[0])) |  # Primera palabra
-            (Proveedor.cuenta == str(cuenta))  # Por cuenta
-        )
+        proveedores_candidatos = [
+            proveedor for proveedor in indice.proveedores.values()
+            if (nombre_limpio and nombre_limpio[:15] in (proveedor.nombre or '').upper())  # Primeros 15 caracteres
+            or (palabras and palabras[0] in (proveedor.nombre or '').upper())  # Primera palabra
+            or proveedor.codigo_quiter == cuenta  # Por cuenta
+        ]
         
-        self.logger.info(f"  📋 Encontrados {proveedores_candidatos.count()} proveedores candidatos")
+        self.logger.info(f"  📋 Encontrados {len(proveedores_candidatos)} proveedores candidatos")
         
         mejor_factura = None
         mejor_vale = None
         mejor_puntuacion = 0
+        tolerancia = importe * 0.1  # 10% de tolerancia
         
         for proveedor in proveedores_candidatos:
             self.logger.info(f"  🔍 Verificando proveedor: {proveedor.nombre}")
             
-            # Buscar facturas de este proveedor con importe similar (±10%)
-            tolerancia = importe * 0.1  # 10% de tolerancia
-            facturas_proveedor = Factura.select().where(
-                (Factura.proveedor == proveedor) &
-                (Factura.total >= importe - tolerancia) &
-                (Factura.total <= importe + tolerancia)
-            )
-            
-            for factura in facturas_proveedor:
+            # Facturas de este proveedor con importe similar (±10%)
+            for factura in indice.facturas_en_rango(proveedor.id, importe - tolerancia, importe + tolerancia):
                 diferencia_importe = abs(float(factura.total) - importe)
                 
                 # Calcular puntuación (menor diferencia = mejor puntuación)
@@ -237,7 +291,7 @@ class AutocargaController:
                     continue  # Fuera de tolerancia
                 
                 # Bonus por coincidencia de nombre
-                if nombre_limpio[:10] in proveedor.nombre.upper():
+                if nombre_limpio[:10] in (proveedor.nombre or '').upper():
                     puntuacion += 10
                     
                 self.logger.info(f"    💰 Factura {factura.serie}-{factura.folio}: ${factura.total:,.2f} (dif: ${diferencia_importe:,.2f}, puntos: {puntuacion:.1f})")
@@ -246,35 +300,36 @@ class AutocargaController:
                     mejor_puntuacion = puntuacion
                     mejor_factura = factura
                     
-                    # Buscar vale asociado a esta factura (opcional)
-                    vale_asociado = Vale.get_or_none(Vale.factura == factura)
-                    if vale_asociado:
-                        mejor_vale = vale_asociado
-                        puntuacion += 5  # Bonus por tener vale
-                        self.logger.info(f"      📄 Vale asociado: {vale_asociado.numero}")
+                    # Vale asociado a esta factura (opcional)
+                    mejor_vale = indice.vale_de_factura(factura)
+                    if mejor_vale:
+                        self.logger.info(f"      📄 Vale asociado: {mejor_vale}")
         
         # ESTRATEGIA 2: Si no hay coincidencia directa, buscar por cuenta en vales
-        if not mejor_factura:
+        if not mejor_factura and importe:
             self.logger.info(f"  🔄 Estrategia alternativa: buscar vales por cuenta {cuenta}")
             
-            # Buscar vales que podrían corresponder a esta cuenta
+            # Facturas con vale de proveedores cuya cuenta contiene los últimos 4 dígitos
             # (esto es más especulativo, pero puede ayudar)
-            vales_cuenta = Vale.select().join(Factura).join(Proveedor).where(
-                Proveedor.cuenta.contains(str(cuenta)[-4:])  # Últimos 4 dígitos de cuenta
-            )
-            
-            for vale in vales_cuenta:
-                if vale.factura:
-                    diferencia_importe = abs(float(vale.factura.total) - importe)
-                    if diferencia_importe < importe * 0.15:  # 15% de tolerancia más amplia
-                        puntuacion = 60 - (diferencia_importe / (importe * 0.15) * 10)
+            terminacion = str(cuenta)[-4:]
+            tolerancia_amplia = importe * 0.15  # 15% de tolerancia más amplia
+            for proveedor in indice.proveedores.values():
+                if proveedor.codigo_quiter is None or terminacion not in str(proveedor.codigo_quiter):
+                    continue
+                for factura in indice.facturas_en_rango(proveedor.id, importe - tolerancia_amplia, importe + tolerancia_amplia):
+                    no_vale = indice.vale_de_factura(factura)
+                    if not no_vale:
+                        continue
+                    diferencia_importe = abs(float(factura.total) - importe)
+                    if diferencia_importe < tolerancia_amplia:
+                        puntuacion = 60 - (diferencia_importe / tolerancia_amplia * 10)
                         
-                        self.logger.info(f"    🎫 Vale {vale.numero} → Factura {vale.factura.serie}-{vale.factura.folio}: ${vale.factura.total:,.2f} (puntos: {puntuacion:.1f})")
+                        self.logger.info(f"    🎫 Vale {no_vale} → Factura {factura.serie}-{factura.folio}: ${factura.total:,.2f} (puntos: {puntuacion:.1f})")
                         
                         if puntuacion > mejor_puntuacion:
                             mejor_puntuacion = puntuacion
-                            mejor_factura = vale.factura
-                            mejor_vale = vale
+                            mejor_factura = factura
+                            mejor_vale = no_vale
         
         # Resultado final
         if mejor_factura:
@@ -330,6 +385,10 @@ class AutocargaController:
 • Vales procesados exitosamente: {stats.get('vales_exitosos', 0)}
 • Órdenes encontradas: {stats.get('ordenes_encontradas', 0)}
 • Órdenes procesadas exitosamente: {stats.get('ordenes_exitosas', 0)}
+• Archivos sin cambios tomados de la caché: {stats.get('desde_cache', 0)}
+• Archivos duplicados omitidos: {stats.get('duplicados_omitidos', 0)}
+• Vales ya registrados (no extraídos): {stats.get('vales_ya_registrados', 0)}
+• Archivos en cuarentena: {len(stats.get('cuarentena', []))}
 
 🔍 COINCIDENCIAS DE PROVEEDORES:
 """
@@ -340,6 +399,11 @@ class AutocargaController:
 • Órdenes con proveedor encontrado: {pm.get('ordenes_con_proveedor', 0)}
 • Órdenes sin proveedor: {pm.get('ordenes_sin_proveedor', 0)}
 """
+        if stats.get('cuarentena'):
+            reporte_content += "\n🚧 ARCHIVOS EN CUARENTENA (no se procesaron):\n"
+            for entrada in stats['cuarentena']:
+                origen = "" if entrada.get('nuevo') else " (de una corrida anterior)"
+                reporte_content += f"• {os.path.basename(entrada['archivo'])}: {entrada['motivo']}{origen}\n"
         reporte_content += f"""
 🔄 ACTUALIZACIONES EN BASE DE DATOS:
 • Proveedores actualizados con código: {contadores['proveedores_actualizados']}
@@ -351,7 +415,12 @@ class AutocargaController:
 • Órdenes sin asociar: {contadores.get('ordenes_sin_asociar', 0)}
 • Facturas actualizadas: {contadores['facturas_actualizadas']}
 • Errores durante procesamiento: {contadores['errores']}
-
+• Consultas a la base de datos: {contadores.get('consultas_bd', 0)}
+"""
+        if stats.get('tiempos_etapas'):
+            reporte_content += "\n⏱️ TIEMPOS POR ETAPA (total, percentiles y archivos más lentos):\n"
+            reporte_content += "\n".join(formatear_resumen(stats['tiempos_etapas'])) + "\n"
+        reporte_content += """
 ✅ PROCESO COMPLETADO EXITOSAMENTE
 
 💡 PRÓXIMOS PASOS:
@@ -387,11 +456,11 @@ class AutocargaController:
         x = reporte_window.master.winfo_x() + (reporte_window.master.winfo_width() // 2) - (reporte_window.winfo_width() // 2)
         y = reporte_window.master.winfo_y() + (reporte_window.master.winfo_height() // 2) - (reporte_window.winfo_height() // 2)
         reporte_window.geometry(f"+{x}+{y}")
-    def _mostrar_barra_progreso(self, total_archivos):
+    def _mostrar_barra_progreso(self, total_archivos, on_cancelar=None):
         import ttkbootstrap as ttk
         progreso_window = ttk.Toplevel(self.parent_widget)
         progreso_window.title("Procesando archivos PDF...")
-        progreso_window.geometry("400x120")
+        progreso_window.geometry("400x160")
         progreso_window.transient(self.parent_widget)
         progreso_window.grab_set()
 
@@ -403,7 +472,7 @@ class AutocargaController:
         hs = progreso_window.winfo_screenheight()
         x = (ws // 2) - (w // 2)
         y = (hs // 2) - (h // 2)
-        progreso_window.geometry(f"400x120+{x}+{y}")
+        progreso_window.geometry(f"400x160+{x}+{y}")
 
         # Detectar tema actual
         theme = str(ttk.Style().theme)
@@ -419,6 +488,15 @@ class AutocargaController:
         barra = ttk.Progressbar(progreso_window, maximum=total_archivos, length=350, bootstyle="info-striped")
         barra.pack(pady=(0, 10))
 
+        if on_cancelar:
+            def cancelar():
+                boton_cancelar.config(state="disabled", text="Cancelando...")
+                on_cancelar()
+
+            boton_cancelar = ttk.Button(progreso_window, text="Cancelar", bootstyle="outline-danger", command=cancelar)
+            boton_cancelar.pack(pady=(0, 10))
+            progreso_window.protocol("WM_DELETE_WINDOW", cancelar)
+
         progreso_window.update_idletasks()
         return progreso_window, barra
     """Controlador que maneja la lógica de autocarga de facturas"""
@@ -427,7 +505,8 @@ class AutocargaController:
         self.bd_control = bd_control
         self.parent_widget = parent_widget
         self.logger = logging.getLogger(__name__)
-        self.dialog_utils = DialogUtils(parent_widget)
+        # Sin widget padre no hay interfaz: no se muestran diálogos ni ventanas
+        self.dialog_utils = _crear_dialog_utils(parent_widget) if parent_widget is not None else None
         self.reporte_mostrado = False  # Flag para evitar reportes múltiples
     
     def ejecutar_autocarga_con_configuracion(self, facturas_seleccionadas: List[Dict[str, Any]] = None) -> Tuple[bool, Dict[str, Any]]:
@@ -460,67 +539,73 @@ class AutocargaController:
             self.logger.info(f"⚙️ Configuración de autocarga: {config}")
             
             # Crear instancia de AutoCarga
-            autocarga = AutoCarga(
-                ruta_carpeta=config['ruta_carpeta'],
-                dias_atras=config['dias_atras']
-            )
+            autocarga = self._crear_autocarga(config, facturas_seleccionadas)
             
             # DIAGNÓSTICO: Verificar que el parámetro se pasó correctamente
             self.logger.info(f"🔍 DIAGNÓSTICO - Días configurados en AutoCarga: {autocarga.dias_atras}")
 
-            # Buscar archivos para saber el total
-            lista_vales, lista_ordenes = autocarga.buscar_archivos()
-            total_archivos = len(lista_vales) + len(lista_ordenes)
-            
-            # DIAGNÓSTICO: Mostrar qué archivos se encontraron
-            self.logger.info(f"📁 DIAGNÓSTICO - Archivos encontrados con {config['dias_atras']} días:")
-            self.logger.info(f"   📄 Vales: {len(lista_vales)}")
-            self.logger.info(f"   📋 Órdenes: {len(lista_ordenes)}")
-            if lista_vales:
-                self.logger.info(f"   📝 Primer vale: {os.path.basename(lista_vales[0])}")
-            if lista_ordenes:
-                self.logger.info(f"   📝 Primera orden: {os.path.basename(lista_ordenes[0])}")
-
-            import threading
-            progreso_window, barra = (None, None)
-            resultado = {'vales': None, 'ordenes': None}
-            if total_archivos > 0:
-                progreso_window, barra = self._mostrar_barra_progreso(total_archivos)
+            # Escaneo → extracción → coincidencias → normalización → persistencia, por lotes.
+            # Los lotes se consumen en este hilo (el de Tk): la asociación manual abre
+            # diálogos modales, y mientras llega el siguiente lote se atiende la ventana
+            # de progreso con al_esperar. La carpeta se escanea una sola vez, dentro de
+            # iterar_autocarga, que informa el total ya filtrado con progress_callback(0, total).
+            progreso_window, barra = self._mostrar_barra_progreso(1, on_cancelar=autocarga.cancelar)
 
-                def progress_callback(idx, total):
-                    if barra:
-                        barra.after(0, barra.config, {'value': idx})
+            def atender_ventana():
+                if progreso_window is not None:
+                    progreso_window.update()
 
-                def procesamiento():
-                    self._mostrar_mensaje_progreso("Iniciando autocarga...")
-                    self.logger.info("🚀 Ejecutando autocarga...")
-                    vales, ordenes = autocarga.ejecutar_autocarga(progress_callback=progress_callback)
-                    resultado['vales'] = vales
-                    resultado['ordenes'] = ordenes
-                    if progreso_window:
-                        progreso_window.after(0, progreso_window.destroy)
-
-                hilo = threading.Thread(target=procesamiento)
-                hilo.start()
-                progreso_window.wait_window()
-                vales, ordenes = resultado['vales'], resultado['ordenes']
-            else:
-                self._mostrar_mensaje_progreso("Iniciando autocarga...")
-                self.logger.info("🚀 Ejecutando autocarga...")
-                vales, ordenes = autocarga.ejecutar_autocarga()
+            def progress_callback(idx, total):
+                # Se llama en este hilo, desde iterar_autocarga
+                if barra is not None:
+                    barra.config(maximum=max(total, 1), value=idx)
+                atender_ventana()
 
-            self.logger.info(f"📊 Autocarga ejecutada - Vales: {len(vales) if vales else 0}, Órdenes: {len(ordenes) if ordenes else 0}")
+            self._mostrar_mensaje_progreso("Iniciando autocarga...")
+            self.logger.info("🚀 Ejecutando autocarga...")
+            try:
+                lotes = self._normalizar_lotes(
+                    autocarga.iterar_autocarga(
+                        tamano_lote=config.get('tamano_lote', TAMANO_LOTE_PERSISTENCIA),
+                        progress_callback=progress_callback, al_esperar=atender_ventana
+                    ),
+                    tiempos=autocarga.tiempos
+                )
+                if self.bd_control:
+                    self.logger.info("💾 Guardando resultados en la base de datos por lotes...")
+                    contadores = self._guardar_lotes_en_bd(lotes, facturas_seleccionadas,
+                                                           al_guardar_lote=autocarga.confirmar_persistidos,
+                                                           tiempos=autocarga.tiempos)
+                else:
+                    self.logger.warning("⚠️ Sin conexión a BD - No se procesarán resultados")
+                    contadores = {'lotes': 0, 'consultas_bd': 0}
+                    for _ in lotes:
+                        pass
+            finally:
+                if progreso_window is not None:
+                    progreso_window.destroy()
             
             # Obtener estadísticas
             stats = autocarga.obtener_estadisticas()
+            stats['consultas_bd'] = contadores['consultas_bd']
+            self.logger.info(f"📁 Archivos encontrados con {config['dias_atras']} días - "
+                             f"Vales: {stats.get('vales_encontrados', 0)}, Órdenes: {stats.get('ordenes_encontradas', 0)}")
             self.logger.info(f"📈 Estadísticas autocarga: {stats}")
+            self._guardar_tiempos_etapas(stats, contadores, config)
+            
+            if stats.get('cancelado') or contadores.get('cancelado_por_usuario', False):
+                # Sin confirmar el escaneo: la siguiente corrida incremental vuelve a revisar
+                # estos archivos (los lotes ya guardados quedan en la bitácora)
+                self.logger.info("🚫 Autocarga cancelada por el usuario - no se confirma el escaneo")
+                if self.bd_control and self.parent_widget is not None:
+                    self._mostrar_reporte_procesamiento(stats, contadores, facturas_seleccionadas)
+                return contadores['lotes'] > 0, stats
             
-            # Procesar resultados para llenar BD
             if self.bd_control:
-                self.logger.info("💾 Procesando resultados a base de datos...")
-                self._procesar_resultados_a_bd(vales, ordenes, stats, facturas_seleccionadas)
-            else:
-                self.logger.warning("⚠️ Sin conexión a BD - No se procesarán resultados")
+                if self.parent_widget is not None:
+                    self._mostrar_reporte_procesamiento(stats, contadores, facturas_seleccionadas)
+                # Los archivos de esta corrida ya no se vuelven a revisar en modo incremental
+                autocarga.confirmar_escaneo()
             
             return True, stats
             
@@ -528,9 +613,187 @@ class AutocargaController:
             self.logger.error(f"❌ Error en autocarga: {e}")
             import traceback
             self.logger.error(f"📍 Traceback completo: {traceback.format_exc()}")
-            self.dialog_utils.show_error("Error en Autocarga", f"Error durante la autocarga: {str(e)}")
+            self._mostrar_error("Error en Autocarga", f"Error durante la autocarga: {str(e)}")
             return False, {}
     
+    def ejecutar_autocarga_sin_interfaz(self, config: Dict[str, Any], facturas_seleccionadas: List[Dict[str, Any]] = None,
+                                        dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Ejecuta escaneo → extracción → coincidencias → persistencia sin diálogos ni
+        ventanas (para autocarga_cli.py o tareas programadas).
+        
+        Args:
+            config (Dict): Misma configuración que devuelve el diálogo de configuración
+                (ruta_carpeta, dias_atras, workers, forzar_reextraccion, backend_texto, incremental),
+                más 'tamano_lote' (documentos por escritura en la BD) y 'reanudable' opcionales
+            facturas_seleccionadas: Facturas candidatas para asociar vales (opcional)
+            dry_run (bool): Procesar todo pero revertir los cambios en la BD al terminar
+            
+        Returns:
+            Dict[str, Any]: Reporte serializable con configuración, tiempos (s),
+            estadísticas de extracción y contadores de la BD
+        """
+        inicio = time.perf_counter()
+        tiempos = {}
+        if dry_run:
+            # Un dry-run no guarda nada, así que no debe dejar puntos de control
+            config = dict(config, reanudable=False)
+        reporte = {
+            'inicio': datetime.now().isoformat(timespec='seconds'),
+            'configuracion': dict(config),
+            'dry_run': dry_run,
+            'exito': False,
+        }
+        
+        try:
+            autocarga = self._crear_autocarga(config, facturas_seleccionadas)
+            
+            # Escaneo → extracción → coincidencias → normalización → persistencia, por lotes:
+            # la BD escribe cada lote mientras el hilo de extracción sigue con los siguientes
+            lotes = self._normalizar_lotes(
+                autocarga.iterar_autocarga(tamano_lote=config.get('tamano_lote', TAMANO_LOTE_PERSISTENCIA)),
+                tiempos=autocarga.tiempos
+            )
+            espera = {'segundos': 0.0}
+            contadores = self._guardar_lotes_en_bd(
+                self._medir_espera(lotes, espera), facturas_seleccionadas, dry_run=dry_run,
+                al_guardar_lote=None if dry_run else autocarga.confirmar_persistidos,
+                tiempos=autocarga.tiempos
+            )
+            tiempos['espera_extraccion'] = espera['segundos']
+            tiempos['persistencia'] = time.perf_counter() - inicio - espera['segundos']
+            
+            stats = autocarga.obtener_estadisticas()
+            stats['consultas_bd'] = contadores['consultas_bd']
+            
+            if not dry_run and not stats.get('cancelado'):
+                autocarga.confirmar_escaneo()
+            
+            reporte.update(estadisticas=stats, contadores=contadores, exito=True)
+            if autocarga.bitacora is not None:
+                reporte['archivos_mas_lentos'] = autocarga.bitacora.mas_lentos()
+            reporte['archivos_en_cuarentena'] = stats.get('cuarentena', [])
+            reporte['tiempos_etapas'] = stats['tiempos_etapas']
+            ruta_tiempos = self._guardar_tiempos_etapas(stats, contadores, config)
+            if ruta_tiempos is not None:
+                reporte['archivo_tiempos'] = str(ruta_tiempos)
+            
+        except Exception as e:
+            self.logger.error(f"❌ Error en autocarga sin interfaz: {e}")
+            import traceback
+            self.logger.error(f"📍 Traceback completo: {traceback.format_exc()}")
+            reporte['error'] = str(e)
+        
+        tiempos['total'] = time.perf_counter() - inicio
+        reporte['tiempos_s'] = {etapa: round(segundos, 3) for etapa, segundos in tiempos.items()}
+        return reporte
+    
+    def _guardar_tiempos_etapas(self, stats: Dict, contadores: Dict,
+                                config: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+        """
+        Guarda stats['tiempos_etapas'] en logs/autocarga_tiempos_<fecha>.json, con la
+        configuración y los conteos de la corrida, para comparar entre versiones.
+        
+        Returns:
+            Optional[Path]: Archivo guardado, o None si no se pudo guardar
+        """
+        extra = {
+            'configuracion': dict(config or {}),
+            'archivos': {
+                'vales_procesados': stats.get('vales_procesados', 0),
+                'ordenes_procesadas': stats.get('ordenes_procesadas', 0),
+                'desde_cache': stats.get('desde_cache', 0),
+            },
+            'consultas_bd': contadores.get('consultas_bd', 0),
+        }
+        try:
+            ruta = guardar_tiempos(stats.get('tiempos_etapas', {}), extra=extra)
+        except OSError as e:
+            self.logger.warning(f"⚠️ No se pudieron guardar los tiempos por etapa: {e}")
+            return None
+        self.logger.info(f"⏱️ Tiempos por etapa guardados en {ruta}")
+        return ruta
+    
+    @staticmethod
+    def _medir_espera(lotes: Iterable, espera: Dict[str, float]) -> Iterator:
+        """Entrega los lotes sumando en espera['segundos'] el tiempo esperando cada uno."""
+        iterador = iter(lotes)
+        while True:
+            marca = time.perf_counter()
+            try:
+                lote = next(iterador)
+            except StopIteration:
+                espera['segundos'] += time.perf_counter() - marca
+                return
+            espera['segundos'] += time.perf_counter() - marca
+            yield lote
+    
+    def _normalizar_lotes(self, lotes: Iterable[Tuple[Dict, Dict]],
+                          tiempos: Optional[TiemposEtapas] = None) -> Iterator[Tuple[Dict, Dict]]:
+        """
+        Etapa de normalización: convierte los vales de cada lote al formato de la BD
+        (procesar_datos_vale) antes de persistirlos. Las órdenes pasan igual.
+        
+        Args:
+            lotes: Iterable de (vales, ordenes) extraídos, p. ej. de AutoCarga.iterar_autocarga
+            tiempos (TiemposEtapas): Donde registrar la duración de cada lote ('normalizacion')
+            
+        Returns:
+            Iterator[Tuple[Dict, Dict]]: (vales normalizados, ordenes) con las mismas llaves;
+            un vale que no se pudo normalizar queda como None
+        """
+        try:
+            for vales, ordenes in lotes:
+                inicio_lote = time.perf_counter()
+                normalizados = {}
+                for vale_id, vale_data in vales.items():
+                    try:
+                        normalizados[vale_id] = procesar_datos_vale(vale_data)
+                    except Exception as e:
+                        self.logger.error(f"Error normalizando vale {vale_id}: {e}")
+                        normalizados[vale_id] = None
+                if tiempos is not None:
+                    tiempos.agregar(ETAPA_NORMALIZACION, time.perf_counter() - inicio_lote,
+                                    f"{len(vales)} vales")
+                yield normalizados, ordenes
+        finally:
+            # Al cerrar esta etapa se cierra también la anterior (detiene la extracción)
+            cerrar = getattr(lotes, 'close', None)
+            if cerrar:
+                cerrar()
+    
+    def _crear_autocarga(self, config: Dict[str, Any],
+                         facturas_seleccionadas: List[Dict[str, Any]] = None) -> AutoCarga:
+        """
+        Crea la instancia de AutoCarga a partir de la configuración.
+        
+        Salvo con config['omitir_vales_registrados'] = False, los vales ya registrados en
+        la BD se omiten antes de extraerlos. Si hay facturas seleccionadas solo se
+        omiten los que ya están asociados, porque a los demás todavía se les busca factura.
+        """
+        filtro = None
+        if config.get('omitir_vales_registrados', True):
+            filtro = functools.partial(vales_registrados, solo_asociados=bool(facturas_seleccionadas))
+        return AutoCarga(
+            ruta_carpeta=config['ruta_carpeta'],
+            dias_atras=config['dias_atras'],
+            workers=config.get('workers', 1),
+            forzar_reextraccion=config.get('forzar_reextraccion', False),
+            backend_texto=config.get('backend_texto', 'pdfplumber'),
+            incremental=config.get('incremental', False),
+            reanudable=config.get('reanudable', True),
+            filtro_vales_registrados=filtro,
+            usar_plantillas=config.get('usar_plantillas', False),
+            timeout_archivo=config.get('timeout_archivo', TIMEOUT_ARCHIVO_S) or None,
+            memoria_maxima_mb=config.get('memoria_maxima_mb', MEMORIA_MAXIMA_MB) or None,
+            reintentar_cuarentena=config.get('reintentar_cuarentena', False)
+        )
+    
+    def _mostrar_error(self, titulo: str, mensaje: str):
+        """Muestra un error en un diálogo si hay interfaz (el error ya queda en el log)."""
+        if self.dialog_utils is not None:
+            self.dialog_utils.show_error(titulo, mensaje)
+    
     def _mostrar_dialogo_configuracion(self) -> Optional[Dict[str, Any]]:
         """
         Muestra un diálogo para configurar la autocarga.
@@ -544,7 +807,7 @@ class AutocargaController:
         # Crear ventana de configuración
         config_window = ttk.Toplevel(self.parent_widget)
         config_window.title("Configuración de Autocarga")
-        config_window.geometry("500x480")
+        config_window.geometry("500x610")
         config_window.transient(self.parent_widget)
         config_window.grab_set()
         
@@ -658,6 +921,44 @@ class AutocargaController:
             variable=crear_vale_automatico_var
         ).pack(anchor="w", pady=(5, 0))
         
+        forzar_reextraccion_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            opciones_frame,
+            text="Forzar re-extracción (ignorar caché de PDFs ya leídos)",
+            variable=forzar_reextraccion_var
+        ).pack(anchor="w", pady=(5, 0))
+        
+        lectura_rapida_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            opciones_frame,
+            text="Lectura rápida de texto (pypdfium2, sin análisis de tablas)",
+            variable=lectura_rapida_var
+        ).pack(anchor="w", pady=(5, 0))
+        
+        incremental_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            opciones_frame,
+            text="Solo archivos nuevos desde la última autocarga",
+            variable=incremental_var
+        ).pack(anchor="w", pady=(5, 0))
+        
+        workers_frame = ttk.Frame(opciones_frame)
+        workers_frame.pack(fill="x", pady=(5, 0))
+        
+        ttk.Label(
+            workers_frame,
+            text="Procesos de extracción en paralelo:"
+        ).pack(side="left", padx=(0, 10))
+        
+        workers_var = ttk.IntVar(value=workers_por_defecto())
+        ttk.Spinbox(
+            workers_frame,
+            from_=1,
+            to=max(1, os.cpu_count() or 1),
+            textvariable=workers_var,
+            width=5
+        ).pack(side="left")
+        
         # Frame de botones
         botones_frame = ttk.Frame(main_frame)
         botones_frame.pack(fill="x", pady=(20, 0))
@@ -665,11 +966,19 @@ class AutocargaController:
         resultado = [None]  # Lista para almacenar el resultado
         
         def aceptar():
+            try:
+                workers = max(1, workers_var.get())
+            except Exception:
+                workers = 1
             config_result.update({
                 'ruta_carpeta': ruta_var.get(),
                 'dias_atras': dias_var.get(),
                 'actualizar_proveedores': actualizar_proveedores_var.get(),
-                'crear_vale_automatico': crear_vale_automatico_var.get()
+                'crear_vale_automatico': crear_vale_automatico_var.get(),
+                'workers': workers,
+                'forzar_reextraccion': forzar_reextraccion_var.get(),
+                'backend_texto': 'pdfium' if lectura_rapida_var.get() else 'pdfplumber',
+                'incremental': incremental_var.get()
             })
             resultado[0] = config_result
             config_window.destroy()
@@ -707,33 +1016,106 @@ class AutocargaController:
         """Muestra un mensaje de progreso"""
         self.logger.info(mensaje)
     
-    def _procesar_resultados_a_bd(self, vales: Dict, ordenes: Dict, stats: Dict, facturas_seleccionadas: List[Dict[str, Any]] = None):
+    def _guardar_lotes_en_bd(self, lotes: Iterable[Tuple[Dict, Dict]],
+                             facturas_seleccionadas: List[Dict[str, Any]] = None,
+                             dry_run: bool = False, al_guardar_lote=None,
+                             tiempos: Optional[TiemposEtapas] = None) -> Dict[str, Any]:
+        """
+        Guarda en la BD lotes (vales, órdenes) conforme llegan, p. ej. de
+        _normalizar_lotes(AutoCarga.iterar_autocarga(...)). Cada lote se precarga, se
+        resuelve y se inserta por separado, así lo ya escrito se conserva aunque la
+        corrida falle después.
+        
+        Args:
+            lotes: Iterable de (vales normalizados, ordenes)
+            facturas_seleccionadas: Lista de facturas seleccionadas para asociación
+            dry_run (bool): Hacer todo dentro de una transacción que se revierte al final
+            al_guardar_lote: Función (vales, ordenes) llamada cuando un lote ya quedó
+                guardado (p. ej. AutoCarga.confirmar_persistidos)
+            tiempos (TiemposEtapas): Donde registrar la duración de cada lote ('persistencia')
+            
+        Returns:
+            Dict[str, Any]: Contadores del reporte (incluye 'consultas_bd' y 'lotes')
+        """
+        from src.bd.models import Vale
+        
+        # Contadores para el reporte
+        contadores = {
+            'proveedores_actualizados': 0,
+            'vales_creados': 0,
+            'vales_asociados': 0,
+            'vales_sin_asociar': 0,
+            'facturas_actualizadas': 0,
+            'errores': 0,
+            'consultas_bd': 0,
+            'lotes': 0
+        }
+        
+        def guardar():
+            try:
+                for vales, ordenes in lotes:
+                    inicio_lote = time.perf_counter()
+                    self._procesar_lote_a_bd(vales, ordenes, contadores, facturas_seleccionadas)
+                    contadores['lotes'] += 1
+                    if tiempos is not None:
+                        tiempos.agregar(ETAPA_PERSISTENCIA, time.perf_counter() - inicio_lote,
+                                        f"lote {contadores['lotes']} ({len(vales) + len(ordenes)} documentos)")
+                    if al_guardar_lote:
+                        al_guardar_lote(vales, ordenes)
+                    if contadores.get('cancelado_por_usuario', False):
+                        break
+            finally:
+                # Detener la extracción si se sale antes de tiempo (error o cancelación)
+                cerrar = getattr(lotes, 'close', None)
+                if cerrar:
+                    cerrar()
+        
+        database = Vale._meta.database
+        with ContadorConsultas(database) as contador:
+            if dry_run:
+                with database.atomic() as transaccion:
+                    guardar()
+                    transaccion.rollback()
+                self.logger.info("🧪 Dry-run: cambios en la base de datos revertidos")
+            else:
+                guardar()
+        contadores['consultas_bd'] = contador.consultas
+        self.logger.info(f"🗄️ Consultas a la base de datos en esta autocarga: {contador.consultas}")
+        
+        return contadores
+    
+    def _procesar_lote_a_bd(self, vales: Dict, ordenes: Dict, contadores: Dict,
+                            facturas_seleccionadas: List[Dict[str, Any]] = None):
         """
-        Procesa los resultados de la autocarga para llenar la base de datos.
+        Procesa vales y órdenes en modo lote: precarga con consultas IN lo que se va
+        a consultar, resuelve las asociaciones en memoria e inserta los registros
+        nuevos con insert_many en una sola transacción.
         
         Args:
-            vales: Datos de vales extraídos
+            vales: Vales normalizados (ver _normalizar_lotes); None si no se pudo normalizar
             ordenes: Datos de órdenes extraídas
-            stats: Estadísticas del procesamiento
+            contadores: Contadores del reporte
             facturas_seleccionadas: Lista de facturas seleccionadas para asociación
         """
+        lote = LoteAutocarga(logger=self.logger)
+        lote.precargar(
+            no_vales=[v.get('noVale', '') for v in vales.values() if v is not None],
+            refs_ordenes=[o.get('Ref_Movimiento', '') for o in ordenes.values()],
+            facturas_seleccionadas=facturas_seleccionadas
+        )
+        # Facturas de los proveedores de las órdenes, para asociarlas por importe en memoria
+        lote.asociacion = IndiceAsociacion.desde_bd(
+            str(o.get('Cuenta', '')) for o in ordenes.values() if str(o.get('Cuenta', '')).isdigit()
+        ) if ordenes else None
+        
         try:
-            from src.bd.models import Factura, Proveedor, Vale, Concepto
-            
-            # Contadores para el reporte
-            contadores = {
-                'proveedores_actualizados': 0,
-                'vales_creados': 0,
-                'vales_asociados': 0,
-                'vales_sin_asociar': 0,
-                'facturas_actualizadas': 0,
-                'errores': 0
-            }
-            
             # Procesar vales
-            for vale_id, vale_data in vales.items():
+            for vale_id, datos_procesados in vales.items():
+                if datos_procesados is None:
+                    contadores['errores'] += 1
+                    continue
                 try:
-                    self._procesar_vale_individual(vale_data, contadores, facturas_seleccionadas)
+                    self._procesar_vale_individual(datos_procesados, contadores, facturas_seleccionadas, lote)
                     
                     # Verificar si el usuario canceló el proceso
                     if contadores.get('cancelado_por_usuario', False):
@@ -749,25 +1131,28 @@ class AutocargaController:
                 # Procesar órdenes
                 for orden_id, orden_data in ordenes.items():
                     try:
-                        self._procesar_orden_individual(orden_data, contadores)
+                        self._procesar_orden_individual(orden_data, contadores, lote)
                     except Exception as e:
                         self.logger.error(f"Error procesando orden {orden_id}: {e}")
                         contadores['errores'] += 1
-            
-            # Mostrar reporte final
-            self._mostrar_reporte_procesamiento(stats, contadores, facturas_seleccionadas)
-            
-        except Exception as e:
-            self.logger.error(f"Error procesando resultados a BD: {e}")
-            self.dialog_utils.show_error("Error procesando resultados", f"Error: {str(e)}")
+        finally:
+            # Lo resuelto hasta aquí se guarda aunque el usuario cancele, como al crear uno por uno
+            lote.insertar(contadores)
     
-    def _actualizar_codigo_proveedor(self, datos_procesados: Dict[str, Any]):
+    def _actualizar_codigo_proveedor(self, datos_procesados: Dict[str, Any], lote: Optional[LoteAutocarga] = None):
         """
         Actualiza el código_quiter del proveedor si no lo tiene y el vale incluye código.
         
         Args:
             datos_procesados: Datos del vale procesados que incluyen proveedor y código
+            lote: Lote de la corrida; cada par (proveedor, código) se revisa una sola vez
         """
+        if lote is not None:
+            clave = (datos_procesados.get('proveedor'), datos_procesados.get('codigo'))
+            if clave in lote.codigos_revisados:
+                return
+            lote.codigos_revisados.add(clave)
+        
         try:
             # Import del modelo Proveedor
             import sys
@@ -835,183 +1220,25 @@ class AutocargaController:
         except Exception as e:
             self.logger.error(f"Error actualizando código del proveedor: {e}")
     
-    def _procesar_vale_individual(self, vale_data: Dict, contadores: Dict, facturas_seleccionadas: List[Dict[str, Any]] = None):
-        """Procesa un vale individual para actualizar la BD"""
+    def _procesar_vale_individual(self, datos_procesados: Dict, contadores: Dict, facturas_seleccionadas: List[Dict[str, Any]] = None,
+                                  lote: Optional[LoteAutocarga] = None):
+        """
+        Procesa un vale individual, ya normalizado con procesar_datos_vale, para actualizar la BD.
+        Con un lote, las consultas se resuelven con los registros precargados y el vale
+        nuevo se agrega al lote en lugar de crearse de inmediato.
+        """
         reporte_content = ""
         try:
-            # Importar funciones de procesamiento
-            try:
-                from ..utils.procesar_datos_vale import procesar_datos_vale
-            except ImportError:
-                from utils.procesar_datos_vale import procesar_datos_vale
-
             import sys
             src_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
             sys.path.insert(0, src_path)
             from src.bd.models import Vale, Factura
 
-            def normalizar_documento(doc):
-                """Normaliza un documento para comparación: elimina espacios y guiones"""
-                return str(doc).replace(' ', '').replace('-', '').strip()
-
-            def extraer_serie_folio(doc):
-                """Extrae serie y folio de un documento en formato 'SERIE-FOLIO' o 'SERIE FOLIO'"""
-                if '-' in doc:
-                    partes = doc.split('-', 1)
-                elif ' ' in doc:
-                    partes = doc.split(' ', 1)
-                else:
-                    return None, None
-                if len(partes) == 2:
-                    return partes[0].strip(), partes[1].strip()
-                return None, None
-
-            def normalizar_folio_para_comparacion(folio_str):
-                """
-                Normaliza un folio para comparación flexible.
-                Extrae la parte principal del folio ignorando prefijos/sufijos.
-                
-                Ejemplos:
-                - 'B1-405721387T1' -> '405721387'
-                - 'TP-B1-405721387T1' -> '405721387' 
-                - '123456' -> '123456'
-                - 'A-123-B' -> '123'
-                """
-                if not folio_str:
-                    return ''
-                
-                # Remover espacios y convertir a string
-                folio_clean = str(folio_str).strip()
-                
-                # Si es solo dígitos, retornar tal como está
-                if folio_clean.isdigit():
-                    return folio_clean
-                
-                # Buscar la secuencia de dígitos más larga
-                import re
-                numeros = re.findall(r'\d+', folio_clean)
-                if numeros:
-                    # Retornar el número más largo encontrado
-                    return max(numeros, key=len)
-                
-                # Si no hay números, retornar el folio normalizado sin guiones
-                return folio_clean.replace('-', '').replace(' ', '')
-
-            def folios_son_equivalentes(folio1, folio2):
-                """
-                Compara dos folios usando normalización flexible.
-                
-                Args:
-                    folio1, folio2: Los folios a comparar
-                    
-                Returns:
-                    bool: True si son equivalentes
-                """
-                if not folio1 or not folio2:
-                    return False
-                
-                # Normalizar ambos folios
-                norm1 = normalizar_folio_para_comparacion(folio1)
-                norm2 = normalizar_folio_para_comparacion(folio2)
-                
-                # Comparar normalizados
-                return norm1 == norm2 and len(norm1) > 0
-
-            def buscar_factura_asociada(no_documento, facturas_seleccionadas, nombre_vale=""):
-                """
-                Busca facturas que coincidan con el número de documento del vale.
-                LÓGICA SIMPLIFICADA: Intenta diferentes estrategias de matching
-                """
-                if not no_documento or not facturas_seleccionadas:
-                    return None, None
-                
-                self.logger.debug(f"🔍 Buscando asociación para vale {nombre_vale}: No Documento '{no_documento}'")
-                self.logger.info(f"📊 DEBUGGING - Total facturas seleccionadas: {len(facturas_seleccionadas)}")
-                
-                for i, factura_data in enumerate(facturas_seleccionadas):
-                    try:
-                        # Obtener datos de la factura
-                        serie_folio = factura_data.get('serie_folio', '')
-                        serie = factura_data.get('serie', '').strip()
-                        folio = str(factura_data.get('folio', '')).strip()
-                        folio_interno = factura_data.get('folio_interno', '')
-                        
-                        # Inicializar variables para extracción
-                        serie_original = serie  # Inicializar con la serie disponible
-                        folio_original = folio  # Inicializar con el folio disponible
-                        
-                        self.logger.debug(f"   🔍 FACTURA {i+1}: serie='{serie}', folio='{folio}', serie_folio='{serie_folio}'")
-                        
-                        # ESTRATEGIA 1: Coincidencia exacta completa
-                        # Comparar no_documento con serie_folio completo
-                        if serie_folio and no_documento in serie_folio:
-                            self.logger.info(f"   ✅ Coincidencia EXACTA en serie_folio: '{no_documento}' está en '{serie_folio}'")
-                            try:
-                                if serie:
-                                    factura_encontrada = Factura.get((Factura.serie == serie) & (Factura.folio == folio))
-                                else:
-                                    factura_encontrada = Factura.get(Factura.folio == folio)
-                                return factura_encontrada, "serie_folio_exacto"
-                            except Exception as e:
-                                self.logger.warning(f"   ❌ Error buscando factura: {e}")
-                                continue
-                        
-                        # ESTRATEGIA 2: Coincidencia por folio solamente
-                        # Comparar no_documento con folio de la factura
-                        if folio and folios_son_equivalentes(no_documento, folio):
-                            self.logger.info(f"   ✅ Coincidencia por FOLIO: '{no_documento}' ≈ '{folio}'")
-                            try:
-                                if serie:
-                                    factura_encontrada = Factura.get((Factura.serie == serie) & (Factura.folio == folio))
-                                else:
-                                    factura_encontrada = Factura.get(Factura.folio == folio)
-                                return factura_encontrada, "folio_equivalente"
-                            except Exception as e:
-                                self.logger.warning(f"   ❌ Error buscando factura: {e}")
-                                continue
-                        
-                        # ESTRATEGIA 3: Buscar por núcleo numérico
-                        # Extraer números y comparar
-                        no_doc_numerico = normalizar_folio_para_comparacion(no_documento)
-                        folio_numerico = normalizar_folio_para_comparacion(folio)
-                        
-                        if no_doc_numerico and folio_numerico and no_doc_numerico == folio_numerico:
-                            self.logger.info(f"   ✅ Coincidencia NUMÉRICA: '{no_doc_numerico}' (de '{no_documento}') = '{folio_numerico}' (de '{folio}')")
-                            try:
-                                if serie:
-                                    factura_encontrada = Factura.get((Factura.serie == serie) & (Factura.folio == folio))
-                                else:
-                                    factura_encontrada = Factura.get(Factura.folio == folio)
-                                return factura_encontrada, "numerico_equivalente"
-                            except Exception as e:
-                                self.logger.warning(f"   ❌ Error buscando factura: {e}")
-                                continue
-                        
-                        # Si no tenemos serie y folio directamente, extraerlos del folio_xml
-                        if not serie_original or not folio_original:
-                            folio_xml = factura_data.get('folio_xml', '')
-                            self.logger.debug(f"   🔄 Extrayendo de folio_xml: '{folio_xml}'")
-                            if folio_xml and ' ' in folio_xml:
-                                partes = folio_xml.split(' ', 1)
-                                if len(partes) == 2:
-                                    serie_original = partes[0].strip()
-                                    try:
-                                        folio_original = int(partes[1].strip())
-                                    except ValueError:
-                                        folio_original = partes[1].strip()
-                                    self.logger.debug(f"   ✅ Extraído: serie='{serie_original}', folio='{folio_original}'")
-                        self.logger.debug(f"   ❌ Sin coincidencia: '{no_documento}' vs '{serie_folio}' (Serie: '{serie}', Folio: '{folio}')")
-                    
-                    except Exception as e:
-                        self.logger.warning(f"   ❌ Error procesando factura {i}: {e}")
-                        continue
-                
-                self.logger.info(f"   ⚠️ No se encontró coincidencia para No Documento '{no_documento}' entre {len(facturas_seleccionadas)} facturas")
-                return None, None
-
-            datos_procesados = procesar_datos_vale(vale_data)
+            if lote is not None and lote.vale_pendiente(datos_procesados['noVale']):
+                self.logger.info(f"Vale {datos_procesados['noVale']} repetido en esta autocarga, se omite")
+                return
             try:
-                vale_existente = Vale.get(Vale.noVale == datos_procesados['noVale'])
+                vale_existente = self._obtener_vale_existente(datos_procesados['noVale'], lote)
                 self.logger.info(f"Vale {datos_procesados['noVale']} ya existe en BD")
                 
                 # Verificar de manera segura si el vale tiene factura asociada
@@ -1021,7 +1248,13 @@ class AutocargaController:
                 if tiene_factura:
                     try:
                         # Intentar acceder a la factura para verificar que existe
-                        _ = vale_existente.factura
+                        if lote is not None:
+                            factura_actual = lote.factura_de_vale(vale_existente)
+                            if factura_actual is None:
+                                raise Factura.DoesNotExist()
+                            vale_existente.factura = factura_actual
+                        else:
+                            _ = vale_existente.factura
                         factura_valida = True
                     except Factura.DoesNotExist:
                         # La factura referenciada no existe, tratar como si no tuviera factura
@@ -1034,7 +1267,7 @@ class AutocargaController:
                 if facturas_seleccionadas and not tiene_factura:
                     self.logger.info(f"🔄 Vale {datos_procesados['noVale']} existe pero SIN ASOCIAR - intentando asociar con facturas seleccionadas")
                     no_documento = datos_procesados.get('noDocumento', '').strip()
-                    factura_asociada, tipo_coincidencia = buscar_factura_asociada(no_documento, facturas_seleccionadas, datos_procesados['noVale'])
+                    factura_asociada, tipo_coincidencia = self._buscar_factura_asociada(no_documento, facturas_seleccionadas, datos_procesados['noVale'], lote)
                     if factura_asociada:
                         try:
                             vale_existente.factura = factura_asociada
@@ -1107,13 +1340,13 @@ class AutocargaController:
                                 self.logger.info(f"ℹ️ No hay facturas del proveedor '{nombre_proveedor}' disponibles para asociación manual")
                 elif facturas_seleccionadas and tiene_factura and factura_valida:
                     self.logger.info(f"✅ Vale {datos_procesados['noVale']} ya existe y YA ESTÁ ASOCIADO con {vale_existente.factura.serie}-{vale_existente.factura.folio}")
-                self._actualizar_codigo_proveedor(datos_procesados)
+                self._actualizar_codigo_proveedor(datos_procesados, lote)
                 return
             except Vale.DoesNotExist:
                 pass
             no_documento = datos_procesados.get('noDocumento', '').strip()
             self.logger.debug(f"🔄 Procesando vale: {datos_procesados.get('noVale', 'SIN_NUMERO')}, No Documento: '{no_documento}'")
-            factura_asociada, tipo_coincidencia = buscar_factura_asociada(no_documento, facturas_seleccionadas, datos_procesados['noVale'])
+            factura_asociada, tipo_coincidencia = self._buscar_factura_asociada(no_documento, facturas_seleccionadas, datos_procesados['noVale'], lote)
             
             if factura_asociada:
                 self.logger.info(f"✅ Vale {datos_procesados['noVale']} será asociado con factura {factura_asociada.serie}-{factura_asociada.folio} (tipo: {tipo_coincidencia})")
@@ -1185,10 +1418,10 @@ class AutocargaController:
             # Crear y guardar el vale
             try:
                 # Actualizar proveedor con código si no lo tiene
-                self._actualizar_codigo_proveedor(datos_procesados)
+                self._actualizar_codigo_proveedor(datos_procesados, lote)
                 
-                # Crear el vale con los campos correctos del modelo
-                nuevo_vale = Vale.create(
+                # Campos del vale según el modelo
+                campos_vale = dict(
                     noVale=datos_procesados['noVale'],
                     tipo=datos_procesados.get('tipo', ''),
                     noDocumento=datos_procesados.get('noDocumento', ''),
@@ -1203,9 +1436,16 @@ class AutocargaController:
                     responsable=datos_procesados.get('responsable'),
                     proveedor=datos_procesados.get('proveedor', ''),
                     codigo=datos_procesados.get('codigo', ''),
-                    factura=factura_asociada  # Asociar con la factura encontrada (puede ser None)
                 )
                 
+                if lote is not None:
+                    # Se inserta con el resto del lote; los contadores se actualizan al insertar
+                    lote.agregar_vale(campos_vale, factura_asociada)
+                    return
+                
+                # Crear el vale asociado con la factura encontrada (puede ser None)
+                nuevo_vale = Vale.create(**campos_vale, factura=factura_asociada)
+                
                 if factura_asociada:
                     contadores['vales_asociados'] += 1
                     self.logger.info(f"✅ Vale {datos_procesados['noVale']} CREADO y ASOCIADO con factura {factura_asociada.serie}-{factura_asociada.folio}")
@@ -1225,50 +1465,156 @@ class AutocargaController:
             self.logger.error(traceback.format_exc())
             contadores['errores'] += 1
 
-    def _buscar_factura_por_asociacion_inteligente(self, orden_data):
+    def _buscar_factura_asociada(self, no_documento, facturas_seleccionadas, nombre_vale="", lote=None):
+        """
+        Busca facturas que coincidan con el número de documento del vale.
+        LÓGICA SIMPLIFICADA: Intenta diferentes estrategias de matching
+        Con un lote, las facturas se toman de las precargadas en lugar de consultar la BD.
+        """
+        if not no_documento or not facturas_seleccionadas:
+            return None, None
+
+        self.logger.debug(f"🔍 Buscando asociación para vale {nombre_vale}: No Documento '{no_documento}'")
+        self.logger.info(f"📊 DEBUGGING - Total facturas seleccionadas: {len(facturas_seleccionadas)}")
+
+        for i, factura_data in enumerate(facturas_seleccionadas):
+            try:
+                # Obtener datos de la factura
+                serie_folio = factura_data.get('serie_folio', '')
+                serie = factura_data.get('serie', '').strip()
+                folio = str(factura_data.get('folio', '')).strip()
+                folio_interno = factura_data.get('folio_interno', '')
+
+                # Inicializar variables para extracción
+                serie_original = serie  # Inicializar con la serie disponible
+                folio_original = folio  # Inicializar con el folio disponible
+
+                self.logger.debug(f"   🔍 FACTURA {i+1}: serie='{serie}', folio='{folio}', serie_folio='{serie_folio}'")
+
+                # ESTRATEGIA 1: Coincidencia exacta completa
+                # Comparar no_documento con serie_folio completo
+                if serie_folio and no_documento in serie_folio:
+                    self.logger.info(f"   ✅ Coincidencia EXACTA en serie_folio: '{no_documento}' está en '{serie_folio}'")
+                    try:
+                        factura_encontrada = self._obtener_factura(serie, folio, lote)
+                        return factura_encontrada, "serie_folio_exacto"
+                    except Exception as e:
+                        self.logger.warning(f"   ❌ Error buscando factura: {e}")
+                        continue
+
+                # ESTRATEGIA 2: Coincidencia por folio solamente
+                # Comparar no_documento con folio de la factura
+                if folio and folios_son_equivalentes(no_documento, folio):
+                    self.logger.info(f"   ✅ Coincidencia por FOLIO: '{no_documento}' ≈ '{folio}'")
+                    try:
+                        factura_encontrada = self._obtener_factura(serie, folio, lote)
+                        return factura_encontrada, "folio_equivalente"
+                    except Exception as e:
+                        self.logger.warning(f"   ❌ Error buscando factura: {e}")
+                        continue
+
+                # ESTRATEGIA 3: Buscar por núcleo numérico
+                # Extraer números y comparar
+                no_doc_numerico = normalizar_folio_para_comparacion(no_documento)
+                folio_numerico = normalizar_folio_para_comparacion(folio)
+
+                if no_doc_numerico and folio_numerico and no_doc_numerico == folio_numerico:
+                    self.logger.info(f"   ✅ Coincidencia NUMÉRICA: '{no_doc_numerico}' (de '{no_documento}') = '{folio_numerico}' (de '{folio}')")
+                    try:
+                        factura_encontrada = self._obtener_factura(serie, folio, lote)
+                        return factura_encontrada, "numerico_equivalente"
+                    except Exception as e:
+                        self.logger.warning(f"   ❌ Error buscando factura: {e}")
+                        continue
+
+                # Si no tenemos serie y folio directamente, extraerlos del folio_xml
+                if not serie_original or not folio_original:
+                    folio_xml = factura_data.get('folio_xml', '')
+                    self.logger.debug(f"   🔄 Extrayendo de folio_xml: '{folio_xml}'")
+                    if folio_xml and ' ' in folio_xml:
+                        partes = folio_xml.split(' ', 1)
+                        if len(partes) == 2:
+                            serie_original = partes[0].strip()
+                            try:
+                                folio_original = int(partes[1].strip())
+                            except ValueError:
+                                folio_original = partes[1].strip()
+                            self.logger.debug(f"   ✅ Extraído: serie='{serie_original}', folio='{folio_original}'")
+                self.logger.debug(f"   ❌ Sin coincidencia: '{no_documento}' vs '{serie_folio}' (Serie: '{serie}', Folio: '{folio}')")
+
+            except Exception as e:
+                self.logger.warning(f"   ❌ Error procesando factura {i}: {e}")
+                continue
+
+        self.logger.info(f"   ⚠️ No se encontró coincidencia para No Documento '{no_documento}' entre {len(facturas_seleccionadas)} facturas")
+        return None, None
+
+    def _obtener_vale_existente(self, no_vale, lote=None):
+        """
+        Obtiene un vale registrado por su número, del lote precargado si se proporciona o de la BD.
+        
+        Raises:
+            Vale.DoesNotExist: Si no existe
+        """
+        from src.bd.models import Vale
+        if lote is not None:
+            vale = lote.buscar_vale(no_vale)
+            if vale is None:
+                raise Vale.DoesNotExist()
+            return vale
+        return Vale.get(Vale.noVale == no_vale)
+
+    def _obtener_factura(self, serie, folio, lote=None):
+        """
+        Obtiene una factura por serie y folio (solo folio si no hay serie), del lote
+        precargado si se proporciona o de la BD.
+        
+        Raises:
+            Factura.DoesNotExist: Si no existe
+        """
+        if lote is not None:
+            return lote.buscar_factura(serie, folio)
+        from src.bd.models import Factura
+        if serie:
+            return Factura.get((Factura.serie == serie) & (Factura.folio == folio))
+        return Factura.get(Factura.folio == folio)
+
+    def _buscar_factura_por_asociacion_inteligente(self, orden_data, indice: Optional[IndiceAsociacion] = None):
         """
         Busca facturas usando cuenta -> proveedor -> factura por importe
         Estrategia simplificada: cuenta=codigo_quiter, luego match por proveedor+importe
+        
+        Args:
+            orden_data (Dict): Datos con 'cuenta' e 'importe_total'
+            indice (IndiceAsociacion): Índice precargado de la corrida (si no se
+                proporciona, se precargan solo las facturas de esta cuenta)
         """
-        try:
-            from src.bd.models import Factura, Proveedor
-        except ImportError:
-            from src.bd.models import Factura, Proveedor
-            
         try:
             cuenta = orden_data.get('cuenta')
-            fecha = orden_data.get('fecha')
             importe = orden_data.get('importe_total')
             
             if not cuenta or not importe:
                 self.logger.info(f"❌ Faltan datos: cuenta={cuenta}, importe={importe}")
                 return None
-                
-            # Buscar proveedor por codigo_quiter = cuenta
-            proveedor = Proveedor.get_or_none(Proveedor.codigo_quiter == cuenta)
+            
+            if indice is None:
+                indice = IndiceAsociacion.desde_bd([cuenta])
+            
+            # Proveedor por codigo_quiter = cuenta y facturas con importe similar (tolerancia 5%)
+            proveedor, factura, candidatas = indice.buscar_por_cuenta(cuenta, importe)
             if not proveedor:
                 self.logger.info(f"❌ No se encontró proveedor con codigo_quiter: {cuenta}")
                 return None
                 
             self.logger.info(f"✅ Proveedor encontrado: {proveedor.nombre} (codigo_quiter: {cuenta})")
-                
-            # Buscar facturas del proveedor con el importe similar (tolerancia 5%)
-            facturas = Factura.select().where(
-                Factura.proveedor == proveedor,
-                (Factura.total >= importe * 0.95) & (Factura.total <= importe * 1.05)
-            )
-            
-            count = facturas.count()
-            self.logger.info(f"🔍 Facturas encontradas con importe similar: {count}")
+            self.logger.info(f"🔍 Facturas encontradas con importe similar: {len(candidatas)}")
             
-            if count == 1:
-                factura = facturas.first()
+            if len(candidatas) == 1:
                 self.logger.info(f"✅ Factura única encontrada: {factura.serie}-{factura.folio} (${factura.total})")
                 return factura
-            elif count > 1:
-                # Si hay múltiples, tomar la primera (podríamos usar fecha como criterio adicional)
-                factura = facturas.first()
-                self.logger.info(f"⚠️ Múltiples facturas encontradas, tomando la primera: {factura.serie}-{factura.folio}")
+            elif candidatas:
+                # Si hay múltiples, tomar la de importe más cercano
+                self.logger.info(f"⚠️ Múltiples facturas encontradas, tomando la de importe más cercano: {factura.serie}-{factura.folio}")
                 return factura
             else:
                 self.logger.info(f"❌ No se encontraron facturas del proveedor {proveedor.nombre} con importe ~${importe}")
@@ -1422,13 +1768,14 @@ class AutocargaController:
             import traceback
             self.logger.error(f"Traceback: {traceback.format_exc()}")
 
-    def _buscar_proveedor_para_cuenta_mayor(self, cuenta, nombre_proveedor):
+    def _buscar_proveedor_para_cuenta_mayor(self, cuenta, nombre_proveedor, indice: Optional[IndiceAsociacion] = None):
         """
         Busca un proveedor para actualizar su cuenta mayor cuando no hay factura asociada.
         
         Args:
             cuenta (int): Código de cuenta del proveedor
             nombre_proveedor (str): Nombre del proveedor de la orden
+            indice (IndiceAsociacion): Índice precargado con los proveedores de las cuentas de la corrida
             
         Returns:
             Proveedor: Instancia del proveedor encontrado o None
@@ -1440,7 +1787,10 @@ class AutocargaController:
             
             # Estrategia 1: Buscar por codigo_quiter
             if cuenta:
-                proveedor = Proveedor.get_or_none(Proveedor.codigo_quiter == cuenta)
+                if indice is not None:
+                    proveedor = indice.proveedor_por_cuenta(cuenta)
+                else:
+                    proveedor = Proveedor.get_or_none(Proveedor.codigo_quiter == cuenta)
                 if proveedor:
                     self.logger.info(f"✅ Proveedor encontrado por codigo_quiter {cuenta}: ID={proveedor.id} nombre='{proveedor.nombre or proveedor.nombre_en_quiter}'")
                     return proveedor
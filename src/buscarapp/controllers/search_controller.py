@@ -3,37 +3,61 @@ Controlador para la lógica de búsqueda y filtros
 """
 import sys
 import os
-from typing import List, Dict, Any, Optional
+import dataclasses
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 import logging
 import traceback
 
+import numpy as np
+
 # Agregar path para imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 
 try:
-    from ..models.search_models import SearchFilters, SearchState, FacturaData
-    from src.bd.models import Factura, Proveedor, Vale
+    from ..models.search_models import SearchFilters, SearchState, SearchPage, FacturaData
+    from ..models.search_index import SearchIndex, fold_text
+    from src.bd.models import Factura, Proveedor, Vale, Concepto
 except ImportError:
-    from models.search_models import SearchFilters, SearchState, FacturaData
+    from models.search_models import SearchFilters, SearchState, SearchPage, FacturaData
+    from models.search_index import SearchIndex, fold_text
     # Fallback import para Vale
     sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'src'))
     try:
-        from src.bd.models import Factura, Proveedor, Vale
+        from src.bd.models import Factura, Proveedor, Vale, Concepto
     except ImportError:
         # Último fallback
         sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        from src.bd.models import Factura, Proveedor, Vale
+        from src.bd.models import Factura, Proveedor, Vale, Concepto
 
 
 class SearchController:
     """Controlador que maneja la lógica de búsqueda y filtros"""
     
-    def __init__(self, bd_control=None):
+    # Filas por página en la búsqueda en el servidor
+    DEFAULT_PAGE_SIZE = 500
+    
+    # Combinaciones de filtros recientes cuyos resultados se conservan (búsqueda mientras se escribe)
+    RESULT_CACHE_SIZE = 8
+    
+    def __init__(self, bd_control=None, server_side: bool = False, page_size: int = DEFAULT_PAGE_SIZE):
+        """
+        Args:
+            bd_control: Gestor de base de datos (None si no hay conexión)
+            server_side: Filtrar y paginar en la base de datos en lugar de cargar
+                todas las facturas en memoria
+            page_size: Filas por página en la búsqueda en el servidor
+        """
         self.bd_control = bd_control
-        self.state = SearchState()
+        self.state = SearchState(server_side=server_side)
+        self.page_size = page_size
         self.logger = logging.getLogger(__name__)
+        # Índice columnar de state.all_facturas (se reconstruye en cada load_facturas)
+        self._search_index: Optional[SearchIndex] = None
+        # Resultados (posiciones en el índice) de las últimas combinaciones de filtros
+        self._result_cache: "OrderedDict[tuple, Tuple[SearchFilters, np.ndarray]]" = OrderedDict()
     
     def load_facturas(self) -> bool:
         """
@@ -49,6 +73,7 @@ class SearchController:
                 self.logger.warning("Base de datos no disponible")
                 self.state.database_available = False
                 self.state.all_facturas.clear()
+                self._search_index = None
                 return False
             
             # Verificar si hay facturas en la base de datos
@@ -57,52 +82,30 @@ class SearchController:
                 self.logger.info("No hay facturas en la base de datos")
                 self.state.database_available = True
                 self.state.all_facturas.clear()
+                self._search_index = None
+                self.state.server_total_facturas = 0
                 return True
             
-            # Consultar todas las facturas con información del proveedor
-            facturas_query = (Factura
-                            .select()
-                            .join(Proveedor, on=(Factura.proveedor == Proveedor.id))
-                            .order_by(Factura.fecha.desc()))
+            # Búsqueda en el servidor: no se cargan las facturas, cada búsqueda trae su página
+            if self.state.server_side:
+                self.state.all_facturas.clear()
+                self._search_index = None
+                self.state.server_total_facturas = facturas_count
+                self.state.database_available = True
+                self.state.clear_results()
+                self.logger.info(f"Búsqueda en el servidor - {facturas_count} facturas disponibles")
+                return True
             
-            facturas_data = []
-            for factura in facturas_query:
-                # Obtener el vale asociado si existe
-                vale_asociado = None
-                try:
-                    # Buscar vale por factura_id usando el modelo correcto
-                    vale_asociado = Vale.get(Vale.factura_id == factura.folio_interno)
-                except Vale.DoesNotExist:
-                    vale_asociado = None
-                except Exception as e:
-                    self.logger.debug(f"Error buscando vale para factura {factura.folio_interno}: {e}")
-                    vale_asociado = None
-                
-                factura_data = FacturaData(
-                    folio_interno=str(factura.folio_interno),
-                    tipo=factura.tipo,
-                    no_vale=str(vale_asociado.noVale) if vale_asociado else "",
-                    fecha=self._format_date_for_display(factura.fecha),
-                    folio_xml=f"{factura.serie or ''} {factura.folio or ''}".strip(),
-                    serie=factura.serie,
-                    folio=factura.folio,
-                    nombre_emisor=factura.nombre_emisor,
-                    rfc_emisor=factura.rfc_emisor,
-                    conceptos=self._format_conceptos(factura.conceptos),
-                    total=float(factura.total) if factura.total else 0.0,
-                    subtotal=float(factura.subtotal) if factura.subtotal else 0.0,
-                    iva_trasladado=float(factura.iva_trasladado) if factura.iva_trasladado else 0.0,
-                    ret_iva=float(factura.ret_iva) if factura.ret_iva else 0.0,
-                    ret_isr=float(factura.ret_isr) if factura.ret_isr else 0.0,
-                    clase=factura.clase,
-                    departamento=factura.departamento,  # AGREGADO: Campo departamento
-                    cargada=bool(factura.cargada),
-                    pagada=bool(factura.pagada),
-                    comentario=factura.comentario
-                )
-                facturas_data.append(factura_data.to_dict())
+            # Una sola consulta: facturas con su proveedor y el vale asociado (LEFT JOIN),
+            # más una consulta con los conceptos de todas las facturas
+            facturas_query = self._build_facturas_query().order_by(Factura.fecha.desc())
+            conceptos_por_factura = self._load_conceptos_por_factura()
+            
+            facturas_data = [self._row_to_factura_dict(factura, conceptos_por_factura)
+                             for factura in facturas_query]
             
             self.state.all_facturas = facturas_data
+            self._build_search_index()
             self.state.database_available = True
             self.state.clear_results()  # Iniciar con tabla vacía
             
@@ -114,8 +117,110 @@ class SearchController:
             traceback.print_exc()
             self.state.database_available = False
             self.state.all_facturas.clear()
+            self._search_index = None
             return False
     
+    def _build_search_index(self) -> None:
+        """Construye el índice columnar de state.all_facturas (sin índice se filtra fila por fila)"""
+        try:
+            self._search_index = SearchIndex(self.state.all_facturas, self._normalize_date)
+        except Exception as e:
+            self.logger.warning(f"No se pudo construir el índice de búsqueda: {e}")
+            self._search_index = None
+        self._result_cache.clear()
+    
+    def _filter_indices(self, filters: SearchFilters) -> Optional[np.ndarray]:
+        """
+        Resuelve los filtros con el índice, reutilizando búsquedas recientes: una
+        combinación repetida sale del caché y una que refina a otra anterior (p. ej.
+        una letra más en el texto de búsqueda) solo revisa los resultados de aquella
+        
+        Args:
+            filters: Filtros a aplicar
+            
+        Returns:
+            np.ndarray: Posiciones de las facturas; None si el índice no los puede resolver
+        """
+        if self._search_index is None:
+            return None
+        
+        key = dataclasses.astuple(filters)
+        cached = self._result_cache.get(key)
+        if cached is not None:
+            self._result_cache.move_to_end(key)
+            return cached[1]
+        
+        # La búsqueda anterior más pequeña de la que esta es un refinamiento
+        candidates = None
+        for base_filters, base_indices in self._result_cache.values():
+            if (candidates is None or base_indices.size < candidates.size) \
+                    and SearchIndex.refines(filters, base_filters):
+                candidates = base_indices
+        
+        indices = self._search_index.filter(filters, candidates)
+        if indices is not None:
+            self._result_cache[key] = (dataclasses.replace(filters), indices)
+            if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+        return indices
+    
+    def _build_facturas_query(self):
+        """
+        Consulta base del listado: facturas con su proveedor (INNER JOIN) y el vale
+        asociado (LEFT JOIN), solo con las columnas que usa FacturaData
+        
+        Returns:
+            Consulta de peewee que devuelve diccionarios
+        """
+        from peewee import JOIN
+        return (Factura
+                .select(Factura.folio_interno, Factura.tipo, Factura.fecha, Factura.serie,
+                        Factura.folio, Factura.nombre_emisor, Factura.rfc_emisor,
+                        Factura.total, Factura.subtotal, Factura.iva_trasladado,
+                        Factura.ret_iva, Factura.ret_isr, Factura.clase, Factura.departamento,
+                        Factura.cargada, Factura.pagada, Factura.comentario,
+                        Vale.noVale.alias('no_vale'))
+                .join(Proveedor, on=(Factura.proveedor == Proveedor.id))
+                .switch(Factura)
+                .join(Vale, JOIN.LEFT_OUTER, on=(Vale.factura == Factura.folio_interno))
+                .dicts())
+    
+    def _row_to_factura_dict(self, factura: Dict[str, Any],
+                             conceptos_por_factura: Dict[int, List[str]]) -> Dict[str, Any]:
+        """
+        Convierte una fila de _build_facturas_query al diccionario de la tabla
+        
+        Args:
+            factura: Fila de la consulta
+            conceptos_por_factura: Descripciones de conceptos por folio_interno
+            
+        Returns:
+            Dict[str, Any]: Datos de FacturaData.to_dict
+        """
+        no_vale = factura['no_vale']
+        return FacturaData(
+            folio_interno=str(factura['folio_interno']),
+            tipo=factura['tipo'],
+            no_vale=str(no_vale) if no_vale is not None else "",
+            fecha=self._format_date_for_display(factura['fecha']),
+            folio_xml=f"{factura['serie'] or ''} {factura['folio'] or ''}".strip(),
+            serie=factura['serie'],
+            folio=factura['folio'],
+            nombre_emisor=factura['nombre_emisor'],
+            rfc_emisor=factura['rfc_emisor'],
+            conceptos=self._format_descripciones(conceptos_por_factura.get(factura['folio_interno'], ())),
+            total=float(factura['total']) if factura['total'] else 0.0,
+            subtotal=float(factura['subtotal']) if factura['subtotal'] else 0.0,
+            iva_trasladado=float(factura['iva_trasladado']) if factura['iva_trasladado'] else 0.0,
+            ret_iva=float(factura['ret_iva']) if factura['ret_iva'] else 0.0,
+            ret_isr=float(factura['ret_isr']) if factura['ret_isr'] else 0.0,
+            clase=factura['clase'],
+            departamento=factura['departamento'],  # AGREGADO: Campo departamento
+            cargada=bool(factura['cargada']),
+            pagada=bool(factura['pagada']),
+            comentario=factura['comentario']
+        ).to_dict()
+    
     def load_proveedores(self) -> bool:
         """
         Carga la lista de proveedores para los filtros
@@ -168,6 +273,9 @@ class SearchController:
         Returns:
             List[Dict[str, Any]]: Lista de facturas filtradas
         """
+        if self.state.server_side:
+            return self.apply_filters_server_side(filters)
+        
         try:
             if not filters.has_active_filters():
                 self.logger.info("No hay filtros activos - mostrando todas las facturas")
@@ -175,11 +283,12 @@ class SearchController:
                 return self.state.filtered_facturas
             
             self.logger.info("Aplicando filtros...")
-            filtered_data = []
-            
-            for i, factura in enumerate(self.state.all_facturas):
-                if self._factura_matches_filters(factura, filters):
-                    filtered_data.append(factura)
+            indices = self._filter_indices(filters)
+            if indices is not None:
+                filtered_data = self._search_index.rows(indices)
+            else:
+                filtered_data = [factura for factura in self.state.all_facturas
+                                 if self._factura_matches_filters(factura, filters)]
             
             self.state.set_filtered_results(filtered_data)
             self.logger.info(f"Filtros aplicados - {len(filtered_data)} resultados de {len(self.state.all_facturas)} totales")
@@ -191,6 +300,168 @@ class SearchController:
             traceback.print_exc()
             return []
     
+    def apply_filters_server_side(self, filters: SearchFilters) -> List[Dict[str, Any]]:
+        """
+        Aplica los filtros en la base de datos y trae solo la primera página
+        
+        Args:
+            filters: Filtros a aplicar
+            
+        Returns:
+            List[Dict[str, Any]]: Facturas de la primera página
+        """
+        try:
+            page = self.search_page(filters)
+            self.state.set_filtered_results(page.facturas)
+            self.state.server_match_count = page.total_count
+            self.state.current_filters = filters
+            self.state.next_cursor = page.next_cursor
+            self.logger.info(f"Filtros aplicados en el servidor - {len(page.facturas)} de "
+                             f"{page.total_count} resultados")
+            return self.state.filtered_facturas
+            
+        except Exception as e:
+            self.logger.error(f"Error aplicando filtros en el servidor: {e}")
+            traceback.print_exc()
+            return []
+    
+    def load_next_page(self) -> List[Dict[str, Any]]:
+        """
+        Trae la siguiente página de la búsqueda en el servidor y la agrega a los resultados
+        
+        Returns:
+            List[Dict[str, Any]]: Facturas de la nueva página (vacía si no hay más)
+        """
+        if not self.state.has_more_results():
+            return []
+        try:
+            page = self.search_page(self.state.current_filters or SearchFilters(),
+                                    cursor=self.state.next_cursor, with_count=False)
+            self.state.filtered_facturas.extend(page.facturas)
+            self.state.next_cursor = page.next_cursor
+            return page.facturas
+            
+        except Exception as e:
+            self.logger.error(f"Error cargando la siguiente página: {e}")
+            traceback.print_exc()
+            return []
+    
+    def search_page(self, filters: SearchFilters, cursor: Optional[Tuple[Any, int]] = None,
+                    page_size: Optional[int] = None, with_count: bool = True) -> SearchPage:
+        """
+        Trae una página de facturas filtradas en la base de datos, ordenadas por fecha
+        y folio interno descendentes. La paginación es por llave (keyset): la página
+        siguiente empieza después de la última fila de la anterior, sin OFFSET.
+        
+        Args:
+            filters: Filtros a aplicar
+            cursor: (fecha, folio_interno) de la última fila de la página anterior
+                (None para la primera página)
+            page_size: Filas por página (default: self.page_size)
+            with_count: Si también se cuenta el total de resultados
+            
+        Returns:
+            SearchPage: Facturas de la página, total de resultados y cursor de la siguiente
+        """
+        page_size = page_size or self.page_size
+        query = self._build_facturas_query()
+        conditions = self._build_filter_conditions(filters)
+        if conditions:
+            query = query.where(*conditions)
+        
+        total_count = query.count() if with_count else 0
+        
+        if cursor is not None:
+            fecha, folio_interno = cursor
+            query = query.where((Factura.fecha < fecha) |
+                                ((Factura.fecha == fecha) & (Factura.folio_interno < folio_interno)))
+        rows = list(query
+                    .order_by(Factura.fecha.desc(), Factura.folio_interno.desc())
+                    .limit(page_size + 1))
+        
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1]['fecha'], rows[-1]['folio_interno'])
+        
+        conceptos_por_factura = self._load_conceptos_por_factura([row['folio_interno'] for row in rows])
+        facturas = [self._row_to_factura_dict(row, conceptos_por_factura) for row in rows]
+        return SearchPage(facturas=facturas, total_count=total_count, next_cursor=next_cursor)
+    
+    def _build_filter_conditions(self, filters: SearchFilters) -> list:
+        """
+        Traduce los filtros a condiciones WHERE, con el mismo criterio que
+        _factura_matches_filters: los textos se buscan como subcadena sin
+        distinguir mayúsculas. La búsqueda libre se hace campo por campo (una
+        coincidencia que cruce dos campos ya no cuenta) y en los conceptos revisa
+        cada descripción completa, no el texto recortado de la tabla.
+        
+        Args:
+            filters: Filtros a traducir
+            
+        Returns:
+            list: Condiciones de peewee (se combinan con AND)
+        """
+        from datetime import datetime
+        from peewee import Cast, SQL, fn
+        
+        conditions = []
+        
+        # Filtros de fecha (las fechas que no se pueden interpretar se ignoran)
+        for valor, es_inicial in ((filters.fecha_inicial, True), (filters.fecha_final, False)):
+            if not valor:
+                continue
+            try:
+                fecha = datetime.strptime(self._normalize_date(valor), '%Y-%m-%d').date()
+            except ValueError:
+                self.logger.warning(f"Fecha de filtro no válida, se ignora: {valor}")
+                continue
+            conditions.append(Factura.fecha >= fecha if es_inicial else Factura.fecha <= fecha)
+        
+        # Filtro por tipo
+        if filters.tipo_filtro:
+            tipo_codigo = filters.tipo_filtro.split(' - ')[0] if ' - ' in filters.tipo_filtro else filters.tipo_filtro
+            conditions.append(Factura.tipo == tipo_codigo)
+        
+        # Filtro por proveedor
+        if filters.proveedor_filtro:
+            conditions.append(Factura.nombre_emisor.contains(filters.proveedor_filtro))
+        
+        # Filtro por número de vale, folio interno o serie-folio
+        if filters.no_vale_filtro:
+            valor = filters.no_vale_filtro
+            serie_folio = Factura.serie.concat(' ').concat(Factura.folio)
+            conditions.append(Vale.noVale.contains(valor) |
+                              Cast(Factura.folio_interno, 'TEXT').contains(valor) |
+                              serie_folio.contains(valor) |
+                              Factura.folio.contains(valor))
+        
+        # Filtro por clase
+        if filters.clase_filtro:
+            conditions.append(Factura.clase.contains(filters.clase_filtro))
+        
+        # Filtros Solo Cargado / Solo Pagado
+        if filters.solo_cargado:
+            conditions.append(Factura.cargada == True)
+        if filters.solo_pagado:
+            conditions.append(Factura.pagada == True)
+        
+        # Filtro de búsqueda de texto
+        if filters.texto_busqueda:
+            texto = filters.texto_busqueda
+            en_conceptos = fn.EXISTS(Concepto
+                                     .select(SQL('1'))
+                                     .where((Concepto.factura == Factura.folio_interno) &
+                                            Concepto.descripcion.contains(texto)))
+            conditions.append(Cast(Factura.folio_interno, 'TEXT').contains(texto) |
+                              Factura.serie.concat(' ').concat(Factura.folio).contains(texto) |
+                              Factura.tipo.contains(texto) |
+                              Factura.nombre_emisor.contains(texto) |
+                              Factura.rfc_emisor.contains(texto) |
+                              en_conceptos)
+        
+        return conditions
+    
     def _factura_matches_filters(self, factura: Dict[str, Any], filters: SearchFilters) -> bool:
         """
         Verifica si una factura cumple con los filtros
@@ -224,8 +495,8 @@ class SearchController:
         
         # Filtro por proveedor
         if filters.proveedor_filtro:
-            emisor = factura.get('nombre_emisor', '').lower()
-            if filters.proveedor_filtro.lower() not in emisor:
+            emisor = fold_text(factura.get('nombre_emisor', ''))
+            if fold_text(filters.proveedor_filtro) not in emisor:
                 return False
         
         # Filtro por número de vale
@@ -243,8 +514,8 @@ class SearchController:
         
         # Filtro por clase
         if filters.clase_filtro:
-            clase_factura = str(factura.get('clase', '')).lower()
-            if filters.clase_filtro.lower() not in clase_factura:
+            clase_factura = fold_text(str(factura.get('clase', '')))
+            if fold_text(filters.clase_filtro) not in clase_factura:
                 return False
         
         # Filtro Solo Cargado
@@ -267,28 +538,50 @@ class SearchController:
                 str(factura.get("conceptos", "")),
                 str(factura.get("rfc_emisor", "")),
                 str(factura.get("rfc_receptor", ""))
-            ]).lower()
+            ])
             
-            if filters.texto_busqueda.lower() not in searchable_text:
+            if fold_text(filters.texto_busqueda) not in fold_text(searchable_text):
                 return False
         
         return True
     
+    def _load_conceptos_por_factura(self, folios: Optional[List[int]] = None) -> Dict[int, List[str]]:
+        """
+        Carga las descripciones de los conceptos en una sola consulta
+        
+        Args:
+            folios: Folios internos de las facturas (None para todas)
+        
+        Returns:
+            Dict[int, List[str]]: Descripciones por folio_interno, en el orden de captura
+        """
+        conceptos_por_factura: Dict[int, List[str]] = {}
+        if folios is not None and not folios:
+            return conceptos_por_factura
+        consulta = (Concepto
+                    .select(Concepto.factura, Concepto.descripcion)
+                    .order_by(Concepto.factura, Concepto.id)
+                    .tuples())
+        if folios is not None:
+            consulta = consulta.where(Concepto.factura.in_(folios))
+        for factura_id, descripcion in consulta:
+            conceptos_por_factura.setdefault(factura_id, []).append(descripcion)
+        return conceptos_por_factura
+    
     def _format_conceptos(self, conceptos) -> str:
         """Formatea la lista de conceptos para mostrar en la tabla"""
         try:
             if not conceptos:
                 return ""
-            
-            conceptos_list = list(conceptos)
-            if not conceptos_list:
-                return ""
-            
-            # Extraer solo las descripciones de todos los conceptos
-            descripciones = []
-            for concepto in conceptos_list:
-                if concepto.descripcion:
-                    descripciones.append(concepto.descripcion.strip())
+            return self._format_descripciones(concepto.descripcion for concepto in conceptos)
+        except Exception:
+            return ""
+    
+    def _format_descripciones(self, descripciones: Iterable[Optional[str]]) -> str:
+        """Une las descripciones de los conceptos de una factura para mostrar en la tabla"""
+        try:
+            # Extraer solo las descripciones con contenido
+            descripciones = [descripcion.strip() for descripcion in descripciones if descripcion]
             
             if not descripciones:
                 return ""
@@ -0,0 +1,242 @@
+"""
+Índice columnar de las facturas cargadas en memoria.
+Se construye una vez al cargar las facturas: fechas como ordinales en un arreglo
+ordenado (rango por búsqueda binaria), textos ya en minúsculas y sin acentos,
+valores repetidos (tipo, proveedor, clase) como categorías y los estados
+cargada/pagada como máscaras booleanas. Cada búsqueda intersecta máscaras de
+NumPy y solo las filas que quedan se revisan con los filtros de texto libre.
+"""
+import unicodedata
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from .search_models import SearchFilters
+except ImportError:
+    from search_models import SearchFilters
+
+# Separa los campos del filtro de número de vale para que una coincidencia no cruce dos campos
+_SEPARADOR_CAMPOS = '\x1f'
+
+# Ordinal de las facturas sin fecha: antes de cualquier fecha real (los ordinales empiezan en 1)
+_SIN_FECHA = 0
+
+
+def fold_text(texto: str) -> str:
+    """
+    Texto en minúsculas y sin acentos, para comparar búsquedas
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        str: Texto normalizado ('Mecánica' -> 'mecanica')
+    """
+    if texto.isascii():
+        return texto.lower()
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def _date_to_ordinal(fecha_iso: str) -> Optional[int]:
+    """Ordinal de una fecha YYYY-MM-DD (None si no tiene ese formato)"""
+    try:
+        return date.fromisoformat(fecha_iso).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _contains_rows(valores: List[str], indices: np.ndarray, subcadena: str) -> np.ndarray:
+    """
+    Índices (de los dados) cuyo texto contiene la subcadena. El operador in de
+    Python sobre textos ya normalizados resultó más rápido que np.strings.find.
+    """
+    if indices.size == len(valores):
+        candidatos = valores
+    else:
+        candidatos = map(valores.__getitem__, indices.tolist())
+    mask = np.fromiter((subcadena in valor for valor in candidatos), dtype=bool, count=indices.size)
+    return indices[mask]
+
+
+class _Categorias:
+    """Columna con pocos valores distintos: se compara cada valor una vez y se expande"""
+
+    def __init__(self, valores: List[str]):
+        codigos_por_valor: Dict[str, int] = {}
+        self.codigos = np.fromiter((codigos_por_valor.setdefault(valor, len(codigos_por_valor))
+                                    for valor in valores), dtype=np.int32, count=len(valores))
+        self.unicos = list(codigos_por_valor)
+
+    def igual(self, valor: str) -> np.ndarray:
+        """Máscara de las filas iguales al valor"""
+        return np.array([unico == valor for unico in self.unicos], dtype=bool)[self.codigos]
+
+    def contiene(self, subcadena: str) -> np.ndarray:
+        """Máscara de las filas que contienen la subcadena"""
+        return np.array([subcadena in unico for unico in self.unicos], dtype=bool)[self.codigos]
+
+
+class SearchIndex:
+    """
+    Índice de solo lectura sobre la lista de facturas. Si la lista cambia hay que
+    construirlo de nuevo (SearchController lo hace en cada load_facturas).
+    """
+
+    def __init__(self, facturas: List[Dict[str, Any]], normalize_date: Callable[[str], str]):
+        """
+        Args:
+            facturas: Diccionarios de FacturaData.to_dict, en el orden de la tabla
+            normalize_date: Normaliza una fecha a YYYY-MM-DD (el mismo criterio que el filtro)
+        """
+        self.size = len(facturas)
+        self._normalize_date = normalize_date
+        # Las mismas facturas en un arreglo de objetos: tomar los resultados por posición es más rápido
+        self._facturas = np.empty(self.size, dtype=object)
+        self._facturas[:] = facturas
+
+        # Fechas: ordinales ordenados para buscar rangos; las que no son YYYY-MM-DD
+        # se comparan como texto, igual que el filtro fila por fila
+        ordinales = np.empty(self.size, dtype=np.int32)
+        self._fechas_irregulares: Dict[int, str] = {}
+        for i, factura in enumerate(facturas):
+            fecha = normalize_date(factura.get('fecha', ''))
+            ordinal = _date_to_ordinal(fecha) if fecha else _SIN_FECHA
+            if ordinal is None:
+                self._fechas_irregulares[i] = fecha
+                ordinal = _SIN_FECHA
+            ordinales[i] = ordinal
+        self._orden_fechas = np.argsort(ordinales, kind='stable')
+        self._fechas_ordenadas = ordinales[self._orden_fechas]
+
+        self._tipos = _Categorias([factura.get('tipo', '') for factura in facturas])
+        self._emisores = _Categorias([fold_text(factura.get('nombre_emisor', '')) for factura in facturas])
+        self._clases = _Categorias([fold_text(str(factura.get('clase', ''))) for factura in facturas])
+        self._cargada = np.array([bool(factura.get('cargada_bool', False)) for factura in facturas], dtype=bool)
+        self._pagada = np.array([bool(factura.get('pagada_bool', False)) for factura in facturas], dtype=bool)
+
+        self._folios = [
+            _SEPARADOR_CAMPOS.join((
+                str(factura.get('no_vale', '')),
+                str(factura.get('folio_interno', '')),
+                str(factura.get('serie_folio', '')),
+                str(factura.get('folio', '')),
+            ))
+            for factura in facturas
+        ]
+        self._texto = [
+            fold_text(' '.join([
+                str(factura.get("folio_interno", "")),
+                str(factura.get("serie_folio", "")),
+                str(factura.get("tipo", "")),
+                str(factura.get("nombre_emisor", "")),
+                str(factura.get("conceptos", "")),
+                str(factura.get("rfc_emisor", "")),
+                str(factura.get("rfc_receptor", ""))
+            ]))
+            for factura in facturas
+        ]
+
+    @staticmethod
+    def refines(filters: SearchFilters, base: SearchFilters) -> bool:
+        """
+        Indica si todo resultado de filters es también resultado de base, de modo
+        que filters se puede resolver revisando solo los resultados de base (p. ej.
+        al agregar una letra al texto de búsqueda)
+
+        Args:
+            filters: Filtros nuevos
+            base: Filtros de una búsqueda anterior
+
+        Returns:
+            bool: True si filters es igual o más restrictivo que base
+        """
+        if (filters.fecha_inicial or '') != (base.fecha_inicial or '') \
+                or (filters.fecha_final or '') != (base.fecha_final or '') \
+                or (filters.tipo_filtro or '') != (base.tipo_filtro or ''):
+            return False
+        if (base.solo_cargado and not filters.solo_cargado) or (base.solo_pagado and not filters.solo_pagado):
+            return False
+        # Filtros de subcadena: si el texto nuevo contiene al anterior, sus coincidencias también
+        for campo in ('proveedor_filtro', 'clase_filtro', 'texto_busqueda'):
+            if fold_text(getattr(base, campo) or '') not in fold_text(getattr(filters, campo) or ''):
+                return False
+        return (base.no_vale_filtro or '') in (filters.no_vale_filtro or '')
+
+    def filter(self, filters: SearchFilters, candidates: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Posiciones de las facturas que cumplen los filtros, en el orden original
+
+        Args:
+            filters: Filtros a aplicar
+            candidates: Posiciones ordenadas a las que se limita la búsqueda (los
+                resultados de una búsqueda que filters refina); None para todas
+
+        Returns:
+            np.ndarray: Índices de las facturas; None si algún filtro no se puede
+            resolver con el índice (p. ej. una fecha de filtro que no se reconoce)
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        if filters.fecha_inicial or filters.fecha_final:
+            fechas = self._date_range_mask(filters.fecha_inicial, filters.fecha_final)
+            if fechas is None:
+                return None
+            mask &= fechas
+
+        if filters.tipo_filtro:
+            tipo_codigo = filters.tipo_filtro.split(' - ')[0] if ' - ' in filters.tipo_filtro else filters.tipo_filtro
+            mask &= self._tipos.igual(tipo_codigo)
+
+        if filters.proveedor_filtro:
+            mask &= self._emisores.contiene(fold_text(filters.proveedor_filtro))
+
+        if filters.clase_filtro:
+            mask &= self._clases.contiene(fold_text(filters.clase_filtro))
+
+        if filters.solo_cargado:
+            mask &= self._cargada
+
+        if filters.solo_pagado:
+            mask &= self._pagada
+
+        # Los filtros de texto libre solo revisan las filas que quedan
+        indices = np.flatnonzero(mask) if candidates is None else candidates[mask[candidates]]
+        if filters.no_vale_filtro and indices.size:
+            indices = _contains_rows(self._folios, indices, filters.no_vale_filtro)
+        if filters.texto_busqueda and indices.size:
+            indices = _contains_rows(self._texto, indices, fold_text(filters.texto_busqueda))
+        return indices
+
+    def rows(self, indices: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Facturas en las posiciones dadas
+
+        Args:
+            indices: Posiciones devueltas por filter
+
+        Returns:
+            List[Dict[str, Any]]: Los mismos diccionarios de la lista original
+        """
+        return self._facturas[indices].tolist()
+
+    def _date_range_mask(self, fecha_inicial: Optional[str], fecha_final: Optional[str]) -> Optional[np.ndarray]:
+        """Máscara de las facturas dentro del rango de fechas (límites incluidos)"""
+        inicial_norm = self._normalize_date(fecha_inicial) if fecha_inicial else None
+        final_norm = self._normalize_date(fecha_final) if fecha_final else None
+        inicial = _date_to_ordinal(inicial_norm) if inicial_norm else None
+        final = _date_to_ordinal(final_norm) if final_norm else None
+        if (inicial_norm and inicial is None) or (final_norm and final is None):
+            return None
+
+        inicio = 0 if inicial is None else np.searchsorted(self._fechas_ordenadas, inicial, side='left')
+        fin = self.size if final is None else np.searchsorted(self._fechas_ordenadas, final, side='right')
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._orden_fechas[inicio:fin]] = True
+
+        # Fechas que no son YYYY-MM-DD: comparación de texto, como en el filtro fila por fila
+        for i, fecha in self._fechas_irregulares.items():
+            mask[i] = not ((inicial_norm and fecha < inicial_norm) or (final_norm and fecha > final_norm))
+        return mask
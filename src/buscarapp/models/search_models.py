@@ -2,7 +2,7 @@
 Modelos para el estado de búsqueda y filtros
 """
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 
 
@@ -48,23 +48,54 @@ class SearchState:
     proveedores_data: List[Dict[str, Any]] = field(default_factory=list)
     database_available: bool = False
     
+    # Búsqueda en el servidor: las facturas se filtran y paginan en la base de datos
+    server_side: bool = False
+    server_total_facturas: int = 0
+    server_match_count: int = 0
+    current_filters: Optional[SearchFilters] = None
+    next_cursor: Optional[Tuple[Any, int]] = None
+    
     def get_results_count(self) -> int:
         """Obtiene el número de resultados filtrados"""
+        if self.server_side:
+            return self.server_match_count
         return len(self.filtered_facturas)
     
     def get_total_count(self) -> int:
         """Obtiene el número total de facturas"""
+        if self.server_side:
+            return self.server_total_facturas
         return len(self.all_facturas)
     
+    def has_more_results(self) -> bool:
+        """Indica si quedan páginas de resultados por traer del servidor"""
+        return self.server_side and self.next_cursor is not None
+    
     def clear_results(self) -> None:
         """Limpia los resultados filtrados"""
         self.filtered_facturas.clear()
+        self.server_match_count = 0
+        self.current_filters = None
+        self.next_cursor = None
     
     def set_filtered_results(self, results: List[Dict[str, Any]]) -> None:
         """Establece los resultados filtrados"""
         self.filtered_facturas = results.copy()
 
 
+@dataclass
+class SearchPage:
+    """Página de resultados de una búsqueda en el servidor"""
+    facturas: List[Dict[str, Any]] = field(default_factory=list)
+    total_count: int = 0
+    next_cursor: Optional[Tuple[Any, int]] = None  # (fecha, folio_interno) de la última fila
+    
+    @property
+    def has_more(self) -> bool:
+        """Indica si hay una página siguiente"""
+        return self.next_cursor is not None
+
+
 @dataclass
 class FacturaData:
     """Modelo para datos de una factura"""
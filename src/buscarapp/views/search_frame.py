@@ -35,10 +35,19 @@ except ImportError:
 class SearchFrame:
     """Frame que contiene los controles de búsqueda - COPIA EXACTA DE LA ORIGINAL"""
     
-    def __init__(self, parent, on_search_callback: Callable, on_clear_callback: Callable):
+    # Espera tras la última tecla antes de la búsqueda en vivo
+    DEFAULT_LIVE_SEARCH_DELAY_MS = 250
+    
+    def __init__(self, parent, on_search_callback: Callable, on_clear_callback: Callable,
+                 on_live_search_callback: Optional[Callable] = None,
+                 live_search_delay_ms: int = DEFAULT_LIVE_SEARCH_DELAY_MS):
         self.parent = parent
         self.on_search_callback = on_search_callback
         self.on_clear_callback = on_clear_callback
+        # Búsqueda mientras se escribe en el campo "Buscar" (None para desactivarla)
+        self.on_live_search_callback = on_live_search_callback
+        self.live_search_delay_ms = live_search_delay_ms
+        self._live_search_job = None
         self.logger = logging.getLogger(__name__)
         
         # Variables de búsqueda - EXACTO COMO EN ORIGINAL
@@ -63,6 +72,7 @@ class SearchFrame:
         self.main_frame.pack(fill="x", padx=5, pady=5)
         
         self._create_widgets()
+        self.texto_busqueda_var.trace_add("write", self._on_texto_busqueda_changed)
     
     def _create_widgets(self):
         """Crea los controles de búsqueda - COPIA EXACTA DE buscar_app.py"""
@@ -240,6 +250,7 @@ class SearchFrame:
     
     def _on_search_clicked(self):
         """Maneja el click del botón buscar"""
+        self._cancel_live_search()
         filters = self.get_filters()
         self.on_search_callback(filters)
     
@@ -248,6 +259,24 @@ class SearchFrame:
         self.clear_filters()
         self.on_clear_callback()
     
+    def _on_texto_busqueda_changed(self, *args):
+        """Programa la búsqueda en vivo; cada tecla reinicia la espera (debounce)"""
+        if not self.on_live_search_callback:
+            return
+        self._cancel_live_search()
+        self._live_search_job = self.main_frame.after(self.live_search_delay_ms, self._run_live_search)
+    
+    def _run_live_search(self):
+        """Ejecuta la búsqueda en vivo con los filtros actuales"""
+        self._live_search_job = None
+        self.on_live_search_callback(self.get_filters())
+    
+    def _cancel_live_search(self):
+        """Cancela la búsqueda en vivo pendiente, si hay una"""
+        if self._live_search_job is not None:
+            self.main_frame.after_cancel(self._live_search_job)
+            self._live_search_job = None
+    
     def get_filters(self) -> Dict[str, Any]:
         """Obtiene los filtros actuales"""
         # Obtener valor del tipo
@@ -300,6 +329,7 @@ class SearchFrame:
         self.solo_cargado_var.set(False)
         self.solo_pagado_var.set(False)
         self.texto_busqueda_var.set("")
+        self._cancel_live_search()  # Limpiar no es una búsqueda
     
     def set_proveedores_data(self, proveedores: list):
         """Actualiza los datos de proveedores"""
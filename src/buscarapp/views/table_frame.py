@@ -10,17 +10,54 @@ import logging
 class TableFrame:
     """Frame que contiene la tabla de resultados"""
     
+    # A partir de cuántas filas la tabla se virtualiza
+    VIRTUAL_THRESHOLD = 1000
+    # Filas creadas arriba y abajo de las visibles en la tabla virtualizada
+    VIRTUAL_MARGIN = 20
+    # Alto de fila si el tema no lo define
+    DEFAULT_ROW_HEIGHT = 20
+    # Bits de event.state de Tk para Shift y Control (clic o tecla que extiende la selección)
+    SHIFT_MASK = 0x0001
+    CONTROL_MASK = 0x0004
+    
     def __init__(self, parent, on_selection_callback: Optional[Callable] = None,
-                 on_double_click_callback: Optional[Callable] = None):
+                 on_double_click_callback: Optional[Callable] = None,
+                 on_end_reached_callback: Optional[Callable] = None,
+                 virtual_threshold: Optional[int] = VIRTUAL_THRESHOLD):
+        """
+        Args:
+            parent: Widget contenedor
+            on_selection_callback: Se llama con la fila seleccionada (o None)
+            on_double_click_callback: Se llama con la fila del doble click
+            on_end_reached_callback: Se llama al llegar al final de la tabla
+            virtual_threshold: Filas a partir de las cuales solo se crean las visibles
+                más un margen y se reciclan al desplazarse (None para no virtualizar)
+        """
         self.parent = parent
         self.on_selection_callback = on_selection_callback
         self.on_double_click_callback = on_double_click_callback
+        # Se llama cuando el usuario llega al final de la tabla (para traer más filas)
+        self.on_end_reached_callback = on_end_reached_callback
+        self._end_reached_pending = False
         self.logger = logging.getLogger(__name__)
         
         # Crear frame principal (FRAME NORMAL, NO LABELFRAME)
         self.main_frame = ttk.Frame(parent)
         self.main_frame.pack(fill="both", expand=True, padx=5, pady=5)
         
+        # Tabla virtualizada: self._pool son los items de la tabla, que muestran las
+        # filas de _current_data a partir de _window_start; la selección se guarda
+        # por índice de fila porque los items se reutilizan para otras filas
+        self.virtual_threshold = virtual_threshold
+        self._virtual = False
+        self._pool: List[str] = []
+        self._window_start = 0
+        self._selected_indices: List[int] = []
+        self._recenter_pending = False
+        # Si el último clic o tecla llevaba Shift/Control: la selección se extiende
+        # y se conservan las filas seleccionadas fuera de la ventana
+        self._extend_selection = False
+        
         self._create_widgets()
         self._current_data = []
         
@@ -91,10 +128,11 @@ class TableFrame:
         self.tree.column("original_index", width=0, minwidth=0, stretch=False)
         
         # Scrollbars (usar ttkbootstrap para mantener el estilo)
-        v_scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self.tree.yview)
+        v_scrollbar = ttk.Scrollbar(table_container, orient="vertical", command=self._on_scrollbar)
         h_scrollbar = ttk.Scrollbar(table_container, orient="horizontal", command=self.tree.xview)
+        self.v_scrollbar = v_scrollbar
         
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(yscrollcommand=self._on_yscroll, xscrollcommand=h_scrollbar.set)
         
         # Grid layout para tabla y scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
@@ -108,6 +146,9 @@ class TableFrame:
         # Configurar eventos
         self.tree.bind("<<TreeviewSelect>>", self._on_selection_changed)
         self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<Configure>", self._on_tree_resized)
+        self.tree.bind("<ButtonPress-1>", self._on_selection_input, add="+")
+        self.tree.bind("<KeyPress>", self._on_selection_input, add="+")
         
         # Configurar tags sin colores especiales (solo para uso interno)
         self.tree.tag_configure("even", background="")
@@ -157,53 +198,278 @@ class TableFrame:
             
             self._current_data = data.copy()
             
-            # Insertar datos
-            for i, row in enumerate(data):
-                # Preparar valores para las columnas (incluyendo índice original)
-                values = []
-                for col in self.columns:
-                    value = row.get(col, "")
-                    
-                    # Formatear valores especiales
-                    if col == "fecha":
-                        value = self._format_date(str(value))
-                    elif col == "total" and isinstance(value, (int, float)):
-                        value = f"${value:,.2f}"
-                    elif col in ["cargada", "pagada"]:
-                        value = "✓" if row.get(f"{col}_bool", False) else ""
-                    
-                    values.append(str(value))
-                
-                # Agregar índice original al final
-                values.append(str(i))
-                
-                # Determinar tag para colores
-                tag = "even" if i % 2 == 0 else "odd"
-                
-                # Tags especiales para estados
-                cargada = row.get("cargada_bool", False)
-                pagada = row.get("pagada_bool", False)
-                
-                if cargada and pagada:
-                    tag = "cargada_pagada"
-                elif cargada:
-                    tag = "cargada"
-                elif pagada:
-                    tag = "pagada"
-                
-                # Insertar fila
-                item_id = self.tree.insert("", "end", values=values, tags=(tag,))
+            # Muchas filas: solo se crean las visibles (no bloquea la interfaz)
+            if self._should_virtualize(len(data)):
+                self._virtual = True
+                self._render_window(0)
+            else:
+                for i, row in enumerate(data):
+                    self._insert_row(i, row)
             
             self.logger.info(f"Tabla cargada con {len(data)} registros")
             
         except Exception as e:
             self.logger.error(f"Error cargando datos en tabla: {e}")
     
+    def append_data(self, data: List[Dict[str, Any]]):
+        """
+        Agrega filas al final de la tabla sin recargar las existentes
+        (p. ej. la siguiente página de una búsqueda en el servidor)
+        
+        Args:
+            data: Lista de diccionarios con los datos
+        """
+        try:
+            inicio = len(self._current_data)
+            self._current_data.extend(data)
+            if self._virtual:
+                self._scroll_to(self._virtual_top())
+                self._on_yscroll(*self.tree.yview())  # La barra refleja el nuevo total
+            elif self._should_virtualize(len(self._current_data)):
+                self._switch_to_virtual()
+            else:
+                for i, row in enumerate(data, start=inicio):
+                    self._insert_row(i, row)
+            
+        except Exception as e:
+            self.logger.error(f"Error agregando datos a la tabla: {e}")
+    
+    def _insert_row(self, i: int, row: Dict[str, Any]):
+        """Inserta una fila con su índice original al final de la tabla"""
+        values, tag = self._row_values(i, row)
+        self.tree.insert("", "end", values=values, tags=(tag,))
+    
+    def _row_values(self, i: int, row: Dict[str, Any]):
+        """
+        Valores y tag de una fila de la tabla
+        
+        Args:
+            i: Índice original de la fila en _current_data
+            row: Datos de la fila
+            
+        Returns:
+            tuple: (values, tag)
+        """
+        # Preparar valores para las columnas (incluyendo índice original)
+        values = []
+        for col in self.columns:
+            value = row.get(col, "")
+            
+            # Formatear valores especiales
+            if col == "fecha":
+                value = self._format_date(str(value))
+            elif col == "total" and isinstance(value, (int, float)):
+                value = f"${value:,.2f}"
+            elif col in ["cargada", "pagada"]:
+                value = "✓" if row.get(f"{col}_bool", False) else ""
+            
+            values.append(str(value))
+        
+        # Agregar índice original al final
+        values.append(str(i))
+        
+        # Determinar tag para colores
+        tag = "even" if i % 2 == 0 else "odd"
+        
+        # Tags especiales para estados
+        cargada = row.get("cargada_bool", False)
+        pagada = row.get("pagada_bool", False)
+        
+        if cargada and pagada:
+            tag = "cargada_pagada"
+        elif cargada:
+            tag = "cargada"
+        elif pagada:
+            tag = "pagada"
+        
+        return values, tag
+    
+    def _on_yscroll(self, first, last):
+        """Actualiza la barra de desplazamiento y avisa cuando se llega al final"""
+        if self._virtual and self._pool:
+            # La tabla solo tiene las filas de la ventana: la barra refleja todas las filas
+            pool_size = len(self._pool)
+            total = len(self._current_data)
+            rows_above = float(first) * pool_size
+            rows_below = (1.0 - float(last)) * pool_size
+            top = self._window_start + rows_above
+            bottom = self._window_start + pool_size - rows_below
+            self.v_scrollbar.set(top / total, bottom / total)
+            last = bottom / total
+            
+            # Cerca del borde de las filas creadas: recentrar la ventana
+            near_top = self._window_start > 0 and rows_above < self.VIRTUAL_MARGIN / 2
+            near_bottom = self._window_start + pool_size < total and rows_below < self.VIRTUAL_MARGIN / 2
+            if (near_top or near_bottom) and not self._recenter_pending:
+                self._recenter_pending = True
+                self.tree.after_idle(self._recenter_window)
+        else:
+            self.v_scrollbar.set(first, last)
+        
+        if (self.on_end_reached_callback and self._current_data and
+                float(last) >= 1.0 and not self._end_reached_pending):
+            # Fuera del callback de scroll, para no insertar filas mientras Tk redibuja
+            self._end_reached_pending = True
+            self.tree.after_idle(self._notify_end_reached)
+    
+    def _on_scrollbar(self, *args):
+        """Comando de la barra vertical: en la tabla virtualizada se traduce a filas de datos"""
+        if not self._virtual:
+            self.tree.yview(*args)
+            return
+        
+        if args[0] == "moveto":
+            top = int(float(args[1]) * len(self._current_data))
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            top = self._virtual_top() + int(args[1]) * step
+        else:
+            return
+        self._scroll_to(top)
+    
+    def _notify_end_reached(self):
+        """Llama al callback de fin de tabla"""
+        try:
+            self.on_end_reached_callback()
+        except Exception as e:
+            self.logger.error(f"Error cargando más filas: {e}")
+        finally:
+            self._end_reached_pending = False
+    
+    def _should_virtualize(self, row_count: int) -> bool:
+        """Indica si una tabla con row_count filas se muestra virtualizada"""
+        return self.virtual_threshold is not None and row_count > self.virtual_threshold
+    
+    def _visible_rows(self) -> int:
+        """Filas que caben en la tabla (al menos las de la opción height)"""
+        rows = int(self.tree.cget("height"))
+        alto = self.tree.winfo_height()
+        if alto > 1:
+            try:
+                style = self.tree.cget("style") or "Treeview"
+                row_height = int(self.tree.tk.call("ttk::style", "lookup", style, "-rowheight")
+                                 or self.DEFAULT_ROW_HEIGHT)
+            except Exception:
+                row_height = self.DEFAULT_ROW_HEIGHT
+            rows = max(rows, alto // max(row_height, 1))
+        return rows
+    
+    def _virtual_top(self) -> int:
+        """Índice de la primera fila visible en la tabla virtualizada"""
+        if not self._pool:
+            return 0
+        return self._window_start + round(float(self.tree.yview()[0]) * len(self._pool))
+    
+    def _scroll_to(self, top: int):
+        """
+        Muestra la tabla virtualizada a partir de la fila top; solo reescribe los
+        items si esa fila queda fuera de los ya creados
+        
+        Args:
+            top: Índice de la fila que debe quedar arriba
+        """
+        total = len(self._current_data)
+        visible = self._visible_rows()
+        top = max(0, min(top, total - visible))
+        pool_size = min(total, visible + 2 * self.VIRTUAL_MARGIN)
+        if (len(self._pool) != pool_size or top < self._window_start or
+                top + visible > self._window_start + len(self._pool)):
+            self._render_window(top - self.VIRTUAL_MARGIN)
+        if self._pool:
+            self.tree.yview_moveto((top - self._window_start) / len(self._pool))
+    
+    def _recenter_window(self):
+        """Vuelve a centrar la ventana en la posición actual (al acercarse a su borde)"""
+        self._recenter_pending = False
+        if not self._virtual or not self._pool:
+            return
+        top = self._virtual_top()
+        self._render_window(top - self.VIRTUAL_MARGIN)
+        self.tree.yview_moveto((top - self._window_start) / len(self._pool))
+    
+    def _render_window(self, start: int):
+        """
+        Reescribe los items de la tabla virtualizada con las filas a partir de start,
+        reutilizando los existentes, y restaura la selección y el foco de esas filas
+        
+        Args:
+            start: Índice de la primera fila de la ventana
+        """
+        total = len(self._current_data)
+        pool_size = min(total, self._visible_rows() + 2 * self.VIRTUAL_MARGIN)
+        start = max(0, min(start, total - pool_size))
+        
+        selected = self._selected_row_indices()
+        focus_item = self.tree.focus()
+        focus_index = self._item_index(focus_item) if focus_item else None
+        
+        # Ajustar el número de items (p. ej. si la tabla cambió de alto)
+        while len(self._pool) < pool_size:
+            self._pool.append(self.tree.insert("", "end"))
+        if len(self._pool) > pool_size:
+            self.tree.delete(*self._pool[pool_size:])
+            del self._pool[pool_size:]
+        
+        self._window_start = start
+        for offset, item in enumerate(self._pool):
+            values, tag = self._row_values(start + offset, self._current_data[start + offset])
+            self.tree.item(item, values=values, tags=(tag,))
+        
+        # Los items ahora muestran otras filas: la selección sigue a las filas
+        self._selected_indices = selected
+        window_end = start + pool_size
+        items = [self._pool[i - start] for i in selected if start <= i < window_end]
+        if set(items) != set(self.tree.selection()):
+            self.tree.selection_set(items)
+        if focus_index is not None and start <= focus_index < window_end:
+            self.tree.focus(self._pool[focus_index - start])
+    
+    def _switch_to_virtual(self):
+        """Pasa a la tabla virtualizada conservando la posición y la selección"""
+        top = round(float(self.tree.yview()[0]) * len(self.tree.get_children()))
+        self._selected_indices = self._selected_row_indices()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._virtual = True
+        self._pool = []
+        self._window_start = 0
+        self._scroll_to(top)
+    
+    def _on_tree_resized(self, event):
+        """Ajusta el número de items de la tabla virtualizada al nuevo alto"""
+        if self._virtual and self._pool:
+            self._scroll_to(self._virtual_top())
+    
+    def _item_index(self, item: str) -> Optional[int]:
+        """Índice original (en _current_data) de la fila que muestra un item"""
+        try:
+            return int(self.tree.set(item, "original_index"))
+        except Exception:
+            return None
+    
+    def _selected_row_indices(self) -> List[int]:
+        """
+        Índices originales de las filas seleccionadas. En la tabla virtualizada
+        incluye las seleccionadas que quedaron fuera de la ventana
+        """
+        selected = [index for index in map(self._item_index, self.tree.selection()) if index is not None]
+        if not self._virtual:
+            return selected
+        window_end = self._window_start + len(self._pool)
+        outside = [i for i in self._selected_indices if not self._window_start <= i < window_end]
+        return sorted(outside + selected)
+    
     def clear_table(self):
         """Limpia todos los datos de la tabla"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
         self._current_data = []
+        self._virtual = False
+        self._pool = []
+        self._window_start = 0
+        self._selected_indices = []
     
     def _sort_by_column(self, column: str):
         """
@@ -277,6 +543,11 @@ class TableFrame:
         Returns:
             Dict con los datos de la fila seleccionada o None
         """
+        if self._virtual:
+            # Los items se reutilizan: la selección se lee por índice de fila
+            selected = self._selected_row_indices()
+            return self._current_data[selected[0]] if selected else None
+        
         selection = self.tree.selection()
         if not selection:
             return None
@@ -308,6 +579,9 @@ class TableFrame:
         Returns:
             Lista de Dict con los datos de las filas seleccionadas
         """
+        if self._virtual:
+            return [self._current_data[i] for i in self._selected_row_indices()]
+        
         selection = self.tree.selection()
         if not selection:
             return []
@@ -341,6 +615,10 @@ class TableFrame:
         Returns:
             Índice de la fila seleccionada o None
         """
+        if self._virtual:
+            selected = self._selected_row_indices()
+            return selected[0] if selected else None
+        
         selection = self.tree.selection()
         if not selection:
             return None
@@ -359,6 +637,18 @@ class TableFrame:
             index: Índice de la fila a seleccionar
         """
         try:
+            if self._virtual:
+                if not 0 <= index < len(self._current_data):
+                    return
+                # Sin la selección anterior, para que no se restaure al mover la ventana
+                self._selected_indices = []
+                self.tree.selection_remove(self.tree.selection())
+                self._scroll_to(index - self._visible_rows() // 2)
+                item = self._pool[index - self._window_start]
+                self.tree.selection_set(item)
+                self.tree.focus(item)
+                return
+            
             items = self.tree.get_children()
             if 0 <= index < len(items):
                 item = items[index]
@@ -368,8 +658,27 @@ class TableFrame:
         except Exception as e:
             self.logger.error(f"Error seleccionando fila {index}: {e}")
     
+    def _on_selection_input(self, event):
+        """Recuerda si el clic o la tecla que cambiará la selección la extiende (Shift/Control)"""
+        self._extend_selection = bool(getattr(event, "state", 0) & (self.SHIFT_MASK | self.CONTROL_MASK))
+    
     def _on_selection_changed(self, event):
         """Maneja el evento de cambio de selección"""
+        if self._virtual:
+            window_end = self._window_start + len(self._pool)
+            in_window = sorted(index for index in map(self._item_index, self.tree.selection())
+                               if index is not None)
+            if in_window == [i for i in self._selected_indices if self._window_start <= i < window_end]:
+                return  # Selección restaurada al reciclar items, no la cambió el usuario
+            if self._extend_selection:
+                # Con Shift/Control la tabla solo cambia las filas de la ventana: las
+                # seleccionadas fuera de ella se conservan
+                self._selected_indices = self._selected_row_indices()
+            else:
+                # Un clic o tecla sin modificadores reemplaza la selección
+                self._selected_indices = in_window
+            self._extend_selection = False
+        
         selected_data = self.get_selected_data()
         
         if selected_data:
@@ -410,34 +719,16 @@ class TableFrame:
                         row_data["pagada_bool"] = pagada
                         row_data["pagada"] = "✓" if pagada else ""
                     
-                    # Actualizar vista
-                    items = self.tree.get_children()
-                    if i < len(items):
-                        item = items[i]
-                        
-                        # Actualizar valores
-                        values = list(self.tree.item(item, "values"))
-                        if cargada is not None and len(values) > 8:
-                            values[8] = "✓" if cargada else ""
-                        if pagada is not None and len(values) > 9:
-                            values[9] = "✓" if pagada else ""
-                        
-                        self.tree.item(item, values=values)
-                        
-                        # Actualizar tag para colores
-                        new_cargada = row_data.get("cargada_bool", False)
-                        new_pagada = row_data.get("pagada_bool", False)
-                        
-                        if new_cargada and new_pagada:
-                            tag = "cargada_pagada"
-                        elif new_cargada:
-                            tag = "cargada"
-                        elif new_pagada:
-                            tag = "pagada"
-                        else:
-                            tag = "even" if i % 2 == 0 else "odd"
-                        
-                        self.tree.item(item, tags=(tag,))
+                    # Actualizar vista (en la tabla virtualizada, solo si la fila está en la ventana)
+                    if self._virtual:
+                        offset = i - self._window_start
+                        item = self._pool[offset] if 0 <= offset < len(self._pool) else None
+                    else:
+                        items = self.tree.get_children()
+                        item = items[i] if i < len(items) else None
+                    if item is not None:
+                        values, tag = self._row_values(i, row_data)
+                        self.tree.item(item, values=values, tags=(tag,))
                     
                     break
                     
@@ -0,0 +1,250 @@
+"""
+Pruebas de la tabla virtualizada de TableFrame con un Treeview simulado
+(no necesitan pantalla ni ttkbootstrap)
+
+Ejecutar con: python -m unittest discover tests
+"""
+import importlib.util
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+TABLE_FRAME = Path(__file__).resolve().parents[1] / "src" / "buscarapp" / "views" / "table_frame.py"
+
+
+class _Widget:
+    """Widget de ttkbootstrap que no hace nada"""
+
+    def __init__(self, *args, **kwargs):
+        self.last = None
+
+    def pack(self, *args, **kwargs):
+        pass
+
+    def grid(self, *args, **kwargs):
+        pass
+
+    def grid_rowconfigure(self, *args, **kwargs):
+        pass
+
+    def grid_columnconfigure(self, *args, **kwargs):
+        pass
+
+    def set(self, *args):
+        self.last = args
+
+
+class _Treeview(_Widget):
+    """Treeview en memoria: items, selección, foco y desplazamiento por filas"""
+
+    def __init__(self, *args, height=7, **kwargs):
+        super().__init__()
+        self.items = {}
+        self.order = []
+        self.selected = []
+        self._focus = ""
+        self.top = 0
+        self.height = height
+        self.count = 0
+        self.yscrollcommand = None
+        self.idle = []
+        self.tk = types.SimpleNamespace(call=lambda *args: 20)
+
+    def heading(self, *args, **kwargs):
+        pass
+
+    def column(self, *args, **kwargs):
+        pass
+
+    def configure(self, **kwargs):
+        self.yscrollcommand = kwargs.get("yscrollcommand", self.yscrollcommand)
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def tag_configure(self, *args, **kwargs):
+        pass
+
+    def cget(self, option):
+        return self.height if option == "height" else ""
+
+    def winfo_height(self):
+        return 1
+
+    def after_idle(self, func):
+        self.idle.append(func)
+
+    def run_idle(self):
+        while self.idle:
+            self.idle.pop(0)()
+
+    def insert(self, parent, index, values=(), tags=()):
+        self.count += 1
+        iid = f"I{self.count}"
+        self.items[iid] = {"values": list(values), "tags": tags}
+        self.order.append(iid)
+        return iid
+
+    def item(self, iid, option=None, **kwargs):
+        if option:
+            return self.items[iid][option]
+        self.items[iid].update(kwargs)
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+            self.order.remove(iid)
+        self.selected = [iid for iid in self.selected if iid in self.items]
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def selection(self):
+        return tuple(iid for iid in self.order if iid in self.selected)
+
+    def selection_set(self, items):
+        self.selected = [items] if isinstance(items, str) else list(items)
+
+    def selection_add(self, items):
+        self.selected += [items] if isinstance(items, str) else list(items)
+
+    def selection_remove(self, items):
+        self.selected = [iid for iid in self.selected if iid not in items]
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self._focus
+        self._focus = iid
+
+    def set(self, iid, column):
+        # La última columna es original_index
+        return self.items[iid]["values"][-1]
+
+    def yview(self, *args):
+        total = len(self.order) or 1
+        return self.top / total, min(1.0, (self.top + self.height) / total)
+
+    def yview_moveto(self, fraction):
+        total = len(self.order)
+        self.top = max(0, min(int(fraction * total + 0.5), max(0, total - self.height)))
+        self.yscrollcommand(*self.yview())
+
+    def see(self, iid):
+        pass
+
+    def xview(self, *args):
+        pass
+
+
+def _cargar_table_frame():
+    """Importa table_frame.py con el ttkbootstrap simulado"""
+    ttk = types.ModuleType("ttkbootstrap")
+    ttk.Frame = ttk.Scrollbar = _Widget
+    ttk.Treeview = _Treeview
+    constants = types.ModuleType("ttkbootstrap.constants")
+    ttk.constants = constants
+    with mock.patch.dict(sys.modules, {"ttkbootstrap": ttk, "ttkbootstrap.constants": constants}):
+        spec = importlib.util.spec_from_file_location("table_frame_bajo_prueba", TABLE_FRAME)
+        modulo = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(modulo)
+    return modulo.TableFrame
+
+
+TableFrame = _cargar_table_frame()
+
+
+def _filas(inicio, fin):
+    return [{"folio_interno": str(i), "total": float(i), "fecha": "2024-01-01"} for i in range(inicio, fin)]
+
+
+class TestTablaVirtualizada(unittest.TestCase):
+
+    def setUp(self):
+        self.seleccionadas = []
+        self.tabla = TableFrame(None, on_selection_callback=self.seleccionadas.append)
+        self.tree = self.tabla.tree
+        self.tabla.load_data(_filas(0, 5000))
+        self.assertTrue(self.tabla._virtual)
+
+    def _item(self, index):
+        return self.tabla._pool[index - self.tabla._window_start]
+
+    def _clic(self, index, state=0):
+        """Simula el clic de Tk sobre la fila index (state: bits de Shift/Control)"""
+        self.tabla._on_selection_input(types.SimpleNamespace(state=state))
+        if state & TableFrame.CONTROL_MASK:
+            self.tree.selection_add(self._item(index))
+        else:
+            self.tree.selection_set(self._item(index))
+        self.tabla._on_selection_changed(None)
+
+    def _seleccion_visible(self):
+        return sorted(int(self.tree.set(iid, "original_index")) for iid in self.tree.selection())
+
+    def test_control_clic_conserva_seleccion_fuera_de_la_ventana(self):
+        self._clic(3)
+        self.tabla._on_scrollbar("moveto", "0.5")
+        self.assertFalse(self.tabla._window_start <= 3 < self.tabla._window_start + len(self.tabla._pool))
+
+        self._clic(2502, state=TableFrame.CONTROL_MASK)
+        self.assertEqual(self.tabla._selected_row_indices(), [3, 2502])
+        self.assertEqual([fila["folio_interno"] for fila in self.tabla.get_selected_data_multiple()], ["3", "2502"])
+
+        # Al volver, la fila seleccionada antes se muestra seleccionada
+        self.tabla._on_scrollbar("moveto", "0")
+        self.assertEqual(self._seleccion_visible(), [3])
+        self.assertEqual(self.tabla._selected_row_indices(), [3, 2502])
+
+    def test_clic_sin_modificadores_reemplaza_la_seleccion(self):
+        self._clic(3)
+        self.tabla._on_scrollbar("moveto", "0.5")
+        self._clic(2502, state=TableFrame.CONTROL_MASK)
+
+        self._clic(2504)
+        self.assertEqual(self.tabla._selected_row_indices(), [2504])
+        self.assertEqual(self.seleccionadas[-1]["folio_interno"], "2504")
+
+    def test_recentrar_conserva_la_seleccion(self):
+        self._clic(10)
+        self._clic(12, state=TableFrame.CONTROL_MASK)
+        inicio = self.tabla._window_start
+
+        # Desplazamiento nativo hasta el borde de los items creados: se recentra en idle
+        self.tree.yview_moveto(1.0)
+        self.assertTrue(self.tabla._recenter_pending)
+        self.tree.run_idle()
+        self.assertGreater(self.tabla._window_start, inicio)
+
+        eventos = len(self.seleccionadas)
+        self.tabla._on_selection_changed(None)  # Evento por la selección restaurada
+        self.assertEqual(len(self.seleccionadas), eventos)
+        self.assertEqual(self.tabla._selected_row_indices(), [10, 12])
+
+    def test_agregar_filas_conserva_seleccion_y_posicion(self):
+        self.tabla._on_scrollbar("moveto", "0.5")
+        self._clic(2503)
+        arriba = self.tabla._virtual_top()
+
+        self.tabla.append_data(_filas(5000, 6000))
+        self.assertEqual(len(self.tabla.get_all_data()), 6000)
+        self.assertEqual(self.tabla._virtual_top(), arriba)
+        self.assertEqual(self.tabla._selected_row_indices(), [2503])
+        # La barra refleja el nuevo total
+        primera, _ = self.tabla.v_scrollbar.last
+        self.assertAlmostEqual(primera, arriba / 6000)
+
+    def test_agregar_filas_pasa_a_virtual_con_la_seleccion(self):
+        tabla = TableFrame(None)
+        tabla.load_data(_filas(0, 900))
+        self.assertFalse(tabla._virtual)
+        tabla.tree.selection_set(tabla.tree.get_children()[5])
+
+        tabla.append_data(_filas(900, 1500))
+        self.assertTrue(tabla._virtual)
+        self.assertEqual(tabla.get_selected_index(), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()